@@ -0,0 +1,60 @@
+"""
+📁 Pastas de dados da aplicação
+- Os dados vivem junto da pacientes.db (pasta de trabalho da aplicação),
+  ou em BIODESK_DADOS se a variável de ambiente estiver definida
+- As caches derivadas de documentos de pacientes ficam em <dados>/cache,
+  só acessíveis ao utilizador, e nunca na pasta temporária partilhada
+"""
+
+import os
+import time
+from typing import Iterable, Optional
+
+PASTA_CACHE = "cache"
+
+
+def pasta_dados() -> str:
+    """Pasta de dados da aplicação (caminho absoluto)"""
+    return os.path.abspath(os.environ.get("BIODESK_DADOS") or os.getcwd())
+
+
+def pasta_cache(nome: str) -> str:
+    """Subpasta de cache privada (0700), criada se não existir"""
+    pasta = os.path.join(pasta_dados(), PASTA_CACHE, nome)
+    os.makedirs(pasta, mode=0o700, exist_ok=True)
+    try:
+        os.chmod(pasta, 0o700)  # makedirs não altera pastas já existentes
+    except OSError:
+        pass
+    return pasta
+
+
+def expirar_ficheiros(pasta: str, idade_maxima_s: float, sufixos: Optional[Iterable[str]] = None,
+                      agora: Optional[float] = None) -> int:
+    """
+    Remove os ficheiros de `pasta` (recursivamente) não modificados há mais
+    de idade_maxima_s segundos, e as subpastas que ficarem vazias
+
+    Returns:
+        número de ficheiros removidos
+    """
+    agora = time.time() if agora is None else agora
+    sufixos = tuple(sufixos) if sufixos else None
+    removidos = 0
+    for raiz, pastas, ficheiros in os.walk(pasta, topdown=False):
+        for nome in ficheiros:
+            if sufixos and not nome.endswith(sufixos):
+                continue
+            caminho = os.path.join(raiz, nome)
+            try:
+                if agora - os.stat(caminho).st_mtime > idade_maxima_s:
+                    os.remove(caminho)
+                    removidos += 1
+            except OSError:
+                pass
+        if raiz != pasta:
+            try:
+                os.rmdir(raiz)  # só funciona se estiver vazia
+            except OSError:
+                pass
+    return removidos
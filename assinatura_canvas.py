@@ -1,26 +1,24 @@
-import sys
-import os
-from PyQt6.QtWidgets import (
-from PyQt6.QtCore import Qt, QPointF, QRectF, QTimer
-from PyQt6.QtGui import (
-import base64
-from io import BytesIO
-from biodesk_dialogs import BiodeskMessageBox
-    from PyQt6.QtCore import pyqtSignal
-    from PyQt6.QtWidgets import QApplication
-from biodesk_ui_kit import BiodeskUIKit
 """
 Canvas de Assinatura para Declaração de Saúde
 Permite captura de assinatura digital para documentos
 """
 
+import sys
+import os
+import base64
+from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
     QLabel, QFrame, QGraphicsView, QGraphicsScene,
-    QGraphicsPixmapItem
+    QGraphicsPixmapItem, QApplication
 )
+from PyQt6.QtCore import Qt, QPointF, QRectF, QTimer, pyqtSignal
+from PyQt6.QtGui import (
     QPainter, QPen, QPixmap, QColor, QFont,
     QBrush, QPainterPath
 )
+from biodesk_dialogs import BiodeskMessageBox
+from biodesk_ui_kit import BiodeskUIKit
+from signature_codec import codificar_assinatura, rasterizar_base64
 
 
 class AssinaturaCanvas(QDialog):
@@ -155,7 +153,7 @@ class AssinaturaCanvas(QDialog):
         self.signature_widget.clear_signature()
         
     def get_signature_data(self):
-        """Retorna dados da assinatura como bytes"""
+        """Retorna dados da assinatura como bytes (formato vetorial)"""
         return self.signature_widget.get_signature_bytes()
 
 
@@ -177,6 +175,7 @@ class SignatureWidget(QFrame):
         self.last_point = QPointF()
         self.paths = []
         self.current_path = QPainterPath()
+        self.tracos = []  # pontos de cada traço, para a codificação vetorial
         self.has_signature = False
         
         # Configurações de desenho
@@ -202,12 +201,14 @@ class SignatureWidget(QFrame):
             self.last_point = event.position()
             self.current_path = QPainterPath()
             self.current_path.moveTo(self.last_point)
+            self.tracos.append([(self.last_point.x(), self.last_point.y())])
             
     def mouseMoveEvent(self, event):
         """Continua desenho da assinatura"""
         if self.drawing and event.buttons() & Qt.MouseButton.LeftButton:
             current_point = event.position()
             self.current_path.lineTo(current_point)
+            self.tracos[-1].append((current_point.x(), current_point.y()))
             self.last_point = current_point
             self.update()
             
@@ -219,6 +220,8 @@ class SignatureWidget(QFrame):
                 self.paths.append(self.current_path)
                 self.has_signature = True
                 self.signature_changed.emit(True)
+            else:
+                self.tracos.pop()
                 
     def paintEvent(self, event):
         """Desenha a assinatura"""
@@ -258,59 +261,27 @@ class SignatureWidget(QFrame):
         """Limpa a assinatura"""
         self.paths.clear()
         self.current_path = QPainterPath()
+        self.tracos.clear()
         self.has_signature = False
         self.signature_changed.emit(False)
         self.update()
         
-    def get_signature_bytes(self):
-        """Retorna assinatura como bytes (PNG)"""
+    def get_signature_vector(self):
+        """Retorna assinatura no formato vetorial compacto (signature_codec)"""
         if not self.has_signature:
             return None
-            
-        # Criar pixmap com a assinatura
-        pixmap = QPixmap(self.canvas_width, self.canvas_height)
-        pixmap.fill(Qt.GlobalColor.white)
-        
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # Desenhar assinatura
-        pen = QPen(self.pen_color, self.pen_width, Qt.PenStyle.SolidLine,
-                  Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
-        painter.setPen(pen)
-        
-        for path in self.paths:
-            painter.drawPath(path)
-            
-        painter.end()
+        return codificar_assinatura(self.tracos, self.canvas_width, self.canvas_height)
         
-        # Converter para bytes
-        byte_array = BytesIO()
-        pixmap.save(byte_array, "PNG")
-        byte_data = byte_array.getvalue()
-        byte_array.close()
-        
-        return byte_data
+    def get_signature_bytes(self):
+        """
+        Retorna assinatura como bytes para as colunas BLOB: a codificação
+        vetorial, não um PNG (rasterizar com signature_codec ao mostrar)
+        """
+        return self.get_signature_vector()
         
-    def get_signature_base64(self):
+    def get_signature_base64(self, dpi=None):
         """Retorna assinatura como string base64"""
-        byte_data = self.get_signature_bytes()
-        if byte_data:
-            return base64.b64encode(byte_data).decode('utf-8')
-        return None
-
-
-# Exemplo de uso
-if __name__ == "__main__":
-    
-    app = QApplication(sys.argv)
-    
-    canvas = AssinaturaCanvas()
-    if canvas.exec() == canvas.DialogCode.Accepted:
-        signature_data = canvas.get_signature_data()
-        if signature_data:
-            print(f"Assinatura capturada: {len(signature_data)} bytes")
-        else:
-            print("Nenhuma assinatura fornecida")
-    
-    sys.exit()
+        vector = self.get_signature_vector()
+        if vector is None:
+            return None
+        return rasterizar_base64(vector, dpi=dpi, espessura=self.pen_width)
@@ -0,0 +1,167 @@
+"""
+Benchmark - Jitter e deriva de um protocolo de 1000 passos
+═══════════════════════════════════════════════════════════════════════
+
+Executa o mesmo protocolo contra o gerador simulado (HS3ServiceSimulado) em
+dois modos e mede, a partir dos instantes em que cada set_frequency chega
+ao gerador, o jitter entre passos e a deriva acumulada face ao agendamento
+ideal (origem + soma dos dwell):
+- qtimer: encadeamento antigo (um QTimer por passo + singleShot de 100 ms)
+- agendador: ProtocolRunner com StepScheduler (prazos absolutos, thread própria)
+
+--bloqueio-gui-ms simula uma GUI ocupada: a thread principal bloqueia esse
+tempo a cada segundo. Cada modo corre num subprocesso próprio.
+
+Uso:
+    python benchmarks/bench_agendador_protocolo.py [--passos 1000] [--dwell 0.05]
+        [--bloqueio-gui-ms 0] [--reconfigurar] [--modos qtimer,agendador]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hil_terapia import Recursos, frequencias, temporizacao, SEMENTE
+
+
+def criar_protocolo(passos, dwell, reconfigurar):
+    from biodesk.quantum.protocol_runner import Protocol, FrequencyStep
+
+    # Com --reconfigurar a amplitude alterna e cada transição reconfigura o gerador
+    return Protocol(
+        name="Benchmark agendador",
+        description=f"{passos} passos de {dwell}s",
+        steps=[FrequencyStep(hz=frequencia, dwell_s=dwell,
+                             amp_vpp=(1.0 if i % 2 == 0 or not reconfigurar else 1.2))
+               for i, frequencia in enumerate(frequencias(passos))],
+    )
+
+
+class RunnerEncadeado:
+    """Reproduz a execução antiga do ProtocolRunner (timers relativos)"""
+
+    def __init__(self, hs3, protocolo, ao_terminar):
+        from PyQt6.QtCore import QTimer
+
+        self.hs3 = hs3
+        self.protocolo = protocolo
+        self.ao_terminar = ao_terminar
+        self.indice = 0
+        self.timer = QTimer()
+        self.timer.timeout.connect(self._fim_passo)
+
+    def iniciar(self):
+        self._iniciar_passo()
+
+    def _iniciar_passo(self):
+        from PyQt6.QtCore import QTimer
+
+        if self.indice >= len(self.protocolo.steps):
+            self.hs3.stop_output()
+            QTimer.singleShot(0, self.ao_terminar)
+            return
+        passo = self.protocolo.steps[self.indice]
+        self.hs3.configure_generator(signal_type=passo.waveform, amplitude_vpp=passo.amp_vpp,
+                                     offset_v=passo.offset_v)
+        self.hs3.set_frequency(passo.hz)
+        self.hs3.enable_ext_trigger_gated(False)
+        self.hs3.start_output()
+        self.timer.setInterval(int(passo.dwell_s * 1000))
+        self.timer.start()
+
+    def _fim_passo(self):
+        from PyQt6.QtCore import QTimer
+
+        self.timer.stop()
+        self.hs3.stop_output()
+        self.indice += 1
+        QTimer.singleShot(100, self._iniciar_passo)
+
+
+def executar_modo(modo, args):
+    from PyQt6.QtCore import QCoreApplication, QTimer
+    from hs3_simulador import HS3ServiceSimulado
+    from biodesk.quantum.protocol_runner import ProtocolRunner
+
+    app = QCoreApplication(sys.argv)
+    hs3 = HS3ServiceSimulado(args.latencia_ms / 1000, SEMENTE, tempo_real=False)
+    protocolo = criar_protocolo(args.passos, args.dwell, args.reconfigurar)
+
+    if args.bloqueio_gui_ms:
+        bloqueio = QTimer()
+        bloqueio.timeout.connect(lambda: time.sleep(args.bloqueio_gui_ms / 1000))
+        bloqueio.start(1000)
+
+    estatisticas_agendador = {}
+    if modo == 'qtimer':
+        runner = RunnerEncadeado(hs3, protocolo, app.quit)
+        QTimer.singleShot(0, runner.iniciar)
+    else:
+        runner = ProtocolRunner(hs3)
+        runner.finished.connect(app.quit)
+        runner.aborted.connect(lambda motivo: app.quit())
+        runner.error_occurred.connect(lambda mensagem: app.quit())
+        QTimer.singleShot(0, lambda: runner.start_protocol(protocolo))
+    # O modo antigo acumula 100 ms por passo; margem para não ficar pendurado
+    QTimer.singleShot(int((protocolo.total_duration_s * 2 + args.passos * 0.2 + 30) * 1000), app.quit)
+
+    with Recursos() as recursos:
+        app.exec()
+    if modo == 'agendador':
+        estatisticas_agendador = runner.last_timing_stats
+
+    transicoes = [instante for instante, comando in hs3.comandos if comando == 'set_frequency']
+    resultado = recursos.resultado()
+    resultado.update(temporizacao(transicoes, transicoes[0] if transicoes else 0.0,
+                                  [passo.dwell_s for passo in protocolo.steps]))
+    resultado['passos'] = len(transicoes)
+    resultado['duracao_ideal_s'] = protocolo.total_duration_s
+    resultado['comandos'] = len(hs3.comandos)
+    resultado['agendador'] = estatisticas_agendador
+    print(json.dumps(resultado))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--passos', type=int, default=1000)
+    parser.add_argument('--dwell', type=float, default=0.05)
+    parser.add_argument('--latencia-ms', type=float, default=1.0)
+    parser.add_argument('--bloqueio-gui-ms', type=float, default=0.0)
+    parser.add_argument('--reconfigurar', action='store_true',
+                        help="alternar a amplitude para forçar reconfiguração em cada passo")
+    parser.add_argument('--modos', default='qtimer,agendador')
+    parser.add_argument('--modo', choices=['qtimer', 'agendador'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        import logging
+        logging.disable(logging.INFO)
+        executar_modo(args.modo, args)
+        return
+
+    ambiente = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    print(f"{args.passos} passos de {args.dwell}s (ideal {args.passos * args.dwell:.1f}s), "
+          f"bloqueio da GUI {args.bloqueio_gui_ms:.0f} ms/s")
+    print(f"{'modo':11}{'duração (s)':>12}{'jitter média (ms)':>19}{'jitter p95 (ms)':>17}"
+          f"{'jitter máx (ms)':>17}{'deriva final (ms)':>19}{'CPU %':>8}")
+    for modo in [m.strip() for m in args.modos.split(',') if m.strip()]:
+        comando = [sys.executable, os.path.abspath(__file__), '--modo', modo,
+                   '--passos', str(args.passos), '--dwell', str(args.dwell),
+                   '--latencia-ms', str(args.latencia_ms), '--bloqueio-gui-ms', str(args.bloqueio_gui_ms)]
+        if args.reconfigurar:
+            comando.append('--reconfigurar')
+        saida = subprocess.run(comando, env=ambiente, check=True, capture_output=True, text=True).stdout
+        r = json.loads(saida.strip().splitlines()[-1])
+        jitter = r['jitter_ms']
+        print(f"{modo:11}{r['duracao_s']:>12.2f}{jitter.get('media', 0):>19.2f}{jitter.get('p95', 0):>17.2f}"
+              f"{jitter.get('max', 0):>17.2f}{r['deriva_final_ms'] or 0:>19.1f}{r['cpu_percent']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmark - Histórico e relatórios sobre 1M de passos de sessão
+═══════════════════════════════════════════════════════════════════════
+
+Gera sessões sintéticas de terapia, avaliação e biofeedback (1M de passos
+por omissão) e compara, para as consultas que o histórico e os relatórios
+fazem ao abrir:
+- linhas: tabelas como as atuais (sem índices), linhas recarregadas e
+  agregadas em Python a cada consulta
+- análise: AnaliseSessoes (agregados pré-calculados e índices de cobertura)
+
+Consultas: histórico de um paciente, resumo de um paciente (totais por
+origem + frequências mais usadas), frequências mais usadas no total e
+série temporal de uma frequência de um paciente. Mede também o tempo de
+ingestão e o tamanho das bases. Corre numa pasta temporária.
+
+Uso:
+    python benchmarks/bench_analise_sessoes.py [--passos 1000000] [--passos-por-sessao 50]
+        [--pacientes 2000] [--repeticoes 20]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ORIGENS = ("terapia", "avaliacao", "biofeedback")
+
+
+def gerar_sessoes(passos_total, passos_por_sessao, pacientes, semente=1234):
+    """Sessões reprodutíveis; 200 frequências distintas entre 1 Hz e 10 kHz"""
+    aleatorio = random.Random(semente)
+    frequencias = sorted({round(10 ** aleatorio.uniform(0, 4), 2) for _ in range(200)})
+    inicio = 1_700_000_000.0
+    sessoes = []
+    for indice in range(passos_total // passos_por_sessao):
+        origem = ORIGENS[indice % len(ORIGENS)]
+        instante = inicio + indice * 600
+        sessoes.append({
+            "origem": origem,
+            "session_id": f"{origem}_{indice}",
+            "patient_id": str(aleatorio.randrange(pacientes)),
+            "patient_name": None,
+            "protocol_name": f"Protocolo {indice % 40}",
+            "inicio": instante,
+            "fim": instante + passos_por_sessao * 60,
+            "passos": [{
+                "frequency": aleatorio.choice(frequencias),
+                "duration_s": 60.0,
+                "amplitude": 1.0,
+                "score": aleatorio.uniform(-100, 100) if origem == "avaliacao" else None,
+                "timestamp": instante + passo * 60,
+            } for passo in range(passos_por_sessao)],
+        })
+    return sessoes
+
+
+# ═══════════════ LINHAS (comportamento atual) ═══════════════
+
+def criar_linhas(db_path, sessoes):
+    conn = sqlite3.connect(db_path)
+    conn.execute('''CREATE TABLE sessoes (session_id TEXT PRIMARY KEY, origem TEXT, patient_id TEXT,
+                    protocol_name TEXT, start_time REAL, end_time REAL)''')
+    conn.execute('''CREATE TABLE passos (id INTEGER PRIMARY KEY, session_id TEXT, patient_id TEXT,
+                    timestamp REAL, frequency REAL, duration_s REAL, amplitude REAL, score REAL)''')
+    with conn:
+        conn.executemany("INSERT INTO sessoes VALUES (?, ?, ?, ?, ?, ?)", [
+            (s["session_id"], s["origem"], s["patient_id"], s["protocol_name"], s["inicio"], s["fim"])
+            for s in sessoes])
+        conn.executemany("INSERT INTO passos VALUES (NULL, ?, ?, ?, ?, ?, ?, ?)", [
+            (s["session_id"], s["patient_id"], p["timestamp"], p["frequency"], p["duration_s"],
+             p["amplitude"], p["score"])
+            for s in sessoes for p in s["passos"]])
+    conn.close()
+
+
+def linhas_historico(conn, paciente):
+    return conn.execute('''SELECT * FROM sessoes WHERE patient_id = ?
+                           ORDER BY start_time DESC LIMIT 50''', (paciente,)).fetchall()
+
+
+def linhas_resumo_paciente(conn, paciente):
+    origem_de = dict(conn.execute("SELECT session_id, origem FROM sessoes WHERE patient_id = ?", (paciente,)))
+    por_origem = defaultdict(lambda: [0, 0.0, 0.0, 0])
+    por_frequencia = defaultdict(lambda: [0, 0.0])
+    for session_id, frequencia, duracao, score in conn.execute(
+            "SELECT session_id, frequency, duration_s, score FROM passos WHERE patient_id = ?", (paciente,)):
+        totais = por_origem[origem_de[session_id]]
+        totais[0] += 1
+        totais[1] += duracao
+        if score is not None:
+            totais[2] += score
+            totais[3] += 1
+        por_frequencia[frequencia][0] += 1
+        por_frequencia[frequencia][1] += duracao
+    return dict(por_origem), sorted(por_frequencia.items(), key=lambda item: -item[1][0])[:10]
+
+
+def linhas_resumo_frequencias(conn):
+    por_frequencia = defaultdict(lambda: [0, 0.0])
+    for frequencia, duracao in conn.execute("SELECT frequency, duration_s FROM passos"):
+        por_frequencia[frequencia][0] += 1
+        por_frequencia[frequencia][1] += duracao
+    return sorted(por_frequencia.items(), key=lambda item: -item[1][0])[:20]
+
+
+def linhas_serie(conn, paciente, frequencia):
+    return sorted(conn.execute('''SELECT timestamp, duration_s, score FROM passos
+                                  WHERE patient_id = ? AND frequency = ?''', (paciente, frequencia)))
+
+
+# ═══════════════ MEDIÇÃO ═══════════════
+
+def mediana_ms(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--passos', type=int, default=1_000_000)
+    parser.add_argument('--passos-por-sessao', type=int, default=50)
+    parser.add_argument('--pacientes', type=int, default=2000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    from session_analytics import AnaliseSessoes
+
+    sessoes = gerar_sessoes(args.passos, args.passos_por_sessao, args.pacientes)
+    paciente = sessoes[0]["patient_id"]
+    frequencia = sessoes[0]["passos"][0]["frequency"]
+    print(f"{len(sessoes)} sessões, {len(sessoes) * args.passos_por_sessao} passos, "
+          f"{args.pacientes} pacientes")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_linhas = os.path.join(pasta, "linhas.db")
+        caminho_analise = os.path.join(pasta, "session_analytics.db")
+
+        inicio = time.perf_counter()
+        criar_linhas(caminho_linhas, sessoes)
+        ingestao_linhas = time.perf_counter() - inicio
+
+        analise = AnaliseSessoes(caminho_analise)
+        inicio = time.perf_counter()
+        for lote in range(0, len(sessoes), 1000):
+            analise.registar_sessoes(sessoes[lote:lote + 1000])
+        ingestao_analise = time.perf_counter() - inicio
+
+        conn = sqlite3.connect(caminho_linhas)
+        consultas = [
+            ("histórico do paciente",
+             lambda: linhas_historico(conn, paciente),
+             lambda: analise.historico(patient_id=paciente)),
+            ("resumo do paciente",
+             lambda: linhas_resumo_paciente(conn, paciente),
+             lambda: analise.resumo_paciente(paciente)),
+            ("frequências mais usadas",
+             lambda: linhas_resumo_frequencias(conn),
+             lambda: analise.resumo_frequencias()),
+            ("série de uma frequência",
+             lambda: linhas_serie(conn, paciente, frequencia),
+             lambda: analise.serie_paciente(paciente, frequencia)),
+        ]
+
+        print(f"\n{'consulta':26}{'linhas (ms)':>14}{'análise (ms)':>15}{'×':>8}")
+        for nome, linhas, agregados in consultas:
+            tempo_linhas = mediana_ms(linhas, args.repeticoes)
+            tempo_analise = mediana_ms(agregados, args.repeticoes)
+            print(f"{nome:26}{tempo_linhas:>14.2f}{tempo_analise:>15.2f}"
+                  f"{tempo_linhas / max(tempo_analise, 1e-6):>8.0f}")
+        conn.close()
+
+        print(f"\n{'':26}{'linhas':>14}{'análise':>15}")
+        print(f"{'ingestão (s)':26}{ingestao_linhas:>14.1f}{ingestao_analise:>15.1f}")
+        print(f"{'tamanho (MB)':26}{os.path.getsize(caminho_linhas) / 1e6:>14.0f}"
+              f"{os.path.getsize(caminho_analise) / 1e6:>15.0f}")
+
+
+if __name__ == '__main__':
+    main()
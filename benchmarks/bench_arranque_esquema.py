@@ -0,0 +1,70 @@
+"""
+Benchmark - Custo da verificação de esquema no arranque
+═══════════════════════════════════════════════════════════════════════
+
+Compara, para cada base de dados da clínica já atualizada:
+- verificação completa (comportamento antigo): CREATE IF NOT EXISTS +
+  PRAGMA table_info + ALTER condicionais em cada arranque
+- verificação versionada: uma leitura de PRAGMA user_version
+- chamadas repetidas no mesmo processo (cache em memória)
+
+Uso:
+    python benchmarks/bench_arranque_esquema.py [--repeticoes 200]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schema_migrations import MIGRACOES, aplicar_migracoes, limpar_cache_verificacao  # noqa: E402
+
+
+def verificacao_completa(db_path, esquema):
+    """Reexecuta todas as migrações idempotentes, como no arranque antigo"""
+    conn = sqlite3.connect(db_path)
+    try:
+        for _, _, migracao in MIGRACOES[esquema]:
+            migracao(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def cronometrar(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) * 1000 / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeticoes', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'esquema':20}{'completa (ms)':>16}{'user_version (ms)':>20}{'em cache (µs)':>16}")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for esquema in MIGRACOES:
+            db_path = os.path.join(pasta, f'{esquema}.db')
+            aplicar_migracoes(db_path, esquema)
+
+            completa = cronometrar(lambda: verificacao_completa(db_path, esquema), args.repeticoes)
+
+            def versionada():
+                limpar_cache_verificacao()
+                aplicar_migracoes(db_path, esquema)
+
+            versionada_ms = cronometrar(versionada, args.repeticoes)
+            cache_us = cronometrar(lambda: aplicar_migracoes(db_path, esquema), args.repeticoes) * 1000
+
+            print(f"{esquema:20}{completa:>16.3f}{versionada_ms:>20.3f}{cache_us:>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
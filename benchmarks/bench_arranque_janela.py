@@ -0,0 +1,97 @@
+"""
+Benchmark - Arranque a frio da janela principal até ao primeiro desenho
+═══════════════════════════════════════════════════════════════════════
+
+Cada medição corre num processo novo com QT_QPA_PLATFORM=offscreen (sem
+ecrã) e mede o tempo desde o início do processo até ao primeiro
+QEvent.Paint da MainWindow, em dois modos:
+- imediato: BIODESK_ARRANQUE_IMEDIATO=1 (todos os ecrãs importados no arranque)
+- diferido: ecrãs pesados importados só quando abertos
+
+Também indica quantos módulos ficaram carregados e quais das bibliotecas
+pesadas (numpy, pandas, QtWebEngine, reportlab, cv2) já estavam importadas.
+Corre numa pasta temporária para não tocar nas bases de dados reais.
+
+Uso:
+    python benchmarks/bench_arranque_janela.py [--repeticoes 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PESADOS = ('numpy', 'pandas', 'PyQt6.QtWebEngineWidgets', 'reportlab', 'cv2', 'ficha_paciente')
+
+# Executado no subprocesso: o relógio começa antes de qualquer import
+SCRIPT = r'''
+import time
+inicio = time.perf_counter()
+import json, sys
+sys.path.insert(0, RAIZ)
+import main_window
+from PyQt6.QtCore import QObject, QEvent, Qt
+from PyQt6.QtWidgets import QApplication
+
+QApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+app = QApplication(sys.argv)
+importado = time.perf_counter()
+janela = main_window.MainWindow()
+resultado = {}
+
+class PrimeiroDesenho(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and not resultado:
+            resultado['primeiro_desenho'] = time.perf_counter() - inicio
+            app.quit()
+        return False
+
+filtro = PrimeiroDesenho()
+janela.installEventFilter(filtro)
+janela.show()
+app.exec()
+
+resultado['imports'] = importado - inicio
+resultado['modulos'] = len(sys.modules)
+resultado['pesados'] = [nome for nome in PESADOS if nome in sys.modules]
+print(json.dumps(resultado))
+'''
+
+
+def medir(modo, pasta):
+    ambiente = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    ambiente.pop('BIODESK_PERFIL_IMPORTS', None)
+    if modo == 'imediato':
+        ambiente['BIODESK_ARRANQUE_IMEDIATO'] = '1'
+    else:
+        ambiente.pop('BIODESK_ARRANQUE_IMEDIATO', None)
+
+    codigo = f"RAIZ = {RAIZ!r}\nPESADOS = {PESADOS!r}\n" + SCRIPT
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=pasta, env=ambiente,
+                           check=True, capture_output=True, text=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'modo':10}{'imports (ms)':>14}{'1º desenho (ms)':>17}{'módulos':>10}  pesados carregados")
+    with tempfile.TemporaryDirectory() as pasta:
+        for modo in ('imediato', 'diferido'):
+            medicoes = [medir(modo, pasta) for _ in range(args.repeticoes)]
+            imports = statistics.median(m['imports'] for m in medicoes) * 1000
+            desenho = statistics.median(m['primeiro_desenho'] for m in medicoes) * 1000
+            ultimo = medicoes[-1]
+            print(f"{modo:10}{imports:>14.0f}{desenho:>17.0f}{ultimo['modulos']:>10}  "
+                  f"{', '.join(ultimo['pesados']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
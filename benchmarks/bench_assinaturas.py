@@ -0,0 +1,192 @@
+"""
+Benchmark - Assinaturas (PNG redesenhado a cada documento vs vetor compacto com rasterização em cache)
+═══════════════════════════════════════════════════════════════════════
+
+Gera N assinaturas sintéticas (10 000 por omissão): 2 a 6 traços de
+movimentos do rato num canvas 400x150. Mede:
+1. Tamanho por assinatura: segmentos em JSON (o formato de
+   SignatureWidget.get_signature_data), JSON + zlib e o vetor de
+   signature_codec; com PyQt6, também o PNG que era guardado
+2. Tempo de codificação e descodificação do vetor, e a verificação de
+   que a ida e volta respeita a quantização
+
+Com PyQt6 (QT_QPA_PLATFORM=offscreen), para --documentos documentos que
+usam assinaturas repetidas (a mesma assinatura aparece em vários PDFs):
+- antigo: signature_points_to_pixmap segmento a segmento + pixmap_to_base64
+  em cada documento
+- cache: SignatureImage.signature_to_base64 (descodifica, desenha com um
+  QPainterPath por traço, PNG e base64 uma vez por assinatura e tamanho)
+a 96 e a 300 DPI.
+
+Uso:
+    python benchmarks/bench_assinaturas.py [--assinaturas 10000] [--documentos 2000]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hil_terapia import SEMENTE, estatisticas_ms
+from qt_app import garantir_aplicacao
+from signature_codec import (
+    ESCALA, codificar_assinatura, descodificar_assinatura, obter_cache_raster, tracos_de_segmentos
+)
+
+LARGURA, ALTURA = 400, 150
+
+
+def gerar_assinaturas(n):
+    """Segmentos ((x0, y0), (x1, y1)) por linha, em pixels inteiros como os QPoint do rato"""
+    aleatorio = random.Random(SEMENTE)
+    assinaturas = []
+    for _ in range(n):
+        linhas = []
+        x = aleatorio.uniform(30, 120)
+        for _ in range(aleatorio.randint(2, 6)):
+            y = aleatorio.uniform(40, 110)
+            angulo = aleatorio.uniform(0, 6.28)
+            anterior = (round(x), round(y))
+            segmentos = []
+            for _ in range(aleatorio.randint(30, 120)):
+                angulo += aleatorio.uniform(-0.6, 0.6)
+                passo = aleatorio.uniform(1, 6)
+                x = min(LARGURA - 5, max(5, x + passo * abs(math.cos(angulo))))
+                y = min(ALTURA - 5, max(5, y + passo * math.sin(angulo)))
+                atual = (round(x), round(y))
+                segmentos.append((anterior, atual))
+                anterior = atual
+            linhas.append(segmentos)
+            x += aleatorio.uniform(5, 25)
+        assinaturas.append(linhas)
+    return assinaturas
+
+
+def parte_formato(assinaturas):
+    tamanhos = {'json': 0, 'json+zlib': 0, 'vetor': 0}
+    codificar, descodificar = [], []
+    vetores = []
+    for linhas in assinaturas:
+        texto = json.dumps(linhas).encode('utf-8')
+        tamanhos['json'] += len(texto)
+        tamanhos['json+zlib'] += len(zlib.compress(texto))
+
+        inicio = time.perf_counter()
+        vetor = codificar_assinatura(tracos_de_segmentos(linhas), LARGURA, ALTURA)
+        codificar.append(time.perf_counter() - inicio)
+        tamanhos['vetor'] += len(vetor)
+        vetores.append(vetor)
+
+        inicio = time.perf_counter()
+        assinatura = descodificar_assinatura(vetor)
+        descodificar.append(time.perf_counter() - inicio)
+        originais = tracos_de_segmentos(linhas)
+        assert len(assinatura.tracos) == len(originais)
+        for traco, original in zip(assinatura.tracos, originais):
+            sem_repetidos = [p for i, p in enumerate(original) if i == 0 or p != original[i - 1]]
+            assert len(traco) == len(sem_repetidos)
+            assert all(abs(a - c) <= 0.5 / ESCALA and abs(b - d) <= 0.5 / ESCALA
+                       for (a, b), (c, d) in zip(traco, sem_repetidos))
+
+    n = len(assinaturas)
+    pontos = sum(len(s) + 1 for linhas in assinaturas for s in linhas) / n
+    print(f"\n1. Formato ({n} assinaturas, {pontos:.0f} pontos em média)")
+    print(f"{'formato':12}{'bytes/assinatura':>18}{'total (MB)':>12}")
+    for formato, total in tamanhos.items():
+        print(f"{formato:12}{total / n:>18.0f}{total / 1e6:>12.2f}")
+    c, d = estatisticas_ms(codificar), estatisticas_ms(descodificar)
+    print(f"codificar: média {c['media']:.3f} ms, p95 {c['p95']:.3f} ms; "
+          f"descodificar: média {d['media']:.3f} ms, p95 {d['p95']:.3f} ms")
+    return vetores
+
+
+def parte_raster(args, assinaturas, vetores):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtCore import QBuffer, QIODevice, QPoint
+    from PyQt6.QtWidgets import QApplication
+
+    garantir_aplicacao(QApplication)
+    from biodesk.forms.health_declaration.export_pdf import SignatureImage
+
+    # PNG que era guardado por assinatura (desenho segmento a segmento)
+    def png_antigo(linhas, largura=LARGURA, altura=ALTURA):
+        pontos = [[(QPoint(*a), QPoint(*b)) for a, b in s] for s in linhas]
+        pixmap = desenhar_antigo(pontos, largura, altura)
+        buffer = QBuffer()
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        pixmap.save(buffer, "PNG")
+        return bytes(buffer.data())
+
+    def desenhar_antigo(pontos, largura, altura):
+        from PyQt6.QtCore import Qt
+        from PyQt6.QtGui import QColor, QPainter, QPen, QPixmap
+        pixmap = QPixmap(largura, altura)
+        pixmap.fill(Qt.GlobalColor.white)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(QColor(0, 0, 0), 2))
+        painter.scale(largura / LARGURA, altura / ALTURA)
+        for linha in pontos:
+            for inicio, fim in linha:
+                painter.drawLine(inicio, fim)
+        painter.end()
+        return pixmap
+
+    amostra = assinaturas[:min(len(assinaturas), 1000)]
+    png_total = sum(len(png_antigo(linhas)) for linhas in amostra)
+    vetor_total = sum(len(v) for v in vetores[:len(amostra)])
+    print(f"\nPNG guardado (amostra de {len(amostra)}): {png_total / len(amostra):.0f} bytes/assinatura "
+          f"vs vetor {vetor_total / len(amostra):.0f}")
+
+    # Documentos: cada um usa uma assinatura de um conjunto pequeno (paciente recorrente)
+    aleatorio = random.Random(SEMENTE)
+    usadas = min(len(assinaturas), max(1, args.documentos // 10))
+    documentos = [aleatorio.randrange(usadas) for _ in range(args.documentos)]
+
+    print(f"\n2. Rasterização ({args.documentos} documentos, {usadas} assinaturas distintas)")
+    print(f"{'DPI':>5} {'modo':8}{'média (ms)':>12}{'p95 (ms)':>10}{'total (s)':>11}")
+    for dpi in (96, 300):
+        largura, altura = round(LARGURA * dpi / 96), round(ALTURA * dpi / 96)
+        antigo = []
+        for i in documentos:
+            inicio = time.perf_counter()
+            pontos = [[(QPoint(*a), QPoint(*b)) for a, b in s] for s in assinaturas[i]]
+            pixmap = desenhar_antigo(pontos, largura, altura)
+            SignatureImage.pixmap_to_base64(pixmap)
+            antigo.append(time.perf_counter() - inicio)
+        obter_cache_raster().limpar()
+        cache = []
+        for i in documentos:
+            inicio = time.perf_counter()
+            SignatureImage.signature_to_base64(vetores[i], dpi=dpi)
+            cache.append(time.perf_counter() - inicio)
+        for modo, duracoes in (('antigo', antigo), ('cache', cache)):
+            e = estatisticas_ms(duracoes)
+            print(f"{dpi:>5} {modo:8}{e['media']:>12.3f}{e['p95']:>10.3f}{sum(duracoes):>11.2f}")
+    cache = obter_cache_raster()
+    print(f"cache: {cache.acertos} acertos, {cache.falhas} falhas, {len(cache)} entradas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--assinaturas', type=int, default=10000)
+    parser.add_argument('--documentos', type=int, default=2000)
+    args = parser.parse_args()
+
+    assinaturas = gerar_assinaturas(args.assinaturas)
+    vetores = parte_formato(assinaturas)
+    try:
+        parte_raster(args, assinaturas, vetores)
+    except ImportError as e:
+        print(f"\nrasterização: não executado ({e})")
+
+
+if __name__ == '__main__':
+    main()
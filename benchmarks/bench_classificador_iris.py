@@ -0,0 +1,128 @@
+"""
+Benchmark - Classificação de notas iridológicas (substring por palavra vs trie compilada)
+═══════════════════════════════════════════════════════════════════════
+
+Gera 10 000 notas sintéticas (texto + setor) e classifica-as com
+vocabulários crescentes (o mapeamento real + palavras-chave sintéticas):
+- substring: o _extract_conditions_from_iris antigo ('palavra in texto'
+  para cada palavra e cada nota)
+- trie: ClassificadorNotasIris (compilado uma vez, uma passagem por nota)
+
+Com notas escritas com acentos os dois modos têm de dar exatamente as
+mesmas condições nota a nota; o benchmark verifica-o. Mede também o
+tempo de compilação do classificador e quantas notas a mais são
+classificadas quando parte das notas é escrita sem acentos.
+
+Uso:
+    python benchmarks/bench_classificador_iris.py [--notas 10000]
+        [--vocabulario 0,500,2000,10000] [--repeticoes 3]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from iris_notas import (PALAVRAS_CONDICOES, SETORES_CONDICOES, ClassificadorNotasIris,
+                        normalizar)
+
+SILABAS = ['ba', 'ce', 'di', 'fo', 'gu', 'la', 'me', 'ni', 'po', 'ru', 'sa', 'te', 'vi',
+           'ção', 'ões', 'ém', 'ás', 'lh', 'nh', 'qu']
+ENCHIMENTO = ['presença', 'de', 'sinal', 'na', 'zona', 'com', 'ligeira', 'alteração', 'lacuna',
+              'anel', 'radial', 'pigmento', 'observado', 'sem', 'relevância', 'crónica', 'aguda']
+
+
+def vocabulario_sintetico(n, aleatorio):
+    """Palavras-chave inventadas (com acentos) mapeadas para condições sintéticas"""
+    palavras = dict(PALAVRAS_CONDICOES)
+    while len(palavras) < len(PALAVRAS_CONDICOES) + n:
+        palavra = ''.join(aleatorio.choice(SILABAS) for _ in range(aleatorio.randint(3, 5)))
+        palavras.setdefault(palavra, f"condicao_{len(palavras) % 300}")
+    return palavras
+
+
+def gerar_notas(n, palavras, aleatorio, sem_acentos=0.0):
+    termos = list(palavras)
+    setores = list(SETORES_CONDICOES) + ['íris', 'colarete', 'pupila']
+    notas = []
+    for _ in range(n):
+        texto = [aleatorio.choice(ENCHIMENTO) for _ in range(aleatorio.randint(8, 20))]
+        for _ in range(aleatorio.randint(0, 3)):
+            texto.insert(aleatorio.randrange(len(texto) + 1), aleatorio.choice(termos))
+        nota = {'texto': ' '.join(texto).capitalize(), 'setor': aleatorio.choice(setores).title()}
+        if aleatorio.random() < sem_acentos:
+            nota = {chave: normalizar(valor) for chave, valor in nota.items()}
+        notas.append(nota)
+    return notas
+
+
+def condicoes_substring(nota, palavras, setores):
+    """Reproduz o ciclo antigo para uma nota (sem a deduplicação entre notas)"""
+    condicoes = []
+    texto_nota = nota.get('texto', '').lower()
+    setor = nota.get('setor', '').lower()
+    for palavra, condicao in palavras.items():
+        if palavra in texto_nota or palavra in setor:
+            if condicao not in condicoes:
+                condicoes.append(condicao)
+    for nome_setor, condicoes_setor in setores.items():
+        if nome_setor in setor:
+            for condicao in condicoes_setor:
+                if condicao not in condicoes:
+                    condicoes.append(condicao)
+    return condicoes
+
+
+def mediana_s(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--notas', type=int, default=10000)
+    parser.add_argument('--vocabulario', default='0,500,2000,10000',
+                        help='palavras-chave sintéticas acrescentadas ao mapeamento real')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{args.notas} notas; tempos em ms (mediana de {args.repeticoes})")
+    print(f"{'palavras':>9}{'substring':>12}{'trie':>10}{'×':>7}{'compilação':>12}"
+          f"{'notas c/ condições (30% sem acentos)':>38}")
+    for extra in [int(valor) for valor in args.vocabulario.split(',') if valor.strip()]:
+        aleatorio = random.Random(1234)
+        palavras = vocabulario_sintetico(extra, aleatorio)
+        notas = gerar_notas(args.notas, palavras, aleatorio)
+
+        inicio = time.perf_counter()
+        classificador = ClassificadorNotasIris(palavras, SETORES_CONDICOES)
+        compilacao = time.perf_counter() - inicio
+
+        tempo_substring, antigas = mediana_s(
+            lambda: [condicoes_substring(nota, palavras, SETORES_CONDICOES) for nota in notas],
+            args.repeticoes)
+        tempo_trie, novas = mediana_s(
+            lambda: [classificador.condicoes_nota(nota['texto'], nota['setor']) for nota in notas],
+            args.repeticoes)
+        assert antigas == novas, "resultados diferentes entre substring e trie"
+
+        # Parte das notas escrita sem acentos: a versão antiga perde essas correspondências
+        mistas = gerar_notas(args.notas, palavras, random.Random(99), sem_acentos=0.3)
+        com_substring = sum(1 for nota in mistas if condicoes_substring(nota, palavras, SETORES_CONDICOES))
+        com_trie = sum(1 for nota in mistas if classificador.condicoes_nota(nota['texto'], nota['setor']))
+
+        print(f"{len(palavras):>9}{tempo_substring * 1000:>12.0f}{tempo_trie * 1000:>10.0f}"
+              f"{tempo_substring / tempo_trie:>7.1f}{compilacao * 1000:>12.0f}"
+              f"{f'{com_substring} → {com_trie}':>38}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark - Verificar ligação antes de enviar (sonda síncrona vs estado em cache)
+═══════════════════════════════════════════════════════════════════════
+
+Usa um destino local (benchmarks/rede_stub.py) nos modos 'online',
+'recusa' e 'silencio' (firewall que descarta pacotes). Mede:
+1. O custo da verificação na thread da interface antes de cada envio:
+   - antigo: ligação TCP com timeout (FichaPaciente._is_online, 3 s)
+   - monitor: MonitorConectividade.esta_online() (leitura do estado em cache)
+2. Com a sonda em fundo (intervalos reduzidos): tempo até o estado refletir
+   a queda da rede, só pela sonda e com o erro relatado pelo transporte;
+   sondas feitas durante --offline-s sem rede (backoff) e tempo até
+   detetar o regresso da ligação
+3. O transporte de email (benchmarks/smtp_stub.py) a alimentar o monitor:
+   envio bem-sucedido -> online; servidor desligado -> offline
+
+Uso:
+    python benchmarks/bench_conectividade.py [--timeout 3] [--consultas 100000] [--offline-s 3]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hil_terapia import estatisticas_ms
+from connectivity_monitor import MonitorConectividade
+from rede_stub import MODOS, RedeLoopback
+
+
+def esperar_estado(monitor, online, limite=10.0):
+    """Segundos até esta_online() == online (None se não acontecer dentro do limite)"""
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < limite:
+        if monitor.esta_online() == online:
+            return time.perf_counter() - inicio
+        time.sleep(0.001)
+    return None
+
+
+def parte_consulta(args, rede):
+    print(f"\n1. Verificação antes de cada envio (thread da interface, timeout {args.timeout:.1f} s)")
+    print(f"{'modo':10}{'verificação':14}{'n':>8}{'média (ms)':>12}{'p95 (ms)':>10}{'máx (ms)':>10}")
+    for modo in MODOS:
+        rede.definir_modo(modo)
+        sonda = rede.sonda(args.timeout)
+        monitor = MonitorConectividade(sonda=sonda)
+        monitor.verificar()  # estado inicial (na aplicação corre na thread de fundo)
+
+        n = args.envios_silencio if modo == 'silencio' else 200
+        antigo = []
+        for _ in range(n):
+            inicio = time.perf_counter()
+            sonda()
+            antigo.append(time.perf_counter() - inicio)
+
+        novo = []
+        for _ in range(args.consultas):
+            inicio = time.perf_counter()
+            monitor.esta_online()
+            novo.append(time.perf_counter() - inicio)
+
+        for nome, duracoes in (('sonda TCP', antigo), ('esta_online', novo)):
+            e = estatisticas_ms(duracoes)
+            print(f"{modo:10}{nome:14}{len(duracoes):>8}{e['media']:>12.4f}{e['p95']:>10.4f}{e['max']:>10.4f}")
+
+
+def parte_fundo(args, rede):
+    intervalo, backoff_inicial, backoff_maximo, timeout = 0.5, 0.05, 0.8, 0.2
+    print(f"\n2. Sonda em fundo (intervalo online {intervalo} s, backoff {backoff_inicial}-{backoff_maximo} s, "
+          f"timeout {timeout} s)")
+
+    rede.definir_modo('online')
+    monitor = MonitorConectividade(sonda=rede.sonda(timeout), intervalo_online=intervalo,
+                                   backoff_inicial=backoff_inicial, backoff_maximo=backoff_maximo)
+    monitor.iniciar()
+    esperar_estado(monitor, True)
+    time.sleep(0.05)
+
+    rede.definir_modo('silencio')
+    t = esperar_estado(monitor, False)
+    print(f"queda detetada só pela sonda:            {t * 1000:8.1f} ms" if t is not None else "queda não detetada")
+
+    rede.definir_modo('online')
+    monitor.verificar_agora()
+    esperar_estado(monitor, True)
+    rede.definir_modo('silencio')
+    inicio = time.perf_counter()
+    monitor.reportar_erro(TimeoutError("timed out"), "smtp")  # o que o transporte relata
+    print(f"queda relatada pelo transporte:          {(time.perf_counter() - inicio) * 1000:8.3f} ms")
+
+    sondagens = monitor.sondagens
+    time.sleep(args.offline_s)
+    feitas = monitor.sondagens - sondagens
+    print(f"sondas em {args.offline_s:.0f} s sem rede (backoff):        {feitas:5d} "
+          f"(intervalo fixo de {backoff_inicial} s: {args.offline_s / (backoff_inicial + timeout):.0f})")
+
+    rede.definir_modo('online')
+    t = esperar_estado(monitor, True)
+    print(f"regresso da ligação detetado em:         {t * 1000:8.1f} ms "
+          f"(espera máxima {backoff_maximo + timeout:.1f} s)" if t is not None else "regresso não detetado")
+    monitor.parar()
+
+
+def parte_transporte():
+    from email_transport import SMTPConnectionPool
+    from email.message import EmailMessage
+    from smtp_stub import SMTPStub
+
+    monitor = MonitorConectividade(sonda=lambda: True)
+    mensagem = EmailMessage()
+    mensagem['From'], mensagem['To'], mensagem['Subject'] = 'clinica@exemplo.pt', 'p@exemplo.pt', 'Teste'
+    mensagem.set_content('Olá')
+
+    print("\n3. Transporte de email a alimentar o monitor")
+    with SMTPStub() as stub:
+        pool = SMTPConnectionPool('127.0.0.1', stub.porta, False, 'clinica@exemplo.pt', 'segredo',
+                                  timeout=2, monitor=monitor)
+        pool.enviar(mensagem)
+        print(f"envio bem-sucedido:     online={monitor.estado().online} (origem {monitor.estado().origem})")
+        pool.fechar()
+    try:
+        pool.enviar(mensagem, tentativas=1)
+    except OSError as e:
+        print(f"servidor desligado:     online={monitor.estado().online} "
+              f"(origem {monitor.estado().origem}, {type(e).__name__})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--timeout', type=float, default=3.0, help='timeout da sonda síncrona antiga')
+    parser.add_argument('--envios-silencio', type=int, default=3,
+                        help="verificações antigas no modo 'silencio' (cada uma espera o timeout)")
+    parser.add_argument('--consultas', type=int, default=100000)
+    parser.add_argument('--offline-s', type=float, default=3.0)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with RedeLoopback() as rede:
+        parte_consulta(args, rede)
+        parte_fundo(args, rede)
+    parte_transporte()
+
+
+if __name__ == '__main__':
+    main()
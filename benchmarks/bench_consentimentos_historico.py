@@ -0,0 +1,124 @@
+"""
+Benchmark - Histórico de consentimentos com conteúdo inline vs armazém externo
+═══════════════════════════════════════════════════════════════════════
+
+Cria uma clínica sintética com o esquema antigo (HTML e assinaturas inline na
+tabela consentimentos), mede obter_historico_consentimentos e
+obter_status_consentimentos, aplica a migração para o armazém endereçado por
+hash e repete as medições.
+
+Uso:
+    python benchmarks/bench_consentimentos_historico.py [--pacientes 3000] [--consultas 500]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consentimentos_manager import ConsentimentosManager  # noqa: E402
+
+TIPOS = ['naturopatia', 'osteopatia', 'iridologia', 'quantica', 'mesoterapia', 'rgpd']
+
+ESQUEMA_ANTIGO = '''
+    CREATE TABLE consentimentos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        paciente_id INTEGER NOT NULL,
+        tipo_consentimento TEXT NOT NULL,
+        data_assinatura TEXT NOT NULL,
+        conteudo_html TEXT,
+        conteudo_texto TEXT,
+        assinatura_paciente BLOB,
+        assinatura_terapeuta BLOB,
+        status TEXT DEFAULT 'assinado',
+        data_criacao TEXT NOT NULL, nome_paciente TEXT, nome_terapeuta TEXT,
+        data_anulacao TEXT, motivo_anulacao TEXT, dados_formulario TEXT
+    )
+'''
+
+
+def criar_clinica_sintetica(db_path, num_pacientes):
+    """Povoa a base com o esquema antigo (conteúdo inline)"""
+    rnd = random.Random(42)
+    templates = {tipo: f"<html><body><h1>{tipo}</h1>" + ("<p>Cláusula de consentimento.</p>" * 250)
+                 for tipo in TIPOS}
+    assinatura_terapeuta = rnd.randbytes(6000)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute(ESQUEMA_ANTIGO)
+    linhas = []
+    for paciente_id in range(1, num_pacientes + 1):
+        for tipo in TIPOS:
+            data = f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} 10:00:00"
+            linhas.append((
+                paciente_id, tipo, data, templates[tipo], f"Consentimento {tipo}",
+                rnd.randbytes(rnd.randint(3000, 9000)), assinatura_terapeuta,
+                'assinado', data, f"Paciente {paciente_id}", "Dr. Nuno Correia"
+            ))
+    conn.executemany('''
+        INSERT INTO consentimentos
+        (paciente_id, tipo_consentimento, data_assinatura, conteudo_html, conteudo_texto,
+         assinatura_paciente, assinatura_terapeuta, status, data_criacao,
+         nome_paciente, nome_terapeuta)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', linhas)
+    conn.commit()
+    conn.close()
+
+
+def medir(manager, pacientes):
+    """Mede o tempo médio (ms) de histórico e status por paciente"""
+    inicio = time.perf_counter()
+    for paciente_id in pacientes:
+        manager.obter_historico_consentimentos(paciente_id)
+    historico_ms = (time.perf_counter() - inicio) * 1000 / len(pacientes)
+
+    inicio = time.perf_counter()
+    for paciente_id in pacientes:
+        manager.obter_status_consentimentos(paciente_id)
+    status_ms = (time.perf_counter() - inicio) * 1000 / len(pacientes)
+
+    return historico_ms, status_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pacientes', type=int, default=3000)
+    parser.add_argument('--consultas', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db_path = os.path.join(pasta, 'clinica.db')
+        criar_clinica_sintetica(db_path, args.pacientes)
+        pacientes = random.Random(7).sample(range(1, args.pacientes + 1), args.consultas)
+        print(f"📦 Base sintética: {args.pacientes * len(TIPOS)} consentimentos, "
+              f"{os.path.getsize(db_path) / 1e6:.1f} MB")
+
+        # Antes: instanciar sem __init__ para não disparar a migração
+        manager = ConsentimentosManager.__new__(ConsentimentosManager)
+        manager.db_path = db_path
+        antes = medir(manager, pacientes)
+
+        inicio = time.perf_counter()
+        manager.criar_tabela_consentimentos()
+        migracao_s = time.perf_counter() - inicio
+        conn = sqlite3.connect(db_path)
+        conn.execute('VACUUM')
+        conn.close()
+
+        depois = medir(manager, pacientes)
+
+        print(f"🔁 Migração: {migracao_s:.2f} s, base após VACUUM: "
+              f"{os.path.getsize(db_path) / 1e6:.1f} MB")
+        print(f"{'':22}{'inline':>12}{'externo':>12}")
+        print(f"{'histórico (ms/pac.)':22}{antes[0]:>12.3f}{depois[0]:>12.3f}")
+        print(f"{'status (ms/pac.)':22}{antes[1]:>12.3f}{depois[1]:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
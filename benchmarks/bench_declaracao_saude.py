@@ -0,0 +1,110 @@
+"""
+Benchmark - Abertura da declaração de saúde (todas as secções vs a pedido)
+═══════════════════════════════════════════════════════════════════════
+
+Abre DeclaracaoSaudeWidget em QT_QPA_PLATFORM=offscreen e mede o tempo até
+o formulário estar interativo (primeiro desenho) e quantos widgets existem
+nesse momento, em dois modos:
+- todas: as 21 secções construídas na abertura (comportamento antigo)
+- a pedido: só as primeiras secções; as restantes quando entram na vista
+
+Mede também o scroll até ao fim (que constrói as secções em falta) e o
+tempo de _obter_dados_formulario. Cada modo corre num subprocesso próprio,
+numa pasta temporária para não tocar nas bases de dados reais.
+
+Uso:
+    python benchmarks/bench_declaracao_saude.py [--repeticoes 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def executar_modo(modo):
+    import time
+    inicio = time.perf_counter()
+    sys.path.insert(0, RAIZ)
+    from PyQt6.QtCore import QObject, QEvent
+    from PyQt6.QtWidgets import QApplication, QWidget
+
+    app = QApplication(sys.argv)
+    from ficha_paciente.declaracao_saude import DeclaracaoSaudeWidget
+    importado = time.perf_counter()
+
+    resultado = {}
+
+    class PrimeiroDesenho(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and 'interativo' not in resultado:
+                resultado['interativo'] = time.perf_counter() - importado
+                app.quit()
+            return False
+
+    widget = DeclaracaoSaudeWidget()
+    if modo == 'todas':
+        widget._construir_todas_secoes()
+    filtro = PrimeiroDesenho()
+    widget.installEventFilter(filtro)
+    widget.resize(1200, 900)
+    widget.show()
+    app.exec()
+    resultado['widgets'] = len(widget.findChildren(QWidget))
+
+    # Scroll até ao fim, construindo o que faltar
+    inicio_scroll = time.perf_counter()
+    barra = widget._scroll_formulario.verticalScrollBar()
+    while True:
+        app.processEvents()
+        if barra.value() >= barra.maximum() and all(construida for _, _, construida in widget._secoes):
+            break
+        barra.setValue(barra.maximum())
+    resultado['scroll_fim'] = time.perf_counter() - inicio_scroll
+    resultado['widgets_fim'] = len(widget.findChildren(QWidget))
+
+    inicio_dados = time.perf_counter()
+    for _ in range(100):
+        widget._obter_dados_formulario()
+    resultado['obter_dados'] = (time.perf_counter() - inicio_dados) / 100
+    resultado['processo'] = time.perf_counter() - inicio
+    print(json.dumps(resultado))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--modo', choices=['todas', 'a_pedido'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        executar_modo(args.modo)
+        return
+
+    ambiente = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    print(f"{'modo':10}{'interativo (ms)':>17}{'widgets':>10}{'scroll ao fim (ms)':>20}"
+          f"{'widgets fim':>13}{'obter dados (ms)':>18}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for modo in ('todas', 'a_pedido'):
+            medicoes = []
+            for _ in range(args.repeticoes):
+                saida = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--modo', modo],
+                    cwd=pasta, env=ambiente, check=True, capture_output=True, text=True,
+                ).stdout
+                medicoes.append(json.loads(saida.strip().splitlines()[-1]))
+            interativo = statistics.median(m['interativo'] for m in medicoes) * 1000
+            scroll = statistics.median(m['scroll_fim'] for m in medicoes) * 1000
+            dados = statistics.median(m['obter_dados'] for m in medicoes) * 1000
+            ultimo = medicoes[-1]
+            print(f"{modo:10}{interativo:>17.0f}{ultimo['widgets']:>10}{scroll:>20.0f}"
+                  f"{ultimo['widgets_fim']:>13}{dados:>18.2f}")
+
+
+if __name__ == '__main__':
+    main()
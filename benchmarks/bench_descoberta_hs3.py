@@ -0,0 +1,167 @@
+"""
+Benchmark - Descoberta do HS3 em portas série (sequencial vs paralela com cache)
+═══════════════════════════════════════════════════════════════════════
+
+Cria N portas série falsas em pseudo-terminais que não respondem e uma
+com o HS3 simulado (HS3SerieSimulado). A lista de portas do sistema
+(serial.tools.list_ports.comports) passa a devolver estas portas, com
+VID:PID e número de série. Mede:
+- sequencial: a procura antiga (porta a porta, *IDN? + espera de 0,5 s)
+- paralela (fria): HS3Discovery.discover sem cache
+- última porta boa: a ligação seguinte, que só sonda a porta guardada
+- porta mudou: o mesmo HS3 (mesma impressão digital) noutra porta
+- hotplug: refrescamento em segundo plano até devices_changed
+
+Corre numa pasta temporária (a última porta boa é gravada em
+hs3_config.json na pasta atual). Precisa de pty (Linux/macOS).
+
+Uso:
+    python benchmarks/bench_descoberta_hs3.py [--portas-mudas 8] [--repeticoes 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from qt_app import garantir_aplicacao
+
+HS3_VID, HS3_PID = 0x0E36, 0x0008
+
+
+class PortaMuda:
+    """Pseudo-terminal que aceita comandos e nunca responde"""
+
+    def __init__(self, indice):
+        import tty
+        self._mestre, self._escravo = os.openpty()
+        tty.setraw(self._escravo)
+        self.info = SimpleNamespace(device=os.ttyname(self._escravo), description=f"Porta muda {indice}",
+                                    vid=0x1A86, pid=0x7523, serial_number=f"MUDA-{indice}")
+
+    def fechar(self):
+        os.close(self._mestre)
+        os.close(self._escravo)
+
+
+def info_hs3(simulador):
+    return SimpleNamespace(device=simulador.porta, description="Handyscope HS3 (simulado)",
+                           vid=HS3_VID, pid=HS3_PID, serial_number="HS3-SIM-000001")
+
+
+def procura_sequencial(portas):
+    """Reproduz o find_hs3_devices antigo para as mesmas portas"""
+    import serial
+    from hs3_config import hs3_config
+
+    encontradas = []
+    for porta in portas:
+        try:
+            teste = serial.Serial(porta.device, baudrate=hs3_config.limits.SERIAL_BAUDRATE,
+                                  timeout=hs3_config.limits.SERIAL_TIMEOUT)
+            teste.write(b"*IDN?\n")
+            time.sleep(0.5)
+            resposta = teste.read_all().decode('utf-8', errors='ignore')
+            teste.close()
+            if len(resposta.strip()) > 0:
+                encontradas.append(porta.device)
+        except Exception:
+            continue
+    return encontradas
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def executar(args):
+    import logging
+    logging.disable(logging.WARNING)
+    import serial.tools.list_ports
+    from hs3_simulador import HS3SerieSimulado
+
+    mudas = [PortaMuda(i) for i in range(args.portas_mudas)]
+    lista = []
+    # O HS3 fica no fim da lista: o pior caso para a procura sequencial
+    serial.tools.list_ports.comports = lambda: list(lista)
+
+    from PyQt6.QtCore import QCoreApplication
+    garantir_aplicacao(QCoreApplication)
+    from hs3_hardware import HS3Discovery
+    from hs3_config import hs3_config
+
+    tempos = {}
+    with HS3SerieSimulado(0.002) as simulador:
+        lista[:] = [m.info for m in mudas] + [info_hs3(simulador)]
+
+        tempos['sequencial'], encontradas = cronometrar(lambda: procura_sequencial(lista))
+        assert encontradas == [simulador.porta], encontradas
+
+        descoberta = HS3Discovery()
+        hs3_config.user_config.pop(HS3Discovery.CONFIG_KEY, None)
+        tempos['paralela'], encontradas = cronometrar(lambda: descoberta.discover(use_cache=False))
+        assert encontradas == [simulador.porta], encontradas
+
+        tempos['ultima_porta'], porta = cronometrar(descoberta.probe_last_good)
+        assert porta == simulador.porta, porta
+
+    # O mesmo HS3 ligado noutra entrada USB: outra porta, mesma impressão digital
+    with HS3SerieSimulado(0.002) as simulador:
+        lista[:] = [m.info for m in mudas] + [info_hs3(simulador)]
+        tempos['porta_mudou'], encontradas = cronometrar(descoberta.discover)
+        assert encontradas == [simulador.porta], encontradas
+
+        concluido = threading.Event()
+        descoberta.devices_changed.connect(lambda portas: concluido.set())
+        inicio = time.perf_counter()
+        descoberta.refresh_async()
+        concluido.wait(30)
+        tempos['hotplug'] = time.perf_counter() - inicio
+
+    for muda in mudas:
+        muda.fechar()
+    print(json.dumps(tempos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--portas-mudas', type=int, default=8)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--executar', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.executar:
+        executar(args)
+        return
+
+    ambiente = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    medicoes = []
+    with tempfile.TemporaryDirectory() as pasta:
+        for _ in range(args.repeticoes):
+            saida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--executar',
+                 '--portas-mudas', str(args.portas_mudas)],
+                cwd=pasta, env=ambiente, check=True, capture_output=True, text=True,
+            ).stdout
+            medicoes.append(json.loads(saida.strip().splitlines()[-1]))
+
+    print(f"{args.portas_mudas} portas mudas + 1 HS3, mediana de {args.repeticoes} execuções")
+    print(f"{'procura':16}{'tempo (ms)':>12}")
+    for nome in ('sequencial', 'paralela', 'ultima_porta', 'porta_mudou', 'hotplug'):
+        print(f"{nome:16}{statistics.median(m[nome] for m in medicoes) * 1000:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark - Eventos de segurança (lista em memória vs diário SQLite particionado por dia)
+═══════════════════════════════════════════════════════════════════════
+
+Regista N eventos (1 000 000 por omissão) distribuídos por --dias dias e
+consulta uma janela de 24 horas, em dois modos:
+- lista: o SafetyManager antigo (SafetyEvent numa lista Python, janela
+  por compreensão de lista, limpeza reconstruindo a lista)
+- diario: DiarioEventosSeguranca (anel em memória + tabela por dia)
+
+Mede o tempo de registo por evento, a memória residente, a consulta da
+janela (todos os eventos e só os críticos), a retenção de 7 dias e, no
+diário, a mesma consulta depois de reabrir a base (o histórico da lista
+perde-se ao sair). Corre numa pasta temporária.
+
+Uso:
+    python benchmarks/bench_diario_seguranca.py [--eventos 1000000] [--dias 30]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hil_terapia import SEMENTE
+from bench_iris_piramide import rss_atual_mb
+from safety_journal import DiarioEventosSeguranca
+
+NIVEIS = ["safe"] * 90 + ["warning"] * 8 + ["danger"] + ["critical"]
+TIPOS = ["parameter_limit", "hardware_error", "user_intervention", "system_error"]
+
+
+@dataclass
+class SafetyEvent:
+    """Cópia do SafetyEvent de safety_manager.py (que precisa de PyQt6)"""
+    timestamp: datetime
+    event_type: str
+    level: str
+    message: str
+    parameters: Optional[Dict] = None
+    action_taken: str = ""
+
+
+def gerar_eventos(n, dias):
+    aleatorio = random.Random(SEMENTE)
+    inicio = datetime.now() - timedelta(days=dias)
+    passo = dias * 86400 / n
+    for i in range(n):
+        nivel = aleatorio.choice(NIVEIS)
+        yield (inicio + timedelta(seconds=i * passo), aleatorio.choice(TIPOS), nivel,
+               f"Parâmetros aprovados: {aleatorio.uniform(1, 1000):.2f}Hz",
+               {"frequency": i % 1000, "amplitude": 1.0})
+
+
+def modo_lista(eventos, janela_inicio, janela_fim):
+    resultado = {}
+    rss_base = rss_atual_mb()
+    lista = []
+    inicio = time.perf_counter()
+    for ts, tipo, nivel, mensagem, parametros in eventos:
+        lista.append(SafetyEvent(ts, tipo, nivel, mensagem, parametros or {}))
+    resultado['registo_s'] = time.perf_counter() - inicio
+    resultado['rss_mb'] = rss_atual_mb() - rss_base
+
+    inicio = time.perf_counter()
+    janela = [e for e in lista if janela_inicio <= e.timestamp < janela_fim]
+    resultado['janela_ms'] = (time.perf_counter() - inicio) * 1000
+    resultado['janela_n'] = len(janela)
+    inicio = time.perf_counter()
+    criticos = [e for e in lista if janela_inicio <= e.timestamp < janela_fim and e.level == "critical"]
+    resultado['criticos_ms'] = (time.perf_counter() - inicio) * 1000
+    resultado['criticos_n'] = len(criticos)
+
+    inicio = time.perf_counter()
+    corte = datetime.now() - timedelta(days=7)
+    lista = [e for e in lista if e.timestamp > corte]
+    resultado['retencao_ms'] = (time.perf_counter() - inicio) * 1000
+    return resultado
+
+
+def modo_diario(eventos, janela_inicio, janela_fim, pasta):
+    resultado = {}
+    db_path = os.path.join(pasta, 'safety_events.db')
+    rss_base = rss_atual_mb()
+    diario = DiarioEventosSeguranca(db_path, flush_intervalo_s=float('inf'))
+    inicio = time.perf_counter()
+    for ts, tipo, nivel, mensagem, parametros in eventos:
+        diario.registar(ts, tipo, nivel, mensagem, parametros)
+    diario.flush()
+    resultado['registo_s'] = time.perf_counter() - inicio
+    resultado['rss_mb'] = rss_atual_mb() - rss_base
+
+    inicio = time.perf_counter()
+    janela = diario.consultar(janela_inicio, janela_fim)
+    resultado['janela_ms'] = (time.perf_counter() - inicio) * 1000
+    resultado['janela_n'] = len(janela)
+    inicio = time.perf_counter()
+    criticos = diario.consultar(janela_inicio, janela_fim, niveis=["critical"])
+    resultado['criticos_ms'] = (time.perf_counter() - inicio) * 1000
+    resultado['criticos_n'] = len(criticos)
+
+    inicio = time.perf_counter()
+    diario.aplicar_retencao(7)
+    resultado['retencao_ms'] = (time.perf_counter() - inicio) * 1000
+    diario.fechar()
+
+    # Reabrir (arranque seguinte da aplicação) e repetir a consulta
+    inicio = time.perf_counter()
+    diario = DiarioEventosSeguranca(db_path)
+    resultado['reaberto_n'] = len(diario.consultar(janela_inicio, janela_fim))
+    resultado['reaberto_ms'] = (time.perf_counter() - inicio) * 1000
+    diario.fechar()
+    resultado['ficheiro_mb'] = os.path.getsize(db_path) / 1e6
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--eventos', type=int, default=1000000)
+    parser.add_argument('--dias', type=int, default=30)
+    args = parser.parse_args()
+
+    # Janela de 24 horas que atravessa a meia-noite (duas partições)
+    janela_fim = (datetime.now() - timedelta(days=2)).replace(hour=12, minute=0, second=0, microsecond=0)
+    janela_inicio = janela_fim - timedelta(hours=24)
+
+    print(f"{args.eventos} eventos em {args.dias} dias; janela {janela_inicio:%d/%m %H:%M} - "
+          f"{janela_fim:%d/%m %H:%M}")
+    print(f"{'modo':8}{'registo (µs/ev)':>17}{'RSS (MB)':>10}{'janela (ms)':>13}{'eventos':>9}"
+          f"{'críticos (ms)':>15}{'retenção (ms)':>15}{'após reabrir':>14}")
+    with tempfile.TemporaryDirectory() as pasta:
+        # Diário primeiro: o RSS não volta a descer depois de libertar a lista
+        for modo in ('diario', 'lista'):
+            eventos = gerar_eventos(args.eventos, args.dias)
+            if modo == 'lista':
+                r = modo_lista(eventos, janela_inicio, janela_fim)
+                reaberto = 'perdido'
+            else:
+                r = modo_diario(eventos, janela_inicio, janela_fim, pasta)
+                reaberto = f"{r['reaberto_n']} ev"
+            print(f"{modo:8}{r['registo_s'] / args.eventos * 1e6:>17.2f}{r['rss_mb']:>10.0f}"
+                  f"{r['janela_ms']:>13.1f}{r['janela_n']:>9}{r['criticos_ms']:>15.1f}"
+                  f"{r['retencao_ms']:>15.1f}{reaberto:>14}")
+            if modo == 'diario':
+                print(f"diário: {r['ficheiro_mb']:.0f} MB em disco; reabrir + consulta {r['reaberto_ms']:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark - Envio de um anexo grande para muitos destinatários
+═══════════════════════════════════════════════════════════════════════
+
+Envia o mesmo anexo (50 MB por omissão) para 100 destinatários através do
+servidor SMTP local (benchmarks/smtp_stub.py) e mede tempo total e pico de
+RSS de:
+- envio antigo: ficheiro lido inteiro, codificado em memória por mensagem
+- send_email_with_attachments: base64 em streaming + cache de anexos
+
+Cada modo corre num subprocesso próprio, porque o pico de RSS
+(ru_maxrss) só cresce ao longo da vida do processo.
+
+Uso:
+    python benchmarks/bench_email_anexos.py [--tamanho-mb 50] [--destinatarios 100]
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def pico_rss_mb():
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux devolve KB, macOS devolve bytes
+    return pico / 1e6 if sys.platform == 'darwin' else pico / 1e3
+
+
+def enviar_antigo(sender, destino, caminho):
+    """Reproduz o envio antigo: anexo lido e codificado inteiro por mensagem"""
+    from email.mime.base import MIMEBase
+    from email import encoders
+    from email_transport import obter_pool
+
+    smtp_config = sender.config.get_smtp_config()
+    msg = sender._criar_mensagem(smtp_config, destino, "Protocolo", "Segue o protocolo.", "Paciente")
+    with open(caminho, "rb") as attachment:
+        part = MIMEBase('application', 'pdf')
+        part.set_payload(attachment.read())
+    encoders.encode_base64(part)
+    part.add_header('Content-Disposition', f'attachment; filename="{os.path.basename(caminho)}"')
+    msg.attach(part)
+    obter_pool(smtp_config).enviar(msg)
+
+
+def executar_modo(modo, caminho, destinatarios, pasta_cache):
+    """Corre um modo no processo atual e imprime o resultado em JSON"""
+    from smtp_stub import SMTPStub
+    from email_sender import EmailSender
+    from email_config import email_config
+    import email_attachments
+
+    logging.disable(logging.INFO)
+    email_attachments._cache = email_attachments.CacheAnexosCodificados(pasta_cache)
+    rss_inicial = pico_rss_mb()
+
+    with SMTPStub() as stub:
+        stub.configurar_email(email_config)
+        sender = EmailSender()
+
+        inicio = time.perf_counter()
+        for i in range(destinatarios):
+            destino = f'p{i}@exemplo.pt'
+            if modo == 'antigo':
+                enviar_antigo(sender, destino, caminho)
+            else:
+                sucesso, mensagem = sender.send_email_with_attachments(
+                    destino, "Protocolo", "Segue o protocolo.", [caminho], "Paciente")
+                if not sucesso:
+                    raise RuntimeError(mensagem)
+        duracao = time.perf_counter() - inicio
+
+        print(json.dumps({
+            'tempo': duracao,
+            'rss_inicial': rss_inicial,
+            'rss_pico': pico_rss_mb(),
+            'mensagens': stub.mensagens,
+            'mb_enviados': stub.bytes_recebidos / 1e6,
+            'codificacoes': email_attachments._cache.codificacoes,
+        }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tamanho-mb', type=int, default=50)
+    parser.add_argument('--destinatarios', type=int, default=100)
+    parser.add_argument('--modo', choices=['antigo', 'streaming'], help=argparse.SUPPRESS)
+    parser.add_argument('--anexo', help=argparse.SUPPRESS)
+    parser.add_argument('--cache', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        executar_modo(args.modo, args.anexo, args.destinatarios, args.cache)
+        return
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'protocolo.pdf')
+        with open(caminho, 'wb') as f:
+            for _ in range(args.tamanho_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        resultados = []
+        for modo in ('antigo', 'streaming'):
+            saida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--modo', modo, '--anexo', caminho,
+                 '--destinatarios', str(args.destinatarios), '--cache', os.path.join(pasta, 'cache')],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            resultados.append((modo, json.loads(saida.strip().splitlines()[-1])))
+
+    print(f"Anexo de {args.tamanho_mb} MB para {args.destinatarios} destinatários")
+    print(f"{'modo':12}{'tempo (s)':>12}{'msg/s':>10}{'RSS pico (MB)':>16}{'RSS extra (MB)':>17}{'codificações':>15}")
+    for modo, r in resultados:
+        print(f"{modo:12}{r['tempo']:>12.1f}{r['mensagens'] / r['tempo']:>10.1f}"
+              f"{r['rss_pico']:>16.0f}{r['rss_pico'] - r['rss_inicial']:>17.0f}{r['codificacoes']:>15}")
+
+
+if __name__ == '__main__':
+    main()
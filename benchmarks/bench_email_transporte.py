@@ -0,0 +1,84 @@
+"""
+Benchmark - Débito de envio de email (mensagens/segundo)
+═══════════════════════════════════════════════════════════════════════
+
+Envia N mensagens para um servidor SMTP local (benchmarks/smtp_stub.py) e
+compara:
+- ligação nova + login por mensagem (comportamento antigo de EmailSender)
+- send_batch_emails com o pool de ligações autenticadas
+- send_email_async através do worker com fila limitada
+
+Uso:
+    python benchmarks/bench_email_transporte.py [--mensagens 1000] [--latencia-ms 5]
+"""
+
+import argparse
+import logging
+import os
+import smtplib
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from smtp_stub import SMTPStub  # noqa: E402
+from email_sender import EmailSender  # noqa: E402
+from email_config import email_config  # noqa: E402
+import email_transport  # noqa: E402
+
+
+def enviar_sem_pool(sender, destino, indice):
+    """Reproduz o envio antigo: SMTP + login por mensagem"""
+    smtp_config = sender.config.get_smtp_config()
+    msg = sender._criar_mensagem(smtp_config, destino, f"Lembrete {indice}", "Olá {nome}", "Paciente")
+    with smtplib.SMTP(smtp_config["server"], smtp_config["port"]) as server:
+        server.login(smtp_config["email"], smtp_config["password"])
+        server.send_message(msg)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--mensagens', type=int, default=1000)
+    parser.add_argument('--latencia-ms', type=float, default=5.0,
+                        help='latência simulada na ligação e no AUTH')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    n = args.mensagens
+    emails = [{'email': f'p{i}@exemplo.pt', 'subject': f'Lembrete {i}',
+               'body': 'Olá {nome}', 'nome': f'Paciente {i}'} for i in range(n)]
+
+    resultados = []
+    with SMTPStub(latencia_ligacao=args.latencia_ms / 1000) as stub:
+        stub.configurar_email(email_config)
+        sender = EmailSender()
+
+        inicio = time.perf_counter()
+        for i in range(n):
+            enviar_sem_pool(sender, f'p{i}@exemplo.pt', i)
+        resultados.append(('ligação por mensagem', time.perf_counter() - inicio, stub.ligacoes))
+
+        ligacoes_antes = stub.ligacoes
+        inicio = time.perf_counter()
+        sucessos, erros = sender.send_batch_emails(emails)
+        assert erros == 0, f"{erros} envios falharam"
+        resultados.append(('pool (lote)', time.perf_counter() - inicio, stub.ligacoes - ligacoes_antes))
+
+        email_transport.fechar_transporte()
+        ligacoes_antes = stub.ligacoes
+        inicio = time.perf_counter()
+        futuros = [sender.send_email_async(e['email'], e['subject'], e['body'], e['nome']) for e in emails]
+        assert all(f.result()[0] for f in futuros)
+        resultados.append(('worker assíncrono', time.perf_counter() - inicio, stub.ligacoes - ligacoes_antes))
+
+        email_transport.fechar_transporte()
+
+    print(f"{n} mensagens, latência simulada {args.latencia_ms:.1f} ms")
+    print(f"{'modo':24}{'tempo (s)':>12}{'msg/s':>10}{'ligações':>10}")
+    for nome, duracao, ligacoes in resultados:
+        print(f"{nome:24}{duracao:>12.2f}{n / duracao:>10.0f}{ligacoes:>10}")
+
+
+if __name__ == '__main__':
+    main()
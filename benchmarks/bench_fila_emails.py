@@ -0,0 +1,123 @@
+"""
+Benchmark - Custo de cada verificação do scheduler com 100k emails em fila
+═══════════════════════════════════════════════════════════════════════
+
+Compara a verificação antiga (carregar e percorrer emails_agendados.json
+inteiro a cada minuto) com a fila SQLite indexada (email_queue.FilaEmails):
+tempo por verificação, tempo para agendar um email e pico de memória
+(tracemalloc).
+
+Uso:
+    python benchmarks/bench_fila_emails.py [--emails 100000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_queue import FilaEmails  # noqa: E402
+
+
+def gerar_emails(n):
+    rnd = random.Random(3)
+    base = datetime.now() + timedelta(days=1)
+    for i in range(n):
+        yield {
+            "id": f"bench_{i}",
+            "data_criacao": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "data_envio": (base + timedelta(minutes=rnd.randint(0, 60 * 24 * 90))).strftime("%Y-%m-%d %H:%M:%S"),
+            "paciente_id": str(rnd.randint(1, 5000)),
+            "paciente_nome": f"Paciente {i}",
+            "destinatario": f"p{i}@exemplo.pt",
+            "assunto": "Lembrete de consulta",
+            "mensagem": "Caro(a) paciente,\n\nRelembramos a sua consulta." * 3,
+            "anexos": [],
+            "status": "agendado",
+        }
+
+
+def verificacao_json(caminho):
+    """Verificação antiga: json.load + strptime de todos os agendados"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        emails = json.load(f)
+    agora = datetime.now()
+    vencidos = []
+    for email in emails:
+        if email.get("status") != "agendado":
+            continue
+        try:
+            data_envio = datetime.strptime(email["data_envio"], "%Y-%m-%d %H:%M:%S")
+        except (KeyError, ValueError):
+            continue
+        if data_envio <= agora:
+            vencidos.append(email)
+    return vencidos
+
+
+def agendar_json(caminho, email):
+    """Agendamento antigo: ler, acrescentar e reescrever o ficheiro inteiro"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        emails = json.load(f)
+    emails.append(email)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(emails, f, indent=2, ensure_ascii=False)
+
+
+def verificacao_fila(fila):
+    fila.reclamar_vencidos()
+    return fila.proximo_envio()
+
+
+def medir(funcao, repeticoes):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    duracao_ms = (time.perf_counter() - inicio) * 1000 / repeticoes
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracao_ms, pico / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--emails', type=int, default=100000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_json = os.path.join(pasta, 'emails_agendados.json')
+        emails = list(gerar_emails(args.emails))
+        with open(caminho_json, 'w', encoding='utf-8') as f:
+            json.dump(emails, f, indent=2, ensure_ascii=False)
+
+        fila = FilaEmails(os.path.join(pasta, 'emails_agendados.db'))
+        fila.inserir_varios(emails)
+        del emails
+
+        novo = next(gerar_emails(1))
+        novo["id"] = "bench_novo"
+
+        resultados = [
+            ('verificação JSON', medir(lambda: verificacao_json(caminho_json), args.repeticoes)),
+            ('verificação SQLite', medir(lambda: verificacao_fila(fila), args.repeticoes * 20)),
+            ('agendar JSON', medir(lambda: agendar_json(caminho_json, novo), args.repeticoes)),
+            ('agendar SQLite', medir(lambda: fila.inserir(novo), args.repeticoes * 20)),
+        ]
+
+    print(f"{args.emails} emails agendados")
+    print(f"{'operação':22}{'tempo (ms)':>14}{'pico memória (MB)':>20}")
+    for nome, (duracao, pico) in resultados:
+        print(f"{nome:22}{duracao:>14.2f}{pico:>20.2f}")
+
+
+if __name__ == '__main__':
+    main()
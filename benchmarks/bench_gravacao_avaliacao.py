@@ -0,0 +1,95 @@
+"""
+Benchmark - Gravação dos resultados de uma avaliação (por item vs em lote)
+═══════════════════════════════════════════════════════════════════════
+
+Grava N resultados de avaliação (50, 500 e 5000 por omissão) numa base
+terapia_quantica.db nova, em dois modos:
+- por_item: o save_assessment_result antigo (ligação nova + commit por item)
+- lote: AssessmentResultWriter (ligação persistente, executemany, um commit
+  por flush_every resultados)
+
+Cada medição usa uma base nova numa pasta temporária; a mediana de
+--repeticoes execuções é apresentada com o número de commits feitos.
+
+Uso:
+    python benchmarks/bench_gravacao_avaliacao.py [--itens 50,500,5000] [--repeticoes 5]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def gravar_por_item(db_path, session_id, resultados):
+    """Reproduz o save_assessment_result antigo, chamado para cada item"""
+    for result in resultados:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO assessment_results
+            (session_id, item_id, score, timestamp)
+            VALUES (?, ?, ?, ?)
+        """, (session_id, result.item.id, result.score, result.timestamp))
+        conn.commit()
+        conn.close()
+    return len(resultados)
+
+
+def gravar_em_lote(db_path, session_id, resultados):
+    from terapia_quantica_window import AssessmentResultWriter
+
+    with AssessmentResultWriter(db_path, session_id, patient_id="1") as writer:
+        for result in resultados:
+            writer.add(result)
+    return -(-len(resultados) // writer.flush_every)
+
+
+MODOS = {'por_item': gravar_por_item, 'lote': gravar_em_lote}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--itens', default='50,500,5000')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    from terapia_quantica_window import (AssessmentCategory, AssessmentItem, AssessmentResult,
+                                         DatabaseManager)
+
+    aleatorio = random.Random(1234)
+    print(f"{'itens':>6}{'modo':>10}{'total (ms)':>12}{'por item (ms)':>15}{'commits':>9}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for n in [int(valor) for valor in args.itens.split(',') if valor.strip()]:
+            resultados = [AssessmentResult(
+                item=AssessmentItem(i, f"Item {i}", AssessmentCategory.FREQUENCIES, "any", "",
+                                    round(aleatorio.uniform(1, 10000), 2)),
+                score=aleatorio.uniform(-100, 100),
+                timestamp=datetime.now(),
+            ) for i in range(n)]
+
+            for modo, gravar in MODOS.items():
+                tempos = []
+                for repeticao in range(args.repeticoes):
+                    db_path = os.path.join(pasta, f"{modo}_{n}_{repeticao}.db")
+                    DatabaseManager(db_path)
+                    inicio = time.perf_counter()
+                    commits = gravar(db_path, f"session_{repeticao}", resultados)
+                    tempos.append(time.perf_counter() - inicio)
+                    with sqlite3.connect(db_path) as conn:
+                        gravados = conn.execute("SELECT COUNT(*) FROM assessment_results").fetchone()[0]
+                    conn.close()
+                    assert gravados == n, (modo, gravados, n)
+                total_ms = statistics.median(tempos) * 1000
+                print(f"{n:>6}{modo:>10}{total_ms:>12.1f}{total_ms / n:>15.3f}{commits:>9}")
+
+
+if __name__ == '__main__':
+    main()
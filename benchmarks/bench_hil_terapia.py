@@ -0,0 +1,504 @@
+"""
+Benchmark - Sessões de terapia contra HS3 simulado (hardware-in-the-loop)
+═══════════════════════════════════════════════════════════════════════
+
+Executa o código real de cada componente contra os simuladores
+determinísticos de benchmarks/hs3_simulador.py, sem ecrã
+(QT_QPA_PLATFORM=offscreen):
+
+- protocol_runner: ProtocolRunner + HS3ServiceSimulado
+- frequency_generator: FrequencyGenerator + hs3_hardware ligado ao HS3 série (pty)
+- biofeedback: BiofeedbackMonitor a amostrar o HS3 série durante a geração
+- assessment: AssessmentWorker + HS3ServiceSimulado
+- hs3_service: HS3Service real sobre a LibTiePie simulada
+
+Por cenário mede o desvio de temporização dos passos/amostras face ao
+agendamento ideal (jitter e deriva acumulada), a latência de cada comando
+ao hardware, o uso de CPU e o pico de memória. Cada cenário corre num
+subprocesso próprio, numa pasta temporária. Os resultados ficam num JSON
+que pode ser comparado com uma execução anterior.
+
+Uso:
+    python benchmarks/bench_hil_terapia.py [--cenarios protocol_runner,assessment]
+        [--passos 10] [--dwell 0.5] [--latencia-ms 1] [--saida resultados.json]
+        [--comparar anterior.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SEMENTE = 1234
+
+COMANDOS_SERVICO = [
+    'configure_generator', 'set_frequency', 'start_output', 'stop_output',
+    'set_burst_by_cycles', 'enable_ext_trigger_gated',
+    'start_stream', 'read_stream', 'stop_stream',
+]
+COMANDOS_SERIE = ['set_frequency', 'set_amplitude', 'set_offset', 'start_generation',
+                  'stop_generation', 'get_status']
+
+
+# ═══════════════ MEDIÇÃO ═══════════════
+
+def estatisticas_ms(valores):
+    """n, média, p95 e máximo (ms) de uma lista de durações em segundos"""
+    if not valores:
+        return {'n': 0}
+    ordenados = sorted(valores)
+    return {
+        'n': len(ordenados),
+        'media': sum(ordenados) / len(ordenados) * 1000,
+        'p95': ordenados[int(0.95 * (len(ordenados) - 1))] * 1000,
+        'max': ordenados[-1] * 1000,
+    }
+
+
+def cronometrar(objeto, nomes, extra=()):
+    """Envolve métodos da instância para registar a duração de cada chamada"""
+    registo = {}
+    for nome in list(nomes) + list(extra):
+        original = getattr(objeto, nome, None)
+        if original is None:
+            continue
+
+        def envolvido(*args, _original=original, _nome=nome, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                registo.setdefault(_nome, []).append(time.perf_counter() - inicio)
+
+        registo[nome] = []
+        setattr(objeto, nome, envolvido)
+    return registo
+
+
+def temporizacao(inicios, inicio_ideal, duracoes):
+    """
+    Compara instantes reais com o agendamento ideal
+
+    - jitter: |intervalo real - duração prevista| entre passos consecutivos
+    - deriva: atraso acumulado de cada passo face ao instante ideal
+    """
+    ideais = []
+    instante = inicio_ideal
+    for duracao in duracoes[:len(inicios)]:
+        ideais.append(instante)
+        instante += duracao
+    derivas = [real - ideal for real, ideal in zip(inicios, ideais)]
+    jitter = [abs((inicios[i] - inicios[i - 1]) - duracoes[i - 1]) for i in range(1, len(inicios))]
+    return {
+        'jitter_ms': estatisticas_ms(jitter),
+        'deriva_final_ms': derivas[-1] * 1000 if derivas else None,
+        'deriva_max_ms': max(derivas) * 1000 if derivas else None,
+    }
+
+
+class Recursos:
+    """Tempo de parede, CPU (utilizador + sistema) e pico de RSS de um bloco"""
+
+    def __enter__(self):
+        import resource
+        self._uso = resource.getrusage(resource.RUSAGE_SELF)
+        self._inicio = time.perf_counter()
+        self.rss_inicial = self._rss(self._uso)
+        return self
+
+    @staticmethod
+    def _rss(uso):
+        # Linux devolve KB, macOS devolve bytes
+        return uso.ru_maxrss / 1e6 if sys.platform == 'darwin' else uso.ru_maxrss / 1e3
+
+    def __exit__(self, *exc):
+        import resource
+        uso = resource.getrusage(resource.RUSAGE_SELF)
+        self.duracao = time.perf_counter() - self._inicio
+        self.cpu = (uso.ru_utime - self._uso.ru_utime) + (uso.ru_stime - self._uso.ru_stime)
+        self.rss_pico = self._rss(uso)
+
+    def resultado(self):
+        return {
+            'duracao_s': self.duracao,
+            'cpu_s': self.cpu,
+            'cpu_percent': 100 * self.cpu / self.duracao if self.duracao else 0.0,
+            'rss_pico_mb': self.rss_pico,
+            'rss_extra_mb': self.rss_pico - self.rss_inicial,
+        }
+
+
+def frequencias(n):
+    """Frequências reprodutíveis entre 10 Hz e 400 Hz"""
+    return [round(10 + i * 390 / max(n - 1, 1), 2) for i in range(n)]
+
+
+def latencias(registo):
+    return {nome: estatisticas_ms(valores) for nome, valores in registo.items() if valores}
+
+
+def _aplicacao():
+    from PyQt6.QtCore import QCoreApplication
+    return QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+
+# ═══════════════ CENÁRIOS ═══════════════
+
+def cenario_protocol_runner(args):
+    from PyQt6.QtCore import QTimer
+    from hs3_simulador import HS3ServiceSimulado
+    from biodesk.quantum.protocol_runner import ProtocolRunner, create_simple_protocol
+
+    app = _aplicacao()
+    hs3 = HS3ServiceSimulado(args.latencia_ms / 1000, SEMENTE)
+    registo = cronometrar(hs3, COMANDOS_SERVICO)
+    runner = ProtocolRunner(hs3)
+    protocolo = create_simple_protocol("HIL", frequencias(args.passos), amplitude=1.0, dwell_time=args.dwell)
+
+    inicios = []
+    estado = {}
+    runner.step_started.connect(lambda indice, passo: inicios.append(time.perf_counter()))
+    runner.finished.connect(app.quit)
+    runner.aborted.connect(lambda motivo: (estado.update(erro=motivo), app.quit()))
+    runner.error_occurred.connect(lambda mensagem: (estado.update(erro=mensagem), app.quit()))
+
+    def iniciar():
+        estado['inicio'] = time.perf_counter()
+        runner.start_protocol(protocolo)
+
+    QTimer.singleShot(0, iniciar)
+    QTimer.singleShot(int((protocolo.total_duration_s + 30) * 1000), app.quit)
+    with Recursos() as recursos:
+        app.exec()
+
+    resultado = recursos.resultado()
+    resultado.update(temporizacao(inicios, estado['inicio'], [p.dwell_s for p in protocolo.steps]))
+    resultado['passos'] = len(inicios)
+    resultado['duracao_ideal_s'] = protocolo.total_duration_s
+    resultado['latencia_comandos'] = latencias(registo)
+    if 'erro' in estado:
+        resultado['erro'] = estado['erro']
+    return resultado
+
+
+def _ligar_hs3_serie(simulador):
+    from hs3_hardware import hs3_hardware
+    resposta = hs3_hardware.connect(simulador.porta)
+    if not resposta.success:
+        raise RuntimeError(resposta.message)
+    return hs3_hardware
+
+
+def cenario_frequency_generator(args):
+    from PyQt6.QtCore import QTimer
+    from hs3_simulador import HS3SerieSimulado
+
+    app = _aplicacao()
+    # A duração dos passos do FrequencyGenerator é em segundos inteiros
+    duracao = max(1, round(args.dwell))
+
+    with HS3SerieSimulado(args.latencia_ms / 1000) as simulador:
+        hs3_hardware = _ligar_hs3_serie(simulador)
+        registo = cronometrar(hs3_hardware, COMANDOS_SERIE, extra=['_send_command'])
+        from frequency_generator import FrequencyGenerator, FrequencyStep, GenerationSession
+
+        gerador = FrequencyGenerator()
+        passos = [FrequencyStep(f, 1.0, 0.0, duracao, f"{f} Hz") for f in frequencias(args.passos)]
+        sessao = GenerationSession("hil", "Paciente HIL", "HIL", passos,
+                                   duracao * len(passos), datetime.now())
+
+        inicios = []
+        estado = {}
+        gerador.step_started.connect(lambda indice, dados: inicios.append(time.perf_counter()))
+        gerador.session_completed.connect(lambda _id: app.quit())
+        gerador.session_error.connect(lambda _id, erro: (estado.update(erro=erro), app.quit()))
+
+        def iniciar():
+            estado['inicio'] = time.perf_counter()
+            resposta = gerador.start_session(sessao)
+            if not resposta.success:
+                estado['erro'] = resposta.message
+                app.quit()
+
+        QTimer.singleShot(0, iniciar)
+        QTimer.singleShot((sessao.total_duration + 30) * 1000, app.quit)
+        with Recursos() as recursos:
+            app.exec()
+        hs3_hardware.disconnect()
+
+    resultado = recursos.resultado()
+    resultado.update(temporizacao(inicios, estado['inicio'], [p.duration_seconds for p in passos]))
+    resultado['passos'] = len(inicios)
+    resultado['duracao_ideal_s'] = sessao.total_duration
+    resultado['latencia_comandos'] = latencias(registo)
+    resultado['comandos_serie'] = len(simulador.comandos)
+    if 'erro' in estado:
+        resultado['erro'] = estado['erro']
+    return resultado
+
+
+def cenario_biofeedback(args):
+    import numpy as np
+    from PyQt6.QtCore import QTimer
+    from hs3_simulador import HS3SerieSimulado
+
+    app = _aplicacao()
+    np.random.seed(SEMENTE)
+    duracao = max(1.0, args.passos * args.dwell)
+
+    with HS3SerieSimulado(args.latencia_ms / 1000) as simulador:
+        hs3_hardware = _ligar_hs3_serie(simulador)
+        hs3_hardware.set_frequency(100.0)
+        hs3_hardware.set_amplitude(1.0)
+        hs3_hardware.start_generation()
+        registo = cronometrar(hs3_hardware, ['get_status'], extra=['_send_command'])
+
+        from biofeedback_monitor import BiofeedbackMonitor
+        monitor = BiofeedbackMonitor(sampling_rate=10)
+        instantes = []
+        monitor.reading_available.connect(lambda leitura: instantes.append(time.perf_counter()))
+
+        estado = {}
+
+        def iniciar():
+            estado['inicio'] = time.perf_counter()
+            if not monitor.start_monitoring("hil", "Paciente HIL"):
+                estado['erro'] = "start_monitoring falhou"
+                app.quit()
+
+        QTimer.singleShot(0, iniciar)
+        QTimer.singleShot(int(duracao * 1000), app.quit)
+        with Recursos() as recursos:
+            app.exec()
+        monitor.stop_monitoring()
+        hs3_hardware.disconnect()
+
+    periodo = 1.0 / monitor.sampling_rate
+    esperadas = int(duracao * monitor.sampling_rate)
+    resultado = recursos.resultado()
+    # A primeira amostra chega um período depois do início
+    resultado.update(temporizacao(instantes, estado.get('inicio', 0.0) + periodo, [periodo] * len(instantes)))
+    resultado['amostras'] = len(instantes)
+    resultado['amostras_esperadas'] = esperadas
+    resultado['latencia_comandos'] = latencias(registo)
+    if 'erro' in estado:
+        resultado['erro'] = estado['erro']
+    return resultado
+
+
+def cenario_assessment(args):
+    import random
+    from hs3_simulador import HS3ServiceSimulado
+    from biodesk.quantum.assessment_worker import AssessmentWorker, AssessmentConfig
+
+    _aplicacao()
+    random.seed(SEMENTE)
+    hs3 = HS3ServiceSimulado(args.latencia_ms / 1000, SEMENTE)
+    registo = cronometrar(hs3, COMANDOS_SERVICO)
+    worker = AssessmentWorker(hs3)
+    analise = cronometrar(worker, ['_calculate_baseline_metrics', '_calculate_frequency_metrics'])
+    config = AssessmentConfig(frequencies=frequencias(args.passos), dwell_s=args.dwell,
+                              baseline_duration_s=1.0, sample_rate_hz=1000.0, top_n=3)
+
+    instantes = []
+    estado = {}
+    # Ligações diretas: chamadas na thread do worker
+    worker.baseline_measured.connect(lambda dados: instantes.append(time.perf_counter()))
+    worker.result_item.connect(lambda dados: instantes.append(time.perf_counter()))
+    worker.error.connect(lambda mensagem: estado.update(erro=mensagem))
+
+    with Recursos() as recursos:
+        estado['inicio'] = time.perf_counter()
+        if worker.start_assessment(config):
+            worker.wait()
+
+    # Baseline: 0.5 s sem saída + 0.5 s de estabilização + aquisição;
+    # cada frequência: 0.2 s de estabilização + dwell
+    baseline = 1.0 + config.baseline_duration_s
+    duracoes = [baseline] + [0.2 + config.dwell_s] * len(config.frequencies)
+    resultado = recursos.resultado()
+    # instantes marcam o fim de cada fase: compara-se com o fim ideal
+    resultado.update(temporizacao(instantes, estado['inicio'] + baseline, duracoes[1:] + [0.0]))
+    resultado['frequencias'] = max(len(instantes) - 1, 0)
+    resultado['duracao_ideal_s'] = sum(duracoes)
+    resultado['latencia_comandos'] = latencias(registo)
+    resultado['analise_ms'] = latencias(analise)
+    if 'erro' in estado:
+        resultado['erro'] = estado['erro']
+    return resultado
+
+
+def cenario_hs3_service(args):
+    from hs3_simulador import LibTiePieSimulada
+    import biodesk.quantum.hs3_service as modulo
+
+    _aplicacao()
+    lib = LibTiePieSimulada(args.latencia_ms / 1000, SEMENTE)
+    modulo.libtiepie = lib
+    modulo.LIBTIEPIE_AVAILABLE = True
+
+    servico = modulo.HS3Service()
+    registo = cronometrar(servico, COMANDOS_SERVICO, extra=['open', 'close'])
+    lista = frequencias(args.passos)
+
+    inicios = []
+    with Recursos() as recursos:
+        servico.open()
+        # configure_generator valida a frequência atual e set_frequency a
+        # amplitude atual: a partir do estado inicial (0 Hz, 0 V) ambos são
+        # rejeitados, por isso parte-se já de valores válidos
+        servico.current_frequency = lista[0]
+        servico.current_amplitude = 1.0
+        inicio = time.perf_counter()
+        for frequencia in lista:
+            inicios.append(time.perf_counter())
+            servico.configure_generator("sine", 1.0, 0.0)
+            servico.set_frequency(frequencia)
+            servico.start_stream(1000.0, 2.0)
+            servico.start_output()
+            servico.read_stream(args.dwell)
+            servico.stop_output()
+            servico.stop_stream()
+        inicios.append(time.perf_counter())
+        servico.close()
+
+    resultado = recursos.resultado()
+    resultado.update(temporizacao(inicios, inicio, [args.dwell] * len(inicios)))
+    resultado['passos'] = len(lista)
+    resultado['duracao_ideal_s'] = args.dwell * len(lista)
+    resultado['latencia_comandos'] = latencias(registo)
+    resultado['comandos_usb'] = len(lib.comandos)
+    return resultado
+
+
+CENARIOS = {
+    'protocol_runner': cenario_protocol_runner,
+    'frequency_generator': cenario_frequency_generator,
+    'biofeedback': cenario_biofeedback,
+    'assessment': cenario_assessment,
+    'hs3_service': cenario_hs3_service,
+}
+
+
+# ═══════════════ EXECUÇÃO E RELATÓRIO ═══════════════
+
+def executar_cenario(nome, args, pasta):
+    """Corre um cenário num subprocesso e devolve o resultado (ou o erro)"""
+    ambiente = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    comando = [sys.executable, os.path.abspath(__file__), '--cenario', nome,
+               '--passos', str(args.passos), '--dwell', str(args.dwell),
+               '--latencia-ms', str(args.latencia_ms)]
+    processo = subprocess.run(comando, cwd=pasta, env=ambiente, capture_output=True, text=True)
+    linhas = processo.stdout.strip().splitlines()
+    if processo.returncode != 0 or not linhas:
+        erro = processo.stderr.strip().splitlines()
+        return {'erro': erro[-1] if erro else f"código de saída {processo.returncode}"}
+    return json.loads(linhas[-1])
+
+
+def _p95_comandos(resultado):
+    valores = [e['p95'] for e in resultado.get('latencia_comandos', {}).values() if e.get('n')]
+    return max(valores) if valores else None
+
+
+def _formatar(valor, casas=1):
+    return '-' if valor is None else f"{valor:.{casas}f}"
+
+
+def imprimir_tabela(resultados):
+    print(f"{'cenário':22}{'duração (s)':>12}{'jitter p95 (ms)':>17}{'deriva (ms)':>13}"
+          f"{'cmd p95 (ms)':>14}{'CPU %':>8}{'RSS pico (MB)':>15}")
+    for nome, r in resultados.items():
+        if 'duracao_s' not in r:
+            print(f"{nome:22}  ❌ {r.get('erro', 'sem resultado')}")
+            continue
+        print(f"{nome:22}{r['duracao_s']:>12.2f}{_formatar(r['jitter_ms'].get('p95')):>17}"
+              f"{_formatar(r['deriva_final_ms']):>13}{_formatar(_p95_comandos(r)):>14}"
+              f"{r['cpu_percent']:>8.1f}{r['rss_pico_mb']:>15.0f}")
+        if r.get('erro'):
+            print(f"{'':22}  ⚠️ {r['erro']}")
+
+
+def comparar(resultados, caminho_anterior):
+    """Mostra a variação das métricas principais face a uma execução anterior"""
+    with open(caminho_anterior, encoding='utf-8') as f:
+        anteriores = json.load(f).get('cenarios', {})
+
+    metricas = [
+        ('duração (s)', lambda r: r.get('duracao_s')),
+        ('jitter p95 (ms)', lambda r: r.get('jitter_ms', {}).get('p95')),
+        ('deriva final (ms)', lambda r: r.get('deriva_final_ms')),
+        ('cmd p95 (ms)', _p95_comandos),
+        ('CPU %', lambda r: r.get('cpu_percent')),
+        ('RSS pico (MB)', lambda r: r.get('rss_pico_mb')),
+    ]
+    print(f"\nComparação com {caminho_anterior}")
+    for nome, atual in resultados.items():
+        anterior = anteriores.get(nome)
+        if not anterior or 'duracao_s' not in anterior or 'duracao_s' not in atual:
+            continue
+        print(f"  {nome}")
+        for titulo, obter in metricas:
+            antes, depois = obter(anterior), obter(atual)
+            if antes is None or depois is None:
+                continue
+            variacao = f"{(depois - antes) / abs(antes) * 100:+.1f}%" if antes else '-'
+            print(f"    {titulo:20}{antes:>12.2f} → {depois:>10.2f}  {variacao}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cenarios', default=','.join(CENARIOS),
+                        help=f"lista separada por vírgulas ({', '.join(CENARIOS)})")
+    parser.add_argument('--passos', type=int, default=10)
+    parser.add_argument('--dwell', type=float, default=0.5, help="segundos por passo")
+    parser.add_argument('--latencia-ms', type=float, default=1.0, help="latência simulada por comando")
+    parser.add_argument('--saida', help="ficheiro JSON de resultados (omissão: hil_<data>.json)")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior")
+    parser.add_argument('--cenario', choices=list(CENARIOS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cenario:
+        import logging
+        logging.disable(logging.INFO)
+        print(json.dumps(CENARIOS[args.cenario](args)))
+        return
+
+    nomes = [nome.strip() for nome in args.cenarios.split(',') if nome.strip()]
+    desconhecidos = [nome for nome in nomes if nome not in CENARIOS]
+    if desconhecidos:
+        parser.error(f"cenários desconhecidos: {', '.join(desconhecidos)}")
+
+    print(f"{args.passos} passos de {args.dwell}s, latência simulada {args.latencia_ms} ms/comando")
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        for nome in nomes:
+            resultados[nome] = executar_cenario(nome, args, pasta)
+
+    imprimir_tabela(resultados)
+
+    saida = args.saida or f"hil_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump({
+            'data': datetime.now().isoformat(),
+            'parametros': {'passos': args.passos, 'dwell': args.dwell, 'latencia_ms': args.latencia_ms},
+            'ambiente': {'python': platform.python_version(), 'plataforma': platform.platform()},
+            'cenarios': resultados,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados em {saida}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == '__main__':
+    main()
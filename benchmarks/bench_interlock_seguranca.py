@@ -0,0 +1,274 @@
+"""
+Benchmark - Interlock de segurança no caminho de comando (sobrecarga e latência de deteção)
+═══════════════════════════════════════════════════════════════════════
+
+1. Sobrecarga por comando (µs), no próprio processo:
+   - validadores: hs3_config.validate_* + tensão total (HS3Hardware e
+     SafetyManager antigos) vs SafetyInterlock.check com os mesmos limites
+   - assert_safe_output (biodesk/quantum/safety.py) vs SafetyInterlock.check
+     compilado de SafetyLimits
+   - com PyQt6: SafetyManager.validate_parameters_before_start (o que o
+     HS3Service chamava a cada comando, com STATUS? ao HS3 série simulado)
+     vs SafetyManager.check_command
+
+2. Latência de deteção, contra o HS3 série simulado (pty), num subprocesso
+   com QT_QPA_PLATFORM=offscreen. Com o gerador ligado é enviado, num
+   instante aleatório, um offset válido por si só mas que com a amplitude
+   atual excede a tensão total (4 V + 2 V > 5 V):
+   - temporizador: desenho antigo, reproduzido aqui; o HS3Hardware só valida
+     cada parâmetro e a violação fica para a verificação periódica de um
+     QTimer de 1 s (com o estado em cache; o _update_current_parameters
+     antigo nunca lia amplitude/offset e não a detetava de todo)
+   - interlock: o comando é verificado antes de ser enviado
+   Mede quantos comandos inseguros chegaram ao dispositivo, o tempo até à
+   deteção e o custo de cada tick do temporizador antigo (o SafetyManager
+   atual já não tem temporizador de verificação).
+
+Uso:
+    python benchmarks/bench_interlock_seguranca.py [--comandos 100000] [--tentativas 20]
+        [--latencia-ms 2]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hil_terapia import SEMENTE, _ligar_hs3_serie, estatisticas_ms
+from hs3_config import hs3_config, HS3SafetyLimits
+from safety_interlock import SafetyInterlock
+
+AMPLITUDE_SEGURA = 4.0
+OFFSET_INSEGURO = 2.0  # válido sozinho (±2.5 V), mas 4 + 2 > 5 V
+
+
+def comandos_aleatorios(n):
+    """Mistura reprodutível de comandos válidos e inválidos"""
+    aleatorio = random.Random(SEMENTE)
+    return [(aleatorio.uniform(0, 1.2e6), aleatorio.uniform(0, 6), aleatorio.uniform(-3, 3))
+            for _ in range(n)]
+
+
+def validadores_antigos(frequencia, amplitude, offset):
+    """Verificações por parâmetro + tensão total, como no SafetyManager antigo"""
+    return (hs3_config.validate_frequency(frequencia)[0] and
+            hs3_config.validate_amplitude(amplitude)[0] and
+            hs3_config.validate_offset(offset)[0] and
+            amplitude + abs(offset) <= hs3_config.limits.MAX_AMPLITUDE)
+
+
+def us_por_comando(funcao, comandos, repeticoes=5):
+    """Mediana (em µs por comando) de várias passagens pela lista"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for frequencia, amplitude, offset in comandos:
+            funcao(frequencia, amplitude, offset)
+        tempos.append((time.perf_counter() - inicio) / len(comandos))
+    return sorted(tempos)[len(tempos) // 2] * 1e6
+
+
+def sobrecarga_sem_qt(comandos):
+    from biodesk.quantum.safety import SafetyError, SafetyLimits, assert_safe_output
+
+    hs3 = SafetyInterlock.from_hs3_limits(HS3SafetyLimits())
+    limites = SafetyLimits()
+    quantum = SafetyInterlock.from_safety_limits(limites)
+
+    def assert_antigo(frequencia, amplitude, offset):
+        try:
+            assert_safe_output(amplitude, offset, limites)
+            return True
+        except SafetyError:
+            return False
+
+    # Os dois caminhos têm de aceitar e rejeitar exatamente os mesmos comandos
+    for frequencia, amplitude, offset in comandos[:10000]:
+        assert validadores_antigos(frequencia, amplitude, offset) == \
+            (hs3.check(frequencia, amplitude, offset) is None)
+        assert assert_antigo(frequencia, amplitude, offset) == \
+            (quantum.check(amplitude=amplitude, offset=offset) is None)
+
+    # O caso normal é um comando válido; nos rejeitados domina a formatação da mensagem
+    validos = [comando for comando in comandos if validadores_antigos(*comando)]
+    linhas = []
+    for nome, lista in (('válidos', validos), ('mistos', comandos)):
+        linhas += [
+            (f'hs3_config.validate_* + total ({nome})', us_por_comando(validadores_antigos, lista),
+             'interlock (HS3SafetyLimits)', us_por_comando(hs3.check, lista)),
+            (f'assert_safe_output ({nome})', us_por_comando(assert_antigo, lista),
+             'interlock (SafetyLimits)',
+             us_por_comando(lambda f, a, o: quantum.check(amplitude=a, offset=o), lista)),
+        ]
+    return linhas
+
+
+# ═══════════════ PARTE QT (subprocesso) ═══════════════
+
+def tick_antigo(gestor, hs3_hardware):
+    """Verificação periódica do SafetyManager antigo: STATUS? ao HS3 e todas as regras"""
+    from safety_manager import SafetyLevel
+
+    hs3_hardware.get_status()
+    gestor._update_current_parameters()
+    violacoes = [regra.name for regra in gestor.safety_rules
+                 if regra.enabled and regra.level == SafetyLevel.CRITICAL and not regra.check_function()]
+    if violacoes:
+        gestor.emergency_shutdown(f"Violações automáticas: {', '.join(violacoes)}")
+
+
+def parte_qt(args):
+    from PyQt6.QtCore import QCoreApplication, QTimer
+    from hs3_simulador import HS3SerieSimulado
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    logging.disable(logging.CRITICAL)  # cada aprovação é registada; não medir a consola
+    from safety_manager import SafetyManager
+
+    resultado = {}
+    with HS3SerieSimulado(args.latencia_ms / 1000) as simulador:
+        hs3_hardware = _ligar_hs3_serie(simulador)
+        gestor = SafetyManager()
+        interlock = hs3_hardware.interlock
+
+        # Sobrecarga por comando com o HS3 ligado (o antigo inclui STATUS? ao dispositivo)
+        comandos = [(440.0, 1.0, 0.0)] * 200
+        resultado['sobrecarga'] = [
+            ('validate_parameters_before_start',
+             us_por_comando(gestor.validate_parameters_before_start, comandos, 3),
+             'check_command', us_por_comando(gestor.check_command, comandos)),
+        ]
+
+        # Custo de um tick do temporizador antigo (com STATUS? ao HS3)
+        duracoes = []
+        for _ in range(50):
+            inicio = time.perf_counter()
+            tick_antigo(gestor, hs3_hardware)
+            duracoes.append(time.perf_counter() - inicio)
+        resultado['tick_ms'] = {'temporizador': estatisticas_ms(duracoes)}
+
+        # Latência de deteção de um comando inseguro
+        aleatorio = random.Random(SEMENTE)
+        deteccao = {}
+        for modo in ('temporizador', 'interlock'):
+            latencias, chegaram = [], 0
+            for _ in range(args.tentativas):
+                if not hs3_hardware.is_connected():
+                    _ligar_hs3_serie(simulador)
+                if modo == 'temporizador':
+                    # HS3Hardware antigo: só limites individuais, sem tensão total
+                    hs3_hardware.interlock = SafetyInterlock(
+                        interlock.min_frequency, interlock.max_frequency,
+                        interlock.min_amplitude, interlock.max_amplitude,
+                        interlock.min_offset, interlock.max_offset)
+                else:
+                    hs3_hardware.interlock = interlock
+
+                hs3_hardware.set_offset(0.0)
+                hs3_hardware.set_frequency(440.0)
+                hs3_hardware.set_amplitude(AMPLITUDE_SEGURA)
+                hs3_hardware.start_generation()
+                if not gestor.start_monitoring():
+                    raise RuntimeError("monitorização de segurança não arrancou")
+                temporizador = QTimer()
+                temporizador.timeout.connect(lambda: tick_antigo(gestor, hs3_hardware))
+                if modo == 'temporizador':
+                    temporizador.start(1000)
+
+                estado = {}
+                gestor.emergency_stop_triggered.connect(
+                    lambda: (estado.setdefault('detetado', time.perf_counter()), app.quit()))
+
+                def enviar():
+                    inicio = time.perf_counter()
+                    resposta = hs3_hardware.set_offset(OFFSET_INSEGURO)
+                    estado['enviado'] = inicio
+                    if not resposta.success:
+                        estado['detetado'] = time.perf_counter()
+                        app.quit()
+
+                QTimer.singleShot(int(aleatorio.uniform(0, 1000)), enviar)
+                QTimer.singleShot(5000, app.quit)
+                app.exec()
+                temporizador.stop()
+                gestor.emergency_stop_triggered.disconnect()
+                gestor.stop_monitoring()
+
+                recebidos = [instante for instante, comando in simulador.comandos
+                             if comando == f"OFFS {OFFSET_INSEGURO}" and instante >= estado.get('enviado', 0)]
+                chegaram += bool(recebidos)
+                if 'detetado' in estado:
+                    latencias.append(estado['detetado'] - estado['enviado'])
+                if hs3_hardware.is_connected():
+                    hs3_hardware.stop_generation()
+            deteccao[modo] = {'chegaram': chegaram, 'tentativas': args.tentativas,
+                              'latencia_ms': estatisticas_ms(latencias)}
+        resultado['deteccao'] = deteccao
+        hs3_hardware.interlock = interlock
+        hs3_hardware.disconnect()
+
+    print(json.dumps(resultado))
+
+
+def imprimir_sobrecarga(linhas):
+    for antigo, t_antigo, novo, t_novo in linhas:
+        print(f"{antigo:44}{t_antigo:>10.2f}   {novo:28}{t_novo:>10.2f}{t_antigo / t_novo:>9.1f}×")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--comandos', type=int, default=100000)
+    parser.add_argument('--tentativas', type=int, default=20)
+    parser.add_argument('--latencia-ms', type=float, default=2.0)
+    parser.add_argument('--parte', choices=['qt'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.parte == 'qt':
+        parte_qt(args)
+        return
+
+    print("Sobrecarga por comando (µs, mediana)")
+    print(f"{'antes':44}{'µs':>10}   {'depois':28}{'µs':>10}{'':>10}")
+    imprimir_sobrecarga(sobrecarga_sem_qt(comandos_aleatorios(args.comandos)))
+
+    ambiente = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    with tempfile.TemporaryDirectory() as pasta:
+        processo = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--parte', 'qt',
+             '--tentativas', str(args.tentativas), '--latencia-ms', str(args.latencia_ms)],
+            cwd=pasta, env=ambiente, capture_output=True, text=True)
+    linhas = processo.stdout.strip().splitlines()
+    if processo.returncode != 0 or not linhas:
+        erro = processo.stderr.strip().splitlines()
+        print(f"\nParte com HS3 simulado não executada: {erro[-1] if erro else processo.returncode}")
+        return
+
+    r = json.loads(linhas[-1])
+    imprimir_sobrecarga(r['sobrecarga'])
+
+    print(f"\nHS3 série simulado (latência {args.latencia_ms} ms), comando inseguro "
+          f"{AMPLITUDE_SEGURA} V + {OFFSET_INSEGURO} V")
+    print(f"{'modo':14}{'chegou ao HS3':>15}{'deteção média (ms)':>20}{'p95 (ms)':>10}"
+          f"{'máx (ms)':>10}{'tick p95 (ms)':>15}")
+    for modo, d in r['deteccao'].items():
+        lat = d['latencia_ms']
+        if lat.get('n'):
+            tempos = f"{lat['media']:>20.3f}{lat['p95']:>10.3f}{lat['max']:>10.3f}"
+        else:
+            tempos = f"{'não detetado':>20}{'-':>10}{'-':>10}"
+        chegaram = f"{d['chegaram']}/{d['tentativas']}"
+        tick = f"{r['tick_ms'][modo]['p95']:>15.3f}" if modo in r['tick_ms'] else f"{'-':>15}"
+        print(f"{modo:14}{chegaram:>15}{tempos}{tick}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark - Abertura, memória e zoom/pan de uma fotografia de íris de 24 MP
+═══════════════════════════════════════════════════════════════════════
+
+Gera uma imagem JPEG sintética de 6000x4000 e mostra-a num IrisGraphicsView
+de 1280x800 (QT_QPA_PLATFORM=offscreen) em três modos, cada um num processo:
+- pixmap: comportamento antigo (QPixmap completo + addPixmap)
+- piramide_fria: ItemPiramideIris na primeira abertura (gera a pirâmide)
+- piramide: ItemPiramideIris com a pirâmide já em cache no disco
+
+Mede o tempo de abertura até ao primeiro frame, a memória residente depois
+da abertura e o tempo de frame de uma sequência de zoom (roda do rato) e
+pan. Corre numa pasta temporária.
+
+Uso:
+    python benchmarks/bench_iris_piramide.py [--largura 6000] [--altura 4000]
+        [--modos pixmap,piramide_fria,piramide]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hil_terapia import SEMENTE, estatisticas_ms
+from qt_app import garantir_aplicacao
+
+
+def rss_atual_mb():
+    """Memória residente atual (Linux); 0 se /proc não existir"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except OSError:
+        return 0.0
+
+
+def gerar_imagem(caminho, largura, altura):
+    """Íris sintética: gradiente radial com fibras aleatórias"""
+    from PyQt6.QtCore import QPointF, Qt
+    from PyQt6.QtGui import QColor, QImage, QPainter, QPen, QRadialGradient
+
+    aleatorio = random.Random(SEMENTE)
+    imagem = QImage(largura, altura, QImage.Format.Format_RGB32)
+    imagem.fill(QColor(20, 16, 14))
+    painter = QPainter(imagem)
+    centro = QPointF(largura / 2, altura / 2)
+    raio = min(largura, altura) * 0.45
+    gradiente = QRadialGradient(centro, raio)
+    gradiente.setColorAt(0.0, QColor(5, 5, 5))
+    gradiente.setColorAt(0.22, QColor(10, 10, 10))
+    gradiente.setColorAt(0.25, QColor(120, 90, 50))
+    gradiente.setColorAt(1.0, QColor(60, 80, 110))
+    painter.setBrush(gradiente)
+    painter.setPen(Qt.PenStyle.NoPen)
+    painter.drawEllipse(centro, raio, raio)
+    for _ in range(40000):
+        angulo = aleatorio.uniform(0, 6.2832)
+        interior = raio * aleatorio.uniform(0.25, 0.95)
+        exterior = interior + raio * aleatorio.uniform(0.02, 0.1)
+        painter.setPen(QPen(QColor(aleatorio.randrange(256), aleatorio.randrange(200),
+                                   aleatorio.randrange(160), 90), aleatorio.uniform(1, 4)))
+        direcao = QPointF(math.cos(angulo), math.sin(angulo))
+        painter.drawLine(centro + direcao * interior, centro + direcao * exterior)
+    painter.end()
+    imagem.save(caminho, 'JPG', 92)
+
+
+def executar_modo(modo, args):
+    from PyQt6.QtCore import QPoint, QPointF, Qt
+    from PyQt6.QtGui import QPixmap, QWheelEvent
+    from PyQt6.QtWidgets import QApplication, QGraphicsScene
+
+    app = QApplication(sys.argv)
+    from iris_canvas import IrisGraphicsView
+    from iris_piramide import CachePiramides, ItemPiramideIris
+
+    if modo == 'piramide_fria':
+        shutil.rmtree(args.cache, ignore_errors=True)
+
+    view = IrisGraphicsView()
+    view.resize(1280, 800)
+    view.show()
+    app.processEvents()
+    rss_base = rss_atual_mb()
+
+    # Abertura: carregar, ajustar à janela e pintar o primeiro frame
+    inicio = time.perf_counter()
+    scene = QGraphicsScene()
+    if modo == 'pixmap':
+        pixmap = QPixmap(args.imagem)
+        item = scene.addPixmap(pixmap)
+    else:
+        cache = CachePiramides(args.cache)
+        item = ItemPiramideIris(cache.obter(args.imagem))
+        scene.addItem(item)
+    scene.setSceneRect(item.boundingRect())
+    view.setScene(scene)
+    view.fitInView(scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
+    view.grab()
+    abertura = time.perf_counter() - inicio
+    rss_abertura = rss_atual_mb() - rss_base
+
+    # Zoom com a roda do rato em pontos aleatórios, pan e regresso
+    aleatorio = random.Random(SEMENTE)
+    frames = {'zoom': [], 'pan': []}
+
+    def rodar(delta):
+        ponto = QPointF(aleatorio.uniform(200, 1080), aleatorio.uniform(150, 650))
+        evento = QWheelEvent(ponto, view.mapToGlobal(ponto), QPoint(), QPoint(0, delta),
+                             Qt.MouseButton.NoButton, Qt.KeyboardModifier.NoModifier,
+                             Qt.ScrollPhase.NoScrollPhase, False)
+        view.wheelEvent(evento)
+
+    for _ in range(args.ciclos):
+        for delta in [120] * 12 + [-120] * 12:
+            rodar(delta)
+            inicio = time.perf_counter()
+            view.grab()
+            frames['zoom'].append(time.perf_counter() - inicio)
+        for _ in range(6):
+            rodar(120)
+        for _ in range(60):
+            view.translate(aleatorio.uniform(-80, 80), aleatorio.uniform(-80, 80))
+            inicio = time.perf_counter()
+            view.grab()
+            frames['pan'].append(time.perf_counter() - inicio)
+        view.fitInView(scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
+
+    resultado = {
+        'abertura_s': abertura,
+        'rss_abertura_mb': rss_abertura,
+        'rss_final_mb': rss_atual_mb() - rss_base,
+        'zoom_ms': estatisticas_ms(frames['zoom']),
+        'pan_ms': estatisticas_ms(frames['pan']),
+    }
+    if modo != 'pixmap':
+        resultado['mosaicos_lidos'] = item.mosaicos_lidos
+    print(json.dumps(resultado))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--largura', type=int, default=6000)
+    parser.add_argument('--altura', type=int, default=4000)
+    parser.add_argument('--ciclos', type=int, default=3)
+    parser.add_argument('--modos', default='pixmap,piramide_fria,piramide')
+    parser.add_argument('--modo', choices=['gerar', 'pixmap', 'piramide_fria', 'piramide'],
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--imagem', help=argparse.SUPPRESS)
+    parser.add_argument('--cache', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo == 'gerar':
+        from PyQt6.QtGui import QGuiApplication
+        garantir_aplicacao(QGuiApplication)
+        gerar_imagem(args.imagem, args.largura, args.altura)
+        return
+    if args.modo:
+        executar_modo(args.modo, args)
+        return
+
+    ambiente = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    with tempfile.TemporaryDirectory() as pasta:
+        imagem = os.path.join(pasta, 'iris_esq.jpg')
+        cache = os.path.join(pasta, 'piramides')
+        comum = [sys.executable, os.path.abspath(__file__), '--imagem', imagem, '--cache', cache,
+                 '--largura', str(args.largura), '--altura', str(args.altura),
+                 '--ciclos', str(args.ciclos)]
+        subprocess.run(comum + ['--modo', 'gerar'], cwd=pasta, env=ambiente, check=True)
+
+        megapixels = args.largura * args.altura / 1e6
+        print(f"Imagem {args.largura}x{args.altura} ({megapixels:.0f} MP, "
+              f"{os.path.getsize(imagem) / 1e6:.1f} MB JPEG), viewport 1280x800")
+        print(f"{'modo':15}{'abertura (ms)':>15}{'RSS abertura (MB)':>19}{'RSS final (MB)':>16}"
+              f"{'zoom p95 (ms)':>15}{'pan p95 (ms)':>14}{'pan máx (ms)':>14}")
+        for modo in [m.strip() for m in args.modos.split(',') if m.strip()]:
+            saida = subprocess.run(comum + ['--modo', modo], cwd=pasta, env=ambiente,
+                                   check=True, capture_output=True, text=True).stdout
+            r = json.loads(saida.strip().splitlines()[-1])
+            print(f"{modo:15}{r['abertura_s'] * 1000:>15.0f}{r['rss_abertura_mb']:>19.0f}"
+                  f"{r['rss_final_mb']:>16.0f}{r['zoom_ms']['p95']:>15.1f}{r['pan_ms']['p95']:>14.1f}"
+                  f"{r['pan_ms']['max']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
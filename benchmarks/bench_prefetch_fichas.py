@@ -0,0 +1,271 @@
+"""
+Benchmark - Abrir fichas de pacientes (leituras síncronas vs pré-carregamento em fundo)
+═══════════════════════════════════════════════════════════════════════
+
+Cria numa pasta temporária uma pacientes.db com N pacientes (2 000 por
+omissão), imagens de íris, consentimentos e pastas de documentos (algumas
+com duas pastas candidatas, {id} e {id}_{nome}). Depois executa um guião
+de --aberturas trocas de paciente sobre os resultados da pesquisa: 60%
+abre o seguinte, 20% o anterior e 20% salta para um resultado qualquer;
+entre selecionar e abrir passam --espera-ms (o utilizador a olhar para a
+lista).
+
+Mede o tempo das leituras de dados que abrir a ficha faz na thread da
+interface:
+- antigo: obter_paciente, imagens de íris, escolha da pasta de documentos
+  (com o nome lido da BD) e duas listagens da pasta, ConsentimentosManager
+  novo e estado dos consentimentos
+- prefetch: PrefetchPacientes.pedir_vizinhos ao selecionar; ao abrir, as
+  partes pré-carregadas saem do DataCache e só as restantes vão à BD/disco
+
+Com PyQt6 (QT_QPA_PLATFORM=offscreen) mede também as miniaturas da
+galeria de íris: QPixmap da imagem inteira + scaled vs QImage já reduzida.
+
+Uso:
+    python benchmarks/bench_prefetch_fichas.py [--pacientes 2000] [--aberturas 200] [--espera-ms 150]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hil_terapia import SEMENTE, estatisticas_ms
+from qt_app import garantir_aplicacao
+
+TIPOS_CONSENTIMENTO = ['naturopatia', 'osteopatia', 'iridologia', 'quantica', 'mesoterapia', 'rgpd']
+
+
+def criar_dados(n, imagens_iris=None):
+    """pacientes.db e Documentos_Pacientes na pasta atual"""
+    from schema_migrations import aplicar_migracoes
+    aplicar_migracoes('pacientes.db', 'pacientes')
+    aleatorio = random.Random(SEMENTE)
+    conn = sqlite3.connect('pacientes.db')
+    with conn:
+        for i in range(1, n + 1):
+            nome = f"Paciente {i:05d} Silva"
+            conn.execute("INSERT INTO pacientes (id, nome, email, contacto, historico) VALUES (?, ?, ?, ?, ?)",
+                         (i, nome, f"p{i}@exemplo.pt", f"91{i:07d}", "Histórico " * 200))
+            for tipo in ('ESQ', 'DRT'):
+                caminho = imagens_iris[aleatorio.randrange(len(imagens_iris))] if imagens_iris else f"iris/{i}_{tipo}.jpg"
+                conn.execute("INSERT INTO imagens_iris (paciente_id, tipo, caminho_imagem) VALUES (?, ?, ?)",
+                             (i, tipo, caminho))
+            for tipo in aleatorio.sample(TIPOS_CONSENTIMENTO, 3):
+                conn.execute("INSERT INTO consentimentos (paciente_id, tipo_consentimento, data_assinatura, status, "
+                             "data_criacao) VALUES (?, ?, ?, 'assinado', ?)",
+                             (i, tipo, "2025-03-01 10:00:00", "2025-03-01 10:00:00"))
+            pastas = [Path("Documentos_Pacientes") / f"{i}_{nome.replace(' ', '_')}"]
+            if i % 4 == 0:
+                pastas.append(Path("Documentos_Pacientes") / str(i))  # pasta antiga sem nome
+            for pasta in pastas:
+                for sub in ("", "Declaracoes", "Prescricoes"):
+                    (pasta / sub).mkdir(parents=True, exist_ok=True)
+                    for k in range(aleatorio.randint(3, 12)):
+                        (pasta / sub / f"doc_{k}.pdf").write_bytes(b"%PDF-1.4\n" + b"x" * 200)
+    conn.close()
+
+
+def guiao(n_resultados, aberturas):
+    aleatorio = random.Random(SEMENTE + 1)
+    indice = aleatorio.randrange(n_resultados)
+    passos = []
+    for _ in range(aberturas):
+        r = aleatorio.random()
+        if r < 0.6:
+            indice = min(n_resultados - 1, indice + 1)
+        elif r < 0.8:
+            indice = max(0, indice - 1)
+        else:
+            indice = aleatorio.randrange(n_resultados)
+        passos.append(indice)
+    return passos
+
+
+# ═══════════════ LEITURAS AO ABRIR A FICHA ═══════════════
+
+def pasta_documentos_antiga(paciente_id):
+    """GestaoDocumentosWidget.get_pasta_documentos antes desta alteração (sem os prints)"""
+    base = Path("Documentos_Pacientes")
+    base.mkdir(parents=True, exist_ok=True)
+    pasta_exacta = base / str(paciente_id)
+    candidatos = sorted(base.glob(f"{paciente_id}_*"))
+    todas_opcoes = ([pasta_exacta] if pasta_exacta.exists() else []) + candidatos
+    if not todas_opcoes:
+        pasta_exacta.mkdir(parents=True, exist_ok=True)
+        return pasta_exacta
+    conn = sqlite3.connect('pacientes.db')
+    resultado = conn.execute('SELECT nome FROM pacientes WHERE id = ?', (paciente_id,)).fetchone()
+    conn.close()
+    if resultado:
+        esperada = f"{paciente_id}_{resultado[0].replace(' ', '_')}"
+        for pasta in todas_opcoes:
+            if pasta.name == esperada:
+                return pasta
+    melhor, melhor_score = None, -1
+    for pasta in todas_opcoes:
+        arquivos = [f for f in pasta.rglob("*") if f.is_file() and not f.name.endswith('.meta')]
+        recente = max(f.stat().st_mtime for f in arquivos) if arquivos else 0
+        score = (recente / 1000000 if recente > 0 else 0) + len(arquivos) * 0.1
+        if score > melhor_score:
+            melhor, melhor_score = pasta, score
+    return melhor or todas_opcoes[0]
+
+
+def listagem_antiga(pasta):
+    arquivos = [(a, a.stat(), a.suffix.lower()) for a in pasta.rglob("*") if a.is_file()]
+    arquivos.sort(key=lambda x: x[1].st_mtime, reverse=True)
+    return arquivos
+
+
+def abrir_antigo(db, paciente_id):
+    from consentimentos_manager import ConsentimentosManager
+    db.obter_paciente(paciente_id)
+    db.get_imagens_por_paciente(paciente_id)
+    for _ in range(2):  # set_paciente_id + atualizar_lista_documentos
+        listagem_antiga(pasta_documentos_antiga(paciente_id))
+    ConsentimentosManager().obter_status_consentimentos(paciente_id)
+
+
+def abrir_prefetch(db, cache, paciente_id):
+    """As mesmas leituras, pelos caminhos novos da FichaPaciente e dos widgets"""
+    from consentimentos_manager import ConsentimentosManager
+    from patient_prefetch import escolher_pasta_documentos, listar_documentos, mtime_pastas
+    acertos = 0
+    if cache.pop_patient_prefetch(paciente_id, 'paciente') is None:
+        db.obter_paciente(paciente_id)
+    else:
+        acertos += 1
+    if cache.pop_patient_prefetch(paciente_id, 'iris') is None:
+        db.get_imagens_por_paciente(paciente_id)
+    else:
+        acertos += 1
+    documentos = cache.pop_patient_prefetch(paciente_id, 'documentos')
+    if documentos is None or mtime_pastas(documentos['pasta']) != documentos['mtime']:
+        nome = lambda: db.obter_paciente(paciente_id)['nome']
+        listar_documentos(escolher_pasta_documentos(paciente_id, nome))
+    else:
+        acertos += 1
+    if cache.pop_patient_prefetch(paciente_id, 'consentimentos') is None:
+        ConsentimentosManager().obter_status_consentimentos(paciente_id)
+    else:
+        acertos += 1
+    return acertos
+
+
+def parte_abertura(args):
+    from data_cache import DataCache
+    from db_manager import DBManager
+    from patient_prefetch import PrefetchPacientes
+
+    db = DBManager('pacientes.db')
+    resultados = db.get_all_pacientes()
+    passos = guiao(len(resultados), args.aberturas)
+    espera = args.espera_ms / 1000
+
+    antigo = []
+    for indice in passos:
+        time.sleep(espera)
+        inicio = time.perf_counter()
+        abrir_antigo(db, resultados[indice]['id'])
+        antigo.append(time.perf_counter() - inicio)
+
+    cache = DataCache.get_instance()
+    cache.clear_all()
+    prefetch = PrefetchPacientes('pacientes.db', cache=cache, miniaturas=args.miniaturas)
+    novo, acertos = [], 0
+    for indice in passos:
+        prefetch.pedir_vizinhos(resultados, indice)  # seleção na lista
+        time.sleep(espera)
+        inicio = time.perf_counter()
+        acertos += abrir_prefetch(db, cache, resultados[indice]['id'])
+        novo.append(time.perf_counter() - inicio)
+    prefetch.parar()
+
+    print(f"\nAbrir ficha ({len(resultados)} pacientes, {len(passos)} trocas, {args.espera_ms:.0f} ms "
+          f"entre selecionar e abrir)")
+    print(f"{'modo':10}{'média (ms)':>12}{'p95 (ms)':>10}{'máx (ms)':>10}")
+    for modo, duracoes in (('antigo', antigo), ('prefetch', novo)):
+        e = estatisticas_ms(duracoes)
+        print(f"{modo:10}{e['media']:>12.2f}{e['p95']:>10.2f}{e['max']:>10.2f}")
+    print(f"partes servidas do pré-carregamento: {acertos}/{4 * len(passos)} "
+          f"({100 * acertos / (4 * len(passos)):.0f}%); fichas pré-carregadas: {prefetch.carregados}")
+
+
+def parte_miniaturas(args, pasta):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QColor, QImage, QPixmap
+    from PyQt6.QtWidgets import QApplication
+
+    from patient_prefetch import miniatura_iris
+
+    garantir_aplicacao(QApplication)
+    caminhos = []
+    for i in range(8):
+        imagem = QImage(2592, 1944, QImage.Format.Format_RGB32)
+        imagem.fill(QColor(40 + i * 20, 90, 140))
+        caminho = os.path.join(pasta, f"iris_{i}.jpg")
+        imagem.save(caminho, "JPG", 90)
+        caminhos.append(caminho)
+
+    def antiga(caminho):
+        QPixmap(caminho).scaled(63, 43, Qt.AspectRatioMode.KeepAspectRatio,
+                                Qt.TransformationMode.SmoothTransformation)
+
+    n = args.miniaturas_n
+    tempos = {}
+    for nome, funcao in (('QPixmap + scaled', antiga),
+                         ('QImageReader reduzida', lambda c: QPixmap.fromImage(miniatura_iris(c)))):
+        duracoes = []
+        for i in range(n):
+            inicio = time.perf_counter()
+            funcao(caminhos[i % len(caminhos)])
+            duracoes.append(time.perf_counter() - inicio)
+        tempos[nome] = estatisticas_ms(duracoes)
+    imagens = [miniatura_iris(c) for c in caminhos]
+    duracoes = []
+    for i in range(n):
+        inicio = time.perf_counter()
+        QPixmap.fromImage(imagens[i % len(imagens)])
+        duracoes.append(time.perf_counter() - inicio)
+    tempos['pré-carregada (fromImage)'] = estatisticas_ms(duracoes)
+
+    print(f"\nMiniaturas de íris (JPEG 2592x1944 -> 63x43, {n} por modo)")
+    print(f"{'modo':28}{'média (ms)':>12}{'p95 (ms)':>10}")
+    for nome, e in tempos.items():
+        print(f"{nome:28}{e['media']:>12.2f}{e['p95']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pacientes', type=int, default=2000)
+    parser.add_argument('--aberturas', type=int, default=200)
+    parser.add_argument('--espera-ms', type=float, default=150)
+    parser.add_argument('--miniaturas-n', type=int, default=40)
+    args = parser.parse_args()
+    args.miniaturas = False  # as imagens de íris da BD sintética não existem em disco
+
+    anterior = os.getcwd()
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)  # DBManager e a gestão de documentos usam caminhos relativos
+        try:
+            criar_dados(args.pacientes)
+            parte_abertura(args)
+            try:
+                parte_miniaturas(args, pasta)
+            except ImportError as e:
+                print(f"\nminiaturas: não executado ({e})")
+        finally:
+            os.chdir(anterior)
+
+
+if __name__ == '__main__':
+    main()
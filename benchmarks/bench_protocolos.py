@@ -0,0 +1,234 @@
+"""
+Benchmark - Armazenamento de protocolos (JSON em TEXT vs passos binários + metadados indexados)
+═══════════════════════════════════════════════════════════════════════
+
+Grava N protocolos (100 000 por omissão, 5 a 40 passos cada) numa base
+nova e mede, para cada formato:
+- listagem completa e listagem filtrada (categoria + duração + gama de
+  frequências); no formato JSON o filtro de duração/frequência tem de
+  descodificar os passos de todos os protocolos da categoria
+- carregamento de 1000 protocolos ao acaso
+- tamanho da base
+
+Partes:
+- terapia: therapy_protocols do TherapySessionManager (precisa de PyQt6);
+  o formato antigo é reproduzido com as mesmas consultas SQL
+- personalizados: custom_protocols do FrequencyLoader (só biblioteca padrão)
+
+Corre numa pasta temporária.
+
+Uso:
+    python benchmarks/bench_protocolos.py [--protocolos 100000] [--partes terapia,personalizados]
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hil_terapia import SEMENTE
+from qt_app import garantir_aplicacao
+from protocol_codec import codificar_frequencias, codificar_passos, metadados_passos
+from schema_migrations import aplicar_migracoes
+
+CATEGORIAS = ["digestivo", "nervoso", "circulatorio", "respiratorio", "imunitario", "hormonal",
+              "muscular", "detox", "energia", "sono", "dor", "geral"]
+CARREGAMENTOS = 1000
+FILTRO = {'category': 'nervoso', 'min_duration': 600, 'max_duration': 1800,
+          'min_frequency': 1.0, 'max_frequency': 1000.0}
+
+
+def gerar_protocolos(n):
+    aleatorio = random.Random(SEMENTE)
+    inicio = datetime(2024, 1, 1)
+    for i in range(n):
+        passos = [SimpleNamespace(frequency=round(aleatorio.uniform(0.5, 2000), 2),
+                                  amplitude=round(aleatorio.uniform(0.5, 3), 1), offset=0.0,
+                                  duration_seconds=aleatorio.choice([30, 60, 120, 180]),
+                                  description=f"Passo {j + 1}")
+                  for j in range(aleatorio.randint(5, 40))]
+        yield {'protocol_id': str(uuid.UUID(int=aleatorio.getrandbits(128))),
+               'name': f"Protocolo {i}", 'description': "Protocolo sintético",
+               'category': aleatorio.choice(CATEGORIAS), 'steps': passos,
+               'created_at': (inicio + timedelta(minutes=i)).isoformat(),
+               'iris_data': {'notas': aleatorio.randint(0, 5)} if i % 4 == 0 else None}
+
+
+def cronometrar_ms(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+# ═══════════════ TERAPIA (therapy_protocols) ═══════════════
+
+def preencher_terapia(db_path, protocolos, binario):
+    """Enche a base numa transação (a gravação por protocolo é medida à parte)"""
+    aplicar_migracoes(db_path, 'therapy_sessions')
+    linhas = []
+    for p in protocolos:
+        iris = json.dumps(p['iris_data']) if p['iris_data'] else None
+        if binario:
+            meta = metadados_passos(p['steps'])
+            linhas.append((p['protocol_id'], p['name'], p['description'], p['category'], '',
+                           'bench', p['created_at'], False, iris, codificar_passos(p['steps']),
+                           meta['step_count'], meta['total_duration'], meta['freq_min'], meta['freq_max']))
+        else:
+            linhas.append((p['protocol_id'], p['name'], p['description'], p['category'],
+                           json.dumps([vars(s) for s in p['steps']]), 'bench', p['created_at'],
+                           False, iris, None, None, None, None, None))
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany('''
+            INSERT INTO therapy_protocols
+            (protocol_id, name, description, category, steps_json, created_by, created_at,
+             iris_based, iris_data_json, steps_blob, step_count, total_duration, freq_min, freq_max)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', linhas)
+    conn.close()
+
+
+def listar_json(db_path, category=None, min_duration=None, max_duration=None,
+                min_frequency=None, max_frequency=None):
+    """list_protocols antigo; os filtros de passos obrigam a ler e descodificar o JSON"""
+    conn = sqlite3.connect(db_path)
+    precisa_passos = any(v is not None for v in (min_duration, max_duration, min_frequency, max_frequency))
+    query = ("SELECT protocol_id, name, description, category, created_at, iris_based"
+             + (", steps_json" if precisa_passos else "") + " FROM therapy_protocols WHERE active = 1")
+    params = []
+    if category:
+        query += " AND category = ?"
+        params.append(category)
+    query += " ORDER BY created_at DESC"
+    protocolos = []
+    for row in conn.execute(query, params):
+        if precisa_passos:
+            passos = json.loads(row[6])
+            duracao = sum(p['duration_seconds'] for p in passos)
+            frequencias = [p['frequency'] for p in passos]
+            if ((min_duration is not None and duracao < min_duration) or
+                    (max_duration is not None and duracao > max_duration) or
+                    (min_frequency is not None and min(frequencias) < min_frequency) or
+                    (max_frequency is not None and max(frequencias) > max_frequency)):
+                continue
+        protocolos.append({'protocol_id': row[0], 'name': row[1], 'description': row[2],
+                           'category': row[3], 'created_at': row[4], 'iris_based': bool(row[5])})
+    conn.close()
+    return protocolos
+
+
+def carregar_json(db_path, protocol_id, FrequencyStep):
+    """load_protocol antigo"""
+    conn = sqlite3.connect(db_path)
+    row = conn.execute("SELECT * FROM therapy_protocols WHERE protocol_id = ? AND active = 1",
+                       (protocol_id,)).fetchone()
+    conn.close()
+    steps = [FrequencyStep(**step) for step in json.loads(row[4])]
+    iris = json.loads(row[8]) if row[8] else None
+    return steps, datetime.fromisoformat(row[6]), iris
+
+
+def parte_terapia(args, pasta, protocolos):
+    from PyQt6.QtCore import QCoreApplication
+    garantir_aplicacao(QCoreApplication)
+    from frequency_generator import FrequencyStep
+    from therapy_session import TherapySessionManager, TherapyProtocol
+
+    ids = [p['protocol_id'] for p in random.Random(SEMENTE).sample(protocolos, CARREGAMENTOS)]
+    print(f"\nterapia: {len(protocolos)} protocolos")
+    print(f"{'formato':10}{'listar (ms)':>13}{'filtrar (ms)':>14}{'resultados':>12}"
+          f"{'carregar (ms/prot)':>20}{'gravar (ms/prot)':>18}{'base (MB)':>11}")
+    for formato in ('json', 'binario'):
+        db_path = os.path.join(pasta, f"therapy_{formato}.db")
+        preencher_terapia(db_path, protocolos, formato == 'binario')
+        if formato == 'json':
+            t_listar, _ = cronometrar_ms(lambda: listar_json(db_path))
+            t_filtrar, filtrados = cronometrar_ms(lambda: listar_json(db_path, **FILTRO))
+            t_carregar, _ = cronometrar_ms(lambda: [carregar_json(db_path, i, FrequencyStep) for i in ids])
+            gravar = None
+        else:
+            gestor = TherapySessionManager(db_path)
+            t_listar, _ = cronometrar_ms(lambda: gestor.list_protocols())
+            t_filtrar, filtrados = cronometrar_ms(lambda: gestor.list_protocols(**FILTRO))
+            t_carregar, _ = cronometrar_ms(lambda: [gestor.load_protocol(i) for i in ids])
+            novos = [TherapyProtocol(str(uuid.uuid4()), p['name'], p['description'], p['category'],
+                                     [FrequencyStep(**vars(s)) for s in p['steps']], 'bench',
+                                     datetime.fromisoformat(p['created_at']))
+                     for p in protocolos[:200]]
+            t_gravar, _ = cronometrar_ms(lambda: [gestor.save_protocol(p) for p in novos])
+            gravar = t_gravar / len(novos)
+        tamanho = os.path.getsize(db_path) / 1e6
+        gravar_txt = f"{gravar:>18.2f}" if gravar is not None else f"{'-':>18}"
+        print(f"{formato:10}{t_listar:>13.0f}{t_filtrar:>14.0f}{len(filtrados):>12}"
+              f"{t_carregar / CARREGAMENTOS:>20.3f}{gravar_txt}{tamanho:>11.0f}")
+
+
+# ═══════════════ PERSONALIZADOS (custom_protocols) ═══════════════
+
+def parte_personalizados(args, pasta, protocolos):
+    from frequency_loader import FrequencyLoader
+
+    print(f"\npersonalizados: {len(protocolos)} protocolos")
+    print(f"{'formato':10}{'listar c/ frequências (ms)':>28}{'só metadados (ms)':>19}{'base (MB)':>11}")
+    anterior = os.getcwd()
+    for formato in ('json', 'binario'):
+        subpasta = os.path.join(pasta, f"personalizados_{formato}")
+        os.makedirs(subpasta)
+        os.chdir(subpasta)  # o FrequencyLoader usa frequencies.db na pasta atual
+        try:
+            loader = FrequencyLoader(excel_path=os.path.join(subpasta, 'inexistente.xls'))
+            linhas = []
+            for p in protocolos:
+                frequencias = [s.frequency for s in p['steps']]
+                if formato == 'json':
+                    linhas.append((p['name'], json.dumps(frequencias), p['description'],
+                                   None, None, None, None))
+                else:
+                    linhas.append((p['name'], '', p['description'], codificar_frequencias(frequencias),
+                                   len(frequencias), min(frequencias), max(frequencias)))
+            with sqlite3.connect(loader.db_path) as conn:
+                conn.executemany('''
+                    INSERT INTO custom_protocols
+                    (protocol_name, frequencies, description, frequencies_blob,
+                     n_frequencies, freq_min, freq_max)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', linhas)
+            conn.close()
+
+            t_completo, completos = cronometrar_ms(loader.get_custom_protocols)
+            t_meta, _ = cronometrar_ms(lambda: loader.get_custom_protocols(include_frequencies=False))
+            assert len(completos) == len(protocolos)
+            meta_txt = f"{t_meta:>19.0f}" if formato == 'binario' else f"{'-':>19}"
+            print(f"{formato:10}{t_completo:>28.0f}{meta_txt}"
+                  f"{os.path.getsize(loader.db_path) / 1e6:>11.0f}")
+        finally:
+            os.chdir(anterior)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--protocolos', type=int, default=100000)
+    parser.add_argument('--partes', default='terapia,personalizados')
+    args = parser.parse_args()
+
+    protocolos = list(gerar_protocolos(args.protocolos))
+    partes = {'terapia': parte_terapia, 'personalizados': parte_personalizados}
+    with tempfile.TemporaryDirectory() as pasta:
+        for nome in [p.strip() for p in args.partes.split(',') if p.strip()]:
+            try:
+                partes[nome](args, pasta, protocolos)
+            except ImportError as e:
+                print(f"\n{nome}: não executado ({e})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Benchmark - Rampas de amplitude/offset do HS3Service (sleep bloqueante vs thread de temporização)
+═══════════════════════════════════════════════════════════════════════
+
+Canal de gerador emulado: cada escrita de amplitude/offset demora
+--latencia-ms (transferência USB) e fica registada com o instante. Compara:
+- bloqueante: o soft_ramp antigo (cópia abaixo; o HS3Service precisa de
+  numpy e LibTiePie), amplitude e depois offset, com time.sleep entre passos
+- thread: plan_ramp + ParameterRamp, amplitude e offset em simultâneo,
+  prazos absolutos numa thread que pode ser cancelada
+
+Mede:
+1. Uma reconfiguração (1 V / +2 V -> 4 V / 0 V): tempo em que quem chama
+   fica bloqueado, tempo até o canal chegar ao alvo, desvio dos passos em
+   relação ao plano e tensão total máxima (amplitude + |offset|) pela qual
+   o canal passa (o limite do HS3 é 5 V)
+2. Um protocolo de --passos passos com amplitude/offset diferentes:
+   bloqueio acumulado de quem executa o protocolo
+3. Cancelamento a meio da rampa: latência de cancel() e escritas depois dele
+
+Uso:
+    python benchmarks/bench_rampa_hs3.py [--latencia-ms 0.5] [--passos 10] [--cancelamentos 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hil_terapia import SEMENTE, estatisticas_ms
+from hs3_config import HS3SafetyLimits
+from parameter_ramp import DEFAULT_DELAY_MS, DEFAULT_STEPS, ParameterRamp, plan_ramp
+
+
+class CanalGeradorEmulado:
+    """Canal do gerador com latência por escrita e registo (instante, atributo, valor)"""
+
+    def __init__(self, latencia_s, amplitude=0.0, offset=0.0):
+        self.latencia_s = latencia_s
+        self._valores = {'amplitude': amplitude, 'offset': offset}
+        self.escritas = []
+        self._lock = threading.Lock()
+
+    def __getattr__(self, nome):
+        valores = self.__dict__.get('_valores', {})
+        if nome in valores:
+            return valores[nome]
+        raise AttributeError(nome)
+
+    def __setattr__(self, nome, valor):
+        if nome in ('amplitude', 'offset'):
+            time.sleep(self.latencia_s)
+            with self._lock:
+                self._valores[nome] = valor
+                self.escritas.append((time.perf_counter(), nome, valor))
+        else:
+            super().__setattr__(nome, valor)
+
+    def tensao_maxima(self, amplitude, offset):
+        """Maior amplitude + |offset| pela qual o canal passou, a partir do estado inicial"""
+        maximo = amplitude + abs(offset)
+        for _, nome, valor in self.escritas:
+            if nome == 'amplitude':
+                amplitude = valor
+            else:
+                offset = valor
+            maximo = max(maximo, amplitude + abs(offset))
+        return maximo
+
+
+def soft_ramp_antigo(generator_channel, attribute, target_value, steps=20, delay_ms=50):
+    """soft_ramp do HS3Service antes desta alteração"""
+    current_value = getattr(generator_channel, attribute)
+    step_size = (target_value - current_value) / steps
+    for i in range(steps):
+        new_value = current_value + (step_size * (i + 1))
+        setattr(generator_channel, attribute, new_value)
+        time.sleep(delay_ms / 1000.0)
+    setattr(generator_channel, attribute, target_value)
+
+
+def configurar_bloqueante(canal, amplitude, offset):
+    soft_ramp_antigo(canal, "amplitude", amplitude)
+    soft_ramp_antigo(canal, "offset", offset)
+    return None
+
+
+def configurar_thread(canal, amplitude, offset):
+    pontos = plan_ramp({'amplitude': canal.amplitude, 'offset': canal.offset},
+                       {'amplitude': amplitude, 'offset': offset})
+    return ParameterRamp(pontos, lambda nome, valor: setattr(canal, nome, valor)).start()
+
+
+MODOS = {'bloqueante': configurar_bloqueante, 'thread': configurar_thread}
+
+
+def desvio_passos_ms(escritas, inicio):
+    """Diferença entre o instante de cada ponto da rampa e o plano (passo k em k * delay)"""
+    instantes = sorted({round(t, 9) for t, _, _ in escritas})
+    # Agrupar escritas do mesmo ponto (amplitude e offset seguidos no modo thread)
+    pontos = []
+    for t in instantes:
+        if not pontos or t - pontos[-1] > DEFAULT_DELAY_MS / 2000:
+            pontos.append(t)
+    return [abs((t - inicio) - k * DEFAULT_DELAY_MS / 1000) * 1000 for k, t in enumerate(pontos)]
+
+
+def reconfiguracao(modo, latencia_s):
+    canal = CanalGeradorEmulado(latencia_s, amplitude=1.0, offset=2.0)
+    inicio = time.perf_counter()
+    rampa = MODOS[modo](canal, 4.0, 0.0)
+    bloqueio = time.perf_counter() - inicio
+    if rampa is not None:
+        rampa.wait()
+    fim = max(t for t, _, _ in canal.escritas)
+    assert (canal.amplitude, canal.offset) == (4.0, 0.0)
+    desvios = desvio_passos_ms(canal.escritas, inicio) if modo == 'thread' else \
+        desvio_passos_ms([e for e in canal.escritas if e[1] == 'amplitude'], inicio)
+    return {'bloqueio_ms': bloqueio * 1000, 'alvo_ms': (fim - inicio) * 1000,
+            'desvio_max_ms': max(desvios), 'tensao_max': canal.tensao_maxima(1.0, 2.0),
+            'escritas': len(canal.escritas)}
+
+
+def protocolo(modo, latencia_s, passos):
+    aleatorio = random.Random(SEMENTE)
+    canal = CanalGeradorEmulado(latencia_s)
+    bloqueios = []
+    rampa = None
+    inicio = time.perf_counter()
+    for _ in range(passos):
+        if rampa is not None:
+            rampa.cancel()  # o passo seguinte substitui a rampa em curso
+        t0 = time.perf_counter()
+        rampa = MODOS[modo](canal, round(aleatorio.uniform(0.5, 4.0), 2), round(aleatorio.uniform(-0.5, 0.5), 2))
+        bloqueios.append(time.perf_counter() - t0)
+        time.sleep(0.005)  # restantes comandos do passo (FREQ, START) e o início do dwell
+    if rampa is not None:
+        rampa.wait()
+    return {'bloqueio_total_s': sum(bloqueios), 'bloqueio': estatisticas_ms(bloqueios),
+            'total_s': time.perf_counter() - inicio}
+
+
+def cancelamentos(latencia_s, n):
+    aleatorio = random.Random(SEMENTE)
+    latencias, tardias = [], 0
+    for _ in range(n):
+        canal = CanalGeradorEmulado(latencia_s)
+        rampa = configurar_thread(canal, 4.0, 1.0)
+        time.sleep(aleatorio.uniform(0, DEFAULT_STEPS * DEFAULT_DELAY_MS / 1000))
+        t0 = time.perf_counter()
+        rampa.cancel()
+        latencias.append(time.perf_counter() - t0)
+        depois = sum(1 for t, _, _ in canal.escritas if t > time.perf_counter())
+        escritas = len(canal.escritas)
+        time.sleep(2 * DEFAULT_DELAY_MS / 1000)
+        tardias += depois + (len(canal.escritas) - escritas)
+    return estatisticas_ms(latencias), tardias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--latencia-ms', type=float, default=0.5)
+    parser.add_argument('--passos', type=int, default=10)
+    parser.add_argument('--cancelamentos', type=int, default=50)
+    args = parser.parse_args()
+    latencia_s = args.latencia_ms / 1000
+    limite = HS3SafetyLimits().MAX_AMPLITUDE
+
+    print(f"Canal emulado: {args.latencia_ms} ms por escrita; rampa de {DEFAULT_STEPS} passos "
+          f"x {DEFAULT_DELAY_MS:.0f} ms")
+    print(f"\n1. Reconfiguração 1 V / +2 V -> 4 V / 0 V (limite {limite} V)")
+    print(f"{'modo':12}{'bloqueio (ms)':>15}{'no alvo (ms)':>14}{'desvio máx (ms)':>17}"
+          f"{'tensão máx (V)':>16}{'escritas':>10}")
+    for modo in MODOS:
+        r = reconfiguracao(modo, latencia_s)
+        aviso = "  > limite" if r['tensao_max'] > limite else ""
+        print(f"{modo:12}{r['bloqueio_ms']:>15.2f}{r['alvo_ms']:>14.1f}{r['desvio_max_ms']:>17.2f}"
+              f"{r['tensao_max']:>16.2f}{r['escritas']:>10}{aviso}")
+
+    print(f"\n2. Protocolo de {args.passos} passos")
+    print(f"{'modo':12}{'bloqueio total (s)':>20}{'por passo p95 (ms)':>20}{'duração (s)':>13}")
+    for modo in MODOS:
+        r = protocolo(modo, latencia_s, args.passos)
+        print(f"{modo:12}{r['bloqueio_total_s']:>20.3f}{r['bloqueio']['p95']:>20.2f}{r['total_s']:>13.2f}")
+
+    lat, tardias = cancelamentos(latencia_s, args.cancelamentos)
+    print(f"\n3. Cancelamento ({args.cancelamentos} rampas): cancel() média {lat['media']:.3f} ms, "
+          f"p95 {lat['p95']:.3f} ms, máx {lat['max']:.3f} ms; escritas depois do cancel: {tardias}")
+    print("   (no modo bloqueante não há cancelamento: a chamada só regressa no fim da rampa)")
+
+
+if __name__ == '__main__':
+    main()
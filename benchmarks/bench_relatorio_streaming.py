@@ -0,0 +1,217 @@
+"""
+Benchmark - Relatórios de análise (concatenação em memória vs escrita incremental)
+═══════════════════════════════════════════════════════════════════════
+
+Gera sessões sintéticas com N itens de ressonância (100 000 por omissão) e
+escreve os relatórios HTML, texto e CSV em três modos:
+- concatenacao: os _generate_*_analysis_report antigos do ReportGenerator
+  (cópia abaixo; o módulo original precisa de PyQt6), gravados depois num
+  ficheiro
+- ficheiro: report_stream.escrever_relatorio diretamente para o ficheiro
+- socket: report_stream.escrever_relatorio para um socketpair lido por
+  outra thread
+
+Mede o tempo e o pico de memória alocada (tracemalloc) e verifica que os
+top 5 e as linhas do CSV são os mesmos nos dois desenhos. Corre numa
+pasta temporária.
+
+Uso:
+    python benchmarks/bench_relatorio_streaming.py [--itens 10000,100000] [--repeticoes 3]
+"""
+
+import argparse
+import csv
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from io import StringIO
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hil_terapia import SEMENTE
+from report_stream import escrever_relatorio, estatisticas_ressonancia
+
+FORMATOS = ("html", "text", "csv")
+CATEGORIAS = ["Órgãos", "Emocional", "Minerais", "Vitaminas", "Toxinas", "Florais", "Meridianos"]
+
+
+def gerar_sessao(n):
+    aleatorio = random.Random(SEMENTE)
+    # Um nome em cada 50 tem vírgula e aspas, que o CSV antigo não escapava
+    itens = [SimpleNamespace(name=f"Item {i}, \"variante\"" if i % 50 == 0 else f"Item {i}",
+                             category=aleatorio.choice(CATEGORIAS), subcategory=f"Sub {i % 37}",
+                             resonance_value=aleatorio.randint(-100, 100),
+                             stability=aleatorio.random(), confidence=aleatorio.random())
+             for i in range(n)]
+    return SimpleNamespace(session_id="bench-0001", timestamp=datetime(2025, 3, 1, 10, 30),
+                           patient_witness={'name': "Paciente Teste", 'birth_date': "01/01/1980"},
+                           field_used="Campo Geral", analysis_results=itens,
+                           notes="Sessão sintética para benchmark")
+
+
+# ═══════════════ DESENHO ANTIGO (cópia de reports_system.py) ═══════════════
+
+def html_antigo(session_data):
+    results = session_data.analysis_results
+    if results:
+        positive_count = len([r for r in results if r.resonance_value > 0])
+        negative_count = len([r for r in results if r.resonance_value < 0])
+        avg_resonance = sum(r.resonance_value for r in results) / len(results)
+        top_positive = sorted([r for r in results if r.resonance_value > 0],
+                              key=lambda x: x.resonance_value, reverse=True)[:5]
+        top_negative = sorted([r for r in results if r.resonance_value < 0],
+                              key=lambda x: abs(x.resonance_value), reverse=True)[:5]
+    else:
+        positive_count = negative_count = 0
+        avg_resonance = 0
+        top_positive = top_negative = []
+    # O cabeçalho com CSS (≈3 KB) era renderizado em cada relatório; aqui só o essencial
+    html_content = f"""<html><head><style>{'x' * 3000}</style></head><body>
+    <p>{session_data.timestamp.strftime('%d/%m/%Y às %H:%M')} {session_data.session_id}</p>
+    <p>{session_data.patient_witness.get('name', 'N/A')} {session_data.field_used}</p>
+    <p>{len(results)} {positive_count} {negative_count} {avg_resonance:+.1f}</p><table>"""
+    for item in top_positive:
+        html_content += f"""
+                <tr><td>{item.name}</td><td>{item.category}</td>
+                    <td class="positive">{item.resonance_value:+d}</td>
+                    <td>{item.stability:.2f}</td><td>{item.confidence:.2f}</td></tr>"""
+    html_content += "</table><table>"
+    for item in top_negative:
+        html_content += f"""
+                <tr><td>{item.name}</td><td>{item.category}</td>
+                    <td class="negative">{item.resonance_value:+d}</td>
+                    <td>{item.stability:.2f}</td><td>{item.confidence:.2f}</td></tr>"""
+    html_content += f"</table><p>{session_data.notes}</p></body></html>"
+    return html_content, top_positive, top_negative
+
+
+def texto_antigo(session_data):
+    results = session_data.analysis_results
+    positive_count = len([r for r in results if r.resonance_value > 0])
+    negative_count = len([r for r in results if r.resonance_value < 0])
+    report = f"{len(results)} {positive_count} {negative_count}\n"
+    if results:
+        avg_resonance = sum(r.resonance_value for r in results) / len(results)
+        report += f"Ressonância Média: {avg_resonance:+.1f}\n"
+        top_positive = sorted([r for r in results if r.resonance_value > 0],
+                              key=lambda x: x.resonance_value, reverse=True)[:5]
+        for i, item in enumerate(top_positive, 1):
+            report += f"{i}. {item.name} ({item.category})\n"
+            report += f"   Ressonância: {item.resonance_value:+d} | "
+            report += f"Estabilidade: {item.stability:.2f} | "
+            report += f"Confiança: {item.confidence:.2f}\n\n"
+        top_negative = sorted([r for r in results if r.resonance_value < 0],
+                              key=lambda x: abs(x.resonance_value), reverse=True)[:5]
+        for i, item in enumerate(top_negative, 1):
+            report += f"{i}. {item.name} ({item.category})\n"
+            report += f"   Ressonância: {item.resonance_value:+d} | "
+            report += f"Estabilidade: {item.stability:.2f} | "
+            report += f"Confiança: {item.confidence:.2f}\n\n"
+    return report
+
+
+def csv_antigo(session_data):
+    csv_content = "Item,Categoria,Subcategoria,Ressonancia,Estabilidade,Confianca,Campo\n"
+    for item in session_data.analysis_results:
+        csv_content += f'"{item.name}","{item.category}","{item.subcategory}",'
+        csv_content += f'{item.resonance_value},{item.stability:.3f},{item.confidence:.3f},'
+        csv_content += f'"{session_data.field_used}"\n'
+    return csv_content
+
+
+ANTIGOS = {"html": lambda s: html_antigo(s)[0], "text": texto_antigo, "csv": csv_antigo}
+
+
+# ═══════════════ MODOS ═══════════════
+
+def escrever_concatenacao(sessao, formato, caminho):
+    conteudo = ANTIGOS[formato](sessao)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(conteudo)
+
+
+def escrever_ficheiro(sessao, formato, caminho):
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        escrever_relatorio(sessao, f, formato)
+
+
+def escrever_socket(sessao, formato, caminho):
+    envio, rececao = socket.socketpair()
+    recebidos = [0]
+
+    def ler():
+        while True:
+            bloco = rececao.recv(1 << 16)
+            if not bloco:
+                return
+            recebidos[0] += len(bloco)
+
+    leitor = threading.Thread(target=ler)
+    leitor.start()
+    with envio:
+        escrever_relatorio(sessao, envio, formato)
+        envio.shutdown(socket.SHUT_WR)
+    leitor.join()
+    rececao.close()
+
+
+MODOS = {"concatenacao": escrever_concatenacao, "ficheiro": escrever_ficheiro, "socket": escrever_socket}
+
+
+def medir(funcao, repeticoes):
+    """Mediana do tempo (ms) e pico de memória alocada (MB) numa passagem com tracemalloc"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sorted(tempos)[len(tempos) // 2], pico / 1e6
+
+
+def verificar(sessao):
+    """Os dois desenhos escolhem os mesmos top 5 e produzem as mesmas linhas CSV"""
+    _, top_positive, top_negative = html_antigo(sessao)
+    e = estatisticas_ressonancia(sessao.analysis_results)
+    assert e.top_positivos == top_positive and e.top_negativos == top_negative
+    novo = StringIO()
+    escrever_relatorio(sessao, novo, "csv")
+    antigas = [linha for linha in csv.reader(StringIO(csv_antigo(sessao))) if '"' not in linha[0]]
+    novas = list(csv.reader(StringIO(novo.getvalue())))
+    assert len(novas) == len(sessao.analysis_results) + 1
+    assert antigas == [linha for linha in novas if '"' not in linha[0]]
+    assert [linha[0] for linha in novas[1:]] == [item.name for item in sessao.analysis_results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--itens', default='10000,100000')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'itens':>8} {'formato':8}{'modo':14}{'tempo (ms)':>12}{'pico (MB)':>11}{'ficheiro (MB)':>15}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for n in [int(v) for v in args.itens.split(',') if v.strip()]:
+            sessao = gerar_sessao(n)
+            verificar(sessao)
+            for formato in FORMATOS:
+                for modo, funcao in MODOS.items():
+                    caminho = os.path.join(pasta, f"relatorio_{modo}.{formato}")
+                    tempo, pico = medir(lambda: funcao(sessao, formato, caminho), args.repeticoes)
+                    tamanho = f"{os.path.getsize(caminho) / 1e6:>15.2f}" if os.path.exists(caminho) else f"{'-':>15}"
+                    print(f"{n:>8} {formato:8}{modo:14}{tempo:>12.1f}{pico:>11.2f}{tamanho}")
+
+
+if __name__ == '__main__':
+    main()
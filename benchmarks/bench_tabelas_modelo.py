@@ -0,0 +1,143 @@
+"""
+Benchmark - Atualização de tabelas com 100k linhas (QTableWidget vs modelo)
+═══════════════════════════════════════════════════════════════════════
+
+Preenche uma tabela de 6 colunas ao estilo de EmailsAgendadosWidget com N
+linhas, em QT_QPA_PLATFORM=offscreen, e mede o tempo de cada atualização
+(incluindo o desenho da vista) e o pico de RSS:
+- QTableWidget: um QTableWidgetItem por célula em cada atualização (antigo)
+- QTableView + ModeloTabelaIncremental: só o primeiro lote entra na vista
+
+Cada modo corre num subprocesso próprio, porque o pico de RSS
+(ru_maxrss) só cresce ao longo da vida do processo.
+
+Uso:
+    python benchmarks/bench_tabelas_modelo.py [--linhas 100000] [--atualizacoes 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pico_rss_mb():
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux devolve KB, macOS devolve bytes
+    return pico / 1e6 if sys.platform == 'darwin' else pico / 1e3
+
+
+def gerar_emails(n):
+    return [{
+        "id": f"email_{i}",
+        "data_envio": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00",
+        "paciente_nome": f"Paciente {i}",
+        "destinatario": f"p{i}@exemplo.pt",
+        "assunto": f"Lembrete de consulta {i}",
+        "anexos": [f"/docs/{i}/protocolo.pdf"] if i % 3 == 0 else [],
+        "status": ("agendado", "enviado", "cancelado", "falhado")[i % 4],
+    } for i in range(n)]
+
+
+def preencher_widget(tabela, emails):
+    """Reproduz EmailsAgendadosWidget.atualizar_tabela antigo"""
+    from PyQt6.QtWidgets import QTableWidgetItem
+    from PyQt6.QtCore import Qt
+    from emails_agendados_manager import COLUNAS_EMAILS
+
+    tabela.setRowCount(len(emails))
+    for row, email in enumerate(emails):
+        for coluna, definicao in enumerate(COLUNAS_EMAILS):
+            item = QTableWidgetItem(definicao.texto(email))
+            if coluna == 0:
+                item.setData(Qt.ItemDataRole.UserRole, email.get("id"))
+            if definicao.alinhamento is not None:
+                item.setTextAlignment(definicao.alinhamento)
+            if definicao.fundo is not None:
+                item.setBackground(definicao.fundo(email))
+            tabela.setItem(row, coluna, item)
+
+
+def executar_modo(modo, linhas, atualizacoes):
+    from PyQt6.QtWidgets import QApplication, QTableWidget, QTableView
+
+    app = QApplication(sys.argv)
+    from emails_agendados_manager import COLUNAS_EMAILS
+    from table_models import ModeloTabelaIncremental
+
+    emails = gerar_emails(linhas)
+    rss_inicial = pico_rss_mb()
+
+    if modo == 'widget':
+        tabela = QTableWidget()
+        tabela.setColumnCount(len(COLUNAS_EMAILS))
+    else:
+        tabela = QTableView()
+        modelo = ModeloTabelaIncremental(COLUNAS_EMAILS)
+        tabela.setModel(modelo)
+    tabela.resize(1200, 800)
+    tabela.show()
+    app.processEvents()
+
+    tempos = []
+    for _ in range(atualizacoes):
+        inicio = time.perf_counter()
+        if modo == 'widget':
+            preencher_widget(tabela, emails)
+        else:
+            modelo.definir_linhas(emails)
+        tabela.viewport().repaint()
+        app.processEvents()
+        tempos.append(time.perf_counter() - inicio)
+
+    # Scroll até ao fim: no modelo força o carregamento de todos os lotes
+    inicio = time.perf_counter()
+    tabela.scrollToBottom()
+    app.processEvents()
+    if modo == 'modelo':
+        while modelo.canFetchMore():
+            modelo.fetchMore()
+            tabela.scrollToBottom()
+            app.processEvents()
+    scroll = time.perf_counter() - inicio
+
+    print(json.dumps({
+        'primeira': tempos[0],
+        'seguintes': sum(tempos[1:]) / max(len(tempos) - 1, 1),
+        'scroll_fim': scroll,
+        'rss_extra': pico_rss_mb() - rss_inicial,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--linhas', type=int, default=100000)
+    parser.add_argument('--atualizacoes', type=int, default=3)
+    parser.add_argument('--modo', choices=['widget', 'modelo'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        executar_modo(args.modo, args.linhas, args.atualizacoes)
+        return
+
+    ambiente = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    print(f"{args.linhas} linhas, {args.atualizacoes} atualizações")
+    print(f"{'modo':10}{'1ª (ms)':>12}{'seguintes (ms)':>17}{'scroll ao fim (ms)':>21}{'RSS extra (MB)':>17}")
+    for modo in ('widget', 'modelo'):
+        saida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--modo', modo,
+             '--linhas', str(args.linhas), '--atualizacoes', str(args.atualizacoes)],
+            env=ambiente, check=True, capture_output=True, text=True,
+        ).stdout
+        r = json.loads(saida.strip().splitlines()[-1])
+        print(f"{modo:10}{r['primeira'] * 1000:>12.0f}{r['seguintes'] * 1000:>17.0f}"
+              f"{r['scroll_fim'] * 1000:>21.0f}{r['rss_extra']:>17.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Benchmark - Lista de tarefas (todos.json reescrito a cada alteração vs SQLite linha a linha)
+═══════════════════════════════════════════════════════════════════════
+
+Com N tarefas (50 000 por omissão) mede, para --operacoes alterações de
+cada tipo (adicionar, marcar como concluída, apagar):
+- json: o save_todos antigo (json.dump de toda a lista com indent=2)
+- sqlite: ArmazemTarefas, que grava só a linha alterada
+e o carregamento ao abrir a janela (json.load vs ArmazemTarefas.listar).
+
+Com PyQt6 (QT_QPA_PLATFORM=offscreen) mede também a atualização da lista:
+o refresh_list antigo (reconstrói o QListWidget inteiro) vs a atualização
+de uma linha do TodoListWindow.
+
+Corre numa pasta temporária.
+
+Uso:
+    python benchmarks/bench_tarefas.py [--tarefas 50000] [--operacoes 200]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hil_terapia import SEMENTE, estatisticas_ms
+from todo_store import ArmazemTarefas
+
+PRIORIDADES = ["Alta", "Normal", "Baixa"]
+
+
+def gerar_tarefas(n):
+    aleatorio = random.Random(SEMENTE)
+    return [{'text': f"Tarefa {i}: ligar ao paciente {aleatorio.randint(1, 5000)} sobre a consulta",
+             'completed': aleatorio.random() < 0.3,
+             'created_date': f"2025-{aleatorio.randint(1, 12):02d}-{aleatorio.randint(1, 28):02d} 10:00",
+             'priority': aleatorio.choice(PRIORIDADES)}
+            for i in range(n)]
+
+
+def gravar_json(caminho, tarefas):
+    """save_todos antigo"""
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(tarefas, f, ensure_ascii=False, indent=2)
+
+
+def medir(funcao, n):
+    duracoes = []
+    for i in range(n):
+        inicio = time.perf_counter()
+        funcao(i)
+        duracoes.append(time.perf_counter() - inicio)
+    return estatisticas_ms(duracoes)
+
+
+def parte_armazenamento(args, pasta, tarefas):
+    aleatorio = random.Random(SEMENTE)
+    resultados = {}
+
+    # json: cada alteração muda a lista em memória e reescreve o ficheiro
+    caminho = os.path.join(pasta, 'todos.json')
+    lista = [dict(t) for t in tarefas]
+    gravar_json(caminho, lista)
+    inicio = time.perf_counter()
+    with open(caminho, 'r', encoding='utf-8') as f:
+        json.load(f)
+    carregar_json = (time.perf_counter() - inicio) * 1000
+
+    def adicionar_json(i):
+        lista.append({'text': f"Nova {i}", 'completed': False,
+                      'created_date': "2025-06-01 09:00", 'priority': "Normal"})
+        gravar_json(caminho, lista)
+
+    def marcar_json(i):
+        tarefa = lista[aleatorio.randrange(len(lista))]
+        tarefa['completed'] = not tarefa['completed']
+        gravar_json(caminho, lista)
+
+    def apagar_json(i):
+        lista.pop(aleatorio.randrange(len(lista)))
+        gravar_json(caminho, lista)
+
+    resultados['json'] = {
+        'carregar_ms': carregar_json, 'ficheiro_mb': os.path.getsize(caminho) / 1e6,
+        'adicionar': medir(adicionar_json, args.operacoes),
+        'marcar': medir(marcar_json, args.operacoes),
+        'apagar': medir(apagar_json, args.operacoes)}
+
+    # sqlite: importação do todos.json antigo e uma linha por alteração
+    legado = os.path.join(pasta, 'legado.json')
+    gravar_json(legado, tarefas)
+    db_path = os.path.join(pasta, 'todos.db')
+    inicio = time.perf_counter()
+    armazem = ArmazemTarefas(db_path, json_legado=legado)
+    importar = (time.perf_counter() - inicio) * 1000
+    assert armazem.contar()['total'] == len(tarefas)
+    inicio = time.perf_counter()
+    ids = [t['id'] for t in armazem.listar()]
+    carregar_sqlite = (time.perf_counter() - inicio) * 1000
+
+    def adicionar_sqlite(i):
+        ids.append(armazem.adicionar(f"Nova {i}", False, "2025-06-01 09:00", "Normal"))
+
+    def marcar_sqlite(i):
+        armazem.definir_concluida(ids[aleatorio.randrange(len(ids))], aleatorio.random() < 0.5)
+
+    def apagar_sqlite(i):
+        armazem.remover(ids.pop(aleatorio.randrange(len(ids))))
+
+    resultados['sqlite'] = {
+        'carregar_ms': carregar_sqlite, 'importar_ms': importar,
+        'adicionar': medir(adicionar_sqlite, args.operacoes),
+        'marcar': medir(marcar_sqlite, args.operacoes),
+        'apagar': medir(apagar_sqlite, args.operacoes)}
+    armazem.fechar()
+    resultados['sqlite']['ficheiro_mb'] = os.path.getsize(db_path) / 1e6
+
+    print(f"\nArmazenamento: {len(tarefas)} tarefas, {args.operacoes} operações de cada tipo")
+    print(f"{'formato':9}{'abrir (ms)':>12}{'adicionar média/p95 (ms)':>26}{'marcar média/p95 (ms)':>24}"
+          f"{'apagar média/p95 (ms)':>24}{'ficheiro (MB)':>15}")
+    for formato, r in resultados.items():
+        colunas = "".join(f"{r[op]['media']:>16.3f} / {r[op]['p95']:>6.3f}" if op == 'adicionar'
+                          else f"{r[op]['media']:>14.3f} / {r[op]['p95']:>6.3f}"
+                          for op in ('adicionar', 'marcar', 'apagar'))
+        print(f"{formato:9}{r['carregar_ms']:>12.1f}{colunas}{r['ficheiro_mb']:>15.1f}")
+    print(f"importação única do todos.json antigo: {resultados['sqlite']['importar_ms']:.0f} ms")
+
+
+def parte_lista(args, pasta, tarefas):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QFont
+    from PyQt6.QtWidgets import QApplication, QListWidgetItem
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    anterior = os.getcwd()
+    os.chdir(pasta)  # a janela usa todos.db na pasta atual
+    try:
+        from todo_list_window import TodoItem, TodoListWindow, PRIORITY_ORDER, PRIORITY_SYMBOLS
+        ArmazemTarefas('todos.db', json_legado=None).adicionar_varias(tarefas)
+
+        inicio = time.perf_counter()
+        janela = TodoListWindow()
+        abrir = (time.perf_counter() - inicio) * 1000
+
+        def refresh_antigo():
+            """refresh_list antigo: limpa e recria todos os itens"""
+            lista = janela.list_widget
+            lista.clear()
+            ordenadas = sorted(janela.todos.values(),
+                               key=lambda x: (x.completed, PRIORITY_ORDER.get(x.priority, 1)))
+            for i, todo in enumerate(ordenadas):
+                texto = (f"{'✅' if todo.completed else '⏳'} "
+                         f"{PRIORITY_SYMBOLS.get(todo.priority, '🟡')} {todo.text}")
+                if todo.completed:
+                    texto = f"~~{texto}~~"
+                texto += f"\n    📅 {todo.created_date.split()[0]}"
+                item = QListWidgetItem(texto)
+                fonte = QFont()
+                fonte.setPointSize(12)
+                fonte.setStrikeOut(todo.completed)
+                item.setFont(fonte)
+                item.setForeground(Qt.GlobalColor.gray if todo.completed else Qt.GlobalColor.black)
+                item.setData(Qt.ItemDataRole.UserRole, i)
+                lista.addItem(item)
+
+        aleatorio = random.Random(SEMENTE)
+        n = min(args.operacoes, 20)
+        antigo = medir(lambda i: refresh_antigo(), n)
+        janela.refresh_list()
+
+        def alternar(i):
+            linha = aleatorio.randrange(janela.list_widget.count())
+            janela.toggle_item_status(janela.list_widget.item(linha))
+            app.processEvents()
+
+        def adicionar(i):
+            todo = TodoItem(f"Nova {i}", priority="Alta")
+            todo.id = janela.store.adicionar(todo.text, False, todo.created_date, todo.priority)
+            janela.todos[todo.id] = todo
+            janela._insert_row(todo)
+            janela.update_counter()
+            app.processEvents()
+
+        incremental_marcar = medir(alternar, args.operacoes)
+        incremental_adicionar = medir(adicionar, args.operacoes)
+        # A lista continua ordenada e coerente com a base depois das alterações
+        assert janela._keys == sorted(janela._keys)
+        assert len(janela._keys) == janela.list_widget.count() == janela.store.contar()['total']
+
+        print(f"\nLista (QListWidget, {len(tarefas)} tarefas): abrir a janela {abrir:.0f} ms")
+        print(f"{'operação':34}{'média (ms)':>12}{'p95 (ms)':>10}")
+        print(f"{'refresh_list antigo (cada alteração)':34}{antigo['media']:>12.2f}{antigo['p95']:>10.2f}")
+        print(f"{'marcar (grava + move uma linha)':34}{incremental_marcar['media']:>12.2f}"
+              f"{incremental_marcar['p95']:>10.2f}")
+        print(f"{'adicionar (grava + insere uma linha)':34}{incremental_adicionar['media']:>12.2f}"
+              f"{incremental_adicionar['p95']:>10.2f}")
+        janela.store.fechar()
+    finally:
+        os.chdir(anterior)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tarefas', type=int, default=50000)
+    parser.add_argument('--operacoes', type=int, default=200)
+    args = parser.parse_args()
+
+    tarefas = gerar_tarefas(args.tarefas)
+    with tempfile.TemporaryDirectory() as pasta:
+        parte_armazenamento(args, pasta, tarefas)
+        with tempfile.TemporaryDirectory() as pasta_lista:
+            try:
+                parte_lista(args, pasta_lista, tarefas)
+            except ImportError as e:
+                print(f"\nlista: não executado ({e})")
+
+
+if __name__ == '__main__':
+    main()
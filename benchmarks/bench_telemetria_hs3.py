@@ -0,0 +1,166 @@
+"""
+Benchmark - Ocupação da ligação série e bloqueio da GUI pela monitorização
+═══════════════════════════════════════════════════════════════════════
+
+Corre uma sessão do FrequencyGenerator contra o HS3 série simulado (pty)
+durante N minutos (30 por omissão, em tempo real) em dois modos:
+- sondagem: monitorização antiga (STATUS? a 10 Hz na thread da GUI)
+- telemetria: HardwareTelemetry (estado em cache das respostas, STATUS?
+  adaptativo noutra thread, sinais agregados)
+
+Mede:
+- ocupação da ligação série: tempo dentro de _send_command / duração
+- comandos recebidos pelo simulador, por tipo
+- bloqueio da GUI: tempo em _send_command na thread principal e atraso de
+  um batimento de 10 ms da thread principal (p99 e máximo)
+- número de emissões de realtime_data
+
+Uso:
+    python benchmarks/bench_telemetria_hs3.py [--minutos 30] [--passo-s 60]
+        [--modos sondagem,telemetria]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hil_terapia import Recursos, estatisticas_ms, frequencias, _ligar_hs3_serie
+
+BATIMENTO_MS = 10
+
+
+def instrumentar_envio(hs3_hardware):
+    """Regista a duração de cada _send_command e se correu na thread principal"""
+    registo = {'total': 0.0, 'principal': 0.0, 'n': 0}
+    original = hs3_hardware._send_command
+    principal = threading.main_thread()
+
+    def envolvido(command):
+        inicio = time.perf_counter()
+        try:
+            return original(command)
+        finally:
+            duracao = time.perf_counter() - inicio
+            registo['total'] += duracao
+            registo['n'] += 1
+            if threading.current_thread() is principal:
+                registo['principal'] += duracao
+
+    hs3_hardware._send_command = envolvido
+    return registo
+
+
+def executar_modo(modo, args):
+    from PyQt6.QtCore import QCoreApplication, QTimer
+    from hs3_simulador import HS3SerieSimulado
+
+    app = QCoreApplication(sys.argv)
+    passos_n = max(1, int(args.minutos * 60 // args.passo_s))
+
+    with HS3SerieSimulado(0.0) as simulador:
+        hs3_hardware = _ligar_hs3_serie(simulador)
+        envio = instrumentar_envio(hs3_hardware)
+        from frequency_generator import FrequencyGenerator, FrequencyStep, GenerationSession
+
+        gerador = FrequencyGenerator()
+        passos = [FrequencyStep(f, 1.0, 0.0, args.passo_s, f"{f} Hz") for f in frequencias(passos_n)]
+        sessao = GenerationSession("telemetria", "Paciente", "Telemetria", passos,
+                                   args.passo_s * passos_n, datetime.now())
+
+        emissoes = []
+        gerador.realtime_data.connect(lambda dados: emissoes.append(time.perf_counter()))
+        gerador.session_completed.connect(lambda _id: app.quit())
+
+        if modo == 'sondagem':
+            # Monitorização antiga: get_status() a 10 Hz na thread da GUI
+            gerador.telemetry.start = lambda: None
+            sondagem = QTimer()
+            sondagem.setInterval(100)
+
+            def sondar():
+                if gerador.is_running and not gerador.is_paused:
+                    estado = hs3_hardware.get_status()
+                    gerador._publish_realtime_data(estado)
+
+            sondagem.timeout.connect(sondar)
+            gerador.session_started.connect(lambda _id: sondagem.start())
+            gerador.session_completed.connect(lambda _id: sondagem.stop())
+
+        # Batimento da thread principal: atraso face ao instante previsto
+        atrasos = []
+        batimento = QTimer()
+        batimento.setInterval(BATIMENTO_MS)
+        anterior = [time.perf_counter()]
+
+        def bater():
+            agora = time.perf_counter()
+            atrasos.append(max(0.0, agora - anterior[0] - BATIMENTO_MS / 1000))
+            anterior[0] = agora
+
+        batimento.timeout.connect(bater)
+        batimento.start()
+
+        QTimer.singleShot(0, lambda: gerador.start_session(sessao))
+        QTimer.singleShot(int((sessao.total_duration + 30) * 1000), app.quit)
+        with Recursos() as recursos:
+            app.exec()
+        gerador.telemetry.shutdown()
+        hs3_hardware.disconnect()
+
+    resultado = recursos.resultado()
+    resultado['passos'] = passos_n
+    resultado['ocupacao_serie_percent'] = 100 * envio['total'] / recursos.duracao
+    resultado['envios'] = envio['n']
+    resultado['gui_em_serie_s'] = envio['principal']
+    resultado['atraso_gui_ms'] = estatisticas_ms(atrasos)
+    ordenados = sorted(atrasos)
+    resultado['atraso_gui_ms']['p99'] = ordenados[int(0.99 * (len(ordenados) - 1))] * 1000 if ordenados else 0.0
+    resultado['comandos'] = dict(Counter(comando.split(' ')[0] for _, comando in simulador.comandos))
+    resultado['emissoes'] = len(emissoes)
+    print(json.dumps(resultado))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--minutos', type=float, default=30.0)
+    parser.add_argument('--passo-s', type=int, default=60)
+    parser.add_argument('--modos', default='sondagem,telemetria')
+    parser.add_argument('--modo', choices=['sondagem', 'telemetria'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        import logging
+        logging.disable(logging.INFO)
+        executar_modo(args.modo, args)
+        return
+
+    ambiente = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    print(f"Sessão de {args.minutos:.0f} min, passos de {args.passo_s}s (tempo real, um modo de cada vez)")
+    print(f"{'modo':12}{'ocupação série %':>18}{'STATUS?':>9}{'GUI em série (s)':>18}"
+          f"{'atraso GUI p99 (ms)':>21}{'máx (ms)':>10}{'emissões':>10}{'CPU %':>8}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for modo in [m.strip() for m in args.modos.split(',') if m.strip()]:
+            saida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--modo', modo,
+                 '--minutos', str(args.minutos), '--passo-s', str(args.passo_s)],
+                cwd=pasta, env=ambiente, check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(saida.strip().splitlines()[-1])
+            atraso = r['atraso_gui_ms']
+            print(f"{modo:12}{r['ocupacao_serie_percent']:>18.1f}{r['comandos'].get('STATUS?', 0):>9}"
+                  f"{r['gui_em_serie_s']:>18.1f}{atraso['p99']:>21.1f}{atraso.get('max', 0):>10.1f}"
+                  f"{r['emissoes']:>10}{r['cpu_percent']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""
+Simuladores determinísticos do HS3 para benchmarks (sem hardware)
+═══════════════════════════════════════════════════════════════════════
+
+- HS3SerieSimulado: dispositivo série num pseudo-terminal (pty) que responde
+  ao protocolo de texto de hs3_hardware.py (*IDN?, VER?, CONFIG?, FREQ,
+  AMPL, OFFS, START, STOP, STATUS?, MEASURE?)
+- LibTiePieSimulada: substitui o módulo libtiepie em
+  biodesk.quantum.hs3_service (gerador + osciloscópio em tempo real)
+- HS3ServiceSimulado: MockHS3Service com latência por comando, aquisição
+  ao ritmo real e ruído com semente fixa
+
+Todos guardam em `comandos` a lista (instante, comando) recebida, para medir
+latências e a temporização dos passos. O simulador série precisa de pty
+(Linux/macOS).
+"""
+
+import os
+import select
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from biodesk.quantum.assessment_worker import MockHS3Service
+
+
+class HS3SerieSimulado:
+    """HS3 série num pty; usar como context manager e ligar a `porta`"""
+
+    IDENTIFICACAO = "TiePie engineering,HS3-SIM,000001,1.0"
+
+    def __init__(self, latencia_resposta: float = 0.002):
+        import tty
+
+        self.latencia_resposta = latencia_resposta
+        self.comandos = []  # (instante, comando)
+        self.frequencia = 0.0
+        self.amplitude = 0.0
+        self.offset = 0.0
+        self.a_gerar = False
+
+        self._mestre, self._escravo = os.openpty()
+        # Sem eco nem modo canónico: as respostas não podem voltar como comandos
+        tty.setraw(self._escravo)
+        self.porta = os.ttyname(self._escravo)
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._servir, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join(1.0)
+        os.close(self._mestre)
+        os.close(self._escravo)
+
+    def _servir(self):
+        pendente = b''
+        while not self._parar.is_set():
+            prontos, _, _ = select.select([self._mestre], [], [], 0.05)
+            if not prontos:
+                continue
+            try:
+                pendente += os.read(self._mestre, 4096)
+            except OSError:
+                return
+
+            while b'\n' in pendente:
+                linha, pendente = pendente.split(b'\n', 1)
+                comando = linha.decode('ascii', 'replace').strip()
+                if not comando:
+                    continue
+                self.comandos.append((time.perf_counter(), comando))
+                resposta = self._responder(comando)
+                if self.latencia_resposta:
+                    time.sleep(self.latencia_resposta)
+                os.write(self._mestre, resposta.encode('ascii') + b'\n')
+
+    def _responder(self, comando: str) -> str:
+        verbo, _, argumento = comando.partition(' ')
+        verbo = verbo.upper()
+
+        if verbo == '*IDN?':
+            return self.IDENTIFICACAO
+        if verbo == 'VER?':
+            return '1.0'
+        if verbo == 'CONFIG?':
+            return f"FREQ={self.frequencia};AMPL={self.amplitude};OFFS={self.offset}"
+        if verbo == 'STATUS?':
+            return 'GENERATING' if self.a_gerar else 'IDLE'
+        if verbo == 'MEASURE?':
+            return f"{self.frequencia:.3f}" if self.a_gerar else 'ERROR: sem sinal'
+        if verbo in ('FREQ', 'AMPL', 'OFFS'):
+            try:
+                valor = float(argumento)
+            except ValueError:
+                return 'ERROR'
+            setattr(self, {'FREQ': 'frequencia', 'AMPL': 'amplitude', 'OFFS': 'offset'}[verbo], valor)
+            return 'OK'
+        if verbo == 'START':
+            self.a_gerar = True
+            return 'OK'
+        if verbo == 'STOP':
+            self.a_gerar = False
+            return 'OK'
+        return 'ERROR'
+
+
+# ═══════════════ LibTiePie simulada ═══════════════
+
+class _CanalGerador:
+    """Canal do AWG: cada escrita de parâmetro é um comando USB com latência"""
+
+    _PARAMETROS = ('frequency', 'amplitude', 'offset', 'signal_type')
+
+    def __init__(self, lib):
+        object.__setattr__(self, '_lib', lib)
+        object.__setattr__(self, 'frequency', 0.0)
+        object.__setattr__(self, 'amplitude', 0.0)
+        object.__setattr__(self, 'offset', 0.0)
+        object.__setattr__(self, 'signal_type', lib.ST_SINE)
+        object.__setattr__(self, 'enabled', False)
+        object.__setattr__(self, 'burst', SimpleNamespace(enabled=False, mode=None, count=0))
+        object.__setattr__(self, 'trigger', SimpleNamespace(enabled=False, kind=None))
+
+    def __setattr__(self, nome, valor):
+        if nome in self._PARAMETROS:
+            self._lib._comando(f"{nome}={valor}")
+        object.__setattr__(self, nome, valor)
+
+
+class _Gerador:
+    def __init__(self, lib):
+        self._lib = lib
+        self.channel_count = 1
+        self.channels = [_CanalGerador(lib)]
+        self.a_gerar = False
+
+    def start(self):
+        self._lib._comando('generator.start')
+        self.a_gerar = True
+
+    def stop(self):
+        self._lib._comando('generator.stop')
+        self.a_gerar = False
+
+
+class _Osciloscopio:
+    def __init__(self, lib, gerador):
+        self._lib = lib
+        self._gerador = gerador
+        self.channel_count = 2
+        self.channels = [SimpleNamespace(enabled=False, coupling=None, range=2.0) for _ in range(2)]
+        self.sample_frequency = 1000.0
+        self.record_length = 1000
+        self.trigger = SimpleNamespace(time_out=1.0)
+        self._inicio = None
+
+    def start(self):
+        self._lib._comando('oscilloscope.start')
+        self._inicio = time.perf_counter()
+
+    def stop(self):
+        self._lib._comando('oscilloscope.stop')
+        self._inicio = None
+
+    @property
+    def is_data_ready(self) -> bool:
+        # O registo fica pronto ao fim de record_length amostras em tempo real
+        if self._inicio is None:
+            return False
+        return time.perf_counter() - self._inicio >= self.record_length / self.sample_frequency
+
+    def get_data(self):
+        self._lib._comando('oscilloscope.get_data')
+        n = int(self.record_length)
+        t = np.arange(n) / self.sample_frequency
+        canal = self._gerador.channels[0]
+        if self._gerador.a_gerar and canal.frequency > 0:
+            corrente = 0.001 * canal.amplitude * np.sin(2 * np.pi * canal.frequency * t)
+        else:
+            corrente = np.zeros(n)
+        ch1 = corrente + 0.0001 * self._lib.rng.standard_normal(n)
+        ch2 = corrente * 1000 + 0.001 * self._lib.rng.standard_normal(n)
+        self._inicio = time.perf_counter()
+        return [ch1, ch2]
+
+
+class _DispositivoHS3:
+    def __init__(self, lib):
+        self.serial_number = 'HS3-SIM-000001'
+        self.name = 'Handyscope HS3 (simulado)'
+        self.driver_version = '0.9.0-sim'
+        self.generator = _Gerador(lib)
+        self.oscilloscope = _Osciloscopio(lib, self.generator)
+
+    def close(self):
+        pass
+
+
+class LibTiePieSimulada:
+    """
+    Substituto do módulo libtiepie com um único HS3
+
+    Uso: hs3_service.libtiepie = LibTiePieSimulada(); hs3_service.LIBTIEPIE_AVAILABLE = True
+    """
+
+    ST_SINE, ST_SQUARE, ST_TRIANGLE, ST_ARBITRARY = 1, 2, 4, 8
+    CK_DCV = 1
+    BM_COUNT = 1
+    TK_GATED = 4
+    PRODUCTID = SimpleNamespace(HS3=13)
+
+    def __init__(self, latencia_comando: float = 0.001, semente: int = 0):
+        self.latencia_comando = latencia_comando
+        self.rng = np.random.default_rng(semente)
+        self.comandos = []  # (instante, comando)
+        self.network = SimpleNamespace(auto_detect_enabled=False)
+        self.device_list = SimpleNamespace(
+            count=1,
+            update=lambda: None,
+            get_product_id=lambda indice: self.PRODUCTID.HS3,
+            create_device=lambda indice: _DispositivoHS3(self),
+        )
+
+    def _comando(self, comando: str):
+        self.comandos.append((time.perf_counter(), comando))
+        if self.latencia_comando:
+            time.sleep(self.latencia_comando)
+
+
+# ═══════════════ MockHS3Service alargado ═══════════════
+
+class HS3ServiceSimulado(MockHS3Service):
+    """
+    MockHS3Service com o comportamento temporal do hardware
+
+    Cada comando tem latência fixa, read_stream demora o tempo pedido (como
+    a aquisição real) e o ruído é reprodutível (semente fixa). Inclui os
+    métodos de burst/trigger que o ProtocolRunner usa.
+    """
+
+    def __init__(self, latencia_comando: float = 0.001, semente: int = 0, tempo_real: bool = True):
+        super().__init__()
+        self.latencia_comando = latencia_comando
+        self.tempo_real = tempo_real
+        self.sample_rate = 1000.0
+        self.comandos = []  # (instante, comando)
+        np.random.seed(semente)
+
+    def _comando(self, comando: str):
+        self.comandos.append((time.perf_counter(), comando))
+        if self.latencia_comando:
+            time.sleep(self.latencia_comando)
+
+    def configure_generator(self, signal_type: str, amplitude_vpp: float, offset_v: float):
+        self._comando('configure_generator')
+        super().configure_generator(signal_type, amplitude_vpp, offset_v)
+
+    def set_frequency(self, freq_hz: float):
+        self._comando('set_frequency')
+        super().set_frequency(freq_hz)
+
+    def start_output(self):
+        self._comando('start_output')
+        super().start_output()
+
+    def stop_output(self):
+        self._comando('stop_output')
+        super().stop_output()
+
+    def set_burst_by_cycles(self, cycles: int):
+        self._comando('set_burst_by_cycles')
+
+    def enable_ext_trigger_gated(self, enabled: bool):
+        self._comando('enable_ext_trigger_gated')
+
+    def start_stream(self, sample_hz: float, v_range: float):
+        self._comando('start_stream')
+        super().start_stream(sample_hz, v_range)
+
+    def stop_stream(self):
+        self._comando('stop_stream')
+        super().stop_stream()
+
+    def read_stream(self, seconds: float):
+        self._comando('read_stream')
+        if self.tempo_real:
+            time.sleep(seconds)
+        return super().read_stream(seconds)
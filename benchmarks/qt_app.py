@@ -0,0 +1,18 @@
+"""
+Aplicação Qt partilhada pelos benchmarks
+═══════════════════════════════════════════════════════════════════════
+
+O PyQt destrói uma QCoreApplication sem referências; os benchmarks só
+precisam que ela exista, por isso a referência fica guardada aqui.
+"""
+
+import sys
+
+_aplicacao = None
+
+
+def garantir_aplicacao(classe):
+    """Cria a aplicação (QCoreApplication, QGuiApplication ou QApplication) se ainda não existir"""
+    global _aplicacao
+    _aplicacao = classe.instance() or classe(sys.argv)
+    return _aplicacao
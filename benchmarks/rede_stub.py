@@ -0,0 +1,99 @@
+"""
+Destino TCP local para simular a rede nos benchmarks (sem dependências externas)
+═══════════════════════════════════════════════════════════════════════
+
+Escuta numa porta de 127.0.0.1 e muda de comportamento a pedido:
+- 'online': aceita e fecha as ligações (a sonda responde de imediato)
+- 'recusa': porta fechada, a ligação é recusada logo (rede sem internet)
+- 'silencio': a fila de ligações pendentes está cheia e ninguém aceita,
+  por isso os SYN são descartados e a ligação só falha no timeout (firewall
+  que descarta pacotes, o caso que congelava a interface)
+"""
+
+import socket
+import threading
+
+from connectivity_monitor import sonda_tcp
+
+MODOS = ('online', 'recusa', 'silencio')
+
+
+class RedeLoopback:
+    """Destino local cujo comportamento muda com definir_modo(); usar como context manager"""
+
+    def __init__(self, modo: str = 'online'):
+        self._lock = threading.Lock()
+        self._escuta = None
+        self._pendentes = []
+        self.porta = None
+        self.modo = None
+        self.definir_modo(modo)
+
+    @property
+    def endereco(self):
+        return ('127.0.0.1', self.porta)
+
+    def sonda(self, timeout: float = 0.5):
+        """Sonda TCP do monitor apontada para este destino"""
+        return sonda_tcp([self.endereco], timeout)
+
+    def definir_modo(self, modo: str):
+        if modo not in MODOS:
+            raise ValueError(f"Modo desconhecido: {modo}")
+        with self._lock:
+            self._fechar()
+            self.modo = modo
+            if modo == 'recusa':
+                if self.porta is None:
+                    self._abrir(1).close()
+                return
+            escuta = self._abrir(0 if modo == 'silencio' else 128)
+            if modo == 'online':
+                threading.Thread(target=self._aceitar, args=(escuta,), daemon=True).start()
+            else:
+                # Encher a fila de pendentes: as ligações seguintes ficam sem resposta
+                for _ in range(4):
+                    cliente = socket.socket()
+                    cliente.setblocking(False)
+                    try:
+                        cliente.connect(self.endereco)
+                    except BlockingIOError:
+                        pass
+                    self._pendentes.append(cliente)
+
+    def _abrir(self, backlog: int) -> socket.socket:
+        escuta = socket.socket()
+        escuta.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        escuta.bind(('127.0.0.1', self.porta or 0))
+        escuta.listen(backlog)
+        self.porta = escuta.getsockname()[1]
+        self._escuta = escuta
+        return escuta
+
+    @staticmethod
+    def _aceitar(escuta: socket.socket):
+        while True:
+            try:
+                ligacao, _ = escuta.accept()
+            except OSError:
+                return  # fechado por definir_modo / __exit__
+            ligacao.close()
+
+    def _fechar(self):
+        for cliente in self._pendentes:
+            cliente.close()
+        self._pendentes = []
+        if self._escuta is not None:
+            try:
+                self._escuta.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._escuta.close()
+            self._escuta = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self._fechar()
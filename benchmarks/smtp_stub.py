@@ -0,0 +1,126 @@
+"""
+Servidor SMTP mínimo para benchmarks (sem dependências externas)
+═══════════════════════════════════════════════════════════════════════
+
+Aceita EHLO/HELO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, RSET, NOOP e QUIT,
+descarta o conteúdo (ou guarda a última mensagem) e conta mensagens e bytes
+recebidos. A latência opcional no cumprimento e no AUTH imita o custo de
+ligação + TLS + login de um servidor real.
+"""
+
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _responder(self, linha):
+        self.wfile.write(linha.encode('ascii') + b'\r\n')
+
+    def _ler_dados(self, guardar):
+        """Lê a fase DATA em blocos até <CRLF>.<CRLF> (sem PIPELINING não há mais nada a seguir)"""
+        tamanho = 0
+        partes = [] if guardar else None
+        cauda = b'\r\n'
+        while True:
+            dados = self.rfile.read1(1024 * 1024)
+            if not dados:
+                break
+            janela = cauda + dados
+            fim = janela.find(b'\r\n.\r\n')
+            if fim >= 0:
+                # O terminador pode ter começado no bloco anterior (util < 0)
+                util = fim + 2 - len(cauda)
+                tamanho += util
+                if guardar:
+                    partes.append(dados[:util] if util >= 0 else b'')
+                    if util < 0:
+                        partes[-2] = partes[-2][:util]
+                break
+            tamanho += len(dados)
+            if guardar:
+                partes.append(dados)
+            cauda = janela[-4:]
+        return tamanho, (b''.join(partes) if guardar else None)
+
+    def handle(self):
+        stub = self.server.stub
+        with stub.lock:
+            stub.ligacoes += 1
+        time.sleep(stub.latencia_ligacao)
+        self._responder('220 stub ESMTP')
+
+        while True:
+            linha = self.rfile.readline()
+            if not linha:
+                return
+            comando = linha.decode('ascii', 'replace').strip()
+            verbo = comando.split(' ', 1)[0].upper()
+
+            if verbo == 'EHLO':
+                self._responder('250-stub')
+                self._responder('250-AUTH PLAIN LOGIN')
+                self._responder('250 8BITMIME')
+            elif verbo == 'HELO':
+                self._responder('250 stub')
+            elif verbo == 'AUTH':
+                time.sleep(stub.latencia_ligacao)
+                if comando.upper().startswith('AUTH LOGIN'):
+                    self._responder('334 VXNlcm5hbWU6')
+                    self.rfile.readline()
+                    self._responder('334 UGFzc3dvcmQ6')
+                    self.rfile.readline()
+                self._responder('235 2.7.0 Authentication successful')
+            elif verbo in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self._responder('250 OK')
+            elif verbo == 'DATA':
+                self._responder('354 End data with <CR><LF>.<CR><LF>')
+                tamanho, conteudo = self._ler_dados(stub.guardar_mensagens)
+                with stub.lock:
+                    stub.mensagens += 1
+                    stub.bytes_recebidos += tamanho
+                    if conteudo is not None:
+                        stub.ultima_mensagem = conteudo
+                self._responder('250 OK queued')
+            elif verbo == 'QUIT':
+                self._responder('221 Bye')
+                return
+            else:
+                self._responder('502 Command not implemented')
+
+
+class _Servidor(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPStub:
+    """Servidor SMTP local em thread; usar como context manager"""
+
+    def __init__(self, latencia_ligacao: float = 0.0, guardar_mensagens: bool = False):
+        self.latencia_ligacao = latencia_ligacao
+        self.guardar_mensagens = guardar_mensagens
+        self.ultima_mensagem = None  # bytes da última fase DATA (se guardar_mensagens)
+        self.lock = threading.Lock()
+        self.ligacoes = 0
+        self.mensagens = 0
+        self.bytes_recebidos = 0
+        self._servidor = _Servidor(('127.0.0.1', 0), _Handler)
+        self._servidor.stub = self
+        self.porta = self._servidor.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def configurar_email(self, config):
+        """Aponta uma instância de EmailConfig para este stub (só em memória)"""
+        config.set('smtp_server', '127.0.0.1')
+        config.set('smtp_port', self.porta)
+        config.set('use_tls', False)
+        config.set('email', 'clinica@exemplo.pt')
+        config.set('password', 'segredo')
@@ -13,12 +13,18 @@ from datetime import datetime, date
 from pathlib import Path
 import base64
 import hashlib
+from io import BytesIO
 
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt, QDate, QBuffer, QIODevice
-from PyQt6.QtGui import QPixmap, QPainter, QPen, QColor, QFont, QPageLayout, QPageSize
+from PyQt6.QtCore import QDate, QBuffer, QIODevice
+from PyQt6.QtGui import QPixmap, QFont, QPageLayout, QPageSize
 from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
 
+from signature_codec import (
+    codificar_assinatura, e_assinatura_vetorial, obter_cache_raster, rasterizar_base64, rasterizar_imagem,
+    rasterizar_png, tracos_de_segmentos
+)
+
 try:
     from reportlab.pdfgen import canvas
     from reportlab.lib.pagesizes import A4, letter
@@ -27,7 +33,7 @@ try:
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.platypus import (
         SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-        Frame, PageTemplate, BaseDocTemplate, PageBreak
+        Frame, PageTemplate, BaseDocTemplate, PageBreak, Image
     )
     from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY
     from reportlab.graphics.shapes import Drawing, Rect, String
@@ -38,35 +44,71 @@ except ImportError:
     logging.warning("ReportLab não disponível. Funcionalidade de PDF limitada.")
 
 
+# Resolução a que as assinaturas são desenhadas nos documentos
+SIGNATURE_DPI = 300
+
+
 class SignatureImage:
     """Processador de imagens de assinatura"""
     
     @staticmethod
-    def signature_points_to_pixmap(signature_points: List[List], width: int = 400, height: int = 150) -> QPixmap:
+    def signature_to_vector(signature_data: Any, width: int = 400, height: int = 150) -> bytes:
+        """
+        Converter assinatura para o formato vetorial compacto
+        
+        Args:
+            signature_data: Lista de linhas com segmentos, ou bytes já codificados
+            width: Largura do canvas de captura
+            height: Altura do canvas de captura
+            
+        Returns:
+            Bytes no formato de signature_codec (aceita também PNG antigo tal como está)
+        """
+        if isinstance(signature_data, (bytes, bytearray, memoryview)):
+            return bytes(signature_data)
+        return codificar_assinatura(tracos_de_segmentos(signature_data), width, height)
+    
+    @staticmethod
+    def signature_points_to_pixmap(signature_points: List[List], width: int = 400, height: int = 150,
+                                   dpi: Optional[float] = None) -> QPixmap:
         """
         Converter pontos de assinatura para QPixmap
         
         Args:
-            signature_points: Lista de linhas com pontos
+            signature_points: Lista de linhas com pontos (ou bytes vetoriais)
             width: Largura da imagem
             height: Altura da imagem
+            dpi: Se indicado, a imagem é desenhada a esta resolução
             
         Returns:
-            QPixmap com assinatura renderizada
+            QPixmap com assinatura renderizada (desenhada uma vez por assinatura e tamanho)
         """
-        pixmap = QPixmap(width, height)
-        pixmap.fill(Qt.GlobalColor.white)
-        
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.setPen(QPen(QColor(0, 0, 0), 2))
-        
-        for line in signature_points:
-            for start_point, end_point in line:
-                painter.drawLine(start_point, end_point)
-        
-        painter.end()
-        return pixmap
+        vector = SignatureImage.signature_to_vector(signature_points, width, height)
+        if not e_assinatura_vetorial(vector):
+            pixmap = QPixmap()
+            pixmap.loadFromData(vector)
+            return pixmap
+        if dpi:
+            return QPixmap.fromImage(rasterizar_imagem(vector, dpi=dpi))
+        return QPixmap.fromImage(rasterizar_imagem(vector, width, height))
+    
+    @staticmethod
+    def signature_to_base64(signature_data: Any, width: int = 400, height: int = 150,
+                            dpi: Optional[float] = None) -> str:
+        """PNG da assinatura em base64, codificado uma vez por assinatura e tamanho"""
+        vector = SignatureImage.signature_to_vector(signature_data, width, height)
+        if dpi:
+            return rasterizar_base64(vector, dpi=dpi)
+        return rasterizar_base64(vector, width, height)
+    
+    @staticmethod
+    def signature_to_png(signature_data: Any, width: int = 400, height: int = 150,
+                         dpi: Optional[float] = None) -> bytes:
+        """PNG da assinatura (para o ReportLab), em cache por assinatura e tamanho"""
+        vector = SignatureImage.signature_to_vector(signature_data, width, height)
+        if dpi:
+            return rasterizar_png(vector, dpi=dpi)
+        return rasterizar_png(vector, width, height)
     
     @staticmethod
     def pixmap_to_base64(pixmap: QPixmap) -> str:
@@ -77,14 +119,15 @@ class SignatureImage:
             pixmap: QPixmap para converter
             
         Returns:
-            String base64 da imagem
+            String base64 da imagem (em cache pelo cacheKey do pixmap, que muda se for alterado)
         """
-        buffer = QBuffer()
-        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
-        pixmap.save(buffer, "PNG")
+        def encode():
+            buffer = QBuffer()
+            buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+            pixmap.save(buffer, "PNG")
+            return base64.b64encode(buffer.data()).decode('utf-8')
         
-        image_data = buffer.data()
-        return base64.b64encode(image_data).decode('utf-8')
+        return obter_cache_raster().obter(('pixmap', pixmap.cacheKey()), encode)
 
 
 class PDFGenerator:
@@ -370,6 +413,13 @@ class PDFGenerator:
         
         # Converter assinatura para imagem se disponível
         if signature_data:
+            # Imagem desenhada à resolução de impressão (em cache por assinatura)
+            try:
+                png = SignatureImage.signature_to_png(signature_data, dpi=SIGNATURE_DPI)
+                elements.append(Image(BytesIO(png), width=8*cm, height=3*cm))
+            except Exception as e:
+                self.logger.warning(f"Assinatura não rasterizada: {e}")
+            
             # Criar linha para assinatura
             signature_line = Table([["Assinatura capturada digitalmente"]], colWidths=[12*cm])
             signature_line.setStyle(TableStyle([
@@ -517,7 +567,7 @@ class QtPrintGenerator:
                 .field {{ margin: 10px 0; }}
                 .label {{ font-weight: bold; }}
                 .critical {{ color: #e74c3c; font-weight: bold; }}
-                .signature {{ border: 1px solid #000; height: 100px; margin: 20px 0; }}
+                .signature {{ border: 1px solid #000; min-height: 100px; margin: 20px 0; }}
                 .footer {{ font-size: 10px; color: #7f8c8d; text-align: center; margin-top: 40px; }}
             </style>
         </head>
@@ -549,10 +599,14 @@ class QtPrintGenerator:
         
         # Assinatura
         if signature_data:
-            html += '''
+            signature_b64 = SignatureImage.signature_to_base64(signature_data, dpi=SIGNATURE_DPI)
+            html += f'''
             <div class="section">
                 <h2>ASSINATURA</h2>
-                <div class="signature">Assinatura capturada digitalmente</div>
+                <div class="signature">
+                    <img src="data:image/png;base64,{signature_b64}" width="400" height="150">
+                </div>
+                <p>Assinatura capturada digitalmente</p>
             </div>
             '''
         
@@ -26,14 +26,15 @@ from PyQt6.QtCore import QThread, pyqtSignal
 
 # Importar módulos do sistema
 try:
-    from .safety import SafetyLimits, SafetyError, assert_safe_output
+    from .safety import SafetyLimits, SafetyError
     # from .hs3_service import HS3Service, HS3NotFoundError  # Descomentado quando necessário
 except ImportError:
     # Fallback para testes diretos
     import sys
     import os
     sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
-    from biodesk.quantum.safety import SafetyLimits, SafetyError, assert_safe_output
+    from biodesk.quantum.safety import SafetyLimits, SafetyError
+from safety_interlock import SafetyInterlock
 
 
 class AssessmentState(Enum):
@@ -304,7 +305,11 @@ class AssessmentWorker(QThread):
         """Validar configuração da avaliação"""
         # Validar segurança se especificado
         if config.safety_limits:
-            assert_safe_output(config.test_amp_vpp, 0.0, config.safety_limits)
+            violation = SafetyInterlock.from_safety_limits(config.safety_limits).check(
+                amplitude=config.test_amp_vpp, offset=0.0
+            )
+            if violation:
+                raise SafetyError(f"❌ {violation}")
         
         # Validar frequências
         for freq in config.frequencies:
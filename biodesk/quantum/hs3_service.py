@@ -12,8 +12,9 @@ Todas as operações são validadas pelo sistema de segurança.
 import os
 import time
 import logging
+import threading
 import numpy as np
-from typing import Literal, Tuple, Optional
+from typing import Dict, Literal, Tuple, Optional
 from dataclasses import dataclass
 
 # Importar LibTiePie se disponível
@@ -28,6 +29,7 @@ except ImportError:
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from safety_manager import SafetyManager
+from parameter_ramp import ParameterRamp, plan_ramp, DEFAULT_STEPS, DEFAULT_DELAY_MS
 
 class HS3NotFoundError(Exception):
     """Erro quando o HS3 não é encontrado"""
@@ -75,6 +77,11 @@ class HS3Service:
         self.current_amplitude = 0.0
         self.current_offset = 0.0
         
+        # Rampas de amplitude/offset numa thread própria; o lock serializa
+        # as escritas no canal do gerador entre a rampa e os outros comandos
+        self._ramp: Optional[ParameterRamp] = None
+        self._generator_lock = threading.RLock()
+        
         # Estado do osciloscópio
         self.is_streaming = False
         self.stream_sample_rate = 0.0
@@ -161,6 +168,8 @@ class HS3Service:
     def close(self) -> None:
         """Fecha conexão com o HS3"""
         try:
+            self.cancel_ramp()
+            
             if self.is_generating:
                 self.stop_output()
             
@@ -204,9 +213,9 @@ class HS3Service:
         if not self.is_connected:
             raise HS3NotFoundError("HS3 não está conectado")
         
-        # Validação de segurança OBRIGATÓRIA
-        is_safe, safety_msg = self.safety_manager.validate_parameters_before_start(
-            frequency=self.current_frequency,  # Usa frequência atual
+        # Validação de segurança OBRIGATÓRIA (interlock síncrono, antes de enviar)
+        is_safe, safety_msg = self.safety_manager.check_command(
+            frequency=self.current_frequency or None,  # Frequência atual, se já definida
             amplitude=amplitude_vpp,
             offset=offset_v
         )
@@ -218,20 +227,21 @@ class HS3Service:
             gen_ch = self.generator.channels[0]
             
             # Configurar tipo de sinal
-            if signal_type == "sine":
-                gen_ch.signal_type = libtiepie.ST_SINE
-            elif signal_type == "square":
-                gen_ch.signal_type = libtiepie.ST_SQUARE
-            elif signal_type == "triangle":
-                gen_ch.signal_type = libtiepie.ST_TRIANGLE
-            elif signal_type == "arb":
-                gen_ch.signal_type = libtiepie.ST_ARBITRARY
-            else:
-                raise ValueError(f"Tipo de sinal inválido: {signal_type}")
-            
-            # Configurar amplitude e offset com ramp suave
-            self.soft_ramp(gen_ch, "amplitude", amplitude_vpp)
-            self.soft_ramp(gen_ch, "offset", offset_v)
+            with self._generator_lock:
+                if signal_type == "sine":
+                    gen_ch.signal_type = libtiepie.ST_SINE
+                elif signal_type == "square":
+                    gen_ch.signal_type = libtiepie.ST_SQUARE
+                elif signal_type == "triangle":
+                    gen_ch.signal_type = libtiepie.ST_TRIANGLE
+                elif signal_type == "arb":
+                    gen_ch.signal_type = libtiepie.ST_ARBITRARY
+                else:
+                    raise ValueError(f"Tipo de sinal inválido: {signal_type}")
+            
+            # Amplitude e offset em rampa suave, em simultâneo e sem bloquear;
+            # o interlock já validou o estado final
+            self.ramp_parameters(amplitude=amplitude_vpp, offset=offset_v)
             
             self.current_amplitude = amplitude_vpp
             self.current_offset = offset_v
@@ -258,10 +268,10 @@ class HS3Service:
         if not self.is_connected:
             raise HS3NotFoundError("HS3 não está conectado")
         
-        # Validação de segurança
-        is_safe, safety_msg = self.safety_manager.validate_parameters_before_start(
+        # Validação de segurança (interlock síncrono, antes de enviar)
+        is_safe, safety_msg = self.safety_manager.check_command(
             frequency=freq_hz,
-            amplitude=self.current_amplitude,
+            amplitude=self.current_amplitude or None,  # Amplitude atual, se já configurada
             offset=self.current_offset
         )
         
@@ -270,7 +280,8 @@ class HS3Service:
         
         try:
             gen_ch = self.generator.channels[0]
-            gen_ch.frequency = freq_hz
+            with self._generator_lock:
+                gen_ch.frequency = freq_hz
             self.current_frequency = freq_hz
             
             self.logger.info(f"🔊 Frequência definida: {freq_hz:.2f} Hz")
@@ -297,8 +308,10 @@ class HS3Service:
             return
         
         try:
+            self.cancel_ramp()
             if self.generator:
-                self.generator.stop()
+                with self._generator_lock:
+                    self.generator.stop()
             self.is_generating = False
             self.logger.info("⏹️ Gerador parado")
             
@@ -440,34 +453,74 @@ class HS3Service:
         except Exception as e:
             self.logger.error(f"Erro ao parar stream: {e}")
     
-    def soft_ramp(self, generator_channel, attribute: str, target_value: float, 
-                  steps: int = 20, delay_ms: float = 50) -> None:
+    def ramp_parameters(self, amplitude: Optional[float] = None, offset: Optional[float] = None,
+                        steps: int = DEFAULT_STEPS, delay_ms: float = DEFAULT_DELAY_MS,
+                        wait: bool = False) -> ParameterRamp:
+        """
+        Leva amplitude e/ou offset do canal 1 aos valores alvo em rampa
+        
+        A rampa corre numa thread de temporização e a chamada regressa de
+        imediato (wait=True espera o fim). Uma rampa em curso é cancelada
+        e a nova parte dos valores atuais do canal.
+        
+        Args:
+            amplitude: Amplitude alvo em Vpp (None para manter)
+            offset: Offset alvo em volts (None para manter)
+            steps: Número de passos da rampa
+            delay_ms: Intervalo entre passos em milissegundos
+            wait: Bloquear até a rampa terminar
+        """
+        if not self.is_connected:
+            raise HS3NotFoundError("HS3 não está conectado")
+        
+        target = {name: value for name, value in (("amplitude", amplitude), ("offset", offset))
+                  if value is not None}
+        return self.soft_ramp(self.generator.channels[0], target, steps=steps,
+                              delay_ms=delay_ms, wait=wait)
+    
+    def cancel_ramp(self) -> None:
+        """Interrompe a rampa em curso (os parâmetros ficam no ponto atual)"""
+        ramp = self._ramp
+        if ramp is not None and ramp.running:
+            ramp.cancel()
+            self.logger.info("⏹️ Rampa de parâmetros cancelada")
+    
+    def soft_ramp(self, generator_channel, attribute, target_value: Optional[float] = None, 
+                  steps: int = DEFAULT_STEPS, delay_ms: float = DEFAULT_DELAY_MS,
+                  wait: bool = False) -> ParameterRamp:
         """
         Utilitário para transições suaves de parâmetros
         
         Args:
             generator_channel: Canal do gerador
-            attribute: Nome do atributo ('amplitude', 'offset', etc.)
-            target_value: Valor alvo
+            attribute: Nome do atributo ('amplitude', 'offset', etc.) ou
+                dicionário {atributo: valor alvo} para vários em simultâneo
+            target_value: Valor alvo (quando attribute é um nome)
             steps: Número de passos da rampa
             delay_ms: Delay entre passos em milissegundos
+            wait: Bloquear até a rampa terminar (por omissão regressa de imediato)
         """
+        target: Dict[str, float] = (dict(attribute) if isinstance(attribute, dict)
+                                    else {attribute: target_value})
+        self.cancel_ramp()
+        
+        def apply(name: str, value: float) -> None:
+            with self._generator_lock:
+                setattr(generator_channel, name, value)
+        
         try:
-            current_value = getattr(generator_channel, attribute)
-            step_size = (target_value - current_value) / steps
-            
-            for i in range(steps):
-                new_value = current_value + (step_size * (i + 1))
-                setattr(generator_channel, attribute, new_value)
-                time.sleep(delay_ms / 1000.0)
-            
-            # Garantir valor final exato
-            setattr(generator_channel, attribute, target_value)
-            
+            with self._generator_lock:
+                start = {name: getattr(generator_channel, name) for name in target}
+            points = plan_ramp(start, target, steps, delay_ms)
         except Exception as e:
-            self.logger.warning(f"Erro na rampa suave para {attribute}: {e}")
-            # Fallback: definir valor diretamente
-            setattr(generator_channel, attribute, target_value)
+            self.logger.warning(f"Erro ao planear rampa suave para {', '.join(target)}: {e}")
+            # Fallback: definir valores diretamente
+            points = [(0.0, target)]
+        
+        self._ramp = ParameterRamp(points, apply).start()
+        if wait:
+            self._ramp.wait()
+        return self._ramp
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -16,7 +16,9 @@ Funcionalidades:
 
 import time
 import logging
+import threading
 import numpy as np
+from functools import partial
 from typing import List, Dict, Any, Optional, Literal, Union
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
@@ -25,7 +27,8 @@ from enum import Enum
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer, QThread
 
 # Importar módulos de segurança e hardware
-from .safety import SafetyLimits, SafetyError, assert_safe_output
+from .safety import SafetyLimits, SafetyError
+from safety_interlock import SafetyInterlock
 # from .hs3_service import HS3Service, HS3NotFoundError  # Descomentado quando necessário
 
 
@@ -139,12 +142,265 @@ class LiveMetrics:
     protocol_start_time: datetime
 
 
+class StepScheduler(QThread):
+    """
+    Agendador de passos com prazos absolutos num relógio monótono
+
+    Corre numa thread própria: o instante de cada transição é calculado a
+    partir da origem do protocolo (origem + soma dos dwell anteriores), por
+    isso atrasos não se acumulam e bloqueios da GUI não alongam os passos.
+    Durante o dwell de um passo é preparada a lista de comandos do passo
+    seguinte; a transição começa mais cedo o tempo que os comandos demoram
+    (média móvel das transições anteriores) para terminar no prazo.
+    """
+    
+    step_due = pyqtSignal(int)          # step_due(step_index) - passo em execução no hardware
+    step_done = pyqtSignal(int)         # step_done(step_index)
+    protocol_done = pyqtSignal()
+    failed = pyqtSignal(str)
+    
+    def __init__(self, protocol: Protocol, hs3_service=None, spin_s: float = 0.002, parent=None):
+        """
+        Args:
+            protocol: Protocolo a executar
+            hs3_service: Serviço HS3 (None para simulação sem hardware)
+            spin_s: Últimos segundos antes do prazo em espera ativa (precisão sub-ms)
+        """
+        super().__init__(parent)
+        self.protocol = protocol
+        self.hs3_service = hs3_service
+        self.spin_s = spin_s
+        self.logger = logging.getLogger("StepScheduler")
+        
+        # Medições: (índice, prazo, fim da transição) em segundos monótonos
+        self.transitions: List[tuple] = []
+        self.origin: Optional[float] = None
+        
+        self._hw_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._abort = False
+        self._paused = False
+        self._interrupted = False  # saída parada por uma pausa: repor o passo atual antes de continuar
+        self._pause_started = 0.0
+        self._paused_total = 0.0
+        self._current_index = 0
+        # Antecipação por tipo de transição (só frequência / reconfiguração completa)
+        self._lead = {False: 0.0, True: 0.0}
+    
+    # ═══════════════ CONTROLO (chamado de outras threads) ═══════════════
+    
+    def pause(self) -> None:
+        """Pausa: para a saída de imediato e suspende os prazos"""
+        with self._hw_lock:
+            if self._paused or self._abort:
+                return
+            self._paused = True
+            self._interrupted = True
+            self._pause_started = time.monotonic()
+            self._stop_output()
+        self._wake.set()
+    
+    def resume(self) -> None:
+        """Retoma: os prazos seguintes são adiados o tempo da pausa"""
+        with self._hw_lock:
+            if not self._paused:
+                return
+            self._paused = False
+            self._paused_total += time.monotonic() - self._pause_started
+        self._wake.set()
+    
+    def stop(self) -> None:
+        """Aborta: para a saída e termina a thread no próximo ponto de espera"""
+        self._abort = True
+        self._wake.set()
+        with self._hw_lock:
+            self._stop_output()
+    
+    # ═══════════════ PREPARAÇÃO ═══════════════
+    
+    @staticmethod
+    def _needs_reconfigure(step: FrequencyStep, previous: Optional[FrequencyStep]) -> bool:
+        if previous is None:
+            return True
+        return ((step.waveform, step.amp_vpp, step.offset_v, step.mode) !=
+                (previous.waveform, previous.amp_vpp, previous.offset_v, previous.mode))
+    
+    def _plan(self, step: FrequencyStep, previous: Optional[FrequencyStep]) -> List:
+        """Comandos de hardware da transição para `step` (calculados durante o passo anterior)"""
+        hs3 = self.hs3_service
+        if hs3 is None:
+            return []
+        
+        if not self._needs_reconfigure(step, previous):
+            # Mesma forma de onda/amplitude: basta mudar a frequência sem parar a saída
+            commands = [partial(hs3.set_frequency, step.hz)]
+            if step.mode == ProtocolMode.BURST:
+                commands.append(partial(hs3.set_burst_by_cycles, step.auto_burst_cycles))
+            return commands
+        
+        commands = []
+        if previous is not None:
+            commands.append(hs3.stop_output)
+        commands.append(partial(hs3.configure_generator, signal_type=step.waveform,
+                                amplitude_vpp=step.amp_vpp, offset_v=step.offset_v))
+        commands.append(partial(hs3.set_frequency, step.hz))
+        if step.mode == ProtocolMode.BURST:
+            commands.append(partial(hs3.set_burst_by_cycles, step.auto_burst_cycles))
+        elif step.mode == ProtocolMode.GATED:
+            commands.append(partial(hs3.enable_ext_trigger_gated, True))
+        else:
+            commands.append(self._disable_gated)
+        commands.append(hs3.start_output)
+        return commands
+    
+    def _disable_gated(self) -> None:
+        try:
+            self.hs3_service.enable_ext_trigger_gated(False)
+        except Exception:
+            pass  # Ignorar se não suportado
+    
+    def _stop_output(self) -> None:
+        if self.hs3_service is None:
+            return
+        try:
+            self.hs3_service.stop_output()
+        except Exception as e:
+            self.logger.warning(f"Erro ao parar saída HS3: {e}")
+    
+    # ═══════════════ EXECUÇÃO ═══════════════
+    
+    def _execute(self, commands: List) -> bool:
+        """
+        Executa os comandos de uma transição; False se abortado ou em pausa
+        
+        A verificação é feita sob o mesmo lock que pause()/stop() usam para
+        parar a saída, por isso nenhum comando (ex: start_output) corre
+        depois de a pausa ter parado o gerador.
+        """
+        with self._hw_lock:
+            if self._abort or self._paused:
+                return False
+            for command in commands:
+                command()
+        return True
+    
+    def _wait_until(self, deadline: float) -> bool:
+        """
+        Espera até ao prazo (deslocado pelo tempo em pausa)
+        
+        Dorme até `spin_s` antes do prazo e termina em espera ativa.
+        Devolve False se o protocolo for abortado. O tempo em pausa é somado
+        a _paused_total por resume().
+        """
+        while True:
+            if self._abort:
+                return False
+            
+            if self._paused:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            
+            if self._interrupted:
+                # Repor a configuração completa do passo interrompido
+                step = self.protocol.steps[self._current_index]
+                commands = self._plan(step, None)
+                with self._hw_lock:
+                    if not (self._abort or self._paused):
+                        for command in commands:
+                            command()
+                        self._interrupted = False
+                continue
+            
+            remaining = deadline + self._paused_total - time.monotonic()
+            if remaining <= 0:
+                return True
+            if remaining > self.spin_s:
+                self._wake.wait(remaining - self.spin_s)
+                self._wake.clear()
+            else:
+                time.sleep(0)
+    
+    def run(self) -> None:
+        steps = self.protocol.steps
+        try:
+            # Primeiro passo: o protocolo começa quando a saída está configurada
+            # (uma pausa antes do início só atrasa a origem)
+            self._interrupted = True
+            if not self._wait_until(0.0):
+                return
+            with self._hw_lock:
+                self._paused_total = 0.0
+                self.origin = time.monotonic()
+            self.transitions.append((0, self.origin, self.origin))
+            self.step_due.emit(0)
+            
+            deadline = self.origin
+            for index in range(1, len(steps) + 1):
+                deadline += steps[index - 1].dwell_s
+                
+                # Preparar a transição durante o dwell do passo atual
+                if index < len(steps):
+                    reconfigure = self._needs_reconfigure(steps[index], steps[index - 1])
+                    commands = self._plan(steps[index], steps[index - 1])
+                else:
+                    reconfigure = False
+                    commands = [self._stop_output]
+                
+                while True:
+                    if not self._wait_until(deadline - self._lead[reconfigure]):
+                        return
+                    started = time.monotonic()
+                    if self._execute(commands):
+                        break
+                    if self._abort:
+                        return
+                    # Pausa entre o fim da espera e a transição: voltar a esperar
+                    # (o passo atual é reposto ao retomar e o prazo é adiado)
+                finished = time.monotonic()
+                self._lead[reconfigure] = 0.7 * self._lead[reconfigure] + 0.3 * (finished - started)
+                self.transitions.append((index, deadline + self._paused_total, finished))
+                
+                self.step_done.emit(index - 1)
+                if index < len(steps):
+                    self._current_index = index
+                    self.step_due.emit(index)
+            
+            self.protocol_done.emit()
+            
+        except Exception as e:
+            with self._hw_lock:
+                self._stop_output()
+            self.failed.emit(f"Erro no passo {self._current_index + 1}: {e}")
+    
+    def timing_stats(self) -> Dict[str, float]:
+        """
+        Jitter e deriva das transições (ms)
+        
+        - jitter: |fim da transição - prazo| de cada passo
+        - deriva: atraso do último passo face ao prazo absoluto
+        """
+        offsets = [finished - deadline for _, deadline, finished in self.transitions[1:]]
+        if not offsets:
+            return {'transitions': 0}
+        errors = sorted(abs(offset) for offset in offsets)
+        return {
+            'transitions': len(offsets),
+            'jitter_mean_ms': sum(errors) / len(errors) * 1000,
+            'jitter_p95_ms': errors[int(0.95 * (len(errors) - 1))] * 1000,
+            'jitter_max_ms': errors[-1] * 1000,
+            'drift_ms': offsets[-1] * 1000,
+        }
+
+
 class ProtocolRunner(QObject):
     """
     Runner principal para execução de protocolos de terapia quântica
     
     Executa sequencialmente os passos de um protocolo, com validação
-    de segurança, soft-ramp e sinais Qt para integração com UI.
+    de segurança, soft-ramp e sinais Qt para integração com UI. A
+    temporização dos passos e o controlo do hardware durante a execução
+    ficam a cargo do StepScheduler (thread com prazos absolutos).
     """
     
     # Sinais Qt para integração com interface
@@ -175,10 +431,9 @@ class ProtocolRunner(QObject):
         self.current_step_index = 0
         self.current_metrics: Optional[LiveMetrics] = None
         
-        # Timers para execução
-        self.execution_timer = QTimer()
-        self.execution_timer.timeout.connect(self._execution_step)
-        self.execution_timer.setSingleShot(False)
+        # Agendador de passos (criado em cada execução)
+        self.scheduler: Optional[StepScheduler] = None
+        self.last_timing_stats: Dict[str, float] = {}
         
         self.metrics_timer = QTimer()
         self.metrics_timer.timeout.connect(self._update_metrics)
@@ -187,6 +442,7 @@ class ProtocolRunner(QObject):
         # Timestamps
         self.protocol_start_time: Optional[datetime] = None
         self.step_start_time: Optional[datetime] = None
+        self._pause_time: Optional[datetime] = None
         
         # Flags de controlo
         self.abort_requested = False
@@ -218,21 +474,19 @@ class ProtocolRunner(QObject):
             SafetyError: Se algum passo violar limites de segurança
         """
         safety_limits = protocol.safety_limits or self.default_safety_limits
+        # Limites compilados uma vez por protocolo (frequência, amplitude, offset e tensão total)
+        interlock = SafetyInterlock.from_safety_limits(safety_limits)
         
         self.logger.info(f"🛡️ Validando segurança de {len(protocol.steps)} passos...")
         
         for i, step in enumerate(protocol.steps):
             try:
                 # Validar cada passo individualmente
-                assert_safe_output(step.amp_vpp, step.offset_v, safety_limits)
+                violation = interlock.check(step.hz, step.amp_vpp, step.offset_v)
+                if violation:
+                    raise SafetyError(f"❌ Passo {i+1}: {violation}")
                 
                 # Validações adicionais específicas do runner
-                if step.hz > safety_limits.max_frequency_hz:
-                    raise SafetyError(
-                        f"❌ Passo {i+1}: Frequência {step.hz:.2f}Hz excede "
-                        f"limite de {safety_limits.max_frequency_hz:.2f}Hz"
-                    )
-                
                 if step.dwell_s > safety_limits.max_single_frequency_duration_min * 60:
                     raise SafetyError(
                         f"❌ Passo {i+1}: Duração {step.dwell_s:.1f}s excede "
@@ -281,7 +535,13 @@ class ProtocolRunner(QObject):
             
             # Iniciar execução
             self._change_state(ProtocolState.RUNNING)
-            self._start_next_step()
+            self.step_start_time = datetime.now()
+            self.scheduler = StepScheduler(protocol, self.hs3_service)
+            self.scheduler.step_due.connect(self._on_step_due)
+            self.scheduler.step_done.connect(self._on_step_done)
+            self.scheduler.protocol_done.connect(self._finish_protocol)
+            self.scheduler.failed.connect(self._on_scheduler_failed)
+            self.scheduler.start(QThread.Priority.TimeCriticalPriority)
             
             # Iniciar timer de métricas
             self.metrics_timer.start()
@@ -309,16 +569,13 @@ class ProtocolRunner(QObject):
             return False
         
         self.pause_requested = True
+        self._pause_time = datetime.now()
         self._change_state(ProtocolState.PAUSED)
         
-        # Parar saída se hardware disponível
-        if self.hs3_service:
-            try:
-                self.hs3_service.stop_output()
-            except Exception as e:
-                self.logger.warning(f"Erro ao parar saída HS3: {e}")
+        # O agendador para a saída e suspende os prazos
+        if self.scheduler:
+            self.scheduler.pause()
         
-        self.execution_timer.stop()
         self.logger.info("⏸️ Protocolo pausado")
         return True
     
@@ -330,8 +587,13 @@ class ProtocolRunner(QObject):
         self.pause_requested = False
         self._change_state(ProtocolState.RUNNING)
         
-        # Continuar passo atual
-        self._continue_current_step()
+        # O tempo em pausa não conta para o passo atual
+        if self.step_start_time and self._pause_time:
+            self.step_start_time += datetime.now() - self._pause_time
+        
+        # Continuar passo atual (o agendador repõe a configuração do hardware)
+        if self.scheduler:
+            self.scheduler.resume()
         
         self.logger.info("▶️ Protocolo retomado")
         return True
@@ -344,16 +606,9 @@ class ProtocolRunner(QObject):
         self._change_state(ProtocolState.ABORTING)
         self.abort_requested = True
         
-        # Parar tudo
-        self.execution_timer.stop()
+        # Parar tudo (o agendador para a saída do hardware)
         self.metrics_timer.stop()
-        
-        # Parar saída se hardware disponível
-        if self.hs3_service:
-            try:
-                self.hs3_service.stop_output()
-            except Exception as e:
-                self.logger.warning(f"Erro ao parar saída HS3: {e}")
+        self._stop_scheduler()
         
         # Reset estado
         self._reset_state()
@@ -364,140 +619,63 @@ class ProtocolRunner(QObject):
         
         self.logger.warning(f"🛑 Protocolo abortado: {reason}")
     
-    def _start_next_step(self) -> None:
-        """Iniciar próximo passo do protocolo"""
-        if not self.current_protocol or self.current_step_index >= len(self.current_protocol.steps):
-            self._finish_protocol()
+    def _stop_scheduler(self) -> None:
+        """Termina a thread do agendador (parando a saída) e guarda as medições"""
+        scheduler = self.scheduler
+        if not scheduler:
             return
-        
-        if self.abort_requested:
+        self.scheduler = None
+        if scheduler.isRunning():
+            scheduler.stop()
+            scheduler.wait()
+        self.last_timing_stats = scheduler.timing_stats()
+    
+    def _on_step_due(self, step_index: int) -> None:
+        """Passo em execução no hardware (emitido pelo agendador)"""
+        if not self.current_protocol or self.abort_requested:
             return
         
-        step = self.current_protocol.steps[self.current_step_index]
+        step = self.current_protocol.steps[step_index]
+        self.current_step_index = step_index
         self.step_start_time = datetime.now()
         
         self.logger.info(
-            f"🎵 Passo {self.current_step_index + 1}/{len(self.current_protocol.steps)}: "
+            f"🎵 Passo {step_index + 1}/{len(self.current_protocol.steps)}: "
             f"{step.hz:.2f}Hz, {step.amp_vpp:.3f}V, {step.dwell_s:.1f}s"
         )
-        
-        # Emitir sinal de início do passo
-        self.step_started.emit(self.current_step_index, step)
-        
-        # Configurar hardware se disponível
-        if self.hs3_service:
-            self._configure_hardware_for_step(step)
-        
-        # Configurar timer para duração do passo
-        step_duration_ms = int(step.dwell_s * 1000)
-        self.execution_timer.setInterval(step_duration_ms)
-        self.execution_timer.start()
-    
-    def _configure_hardware_for_step(self, step: FrequencyStep) -> None:
-        """Configurar hardware HS3 para o passo atual"""
-        try:
-            # Configurar gerador com soft-ramp
-            self.hs3_service.configure_generator(
-                signal_type=step.waveform,
-                amplitude_vpp=step.amp_vpp,
-                offset_v=step.offset_v
-            )
-            
-            # Configurar frequência
-            self.hs3_service.set_frequency(step.hz)
-            
-            # Configurar modo específico
-            if step.mode == ProtocolMode.BURST:
-                cycles = step.auto_burst_cycles
-                self.hs3_service.set_burst_by_cycles(cycles)
-                self.logger.info(f"💥 Modo burst: {cycles} ciclos")
-            
-            elif step.mode == ProtocolMode.GATED:
-                self.hs3_service.enable_ext_trigger_gated(True)
-                self.logger.info("🎯 Modo gated ativado")
-            
-            else:  # CONTINUOUS
-                # Resetar configurações especiais
-                try:
-                    self.hs3_service.enable_ext_trigger_gated(False)
-                except:
-                    pass  # Ignorar se não suportado
-            
-            # Iniciar saída
-            self.hs3_service.start_output()
-            
-        except Exception as e:
-            error_msg = f"Erro ao configurar hardware para passo {self.current_step_index + 1}: {e}"
-            self.logger.error(error_msg)
-            self.abort_protocol(error_msg)
+        self.step_started.emit(step_index, step)
     
-    def _continue_current_step(self) -> None:
-        """Continuar passo atual após pausa"""
-        if not self.current_protocol or not self.step_start_time:
-            return
-        
-        # Calcular tempo restante
-        step = self.current_protocol.steps[self.current_step_index]
-        elapsed = (datetime.now() - self.step_start_time).total_seconds()
-        remaining = max(0, step.dwell_s - elapsed)
-        
-        if remaining > 0:
-            # Reconfigurar hardware e continuar
-            if self.hs3_service:
-                self._configure_hardware_for_step(step)
-            
-            # Timer para tempo restante
-            remaining_ms = int(remaining * 1000)
-            self.execution_timer.setInterval(remaining_ms)
-            self.execution_timer.start()
-        else:
-            # Passo já terminou, avançar
-            self._execution_step()
-    
-    def _execution_step(self) -> None:
-        """Callback do timer de execução - passo terminado"""
-        self.execution_timer.stop()
-        
+    def _on_step_done(self, step_index: int) -> None:
         if self.abort_requested:
             return
-        
-        # Parar saída do passo atual
-        if self.hs3_service:
-            try:
-                self.hs3_service.stop_output()
-            except Exception as e:
-                self.logger.warning(f"Erro ao parar saída: {e}")
-        
-        # Emitir sinal de fim do passo
-        self.step_finished.emit(self.current_step_index)
-        
-        self.logger.info(f"✅ Passo {self.current_step_index + 1} concluído")
-        
-        # Avançar para próximo passo
-        self.current_step_index += 1
-        
-        # Pequena pausa entre passos (100ms)
-        QTimer.singleShot(100, self._start_next_step)
+        self.step_finished.emit(step_index)
+        self.logger.info(f"✅ Passo {step_index + 1} concluído")
+    
+    def _on_scheduler_failed(self, message: str) -> None:
+        error_msg = f"Erro ao configurar hardware: {message}"
+        self.logger.error(error_msg)
+        self.abort_protocol(error_msg)
     
     def _finish_protocol(self) -> None:
         """Finalizar protocolo com sucesso"""
-        self.execution_timer.stop()
+        if not self.current_protocol:
+            return
         self.metrics_timer.stop()
         
+        # O último passo já parou a saída; stop() garante-o também aqui
+        self._stop_scheduler()
         self._change_state(ProtocolState.FINISHED)
         
-        # Garantir que saída está parada
-        if self.hs3_service:
-            try:
-                self.hs3_service.stop_output()
-            except Exception as e:
-                self.logger.warning(f"Erro ao parar saída final: {e}")
-        
         # Emitir sinal de conclusão
         self.finished.emit()
         
         duration = (datetime.now() - self.protocol_start_time).total_seconds()
         self.logger.info(f"🏁 Protocolo '{self.current_protocol.name}' concluído em {duration:.1f}s")
+        if self.last_timing_stats.get('transitions'):
+            self.logger.info(
+                f"⏱️ Jitter médio {self.last_timing_stats['jitter_mean_ms']:.2f}ms, "
+                f"deriva final {self.last_timing_stats['drift_ms']:.2f}ms"
+            )
         
         # Reset estado
         self._reset_state()
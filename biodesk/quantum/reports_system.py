@@ -12,7 +12,7 @@ from pathlib import Path
 from typing import List, Dict, Optional, Any
 from dataclasses import asdict
 import base64
-from io import BytesIO
+from io import BytesIO, StringIO
 
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                             QPushButton, QTextEdit, QTabWidget, QGroupBox,
@@ -27,6 +27,7 @@ from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
 from .resonance_analysis import ResonanceItem, ResonanceField
 from .protocol_generator import TherapyProtocol, ProtocolStep, ProtocolType
 from .resonance_interface import ModernWidget
+from report_stream import escrever_relatorio
 
 class SessionData:
     """Dados completos de uma sessão"""
@@ -79,332 +80,53 @@ class ReportGenerator:
         self.template_dir = Path("templates/reports")
         self.output_dir = Path("reports")
         self.ensure_directories()
+        self._analytics = None
         
     def ensure_directories(self):
         """Garante que diretórios existem"""
         self.template_dir.mkdir(parents=True, exist_ok=True)
         self.output_dir.mkdir(parents=True, exist_ok=True)
     
+    @property
+    def analytics(self):
+        """Análise de sessões concluídas (agregados por paciente e frequência)"""
+        if self._analytics is None:
+            from session_analytics import obter_analise
+            self._analytics = obter_analise()
+        return self._analytics
+    
+    def get_session_history(self, date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                            patient_id: Optional[str] = None, limit: int = 500) -> List[Dict]:
+        """Sessões concluídas no intervalo, mais recentes primeiro"""
+        return self.analytics.historico(patient_id=patient_id, desde=date_from, ate=date_to, limite=limit)
+    
+    def get_frequency_summary(self, limit: int = 20) -> List[Dict]:
+        """Frequências mais usadas em todas as sessões"""
+        return self.analytics.resumo_frequencias(limite=limit)
+    
     def generate_analysis_report(self, session_data: SessionData, 
                                format_type: str = "html") -> str:
         """Gera relatório de análise de ressonância"""
-        if format_type == "html":
-            return self._generate_html_analysis_report(session_data)
-        elif format_type == "text":
-            return self._generate_text_analysis_report(session_data)
-        elif format_type == "csv":
-            return self._generate_csv_analysis_report(session_data)
-        else:
-            raise ValueError(f"Formato não suportado: {format_type}")
+        buffer = StringIO()
+        self.stream_analysis_report(session_data, buffer, format_type)
+        return buffer.getvalue()
     
-    def _generate_html_analysis_report(self, session_data: SessionData) -> str:
-        """Gera relatório HTML detalhado"""
-        
-        # Calcular estatísticas
-        results = session_data.analysis_results
-        if results:
-            positive_count = len([r for r in results if r.resonance_value > 0])
-            negative_count = len([r for r in results if r.resonance_value < 0])
-            avg_resonance = sum(r.resonance_value for r in results) / len(results)
-            
-            # Itens mais ressonantes
-            top_positive = sorted([r for r in results if r.resonance_value > 0], 
-                                key=lambda x: x.resonance_value, reverse=True)[:5]
-            top_negative = sorted([r for r in results if r.resonance_value < 0],
-                                key=lambda x: abs(x.resonance_value), reverse=True)[:5]
-        else:
-            positive_count = negative_count = 0
-            avg_resonance = 0
-            top_positive = top_negative = []
-        
-        html_content = f"""
-<!DOCTYPE html>
-<html lang="pt">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Relatório de Análise de Ressonância - Biodesk</title>
-    <style>
-        body {{ 
-            font-family: 'Segoe UI', Arial, sans-serif; 
-            margin: 20px; 
-            color: #2c3e50;
-            line-height: 1.6;
-        }}
-        .header {{ 
-            text-align: center; 
-            border-bottom: 3px solid #3498db; 
-            padding-bottom: 20px;
-            margin-bottom: 30px;
-        }}
-        .header h1 {{ 
-            color: #2c3e50; 
-            margin: 0;
-            font-size: 28px;
-        }}
-        .header h2 {{ 
-            color: #7f8c8d; 
-            margin: 5px 0 0 0;
-            font-weight: normal;
-        }}
-        .section {{ 
-            margin: 30px 0; 
-            padding: 20px;
-            border: 1px solid #bdc3c7;
-            border-radius: 8px;
-            background-color: #f8f9fa;
-        }}
-        .section h3 {{ 
-            color: #34495e; 
-            border-bottom: 2px solid #ecf0f1;
-            padding-bottom: 10px;
-            margin-top: 0;
-        }}
-        .stats-grid {{ 
-            display: grid; 
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); 
-            gap: 15px; 
-            margin: 20px 0;
-        }}
-        .stat-card {{ 
-            background: white; 
-            padding: 15px; 
-            border-radius: 6px; 
-            text-align: center;
-            border: 1px solid #ecf0f1;
-        }}
-        .stat-number {{ 
-            font-size: 24px; 
-            font-weight: bold; 
-            color: #3498db;
-        }}
-        .stat-label {{ 
-            color: #7f8c8d; 
-            font-size: 14px;
-        }}
-        .resonance-table {{ 
-            width: 100%; 
-            border-collapse: collapse; 
-            margin: 20px 0;
-        }}
-        .resonance-table th, .resonance-table td {{ 
-            border: 1px solid #ddd; 
-            padding: 10px; 
-            text-align: left;
-        }}
-        .resonance-table th {{ 
-            background-color: #3498db; 
-            color: white;
-        }}
-        .positive {{ color: #27ae60; font-weight: bold; }}
-        .negative {{ color: #e74c3c; font-weight: bold; }}
-        .neutral {{ color: #f39c12; }}
-        .footer {{ 
-            text-align: center; 
-            margin-top: 40px; 
-            padding-top: 20px;
-            border-top: 1px solid #bdc3c7;
-            color: #7f8c8d;
-            font-size: 12px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>🔮 Relatório de Análise de Ressonância</h1>
-        <h2>Sistema Biodesk - Medicina Informacional</h2>
-        <p><strong>Data:</strong> {session_data.timestamp.strftime('%d/%m/%Y às %H:%M')}</p>
-        <p><strong>ID da Sessão:</strong> {session_data.session_id}</p>
-    </div>
-
-    <div class="section">
-        <h3>👤 Dados do Paciente</h3>
-        <p><strong>Nome:</strong> {session_data.patient_witness.get('name', 'N/A')}</p>
-        <p><strong>Data de Nascimento:</strong> {session_data.patient_witness.get('birth_date', 'N/A')}</p>
-        <p><strong>Campo Analisado:</strong> {session_data.field_used}</p>
-    </div>
-
-    <div class="section">
-        <h3>📊 Estatísticas Gerais</h3>
-        <div class="stats-grid">
-            <div class="stat-card">
-                <div class="stat-number">{len(results)}</div>
-                <div class="stat-label">Total de Itens</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number positive">{positive_count}</div>
-                <div class="stat-label">Ressonantes Positivos</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number negative">{negative_count}</div>
-                <div class="stat-label">Stressors</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number">{avg_resonance:+.1f}</div>
-                <div class="stat-label">Ressonância Média</div>
-            </div>
-        </div>
-    </div>
-
-    <div class="section">
-        <h3>✅ Top 5 Ressonantes Positivos</h3>
-        <table class="resonance-table">
-            <thead>
-                <tr>
-                    <th>Item</th>
-                    <th>Categoria</th>
-                    <th>Ressonância</th>
-                    <th>Estabilidade</th>
-                    <th>Confiança</th>
-                </tr>
-            </thead>
-            <tbody>
+    def stream_analysis_report(self, session_data: SessionData, destino,
+                               format_type: str = "html") -> int:
         """
+        Escreve o relatório de análise por partes num ficheiro ou socket
         
-        for item in top_positive:
-            html_content += f"""
-                <tr>
-                    <td>{item.name}</td>
-                    <td>{item.category}</td>
-                    <td class="positive">{item.resonance_value:+d}</td>
-                    <td>{item.stability:.2f}</td>
-                    <td>{item.confidence:.2f}</td>
-                </tr>
-            """
-        
-        html_content += """
-            </tbody>
-        </table>
-    </div>
-
-    <div class="section">
-        <h3>⚠️ Top 5 Stressors</h3>
-        <table class="resonance-table">
-            <thead>
-                <tr>
-                    <th>Item</th>
-                    <th>Categoria</th>
-                    <th>Ressonância</th>
-                    <th>Estabilidade</th>
-                    <th>Confiança</th>
-                </tr>
-            </thead>
-            <tbody>
-        """
-        
-        for item in top_negative:
-            html_content += f"""
-                <tr>
-                    <td>{item.name}</td>
-                    <td>{item.category}</td>
-                    <td class="negative">{item.resonance_value:+d}</td>
-                    <td>{item.stability:.2f}</td>
-                    <td>{item.confidence:.2f}</td>
-                </tr>
-            """
-        
-        html_content += f"""
-            </tbody>
-        </table>
-    </div>
-
-    <div class="section">
-        <h3>📝 Observações</h3>
-        <p>{session_data.notes if session_data.notes else 'Nenhuma observação registrada.'}</p>
-    </div>
-
-    <div class="footer">
-        <p>Relatório gerado pelo Sistema Biodesk de Medicina Informacional</p>
-        <p>Este relatório é para fins de pesquisa e apoio complementar</p>
-        <p>Data de geração: {datetime.now().strftime('%d/%m/%Y às %H:%M')}</p>
-    </div>
-</body>
-</html>
+        destino: objeto com write() (ficheiro aberto, StringIO) ou sendall()
+        (socket). format_type: html, text/txt ou csv. Devolve os caracteres escritos.
         """
-        
-        return html_content
+        return escrever_relatorio(session_data, destino, format_type)
     
-    def _generate_text_analysis_report(self, session_data: SessionData) -> str:
-        """Gera relatório em texto simples"""
-        
-        results = session_data.analysis_results
-        positive_count = len([r for r in results if r.resonance_value > 0])
-        negative_count = len([r for r in results if r.resonance_value < 0])
-        
-        report = f"""
-================================================================================
-                        RELATÓRIO DE ANÁLISE DE RESSONÂNCIA
-                           Sistema Biodesk - Medicina Informacional
-================================================================================
-
-Data da Sessão: {session_data.timestamp.strftime('%d/%m/%Y às %H:%M')}
-ID da Sessão: {session_data.session_id}
-
-DADOS DO PACIENTE
-================================================================================
-Nome: {session_data.patient_witness.get('name', 'N/A')}
-Data de Nascimento: {session_data.patient_witness.get('birth_date', 'N/A')}
-Campo Analisado: {session_data.field_used}
-
-ESTATÍSTICAS GERAIS
-================================================================================
-Total de Itens Analisados: {len(results)}
-Ressonantes Positivos: {positive_count}
-Stressors (Negativos): {negative_count}
-        """
-        
-        if results:
-            avg_resonance = sum(r.resonance_value for r in results) / len(results)
-            report += f"Ressonância Média: {avg_resonance:+.1f}\n"
-            
-            # Top 5 positivos
-            top_positive = sorted([r for r in results if r.resonance_value > 0], 
-                                key=lambda x: x.resonance_value, reverse=True)[:5]
-            
-            if top_positive:
-                report += "\nTOP 5 RESSONANTES POSITIVOS\n"
-                report += "=" * 80 + "\n"
-                for i, item in enumerate(top_positive, 1):
-                    report += f"{i}. {item.name} ({item.category})\n"
-                    report += f"   Ressonância: {item.resonance_value:+d} | "
-                    report += f"Estabilidade: {item.stability:.2f} | "
-                    report += f"Confiança: {item.confidence:.2f}\n\n"
-            
-            # Top 5 negativos
-            top_negative = sorted([r for r in results if r.resonance_value < 0],
-                                key=lambda x: abs(x.resonance_value), reverse=True)[:5]
-            
-            if top_negative:
-                report += "\nTOP 5 STRESSORS\n"
-                report += "=" * 80 + "\n"
-                for i, item in enumerate(top_negative, 1):
-                    report += f"{i}. {item.name} ({item.category})\n"
-                    report += f"   Ressonância: {item.resonance_value:+d} | "
-                    report += f"Estabilidade: {item.stability:.2f} | "
-                    report += f"Confiança: {item.confidence:.2f}\n\n"
-        
-        if session_data.notes:
-            report += f"\nOBSERVAÇÕES\n"
-            report += "=" * 80 + "\n"
-            report += f"{session_data.notes}\n"
-        
-        report += f"\n" + "=" * 80
-        report += f"\nRelatório gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}"
-        report += f"\nSistema Biodesk de Medicina Informacional"
-        
-        return report
-    
-    def _generate_csv_analysis_report(self, session_data: SessionData) -> str:
-        """Gera relatório em formato CSV"""
-        
-        csv_content = "Item,Categoria,Subcategoria,Ressonancia,Estabilidade,Confianca,Campo\n"
-        
-        for item in session_data.analysis_results:
-            csv_content += f'"{item.name}","{item.category}","{item.subcategory}",'
-            csv_content += f'{item.resonance_value},{item.stability:.3f},{item.confidence:.3f},'
-            csv_content += f'"{session_data.field_used}"\n'
-        
-        return csv_content
+    def save_analysis_report(self, session_data: SessionData, file_path,
+                             format_type: str = "html") -> str:
+        """Grava o relatório de análise diretamente no ficheiro, sem o montar em memória"""
+        with open(file_path, 'w', encoding='utf-8', newline='') as f:
+            self.stream_analysis_report(session_data, f, format_type)
+        return str(file_path)
     
     def generate_protocol_report(self, protocol: TherapyProtocol, 
                                execution_log: List = None) -> str:
@@ -699,6 +421,7 @@ class ReportsInterface(ModernWidget):
         filters_layout.addWidget(self.date_to, 0, 3)
         
         refresh_btn = QPushButton("🔄 Atualizar")
+        refresh_btn.clicked.connect(self.load_history)
         filters_layout.addWidget(refresh_btn, 0, 4)
         
         layout.addWidget(filters_group)
@@ -720,8 +443,47 @@ class ReportsInterface(ModernWidget):
         
         layout.addWidget(self.history_table)
         
+        # Frequências mais usadas (agregados da análise de sessões)
+        self.frequency_summary_label = QLabel()
+        self.frequency_summary_label.setWordWrap(True)
+        layout.addWidget(self.frequency_summary_label)
+        
         return widget
     
+    def load_history(self):
+        """Preenche o histórico a partir da análise de sessões (consulta indexada)"""
+        date_from = datetime.combine(self.date_from.date().toPyDate(), datetime.min.time())
+        date_to = datetime.combine(self.date_to.date().toPyDate(), datetime.max.time())
+        
+        try:
+            sessions = self.report_generator.get_session_history(date_from, date_to)
+        except Exception as e:
+            print(f"Erro ao carregar histórico: {e}")
+            return
+        
+        self.history_table.setRowCount(len(sessions))
+        for row, session in enumerate(sessions):
+            started = datetime.fromtimestamp(session['inicio_ts']) if session['inicio_ts'] else None
+            results = f"{session['passos']} passos"
+            if session['score_medio'] is not None:
+                results += f" • média {session['score_medio']:.1f}"
+            
+            self.history_table.setItem(row, 0, QTableWidgetItem(started.strftime("%d/%m/%Y %H:%M") if started else "-"))
+            self.history_table.setItem(row, 1, QTableWidgetItem(session['patient_name'] or session['patient_id'] or "-"))
+            self.history_table.setItem(row, 2, QTableWidgetItem(session['protocol_name'] or session['origem']))
+            self.history_table.setItem(row, 3, QTableWidgetItem(results))
+        
+        try:
+            frequencies = self.report_generator.get_frequency_summary(limit=10)
+        except Exception as e:
+            print(f"Erro ao carregar resumo de frequências: {e}")
+            frequencies = []
+        self.frequency_summary_label.setText(
+            "🎵 Frequências mais usadas: " + ", ".join(
+                f"{f['frequencia']:g} Hz ({f['passos']}×)" for f in frequencies
+            ) if frequencies else ""
+        )
+        
     def set_session_data(self, session_data: SessionData):
         """Define dados da sessão atual"""
         self.current_session_data = session_data
@@ -778,12 +540,9 @@ class ReportsInterface(ModernWidget):
             )
             
             if filename:
-                content = self.report_generator.generate_analysis_report(
-                    self.current_session_data, format_type
+                self.report_generator.save_analysis_report(
+                    self.current_session_data, filename, format_type
                 )
-                
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(content)
                     
                 # Mostrar confirmação (usando print por simplicidade)
                 print(f"Relatório salvo em: {filename}")
@@ -0,0 +1,216 @@
+"""
+🌐 Monitor de conectividade
+- Mantém em cache o estado online/offline: esta_online() só lê um
+  atributo e pode ser chamado na thread da interface sem bloquear
+- O estado é atualizado pelos envios do transporte de email (sucesso ou
+  erro de rede) e por uma sonda numa thread de fundo, repetida com
+  backoff exponencial enquanto não houver ligação
+- Por omissão a sonda liga ao servidor SMTP configurado, o destino de que
+  os envios precisam: uma firewall que bloqueie DNS públicos mas deixe
+  passar SMTP não pode parar os emails agendados
+- A sonda é injetável: qualquer função sem argumentos que devolva bool
+  (ex: sonda_tcp apontada para um servidor local)
+"""
+
+import smtplib
+import socket
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+DESTINOS_SONDA = (("8.8.8.8", 53), ("1.1.1.1", 53))  # sem servidor SMTP configurado
+TIMEOUT_SONDA = 3.0
+INTERVALO_ONLINE = 60.0   # entre sondas enquanto há ligação (s)
+BACKOFF_INICIAL = 5.0     # primeira repetição depois de uma falha (s)
+BACKOFF_MAXIMO = 120.0
+
+Sonda = Callable[[], bool]
+
+
+class EstadoConectividade(NamedTuple):
+    online: Optional[bool]    # None enquanto não houver nenhuma informação
+    desde: Optional[float]    # time.monotonic() da última mudança
+    origem: Optional[str]     # 'sonda', 'smtp', ...
+    falhas_seguidas: int
+
+
+def sonda_tcp(destinos: Sequence[Tuple[str, int]] = DESTINOS_SONDA,
+              timeout: float = TIMEOUT_SONDA) -> Sonda:
+    """Sonda que abre uma ligação TCP ao primeiro destino que responder"""
+    def sondar() -> bool:
+        for destino in destinos:
+            try:
+                socket.create_connection(destino, timeout=timeout).close()
+                return True
+            except OSError:
+                continue
+        return False
+    return sondar
+
+
+def destinos_smtp(config=None) -> Tuple[Tuple[str, int], ...]:
+    """Servidor SMTP configurado; DESTINOS_SONDA se não houver nenhum"""
+    try:
+        if config is None:
+            from email_config import email_config as config
+        smtp = config.get_smtp_config()
+        if smtp.get("server") and smtp.get("port"):
+            return ((smtp["server"], int(smtp["port"])),)
+    except Exception as e:
+        print(f"⚠️ Configuração SMTP indisponível para a sonda: {e}")
+    return DESTINOS_SONDA
+
+
+def sonda_smtp(config=None, timeout: float = TIMEOUT_SONDA) -> Sonda:
+    """Sonda TCP ao servidor SMTP, lido da configuração a cada sondagem (pode mudar)"""
+    def sondar() -> bool:
+        return sonda_tcp(destinos_smtp(config), timeout)()
+    return sondar
+
+
+def erro_de_rede(erro: Exception) -> bool:
+    """Indica se o erro mostra falta de ligação (e não uma recusa do servidor)"""
+    if isinstance(erro, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(erro, smtplib.SMTPException):
+        return False  # o servidor respondeu, portanto há rede
+    return isinstance(erro, OSError)
+
+
+class MonitorConectividade:
+    """Estado de ligação em cache, atualizado por relatos e por uma sonda em fundo"""
+
+    def __init__(self, sonda: Optional[Sonda] = None, intervalo_online: float = INTERVALO_ONLINE,
+                 backoff_inicial: float = BACKOFF_INICIAL, backoff_maximo: float = BACKOFF_MAXIMO):
+        self._sonda = sonda or sonda_smtp()
+        self.intervalo_online = intervalo_online
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+
+        self._online: Optional[bool] = None
+        self._desde: Optional[float] = None
+        self._origem: Optional[str] = None
+        self._falhas_seguidas = 0
+        self._observadores: List[Callable[[bool], None]] = []
+
+        self._condicao = threading.Condition()
+        self._acordar = False
+        self._parar = False
+        self._thread: Optional[threading.Thread] = None
+        self.sondagens = 0
+
+    # ─────────────── consulta (sem I/O) ───────────────
+
+    def esta_online(self) -> bool:
+        """Estado em cache; enquanto não houver informação assume que há ligação"""
+        return self._online is not False
+
+    def estado(self) -> EstadoConectividade:
+        with self._condicao:
+            return EstadoConectividade(self._online, self._desde, self._origem, self._falhas_seguidas)
+
+    def adicionar_observador(self, callback: Callable[[bool], None]):
+        """callback(online) a cada mudança de estado, chamado na thread que a detetou"""
+        with self._condicao:
+            self._observadores.append(callback)
+
+    # ─────────────── relatos ───────────────
+
+    def reportar_sucesso(self, origem: str = "transporte"):
+        self._definir(True, origem)
+
+    def reportar_erro(self, erro: Exception, origem: str = "transporte") -> bool:
+        """
+        Regista um erro de rede e pede uma sonda imediata para o confirmar
+
+        Returns:
+            False se o erro não for de rede (ex: autenticação recusada)
+        """
+        if not erro_de_rede(erro):
+            return False
+        self._definir(False, origem)
+        self.verificar_agora()
+        return True
+
+    def _definir(self, online: bool, origem: str):
+        with self._condicao:
+            mudou = online != self._online
+            self._online = online
+            self._origem = origem
+            self._falhas_seguidas = 0 if online else self._falhas_seguidas + 1
+            if mudou:
+                self._desde = time.monotonic()
+            observadores = list(self._observadores) if mudou else []
+
+        if mudou:
+            print("🌐 Ligação à internet disponível" if online else f"📴 Sem ligação à internet ({origem})")
+        for callback in observadores:
+            try:
+                callback(online)
+            except Exception as e:
+                print(f"❌ Erro no observador de conectividade: {e}")
+
+    # ─────────────── sonda ───────────────
+
+    def verificar(self) -> bool:
+        """Corre a sonda na thread atual (bloqueia até ao timeout da sonda)"""
+        try:
+            online = bool(self._sonda())
+        except Exception:
+            online = False
+        self.sondagens += 1
+        self._definir(online, "sonda")
+        return online
+
+    def verificar_agora(self):
+        """Pede à thread de fundo uma sonda imediata, sem esperar pelo resultado"""
+        with self._condicao:
+            self._acordar = True
+            self._condicao.notify()
+
+    def proxima_espera(self) -> float:
+        """Segundos até à próxima sonda: intervalo fixo com ligação, backoff sem ela"""
+        if self._online is False:
+            return min(self.backoff_maximo, self.backoff_inicial * 2 ** max(0, self._falhas_seguidas - 1))
+        return self.intervalo_online
+
+    def iniciar(self):
+        """Arranca a thread da sonda (a primeira sonda corre de imediato)"""
+        with self._condicao:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._parar = False
+            self._acordar = True
+            self._thread = threading.Thread(target=self._executar, name="MonitorConectividade", daemon=True)
+            self._thread.start()
+
+    def parar(self, timeout: float = 2.0):
+        with self._condicao:
+            self._parar = True
+            self._condicao.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _executar(self):
+        while True:
+            with self._condicao:
+                self._condicao.wait_for(lambda: self._acordar or self._parar, timeout=self.proxima_espera())
+                if self._parar:
+                    return
+                self._acordar = False
+            self.verificar()
+
+
+_monitor: Optional[MonitorConectividade] = None
+_monitor_lock = threading.Lock()
+
+
+def obter_monitor() -> MonitorConectividade:
+    """Monitor partilhado da aplicação (a sonda arranca na primeira chamada)"""
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = MonitorConectividade()
+            _monitor.iniciar()
+        return _monitor
@@ -5,9 +5,169 @@ Compatível com o sistema Biodesk e RGPD
 
 import sqlite3
 import os
+import hashlib
 from datetime import datetime
 import json
 
+from data_cache import get_cache
+from schema_migrations import aplicar_migracoes
+
+
+# Colunas pesadas guardadas fora da linha, no armazém endereçado por hash
+COLUNAS_CONTEUDO_EXTERNO = ('conteudo_html', 'assinatura_paciente', 'assinatura_terapeuta')
+
+
+def criar_tabela_conteudo(cursor):
+    """Cria o armazém de conteúdo (HTML e assinaturas) endereçado por hash"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS conteudo_consentimentos (
+            hash TEXT PRIMARY KEY,
+            dados BLOB NOT NULL,
+            tamanho INTEGER NOT NULL,
+            data_criacao TEXT NOT NULL
+        )
+    ''')
+
+
+def guardar_conteudo(cursor, dados):
+    """
+    Guarda conteúdo no armazém e devolve a referência (hash SHA-256)
+    
+    Conteúdo idêntico (ex: o mesmo texto de consentimento ou a mesma assinatura
+    reutilizada) é guardado uma única vez.
+    
+    Args:
+        cursor: Cursor SQLite com transação ativa
+        dados (str|bytes): HTML ou dados binários da assinatura
+    
+    Returns:
+        str or None: Hash do conteúdo ou None se não houver dados
+    """
+    if dados is None:
+        return None
+    
+    blob = dados.encode('utf-8') if isinstance(dados, str) else bytes(dados)
+    referencia = hashlib.sha256(blob).hexdigest()
+    
+    cursor.execute('''
+        INSERT OR IGNORE INTO conteudo_consentimentos (hash, dados, tamanho, data_criacao)
+        VALUES (?, ?, ?, ?)
+    ''', (referencia, blob, len(blob), datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    
+    return referencia
+
+
+def invalidar_cache_consentimento(conn, consentimento_id):
+    """Invalida a cache do paciente dono do consentimento (escritas que só conhecem o ID)"""
+    linha = conn.execute('SELECT paciente_id FROM consentimentos WHERE id = ?',
+                         (consentimento_id,)).fetchone()
+    if linha:
+        get_cache().invalidate_patient_data(linha[0])
+
+
+def carregar_conteudo(cursor, referencia, texto=False):
+    """
+    Carrega conteúdo do armazém a partir da referência
+    
+    Args:
+        cursor: Cursor SQLite
+        referencia (str): Hash devolvido por guardar_conteudo
+        texto (bool): Se True devolve str (HTML), caso contrário bytes
+    
+    Returns:
+        str|bytes|None: Conteúdo ou None se não existir
+    """
+    if not referencia:
+        return None
+    
+    cursor.execute('SELECT dados FROM conteudo_consentimentos WHERE hash = ?', (referencia,))
+    resultado = cursor.fetchone()
+    if not resultado:
+        return None
+    
+    dados = resultado[0]
+    return bytes(dados).decode('utf-8') if texto else bytes(dados)
+
+
+def resolver_conteudo(cursor, valor_inline, referencia, texto=False):
+    """Devolve o valor inline (registos antigos) ou carrega-o do armazém"""
+    if valor_inline is not None:
+        return valor_inline
+    return carregar_conteudo(cursor, referencia, texto=texto)
+
+
+def migrar_conteudo_para_armazem(conn, tamanho_lote=200):
+    """
+    Move HTML e assinaturas guardados inline na tabela consentimentos
+    para o armazém endereçado por hash
+    
+    Args:
+        conn: Conexão SQLite
+        tamanho_lote (int): Número de registos migrados por transação
+    
+    Returns:
+        int: Número de registos migrados
+    """
+    cursor = conn.cursor()
+    migrados = 0
+    ultimo_id = 0
+    
+    while True:
+        cursor.execute('''
+            SELECT id, conteudo_html, assinatura_paciente, assinatura_terapeuta
+            FROM consentimentos
+            WHERE id > ? AND (conteudo_html IS NOT NULL
+                              OR assinatura_paciente IS NOT NULL
+                              OR assinatura_terapeuta IS NOT NULL)
+            ORDER BY id
+            LIMIT ?
+        ''', (ultimo_id, tamanho_lote))
+        
+        lote = cursor.fetchall()
+        if not lote:
+            break
+        
+        for id_consentimento, html, assinatura_paciente, assinatura_terapeuta in lote:
+            cursor.execute('''
+                UPDATE consentimentos
+                SET conteudo_html = NULL, assinatura_paciente = NULL, assinatura_terapeuta = NULL,
+                    conteudo_html_hash = COALESCE(?, conteudo_html_hash),
+                    assinatura_paciente_hash = COALESCE(?, assinatura_paciente_hash),
+                    assinatura_terapeuta_hash = COALESCE(?, assinatura_terapeuta_hash)
+                WHERE id = ?
+            ''', (
+                guardar_conteudo(cursor, html),
+                guardar_conteudo(cursor, assinatura_paciente),
+                guardar_conteudo(cursor, assinatura_terapeuta),
+                id_consentimento
+            ))
+            ultimo_id = id_consentimento
+            migrados += 1
+        
+        conn.commit()
+    
+    return migrados
+
+
+def limpar_conteudo_orfao(conn):
+    """
+    Remove do armazém conteúdo que já não é referenciado por nenhum consentimento
+    
+    Returns:
+        int: Número de entradas removidas
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        DELETE FROM conteudo_consentimentos
+        WHERE hash NOT IN (
+            SELECT conteudo_html_hash FROM consentimentos WHERE conteudo_html_hash IS NOT NULL
+            UNION SELECT assinatura_paciente_hash FROM consentimentos WHERE assinatura_paciente_hash IS NOT NULL
+            UNION SELECT assinatura_terapeuta_hash FROM consentimentos WHERE assinatura_terapeuta_hash IS NOT NULL
+        )
+    ''')
+    conn.commit()
+    return cursor.rowcount
+
 
 class ConsentimentosManager:
     def __init__(self, db_path="pacientes.db"):
@@ -15,77 +175,11 @@ class ConsentimentosManager:
         self.criar_tabela_consentimentos()
     
     def criar_tabela_consentimentos(self):
-        """Cria a tabela de consentimentos se não existir"""
+        """Garante que a tabela de consentimentos existe (migrações versionadas)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Criar tabela de consentimentos
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS consentimentos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    paciente_id INTEGER NOT NULL,
-                    tipo_consentimento TEXT NOT NULL,
-                    data_assinatura TEXT NOT NULL,
-                    conteudo_html TEXT,
-                    conteudo_texto TEXT,
-                    assinatura_paciente BLOB,
-                    assinatura_terapeuta BLOB,
-                    nome_paciente TEXT,
-                    nome_terapeuta TEXT,
-                    status TEXT DEFAULT 'assinado',
-                    data_criacao TEXT NOT NULL,
-                    FOREIGN KEY (paciente_id) REFERENCES pacientes (id)
-                )
-            ''')
-            
-            # Adicionar colunas de nomes se não existirem (para compatibilidade)
-            try:
-                cursor.execute('ALTER TABLE consentimentos ADD COLUMN nome_paciente TEXT')
-            except sqlite3.OperationalError:
-                pass  # Coluna já existe
-                
-            try:
-                cursor.execute('ALTER TABLE consentimentos ADD COLUMN nome_terapeuta TEXT')
-            except sqlite3.OperationalError:
-                pass  # Coluna já existe
-            
-            # Adicionar colunas de anulação se não existirem
-            try:
-                cursor.execute('ALTER TABLE consentimentos ADD COLUMN data_anulacao TEXT')
-            except sqlite3.OperationalError:
-                pass  # Coluna já existe
-                
-            try:
-                cursor.execute('ALTER TABLE consentimentos ADD COLUMN motivo_anulacao TEXT')
-            except sqlite3.OperationalError:
-                pass  # Coluna já existe
-                
-            # Adicionar coluna para dados do formulário (declaração de saúde)
-            try:
-                cursor.execute('ALTER TABLE consentimentos ADD COLUMN dados_formulario TEXT')
-            except sqlite3.OperationalError:
-                pass  # Coluna já existe
-                
-            # Adicionar coluna para dados do formulário (novo sistema declaração)
-            try:
-                cursor.execute('ALTER TABLE consentimentos ADD COLUMN dados_formulario TEXT')
-            except sqlite3.OperationalError:
-                pass  # Coluna já existe
-                
-            # Adicionar coluna para dados de formulário (novo sistema de declaração)
-            try:
-                cursor.execute('ALTER TABLE consentimentos ADD COLUMN dados_formulario TEXT')
-            except sqlite3.OperationalError:
-                pass  # Coluna já existe
-            
-            conn.commit()
-            
+            aplicar_migracoes(self.db_path, 'pacientes')
         except Exception as e:
-            pass  # Ignorar erros de criação
-        finally:
-            if conn:
-                conn.close()
+            print(f"❌ Erro ao preparar tabela de consentimentos: {e}")
     
     def obter_status_consentimentos(self, paciente_id):
         """
@@ -191,17 +285,19 @@ class ConsentimentosManager:
             
             cursor.execute('''
                 INSERT INTO consentimentos 
-                (paciente_id, tipo_consentimento, data_assinatura, conteudo_html, 
-                 conteudo_texto, assinatura_paciente, assinatura_terapeuta, 
+                (paciente_id, tipo_consentimento, data_assinatura, conteudo_html_hash, 
+                 conteudo_texto, assinatura_paciente_hash, assinatura_terapeuta_hash, 
                  nome_paciente, nome_terapeuta, status, data_criacao, dados_formulario)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
-                paciente_id, tipo_consentimento, data_atual, conteudo_html,
-                conteudo_texto, assinatura_paciente, assinatura_terapeuta,
+                paciente_id, tipo_consentimento, data_atual, guardar_conteudo(cursor, conteudo_html),
+                conteudo_texto, guardar_conteudo(cursor, assinatura_paciente),
+                guardar_conteudo(cursor, assinatura_terapeuta),
                 nome_paciente, nome_terapeuta, 'assinado', data_atual, dados_formulario
             ))
             
             conn.commit()
+            get_cache().invalidate_patient_data(paciente_id)
             print(f"✅ Consentimento '{tipo_consentimento}' guardado para paciente {paciente_id}")
             return True
             
@@ -299,7 +395,8 @@ class ConsentimentosManager:
             cursor.execute('''
                 SELECT id, paciente_id, tipo_consentimento, data_assinatura,
                        conteudo_html, conteudo_texto, status, nome_paciente, nome_terapeuta,
-                       assinatura_paciente, assinatura_terapeuta, data_anulacao, motivo_anulacao
+                       assinatura_paciente, assinatura_terapeuta, data_anulacao, motivo_anulacao,
+                       conteudo_html_hash, assinatura_paciente_hash, assinatura_terapeuta_hash
                 FROM consentimentos 
                 WHERE id = ?
             ''', (consentimento_id,))
@@ -312,13 +409,13 @@ class ConsentimentosManager:
                     'paciente_id': resultado[1],
                     'tipo': resultado[2],
                     'data_assinatura': resultado[3],
-                    'conteudo_html': resultado[4],
+                    'conteudo_html': resolver_conteudo(cursor, resultado[4], resultado[13], texto=True),
                     'conteudo_texto': resultado[5],
                     'status': resultado[6],
                     'nome_paciente': resultado[7],
                     'nome_terapeuta': resultado[8],
-                    'assinatura_paciente': resultado[9],
-                    'assinatura_terapeuta': resultado[10],
+                    'assinatura_paciente': resolver_conteudo(cursor, resultado[9], resultado[14]),
+                    'assinatura_terapeuta': resolver_conteudo(cursor, resultado[10], resultado[15]),
                     'data_anulacao': resultado[11],
                     'motivo_anulacao': resultado[12]
                 }
@@ -351,13 +448,14 @@ class ConsentimentosManager:
             
             cursor.execute('''
                 UPDATE consentimentos 
-                SET assinatura_paciente = ?, nome_paciente = ?
+                SET assinatura_paciente = NULL, assinatura_paciente_hash = ?, nome_paciente = ?
                 WHERE id = ?
-            ''', (assinatura_blob, nome_paciente, consentimento_id))
+            ''', (guardar_conteudo(cursor, assinatura_blob), nome_paciente, consentimento_id))
             
             conn.commit()
             
             if cursor.rowcount > 0:
+                invalidar_cache_consentimento(conn, consentimento_id)
                 print(f"✅ Assinatura do paciente atualizada (ID: {consentimento_id})")
                 return True
             else:
@@ -389,13 +487,14 @@ class ConsentimentosManager:
             
             cursor.execute('''
                 UPDATE consentimentos 
-                SET assinatura_terapeuta = ?, nome_terapeuta = ?
+                SET assinatura_terapeuta = NULL, assinatura_terapeuta_hash = ?, nome_terapeuta = ?
                 WHERE id = ?
-            ''', (assinatura_blob, nome_terapeuta, consentimento_id))
+            ''', (guardar_conteudo(cursor, assinatura_blob), nome_terapeuta, consentimento_id))
             
             conn.commit()
             
             if cursor.rowcount > 0:
+                invalidar_cache_consentimento(conn, consentimento_id)
                 print(f"✅ Assinatura do terapeuta atualizada (ID: {consentimento_id})")
                 return True
             else:
@@ -423,19 +522,23 @@ class ConsentimentosManager:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
+            # Verificar pelas referências/tamanhos sem carregar as imagens
             cursor.execute('''
-                SELECT assinatura_paciente, assinatura_terapeuta
-                FROM consentimentos 
-                WHERE id = ?
+                SELECT COALESCE(LENGTH(c.assinatura_paciente), cp.tamanho, 0),
+                       COALESCE(LENGTH(c.assinatura_terapeuta), ct.tamanho, 0)
+                FROM consentimentos c
+                LEFT JOIN conteudo_consentimentos cp ON cp.hash = c.assinatura_paciente_hash
+                LEFT JOIN conteudo_consentimentos ct ON ct.hash = c.assinatura_terapeuta_hash
+                WHERE c.id = ?
             ''', (consentimento_id,))
             
             resultado = cursor.fetchone()
             
             if resultado:
-                assinatura_paciente, assinatura_terapeuta = resultado
+                tamanho_paciente, tamanho_terapeuta = resultado
                 
-                tem_paciente = assinatura_paciente is not None and len(assinatura_paciente) > 0
-                tem_terapeuta = assinatura_terapeuta is not None and len(assinatura_terapeuta) > 0
+                tem_paciente = tamanho_paciente > 0
+                tem_terapeuta = tamanho_terapeuta > 0
                 
                 return {
                     'paciente': tem_paciente,
@@ -472,18 +575,20 @@ class ConsentimentosManager:
             coluna_assinatura = f"assinatura_{tipo_assinatura}"
             
             cursor.execute(f'''
-                SELECT {coluna_assinatura}
+                SELECT {coluna_assinatura}, {coluna_assinatura}_hash
                 FROM consentimentos 
-                WHERE paciente_id = ? AND tipo_consentimento = ? AND {coluna_assinatura} IS NOT NULL
+                WHERE paciente_id = ? AND tipo_consentimento = ?
+                  AND ({coluna_assinatura} IS NOT NULL OR {coluna_assinatura}_hash IS NOT NULL)
                 ORDER BY data_criacao DESC
                 LIMIT 1
             ''', (paciente_id, tipo_documento))
             
             resultado = cursor.fetchone()
+            assinatura = resolver_conteudo(cursor, resultado[0], resultado[1]) if resultado else None
             
-            if resultado and resultado[0]:
+            if assinatura:
                 print(f"✅ Assinatura encontrada: {tipo_assinatura} para {tipo_documento}")
-                return resultado[0]
+                return assinatura
             else:
                 print(f"❌ Assinatura não encontrada: {tipo_assinatura} para {tipo_documento}")
                 return None
@@ -532,11 +637,12 @@ class ConsentimentosManager:
                 
                 cursor.execute(f'''
                     UPDATE consentimentos 
-                    SET {coluna_assinatura} = ?, {coluna_nome} = ?
+                    SET {coluna_assinatura} = NULL, {coluna_assinatura}_hash = ?, {coluna_nome} = ?
                     WHERE id = ?
-                ''', (assinatura_blob, nome_pessoa, consentimento_id))
+                ''', (guardar_conteudo(cursor, assinatura_blob), nome_pessoa, consentimento_id))
                 
                 conn.commit()
+                get_cache().invalidate_patient_data(paciente_id)
                 
                 if cursor.rowcount > 0:
                     print(f"✅ Assinatura {tipo_assinatura} atualizada para {tipo_documento} (ID: {consentimento_id})")
@@ -549,23 +655,26 @@ class ConsentimentosManager:
                 data_atual = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 
                 # Preparar colunas para inserção
+                referencia = guardar_conteudo(cursor, assinatura_blob)
+                referencia_html = guardar_conteudo(cursor, '')
                 if tipo_assinatura == 'paciente':
                     cursor.execute('''
                         INSERT INTO consentimentos 
                         (paciente_id, tipo_consentimento, data_assinatura, data_criacao, 
-                         conteudo_html, conteudo_texto, assinatura_paciente, nome_paciente)
+                         conteudo_html_hash, conteudo_texto, assinatura_paciente_hash, nome_paciente)
                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (paciente_id, tipo_documento, data_atual, data_atual, '', '', assinatura_blob, nome_pessoa))
+                    ''', (paciente_id, tipo_documento, data_atual, data_atual, referencia_html, '', referencia, nome_pessoa))
                 else:
                     cursor.execute('''
                         INSERT INTO consentimentos 
                         (paciente_id, tipo_consentimento, data_assinatura, data_criacao, 
-                         conteudo_html, conteudo_texto, assinatura_terapeuta, nome_terapeuta)
+                         conteudo_html_hash, conteudo_texto, assinatura_terapeuta_hash, nome_terapeuta)
                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (paciente_id, tipo_documento, data_atual, data_atual, '', '', assinatura_blob, nome_pessoa))
+                    ''', (paciente_id, tipo_documento, data_atual, data_atual, referencia_html, '', referencia, nome_pessoa))
                 
                 conn.commit()
                 consentimento_id = cursor.lastrowid
+                get_cache().invalidate_patient_data(paciente_id)
                 
                 print(f"✅ Nova assinatura {tipo_assinatura} criada para {tipo_documento} (ID: {consentimento_id})")
                 return True
@@ -623,6 +732,7 @@ class ConsentimentosManager:
             ''', (data_anulacao, motivo_anulacao, consentimento_id))
             
             conn.commit()
+            get_cache().invalidate_patient_data(paciente_id)
             
             if cursor.rowcount > 0:
                 print(f"✅ Consentimento {tipo_consentimento} anulado com sucesso (ID: {consentimento_id})")
@@ -646,7 +756,8 @@ class ConsentimentosManager:
             cursor = conn.cursor()
             
             cursor.execute('''
-                SELECT conteudo_html, conteudo_texto, nome_paciente, nome_terapeuta, data_assinatura
+                SELECT conteudo_html, conteudo_texto, nome_paciente, nome_terapeuta, data_assinatura,
+                       conteudo_html_hash
                 FROM consentimentos 
                 WHERE paciente_id = ? AND tipo_consentimento = ? AND status != 'anulado'
                 ORDER BY data_criacao DESC
@@ -657,7 +768,7 @@ class ConsentimentosManager:
             
             if resultado:
                 return {
-                    'conteudo_html': resultado[0] or '',
+                    'conteudo_html': resolver_conteudo(cursor, resultado[0], resultado[5], texto=True) or '',
                     'conteudo_texto': resultado[1] or '',
                     'nome_paciente': resultado[2] or '',
                     'nome_terapeuta': resultado[3] or '',
@@ -690,7 +801,8 @@ class ConsentimentosManager:
             cursor = conn.cursor()
             
             cursor.execute('''
-                SELECT id, conteudo_texto, data_criacao, status, conteudo_html, dados_formulario 
+                SELECT id, conteudo_texto, data_criacao, status, conteudo_html, dados_formulario,
+                       conteudo_html_hash
                 FROM consentimentos 
                 WHERE paciente_id = ? AND tipo_consentimento = ?
                 ORDER BY data_criacao DESC
@@ -705,7 +817,7 @@ class ConsentimentosManager:
                     'conteudo_texto': resultado[1] or '',
                     'data_criacao': resultado[2],
                     'status': resultado[3] or 'assinado',
-                    'conteudo_html': resultado[4] or '',
+                    'conteudo_html': resolver_conteudo(cursor, resultado[4], resultado[6], texto=True) or '',
                     'dados_formulario': resultado[5] or ''
                 }
             
@@ -744,6 +856,7 @@ class ConsentimentosManager:
             conn.commit()
             
             if cursor.rowcount > 0:
+                invalidar_cache_consentimento(conn, declaracao_id)
                 print(f"✅ Declaração {declaracao_id} marcada como alterada")
                 return True
             else:
@@ -780,12 +893,14 @@ class ConsentimentosManager:
             cursor.execute('''
                 INSERT INTO consentimentos 
                 (paciente_id, tipo_consentimento, data_assinatura, data_criacao, 
-                 conteudo_texto, conteudo_html, status)
+                 conteudo_texto, conteudo_html_hash, status)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (paciente_id, tipo_documento, data_atual, data_atual, conteudo_texto, conteudo_html, 'pendente_assinatura'))
+            ''', (paciente_id, tipo_documento, data_atual, data_atual, conteudo_texto,
+                  guardar_conteudo(cursor, conteudo_html), 'pendente_assinatura'))
             
             conn.commit()
             consentimento_id = cursor.lastrowid
+            get_cache().invalidate_patient_data(paciente_id)
             
             print(f"✅ Nova declaração criada com ID: {consentimento_id}")
             return consentimento_id
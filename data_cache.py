@@ -41,11 +41,15 @@ class DataCache:
                 'email_config': 1800,     # 30 minutos
                 'iris_analysis': 3600,    # 1 hora
                 'user_preferences': 7200, # 2 horas
-                'system_config': 86400    # 24 horas
+                'system_config': 86400,   # 24 horas
+                'prefetch': 120           # 2 minutos (pré-carregamento de fichas)
             }
             self._max_size = 1000  # Máximo de entradas no cache
             self._cleanup_interval = 300  # Limpeza a cada 5 minutos
             self._last_cleanup = time.time()
+            # O pré-carregamento de fichas escreve a partir de outra thread
+            self._dados_lock = threading.RLock()
+            self._invalidacoes: Dict[str, float] = {}  # {str(patient_id): instante da última escrita}
             self._initialized = True
     
     def _get_ttl_for_key(self, key: str) -> int:
@@ -88,6 +92,10 @@ class DataCache:
     
     def get(self, key: str) -> Optional[Any]:
         """Obtém valor do cache se não expirado"""
+        with self._dados_lock:
+            return self._get(key)
+    
+    def _get(self, key: str) -> Optional[Any]:
         # Limpeza periódica
         current_time = time.time()
         if current_time - self._last_cleanup > self._cleanup_interval:
@@ -107,29 +115,33 @@ class DataCache:
     
     def set(self, key: str, value: Any) -> None:
         """Armazena valor no cache com timestamp atual"""
-        self._cache[key] = (value, time.time())
-        self._enforce_size_limit()
+        with self._dados_lock:
+            self._cache[key] = (value, time.time())
+            self._enforce_size_limit()
     
     def delete(self, key: str) -> bool:
         """Remove chave específica do cache"""
-        if key in self._cache:
-            del self._cache[key]
-            return True
-        return False
+        with self._dados_lock:
+            if key in self._cache:
+                del self._cache[key]
+                return True
+            return False
     
     def clear_prefix(self, prefix: str) -> int:
         """Remove todas as chaves com determinado prefixo"""
-        keys_to_remove = [key for key in self._cache.keys() if key.startswith(prefix)]
-        
-        for key in keys_to_remove:
-            del self._cache[key]
+        with self._dados_lock:
+            keys_to_remove = [key for key in self._cache.keys() if key.startswith(prefix)]
+            
+            for key in keys_to_remove:
+                del self._cache[key]
         
         return len(keys_to_remove)
     
     def clear_all(self) -> None:
         """Limpa todo o cache"""
-        count = len(self._cache)
-        self._cache.clear()
+        with self._dados_lock:
+            count = len(self._cache)
+            self._cache.clear()
         print(f"🗑️ Cache: Removidas todas as {count} entradas")
     
     def get_stats(self) -> Dict[str, Any]:
@@ -137,10 +149,11 @@ class DataCache:
         current_time = time.time()
         expired_count = 0
         
-        for key, (value, timestamp) in self._cache.items():
-            ttl = self._get_ttl_for_key(key)
-            if current_time - timestamp > ttl:
-                expired_count += 1
+        with self._dados_lock:
+            for key, (value, timestamp) in self._cache.items():
+                ttl = self._get_ttl_for_key(key)
+                if current_time - timestamp > ttl:
+                    expired_count += 1
         
         return {
             'total_entries': len(self._cache),
@@ -198,10 +211,41 @@ class DataCache:
         return None
     
     def invalidate_patient_data(self, patient_id: int) -> None:
-        """Invalida cache de um paciente específico"""
+        """Invalida cache de um paciente específico (incluindo o pré-carregamento)"""
         key = f"patient_data_{patient_id}"
-        if self.delete(key):
-            print(f"🗑️ Cache: Dados do paciente {patient_id} invalidados")
+        with self._dados_lock:
+            self._invalidacoes[self._patient_key(patient_id)] = time.time()
+            self.clear_prefix(f"prefetch_{self._patient_key(patient_id)}_")
+            if self.delete(key):
+                print(f"🗑️ Cache: Dados do paciente {patient_id} invalidados")
+    
+    @staticmethod
+    def _patient_key(patient_id) -> str:
+        return str(patient_id)
+    
+    def set_patient_prefetch(self, patient_id: int, tipo: str, value: Any, loaded_since: float) -> bool:
+        """
+        Guarda dados pré-carregados de um paciente
+        
+        Ignora o valor se o paciente foi alterado depois de `loaded_since`
+        (instante em que a leitura começou), para não repor dados antigos.
+        """
+        with self._dados_lock:
+            if self._invalidacoes.get(self._patient_key(patient_id), 0) >= loaded_since:
+                return False
+            self.set(f"prefetch_{self._patient_key(patient_id)}_{tipo}", value)
+            return True
+    
+    def pop_patient_prefetch(self, patient_id: int, tipo: str) -> Optional[Any]:
+        """Retira dados pré-carregados (usados uma vez, ao abrir a ficha)"""
+        key = f"prefetch_{self._patient_key(patient_id)}_{tipo}"
+        with self._dados_lock:
+            value = self._get(key)
+            self._cache.pop(key, None)
+            return value
+    
+    def has_patient_prefetch(self, patient_id: int, tipo: str) -> bool:
+        return self.get(f"prefetch_{self._patient_key(patient_id)}_{tipo}") is not None
     
     def invalidate_templates(self, categoria: str = None) -> None:
         """Invalida cache de templates"""
@@ -2,6 +2,9 @@ import sqlite3
 import logging
 from typing import List, Dict, Any, Optional
 
+from data_cache import get_cache
+from schema_migrations import aplicar_migracoes
+
 logging.basicConfig(level=logging.INFO)
 
 class DBManager:
@@ -32,74 +35,12 @@ class DBManager:
         return sqlite3.connect(self.db_path)
     
     def _ensure_tables(self):
-        """Garante que todas as tabelas necessárias existem"""
+        """Garante que o esquema está atualizado (migrações versionadas)"""
         try:
-            with self._connect() as conn:
-                cursor = conn.cursor()
-                
-                # Verificar se a tabela imagens_iris existe
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS imagens_iris (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        paciente_id INTEGER NOT NULL,
-                        tipo TEXT NOT NULL,
-                        caminho_imagem TEXT NOT NULL,
-                        data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (paciente_id) REFERENCES pacientes (id)
-                    )
-                """)
-                
-                # ═══════════════ MIGRAÇÃO SEGURA: ANÁLISE DE ÍRIS ═══════════════
-                # Adicionar novas colunas se não existirem (compatibilidade com BD antigas)
-                self._add_column_if_not_exists(cursor, 'imagens_iris', 'constituicao', 'TEXT')
-                self._add_column_if_not_exists(cursor, 'imagens_iris', 'sinais', 'TEXT')
-                self._add_column_if_not_exists(cursor, 'imagens_iris', 'data_analise', 'TIMESTAMP')
-                
-                # ═══════════════ MIGRAÇÃO SEGURA: DECLARAÇÃO DE SAÚDE ═══════════════
-                # Adicionar campos para declaração de estado de saúde na tabela pacientes
-                self._add_column_if_not_exists(cursor, 'pacientes', 'declaracao_saude_html', 'TEXT')
-                self._add_column_if_not_exists(cursor, 'pacientes', 'declaracao_saude_data', 'TEXT')
-                self._add_column_if_not_exists(cursor, 'pacientes', 'declaracao_saude_assinada', 'BOOLEAN DEFAULT 0')
-                self._add_column_if_not_exists(cursor, 'pacientes', 'declaracao_saude_data_assinatura', 'TEXT')
-                self._add_column_if_not_exists(cursor, 'pacientes', 'declaracao_saude_dados', 'TEXT')  # JSON dos dados do formulário
-                self._add_column_if_not_exists(cursor, 'pacientes', 'declaracao_saude_primeira_criacao', 'TEXT')  # Data primeiro preenchimento
-                self._add_column_if_not_exists(cursor, 'pacientes', 'declaracao_saude_ultima_alteracao', 'TEXT')  # Data última alteração
-                self._add_column_if_not_exists(cursor, 'pacientes', 'declaracao_saude_hash', 'TEXT')  # Hash para detectar alterações
-                
-                # ═══════════════ MIGRAÇÃO SEGURA: OBSERVAÇÕES ═══════════════
-                # Adicionar campo de observações na tabela pacientes
-                self._add_column_if_not_exists(cursor, 'pacientes', 'observacoes', 'TEXT')
-                
-                # ═══════════════ MIGRAÇÃO SEGURA: COMO CONHECEU ═══════════════
-                # Adicionar campo "como nos conheceu" na tabela pacientes
-                self._add_column_if_not_exists(cursor, 'pacientes', 'conheceu', 'TEXT')
-                
-                # ═══════════════ MIGRAÇÃO SEGURA: CAMPOS ATUAIS DA INTERFACE ═══════════════
-                # Apenas campos que EXISTEM na interface atual
-                self._add_column_if_not_exists(cursor, 'pacientes', 'referenciado', 'TEXT')
-                self._add_column_if_not_exists(cursor, 'pacientes', 'nif', 'TEXT')
-                
-                # ═══════════════ CAMPOS HISTÓRICOS (só compatibilidade) ═══════════════
-                # Mantidos para não quebrar dados antigos, mas não usados na interface atual
-                self._add_column_if_not_exists(cursor, 'pacientes', 'notas', 'TEXT')
-                self._add_column_if_not_exists(cursor, 'pacientes', 'historico', 'TEXT')
-                
-                conn.commit()
+            aplicar_migracoes(self.db_path, 'pacientes')
         except Exception as e:
             logging.error(f"[ERRO ao criar tabelas] {e}")
 
-    def _add_column_if_not_exists(self, cursor, table_name: str, column_name: str, column_type: str):
-        """Adiciona uma coluna à tabela se ela não existir (migração segura)"""
-        try:
-            # Verificar se a coluna já existe
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = [row[1] for row in cursor.fetchall()]
-            
-            if column_name not in columns:
-                cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}")
-        except Exception as e:
-            pass  # Ignorar erros de migração
-
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
         try:
             with self._connect() as conn:
@@ -142,6 +83,7 @@ class DBManager:
                     cur.execute(f'INSERT INTO pacientes ({campos}) VALUES ({qs})', values)
                     paciente['id'] = cur.lastrowid
                 conn.commit()
+                get_cache().invalidate_patient_data(paciente['id'])
                 return paciente.get('id', -1)
         except Exception as e:
             logging.error(f'[ERRO ao guardar paciente] {e}')
@@ -171,6 +113,7 @@ class DBManager:
                     (paciente_id, tipo, caminho)
                 )
                 conn.commit()
+                get_cache().invalidate_patient_data(paciente_id)
                 print(f"✅ Imagem de íris adicionada: {tipo} para paciente {paciente_id}")
         except Exception as e:
             logging.error(f"[ERRO ao adicionar imagem] {e}")
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Anexos de email em streaming para Biodesk
+- Codificação base64 incremental (blocos de linhas completas de 76 caracteres)
+- Cache em disco dos anexos já codificados (ex: o mesmo PDF de protocolo
+  enviado a vários pacientes é codificado uma única vez), na pasta de dados
+  da aplicação e com expiração das entradas antigas
+- Mensagem escrita diretamente na fase DATA do SMTP, sem montar o email
+  inteiro em memória
+"""
+
+import base64
+import hashlib
+import io
+import os
+import re
+import smtplib
+import threading
+import uuid
+import logging
+from email.generator import BytesGenerator
+from email.mime.base import MIMEBase
+from email.utils import getaddresses
+from typing import Iterator, List, Optional
+
+from app_paths import expirar_ficheiros, pasta_cache
+
+logger = logging.getLogger(__name__)
+
+# 57 bytes de origem = 1 linha base64 de 76 caracteres; blocos múltiplos de 57
+# produzem sempre linhas completas
+TAMANHO_BLOCO_ORIGEM = 57 * 16 * 1024
+TAMANHO_BLOCO_LEITURA = 1024 * 1024
+IDADE_MAXIMA_CACHE_S = 7 * 86400   # anexos em cache não usados há mais tempo são apagados
+
+
+def tipo_mime_anexo(caminho: str) -> tuple:
+    """Tipo MIME (maintype, subtype) a partir da extensão do ficheiro"""
+    caminho = caminho.lower()
+    if caminho.endswith('.pdf'):
+        return 'application', 'pdf'
+    if caminho.endswith(('.doc', '.docx')):
+        return 'application', 'vnd.openxmlformats-officedocument.wordprocessingml.document'
+    return 'application', 'octet-stream'
+
+
+def codificar_base64_blocos(ficheiro) -> Iterator[bytes]:
+    """Lê um ficheiro binário aberto e devolve blocos base64 com linhas CRLF"""
+    while True:
+        bloco = ficheiro.read(TAMANHO_BLOCO_ORIGEM)
+        if not bloco:
+            return
+        yield base64.encodebytes(bloco).replace(b'\n', b'\r\n')
+
+
+class CacheAnexosCodificados:
+    """
+    Cache em disco de anexos já codificados em base64
+
+    A chave inclui caminho, tamanho e data de modificação, por isso um ficheiro
+    alterado volta a ser codificado. Quando o total excede limite_bytes são
+    removidas as entradas usadas há mais tempo; entradas não usadas há mais
+    de idade_maxima_s são apagadas ao abrir a cache e a cada nova codificação.
+    """
+
+    def __init__(self, pasta: Optional[str] = None, limite_bytes: int = 1024 ** 3,
+                 idade_maxima_s: float = IDADE_MAXIMA_CACHE_S):
+        self.pasta = pasta or pasta_cache('anexos_codificados')
+        self.limite_bytes = limite_bytes
+        self.idade_maxima_s = idade_maxima_s
+        self._lock = threading.Lock()
+        self.codificacoes = 0  # estatística: anexos codificados (falhas de cache)
+        os.makedirs(self.pasta, mode=0o700, exist_ok=True)
+        self.expirar()
+
+    def _chave(self, caminho: str) -> str:
+        info = os.stat(caminho)
+        identificador = f"{os.path.abspath(caminho)}|{info.st_size}|{info.st_mtime_ns}"
+        return hashlib.sha256(identificador.encode('utf-8')).hexdigest()
+
+    def caminho_codificado(self, caminho: str) -> str:
+        """Devolve o ficheiro base64 correspondente, codificando-o se necessário"""
+        destino = os.path.join(self.pasta, self._chave(caminho) + '.b64')
+
+        with self._lock:
+            if os.path.exists(destino):
+                os.utime(destino)  # marcar como usado recentemente
+                return destino
+
+            temporario = f"{destino}.{uuid.uuid4().hex}.tmp"
+            try:
+                with open(caminho, 'rb') as origem, open(temporario, 'wb') as saida:
+                    for bloco in codificar_base64_blocos(origem):
+                        saida.write(bloco)
+                os.replace(temporario, destino)
+            except Exception:
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+                raise
+            self.codificacoes += 1
+
+            self._aplicar_limite(manter=destino)
+        return destino
+
+    def blocos(self, caminho: str) -> Iterator[bytes]:
+        """Blocos base64 do anexo, lidos do ficheiro em cache"""
+        with open(self.caminho_codificado(caminho), 'rb') as f:
+            while True:
+                bloco = f.read(TAMANHO_BLOCO_LEITURA)
+                if not bloco:
+                    return
+                yield bloco
+
+    def expirar(self, agora: Optional[float] = None) -> int:
+        """Apaga as entradas (e temporários órfãos) não usadas há mais de idade_maxima_s"""
+        return expirar_ficheiros(self.pasta, self.idade_maxima_s, agora=agora)
+
+    def _aplicar_limite(self, manter: str):
+        self.expirar()
+        entradas = []
+        for nome in os.listdir(self.pasta):
+            if not nome.endswith('.b64'):
+                continue
+            caminho = os.path.join(self.pasta, nome)
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, caminho))
+
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, caminho in sorted(entradas):
+            if total <= self.limite_bytes:
+                break
+            if caminho == manter:
+                continue
+            try:
+                os.remove(caminho)
+                total -= tamanho
+            except OSError:
+                pass
+
+    def limpar(self):
+        """Remove todos os anexos em cache"""
+        with self._lock:
+            for nome in os.listdir(self.pasta):
+                try:
+                    os.remove(os.path.join(self.pasta, nome))
+                except OSError:
+                    pass
+
+
+class MensagemComAnexos:
+    """
+    Email com anexos enviados em streaming
+
+    Cabeçalhos, corpo e cabeçalhos de cada anexo são gerados pela biblioteca
+    email (com um marcador no lugar do conteúdo); na fase DATA os marcadores
+    são substituídos pelos blocos base64 vindos da cache.
+    """
+
+    def __init__(self, msg, anexos: List[str], cache: CacheAnexosCodificados):
+        self.remetente = msg['From']
+        self.destinatarios = [endereco for _, endereco in getaddresses(msg.get_all('To', []))]
+        self.anexos = list(anexos)
+        self.cache = cache
+
+        marcadores = []
+        for caminho in self.anexos:
+            part = MIMEBase(*tipo_mime_anexo(caminho))
+            part['Content-Transfer-Encoding'] = 'base64'
+            # Parâmetro separado: nomes com acentos seguem em RFC 2231
+            part.add_header('Content-Disposition', 'attachment', filename=os.path.basename(caminho))
+            marcador = f"BIODESK-ANEXO-{uuid.uuid4().hex}"
+            part.set_payload(marcador)
+            msg.attach(part)
+            marcadores.append(marcador.encode('ascii') + b'\r\n')
+
+        # Estrutura da mensagem (sem os anexos), já com CRLF e pontos duplicados
+        self._segmentos = []
+        estrutura = self._achatar(msg)
+        for marcador in marcadores:
+            antes, estrutura = estrutura.split(marcador, 1)
+            self._segmentos.append(self._pontos_duplicados(antes))
+        if not estrutura.endswith(b'\r\n'):
+            estrutura += b'\r\n'
+        self._segmentos.append(self._pontos_duplicados(estrutura))
+
+    @staticmethod
+    def _achatar(msg) -> bytes:
+        """Bytes da mensagem como smtplib.send_message os gera (cabeçalhos em RFC 2047)"""
+        with io.BytesIO() as saida:
+            BytesGenerator(saida, policy=msg.policy.clone(linesep='\r\n')).flatten(msg, linesep='\r\n')
+            return saida.getvalue()
+
+    @staticmethod
+    def _pontos_duplicados(dados: bytes) -> bytes:
+        # Linhas começadas por '.' são duplicadas (RFC 5321 4.5.2); o alfabeto
+        # base64 não tem '.', por isso os anexos passam sem alterações
+        return re.sub(rb'(?m)^\.', b'..', dados)
+
+    def blocos(self) -> Iterator[bytes]:
+        """Conteúdo da fase DATA, sem o terminador"""
+        for segmento, caminho in zip(self._segmentos, self.anexos):
+            yield segmento
+            vazio = True
+            for bloco in self.cache.blocos(caminho):
+                vazio = False
+                yield bloco
+            if vazio:
+                yield b'\r\n'
+        yield self._segmentos[-1]
+
+    def enviar_por(self, smtp: smtplib.SMTP):
+        """Envia a mensagem por uma sessão SMTP já autenticada"""
+        smtp.ehlo_or_helo_if_needed()
+
+        code, resp = smtp.mail(self.remetente)
+        if code != 250:
+            raise smtplib.SMTPSenderRefused(code, resp, self.remetente)
+
+        recusados = {}
+        for destinatario in self.destinatarios:
+            code, resp = smtp.rcpt(destinatario)
+            if code not in (250, 251):
+                recusados[destinatario] = (code, resp)
+        if len(recusados) == len(self.destinatarios):
+            raise smtplib.SMTPRecipientsRefused(recusados)
+
+        smtp.putcmd("data")
+        code, resp = smtp.getreply()
+        if code != 354:
+            raise smtplib.SMTPDataError(code, resp)
+
+        for bloco in self.blocos():
+            smtp.send(bloco)
+        smtp.send(b'.\r\n')
+
+        code, resp = smtp.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, resp)
+        return recusados
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def obter_cache_anexos() -> CacheAnexosCodificados:
+    """Devolve a cache de anexos partilhada"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheAnexosCodificados()
+        return _cache
@@ -0,0 +1,295 @@
+"""
+📧 Fila de Emails Agendados em SQLite
+Tabela indexada por estado e hora de envio: o scheduler consulta apenas
+o próximo envio e reclama os emails vencidos de forma atómica.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from schema_migrations import aplicar_migracoes
+
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
+FORMATOS_ACEITES = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M")
+
+# Estado intermédio: email reclamado por um envio em curso
+STATUS_A_ENVIAR = "a_enviar"
+
+COLUNAS = (
+    "id", "data_criacao", "data_envio", "paciente_id", "paciente_nome", "destinatario",
+    "assunto", "mensagem", "anexos_json", "status", "data_envio_real", "data_falha",
+    "data_cancelamento", "erro",
+)
+
+
+def data_para_timestamp(data_envio: Optional[str]) -> Optional[float]:
+    """Converte a data de envio para epoch; None se for inválida"""
+    if not data_envio:
+        return None
+    for formato in FORMATOS_ACEITES:
+        try:
+            return datetime.strptime(data_envio, formato).timestamp()
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+class FilaEmails:
+    """Fila persistente de emails agendados"""
+
+    def __init__(self, db_path: str = "emails_agendados.db"):
+        self.db_path = db_path
+        aplicar_migracoes(self.db_path, 'emails_agendados')
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _para_dict(row) -> Dict[str, Any]:
+        email = {coluna: row[coluna] for coluna in COLUNAS if row[coluna] is not None}
+        email["anexos"] = json.loads(email.pop("anexos_json", None) or "[]")
+        return email
+
+    # ═══════════════ ESCRITA ═══════════════
+
+    @staticmethod
+    def _linha(email: Dict[str, Any]) -> tuple:
+        paciente_id = email.get("paciente_id")
+        return (
+            str(email.get("id") or datetime.now().timestamp()),
+            email.get("data_criacao") or datetime.now().strftime(FORMATO_DATA),
+            email.get("data_envio"),
+            data_para_timestamp(email.get("data_envio")),
+            str(paciente_id) if paciente_id not in (None, "") else None,
+            email.get("paciente_nome"),
+            email.get("destinatario"),
+            email.get("assunto"),
+            email.get("mensagem"),
+            json.dumps(email.get("anexos", []), ensure_ascii=False),
+            email.get("status", "agendado"),
+            email.get("data_envio_real"),
+            email.get("data_falha"),
+            email.get("data_cancelamento"),
+            email.get("erro"),
+        )
+
+    def inserir_varios(self, emails: List[Dict[str, Any]]) -> List[str]:
+        """Insere vários emails numa única transação e devolve os IDs"""
+        linhas = [self._linha(email) for email in emails]
+
+        with self._connect() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO emails_agendados
+                (id, data_criacao, data_envio, data_envio_ts, paciente_id, paciente_nome,
+                 destinatario, assunto, mensagem, anexos_json, status,
+                 data_envio_real, data_falha, data_cancelamento, erro)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', linhas)
+        conn.close()
+        return [linha[0] for linha in linhas]
+
+    def inserir(self, email: Dict[str, Any]) -> str:
+        """Insere um email na fila e devolve o ID"""
+        return self.inserir_varios([email])[0]
+
+    def cancelar(self, email_id: str) -> Optional[Dict[str, Any]]:
+        """Cancela um email ainda agendado; devolve-o ou None"""
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                UPDATE emails_agendados SET status = 'cancelado', data_cancelamento = ?
+                WHERE id = ? AND status = 'agendado'
+            ''', (datetime.now().strftime(FORMATO_DATA), email_id))
+            cancelado = cursor.rowcount > 0
+        conn.close()
+        return self.obter(email_id) if cancelado else None
+
+    def reclamar_vencidos(self, agora: Optional[float] = None, limite: int = 50) -> List[Dict[str, Any]]:
+        """
+        Reclama atomicamente os emails vencidos (status agendado -> a_enviar)
+
+        A seleção e a atualização correm na mesma transação IMMEDIATE, por isso
+        duas verificações concorrentes nunca reclamam o mesmo email.
+        """
+        agora = time.time() if agora is None else agora
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute('''
+                SELECT * FROM emails_agendados
+                WHERE status = 'agendado' AND data_envio_ts <= ?
+                ORDER BY data_envio_ts
+                LIMIT ?
+            ''', (agora, limite)).fetchall()
+
+            conn.executemany(
+                "UPDATE emails_agendados SET status = ?, reclamado_ts = ? WHERE id = ?",
+                [(STATUS_A_ENVIAR, agora, row["id"]) for row in rows]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        emails = [self._para_dict(row) for row in rows]
+        for email in emails:
+            email["status"] = STATUS_A_ENVIAR
+        return emails
+
+    def marcar_enviado(self, email_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            conn.execute('''
+                UPDATE emails_agendados SET status = 'enviado', data_envio_real = ?, erro = NULL
+                WHERE id = ?
+            ''', (datetime.now().strftime(FORMATO_DATA), email_id))
+        conn.close()
+        return self.obter(email_id)
+
+    def marcar_falhado(self, email_id: str, erro: str = "") -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            conn.execute('''
+                UPDATE emails_agendados SET status = 'falhado', data_falha = ?, erro = ?
+                WHERE id = ?
+            ''', (datetime.now().strftime(FORMATO_DATA), erro, email_id))
+        conn.close()
+        return self.obter(email_id)
+
+    def devolver(self, email_id: str) -> bool:
+        """Devolve à fila um email reclamado que não chegou a ser submetido (volta a agendado)"""
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                UPDATE emails_agendados SET status = 'agendado', reclamado_ts = NULL
+                WHERE id = ? AND status = ?
+            ''', (email_id, STATUS_A_ENVIAR))
+            devolvido = cursor.rowcount > 0
+        conn.close()
+        return devolvido
+
+    def libertar_reclamados(self, mais_antigos_que: float = 600.0) -> int:
+        """
+        Devolve à fila emails reclamados por um envio que nunca terminou
+        (ex: a aplicação fechou a meio do envio)
+        """
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                UPDATE emails_agendados SET status = 'agendado', reclamado_ts = NULL
+                WHERE status = ? AND reclamado_ts < ?
+            ''', (STATUS_A_ENVIAR, time.time() - mais_antigos_que))
+            libertados = cursor.rowcount
+        conn.close()
+        return libertados
+
+    # ═══════════════ LEITURA ═══════════════
+
+    def proximo_envio(self) -> Optional[float]:
+        """Epoch do próximo email agendado (usa o índice status+data)"""
+        conn = self._connect()
+        try:
+            row = conn.execute('''
+                SELECT MIN(data_envio_ts) FROM emails_agendados
+                WHERE status = 'agendado' AND data_envio_ts IS NOT NULL
+            ''').fetchone()
+            return row[0]
+        finally:
+            conn.close()
+
+    def obter(self, email_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM emails_agendados WHERE id = ?", (email_id,)).fetchone()
+            return self._para_dict(row) if row else None
+        finally:
+            conn.close()
+
+    def listar(self, paciente_id=None) -> List[Dict[str, Any]]:
+        """Lista emails (todos ou de um paciente), mais recentes primeiro"""
+        conn = self._connect()
+        try:
+            if paciente_id is not None:
+                rows = conn.execute('''
+                    SELECT * FROM emails_agendados WHERE paciente_id = ?
+                    ORDER BY data_envio_ts DESC
+                ''', (str(paciente_id),)).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM emails_agendados ORDER BY data_envio_ts DESC"
+                ).fetchall()
+            return [self._para_dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def historico_enviados(self, paciente_id=None, limite: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Emails enviados pelo scheduler, no formato dos registos de
+        historico_envios/emails_enviados.json: o registo é a própria linha da
+        fila marcada 'enviado', em vez de reescrever o ficheiro a cada envio
+        """
+        condicao, valores = "status = 'enviado'", []
+        if paciente_id is not None:
+            condicao += " AND paciente_id = ?"
+            valores.append(str(paciente_id))
+        conn = self._connect()
+        try:
+            rows = conn.execute(f'''
+                SELECT * FROM emails_agendados WHERE {condicao}
+                ORDER BY data_envio_real DESC LIMIT ?
+            ''', (*valores, limite)).fetchall()
+        finally:
+            conn.close()
+        return [{
+            "data_envio": row["data_envio_real"],
+            "paciente_id": row["paciente_id"],
+            "paciente_nome": row["paciente_nome"],
+            "destinatario": row["destinatario"],
+            "assunto": row["assunto"],
+            "num_anexos": len(json.loads(row["anexos_json"] or "[]")),
+            "enviado_real": True,
+            "status": "Enviado via Scheduler",
+        } for row in rows]
+
+    def contagens(self) -> Dict[str, int]:
+        """Número de emails por estado"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM emails_agendados GROUP BY status"
+            ).fetchall()
+            return {status: total for status, total in rows}
+        finally:
+            conn.close()
+
+    # ═══════════════ MIGRAÇÃO ═══════════════
+
+    def importar_json(self, caminho: str) -> int:
+        """
+        Importa o antigo emails_agendados.json (apenas se a fila estiver vazia)
+        e renomeia o ficheiro para .importado
+
+        Returns:
+            int: Número de emails importados
+        """
+        if not os.path.exists(caminho) or sum(self.contagens().values()) > 0:
+            return 0
+
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                emails = json.load(f)
+        except (OSError, ValueError):
+            return 0
+
+        if not isinstance(emails, list) or not emails:
+            return 0
+
+        emails = [dict(email, id=email.get("id") or f"importado_{indice}")
+                  for indice, email in enumerate(emails)]
+        self.inserir_varios(emails)
+
+        os.replace(caminho, caminho + ".importado")
+        return len(emails)
@@ -1,16 +1,26 @@
 """
 📧 Email Scheduler - Sistema de Agendamento de Emails
 Verifica e envia emails agendados automaticamente
+
+Os emails vivem numa fila SQLite indexada (email_queue.FilaEmails); o timer
+acorda à hora do próximo envio e o envio corre na thread do worker SMTP.
+O resultado é gravado na fila nessa mesma thread: a linha marcada 'enviado'
+é o registo do histórico (FilaEmails.historico_enviados).
 """
 
 import json
 import os
+import queue
+import time
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from PyQt6.QtCore import QTimer, QObject, pyqtSignal
 from pathlib import Path
 import traceback
 
+from email_queue import FilaEmails
+from connectivity_monitor import obter_monitor
+
 
 class EmailScheduler(QObject):
     """Scheduler para emails agendados"""
@@ -20,25 +30,42 @@ class EmailScheduler(QObject):
     email_falhado = pyqtSignal(dict, str)  # Emitido quando envio falha
     status_atualizado = pyqtSignal(str)  # Status geral do scheduler
     
+    # Interno: resultado de um envio (já gravado na fila) vindo da thread do worker
+    _envio_concluido = pyqtSignal(dict, bool, str)
+    # Interno: mudança de conectividade vinda da thread do monitor
+    _conectividade_mudou = pyqtSignal(bool)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         
         # Configurações
-        self.intervalo_verificacao = 60000  # 1 minuto em ms
-        self.emails_agendados_file = "emails_agendados.json"
-        self.historico_file = "historico_envios/emails_agendados.json"
+        self.intervalo_verificacao = 60000  # Espera máxima entre verificações (ms)
+        self.intervalo_libertacao = 60.0    # Entre buscas de envios interrompidos (s)
+        self.emails_agendados_file = "emails_agendados.json"  # Formato antigo (importado)
         self.emails_enviados_file = "historico_envios/emails_enviados.json"
         
-        # Timer para verificação periódica
+        # Garantir que pastas existem
+        self._criar_diretorios()
+        
+        # Fila persistente indexada por estado e hora de envio
+        self.fila = FilaEmails()
+        importados = self.fila.importar_json(self.emails_agendados_file)
+        if importados:
+            print(f"📥 {importados} emails importados de {self.emails_agendados_file}")
+        
+        # Timer de disparo único: acorda à hora do próximo email
         self.timer = QTimer()
+        self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.verificar_emails_pendentes)
         
+        self._envio_concluido.connect(self._finalizar_envio)
+        self._conectividade_mudou.connect(self._ao_mudar_conectividade)
+        obter_monitor().adicionar_observador(self._conectividade_mudou.emit)
+        
         # Estado
         self.ativo = False
         self.ultimo_verificacao = None
-        
-        # Garantir que pastas existem
-        self._criar_diretorios()
+        self._ultima_libertacao = 0.0
         
         print("📧 EmailScheduler inicializado")
     
@@ -47,11 +74,10 @@ class EmailScheduler(QObject):
         try:
             os.makedirs("historico_envios", exist_ok=True)
             
-            # Criar ficheiros vazios se não existirem
-            for arquivo in [self.emails_agendados_file, self.historico_file, self.emails_enviados_file]:
-                if not os.path.exists(arquivo):
-                    with open(arquivo, 'w', encoding='utf-8') as f:
-                        json.dump([], f)
+            # Criar ficheiro de enviados vazio se não existir
+            if not os.path.exists(self.emails_enviados_file):
+                with open(self.emails_enviados_file, 'w', encoding='utf-8') as f:
+                    json.dump([], f)
                         
         except Exception as e:
             print(f"❌ Erro ao criar diretorios: {e}")
@@ -59,12 +85,15 @@ class EmailScheduler(QObject):
     def iniciar(self):
         """Iniciar o scheduler"""
         if not self.ativo:
-            self.timer.start(self.intervalo_verificacao)
             self.ativo = True
+            
+            # Emails que ficaram "a enviar" numa sessão anterior voltam à fila
+            self._libertar_reclamados()
+            
             self.status_atualizado.emit("Scheduler iniciado")
-            print("✅ EmailScheduler iniciado - verificação a cada 1 minuto")
+            print("✅ EmailScheduler iniciado - acorda à hora do próximo envio")
             
-            # Verificar imediatamente
+            # Verificar imediatamente (reagenda o timer)
             self.verificar_emails_pendentes()
     
     def parar(self):
@@ -75,6 +104,19 @@ class EmailScheduler(QObject):
             self.status_atualizado.emit("Scheduler parado")
             print("⏹️ EmailScheduler parado")
     
+    def _reagendar_timer(self):
+        """Programa o timer para a hora do próximo email (no máximo intervalo_verificacao)"""
+        if not self.ativo:
+            return
+        
+        proximo = self.fila.proximo_envio()
+        espera_ms = self.intervalo_verificacao
+        # Sem ligação os emails vencidos ficam na fila até à verificação seguinte
+        if proximo is not None and obter_monitor().esta_online():
+            espera_ms = min(espera_ms, max(0, int((proximo - time.time()) * 1000)))
+        
+        self.timer.start(espera_ms)
+    
     def agendar_email(self, email_data: Dict[str, Any]) -> str:
         """
         Agendar um novo email
@@ -86,12 +128,9 @@ class EmailScheduler(QObject):
             ID do email agendado
         """
         try:
-            # Gerar ID único
-            email_id = f"{datetime.now().timestamp()}"
-            
             # Preparar dados do email
             email_agendado = {
-                "id": email_id,
+                "id": f"{datetime.now().timestamp()}",
                 "data_criacao": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "data_envio": email_data.get("data_envio"),
                 "paciente_id": email_data.get("paciente_id"),
@@ -103,21 +142,14 @@ class EmailScheduler(QObject):
                 "status": "agendado"
             }
             
-            # Carregar emails agendados existentes
-            emails_agendados = self._carregar_emails_agendados()
-            
-            # Adicionar novo email
-            emails_agendados.append(email_agendado)
-            
-            # Guardar lista atualizada
-            self._salvar_emails_agendados(emails_agendados)
-            
-            # Também salvar no histórico
-            self._adicionar_ao_historico(email_agendado)
+            email_id = self.fila.inserir(email_agendado)
             
             print(f"📅 Email agendado: {email_data.get('assunto')} para {email_data.get('data_envio')}")
             self.status_atualizado.emit(f"Email agendado: {email_data.get('assunto')}")
             
+            # O novo email pode ser o próximo a vencer
+            self._reagendar_timer()
+            
             return email_id
             
         except Exception as e:
@@ -128,22 +160,12 @@ class EmailScheduler(QObject):
     def cancelar_email(self, email_id: str) -> bool:
         """Cancelar email agendado"""
         try:
-            emails_agendados = self._carregar_emails_agendados()
-            
-            for email in emails_agendados:
-                if email.get("id") == email_id and email.get("status") == "agendado":
-                    email["status"] = "cancelado"
-                    email["data_cancelamento"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    
-                    # Salvar alterações
-                    self._salvar_emails_agendados(emails_agendados)
-                    
-                    # Atualizar histórico
-                    self._atualizar_historico(email)
-                    
-                    print(f"❌ Email cancelado: {email.get('assunto')}")
-                    self.status_atualizado.emit(f"Email cancelado: {email.get('assunto')}")
-                    return True
+            email = self.fila.cancelar(email_id)
+            if email:
+                print(f"❌ Email cancelado: {email.get('assunto')}")
+                self.status_atualizado.emit(f"Email cancelado: {email.get('assunto')}")
+                self._reagendar_timer()
+                return True
             
             return False
             
@@ -151,228 +173,137 @@ class EmailScheduler(QObject):
             print(f"❌ Erro ao cancelar email: {e}")
             return False
     
+    def _libertar_reclamados(self):
+        """Devolve à fila os emails reclamados por um envio que nunca terminou"""
+        self._ultima_libertacao = time.monotonic()
+        libertados = self.fila.libertar_reclamados()
+        if libertados:
+            print(f"🔁 {libertados} emails devolvidos à fila")
+    
+    def _ao_mudar_conectividade(self, online: bool):
+        """A ligação voltou: enviar já os emails que ficaram à espera"""
+        if online and self.ativo:
+            self.timer.stop()
+            self.verificar_emails_pendentes()
+    
     def verificar_emails_pendentes(self):
-        """Verificar e enviar emails que chegaram na hora"""
+        """Reclamar os emails que chegaram à hora e enviá-los em segundo plano"""
         try:
             self.ultimo_verificacao = datetime.now()
             
-            emails_agendados = self._carregar_emails_agendados()
-            emails_para_enviar = []
+            # Um worker que morreu a meio deixa emails "a enviar": devolvê-los
+            # durante a sessão (mesmo limiar de 600 s), não só ao arrancar
+            if time.monotonic() - self._ultima_libertacao >= self.intervalo_libertacao:
+                self._libertar_reclamados()
             
-            agora = datetime.now()
+            # Estado em cache (sem I/O): não gastar os emails a falhar sem rede
+            if not obter_monitor().esta_online():
+                return
             
-            # Filtrar emails que devem ser enviados agora
-            for email in emails_agendados:
-                if email.get("status") != "agendado":
-                    continue
-                    
-                data_envio_str = email.get("data_envio")
-                if not data_envio_str:
-                    continue
-                
-                try:
-                    data_envio = datetime.strptime(data_envio_str, "%Y-%m-%d %H:%M:%S")
-                except:
-                    try:
-                        data_envio = datetime.strptime(data_envio_str, "%Y-%m-%d %H:%M")
-                    except:
-                        continue
-                
-                # Se chegou a hora (com margem de 1 minuto)
-                if data_envio <= agora:
-                    emails_para_enviar.append(email)
+            emails_para_enviar = self.fila.reclamar_vencidos()
             
-            # Enviar emails pendentes
+            # Enviar emails pendentes (fora da thread da interface)
             for email in emails_para_enviar:
                 self._processar_envio_email(email)
             
             if emails_para_enviar:
-                # Salvar alterações
-                self._salvar_emails_agendados(emails_agendados)
-            
-            # Log da verificação
-            total_agendados = len([e for e in emails_agendados if e.get("status") == "agendado"])
-            if total_agendados > 0:
-                print(f"🔍 Verificação: {len(emails_para_enviar)} enviados, {total_agendados} pendentes")
+                print(f"🔍 Verificação: {len(emails_para_enviar)} emails a enviar")
                 
         except Exception as e:
             print(f"❌ Erro na verificação de emails: {e}")
             traceback.print_exc()
+        finally:
+            self._reagendar_timer()
     
     def _processar_envio_email(self, email_data: Dict[str, Any]):
-        """Processar envio de um email específico"""
+        """Submeter o envio de um email ao worker de envio"""
+        email_id = email_data.get("id")
+        
+        def ao_terminar(futuro):
+            # Corre na thread do worker: grava o resultado e o sinal avisa a interface
+            erro = futuro.exception()
+            sucesso, mensagem = (False, str(erro)) if erro else futuro.result()
+            self._registar_resultado(email_id, bool(sucesso), mensagem or "")
+        
         try:
-            # Tentar importar sistema de email
+            # Tentar importar sistema de email (instância partilhada - ligação SMTP reutilizada)
             try:
-                from email_sender import EmailSender
-                email_sender = EmailSender()
+                from email_sender import email_sender
                 sistema_email_disponivel = True
             except ImportError:
                 sistema_email_disponivel = False
             
-            sucesso = False
-            
             if sistema_email_disponivel:
-                # Envio real
-                try:
-                    anexos = email_data.get("anexos", [])
-                    if anexos:
-                        sucesso, erro = email_sender.send_email_with_attachments(
-                            email_data.get("destinatario"),
-                            email_data.get("assunto"),
-                            email_data.get("mensagem"),
-                            anexos
-                        )
-                    else:
-                        sucesso, erro = email_sender.send_email(
-                            email_data.get("destinatario"),
-                            email_data.get("assunto"),
-                            email_data.get("mensagem")
-                        )
-                    
-                    if not sucesso:
-                        print(f"❌ Falha no envio: {erro}")
-                        
-                except Exception as e:
-                    print(f"❌ Erro no sistema de email: {e}")
-                    sucesso = False
+                # Envio real na thread do worker
+                futuro = email_sender.send_email_async(
+                    email_data.get("destinatario"),
+                    email_data.get("assunto"),
+                    email_data.get("mensagem"),
+                    attachment_paths=email_data.get("anexos", []),
+                )
+                futuro.add_done_callback(ao_terminar)
             else:
                 # Modo simulação
                 print(f"📧 SIMULAÇÃO - Email enviado:")
                 print(f"   Para: {email_data.get('destinatario')}")
                 print(f"   Assunto: {email_data.get('assunto')}")
-                sucesso = True  # Considerar sucesso em modo simulação
-            
-            # Atualizar status
-            if sucesso:
-                email_data["status"] = "enviado"
-                email_data["data_envio_real"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                # Registrar no histórico de enviados
-                self._registrar_email_enviado(email_data)
-                
-                print(f"✅ Email enviado: {email_data.get('assunto')}")
-                self.email_enviado.emit(email_data)
-                
-            else:
-                email_data["status"] = "falhado"
-                email_data["data_falha"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                print(f"❌ Falha no envio: {email_data.get('assunto')}")
-                self.email_falhado.emit(email_data, "Erro no envio")
-            
-            # Atualizar histórico
-            self._atualizar_historico(email_data)
+                self._registar_resultado(email_id, True, "")  # Sucesso em modo simulação
             
+        except queue.Full:
+            # O worker não aceitou a tarefa: nada falhou no email, volta à fila
+            # e é reclamado de novo na próxima verificação
+            print(f"⏳ Worker de envio ocupado - email devolvido à fila: {email_data.get('assunto')}")
+            self.fila.devolver(email_id)
         except Exception as e:
             print(f"❌ Erro ao processar envio: {e}")
-            traceback.print_exc()
-    
-    def _carregar_emails_agendados(self) -> List[Dict[str, Any]]:
-        """Carregar lista de emails agendados"""
-        try:
-            if os.path.exists(self.emails_agendados_file):
-                with open(self.emails_agendados_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"❌ Erro ao carregar emails agendados: {e}")
-        return []
+            self._registar_resultado(email_id, False, str(e))
     
-    def _salvar_emails_agendados(self, emails: List[Dict[str, Any]]):
-        """Salvar lista de emails agendados"""
-        try:
-            with open(self.emails_agendados_file, 'w', encoding='utf-8') as f:
-                json.dump(emails, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"❌ Erro ao salvar emails agendados: {e}")
-    
-    def _adicionar_ao_historico(self, email_data: Dict[str, Any]):
-        """Adicionar email ao histórico completo"""
+    def _registar_resultado(self, email_id: str, sucesso: bool, erro: str):
+        """
+        Grava o resultado na fila e entrega-o à thread da interface
+        
+        Chamado na thread do worker: a linha marcada 'enviado' é o registo do
+        histórico, sem ler nem reescrever ficheiros na thread da interface.
+        """
         try:
-            historico = []
-            if os.path.exists(self.historico_file):
-                with open(self.historico_file, 'r', encoding='utf-8') as f:
-                    historico = json.load(f)
-            
-            historico.append(email_data.copy())
-            
-            # Manter apenas os últimos 1000 registros
-            if len(historico) > 1000:
-                historico = historico[-1000:]
-            
-            with open(self.historico_file, 'w', encoding='utf-8') as f:
-                json.dump(historico, f, indent=2, ensure_ascii=False)
-                
+            if sucesso:
+                email_data = self.fila.marcar_enviado(email_id)
+            else:
+                email_data = self.fila.marcar_falhado(email_id, erro)
         except Exception as e:
-            print(f"❌ Erro ao adicionar ao histórico: {e}")
+            print(f"❌ Erro ao gravar resultado do envio: {e}")
+            traceback.print_exc()
+            return
+        self._envio_concluido.emit(email_data or {"id": email_id}, sucesso, erro)
     
-    def _atualizar_historico(self, email_atualizado: Dict[str, Any]):
-        """Atualizar email no histórico"""
-        try:
-            historico = []
-            if os.path.exists(self.historico_file):
-                with open(self.historico_file, 'r', encoding='utf-8') as f:
-                    historico = json.load(f)
-            
-            # Encontrar e atualizar o email
-            for i, email in enumerate(historico):
-                if email.get("id") == email_atualizado.get("id"):
-                    historico[i] = email_atualizado.copy()
-                    break
-            
-            with open(self.historico_file, 'w', encoding='utf-8') as f:
-                json.dump(historico, f, indent=2, ensure_ascii=False)
-                
-        except Exception as e:
-            print(f"❌ Erro ao atualizar histórico: {e}")
+    def _finalizar_envio(self, email_data: Dict[str, Any], sucesso: bool, erro: str):
+        """Avisar do resultado de um envio já gravado (thread da interface)"""
+        if sucesso:
+            print(f"✅ Email enviado: {email_data.get('assunto')}")
+            self.email_enviado.emit(email_data)
+        else:
+            print(f"❌ Falha no envio: {email_data.get('assunto')} ({erro})")
+            self.email_falhado.emit(email_data, erro or "Erro no envio")
     
-    def _registrar_email_enviado(self, email_data: Dict[str, Any]):
-        """Registrar email no histórico de enviados"""
+    def obter_emails_agendados(self, paciente_id=None) -> List[Dict[str, Any]]:
+        """Obter lista de emails agendados (opcionalmente de um paciente)"""
         try:
-            enviados = []
-            if os.path.exists(self.emails_enviados_file):
-                with open(self.emails_enviados_file, 'r', encoding='utf-8') as f:
-                    enviados = json.load(f)
-            
-            # Registro simplificado para histórico de enviados
-            registro = {
-                "data_envio": email_data.get("data_envio_real"),
-                "paciente_id": email_data.get("paciente_id"),
-                "paciente_nome": email_data.get("paciente_nome"),
-                "destinatario": email_data.get("destinatario"),
-                "assunto": email_data.get("assunto"),
-                "num_anexos": len(email_data.get("anexos", [])),
-                "enviado_real": True,
-                "status": "Enviado via Scheduler"
-            }
-            
-            enviados.append(registro)
-            
-            # Manter apenas os últimos 1000 registros
-            if len(enviados) > 1000:
-                enviados = enviados[-1000:]
-            
-            with open(self.emails_enviados_file, 'w', encoding='utf-8') as f:
-                json.dump(enviados, f, indent=2, ensure_ascii=False)
-                
+            return self.fila.listar(paciente_id)
         except Exception as e:
-            print(f"❌ Erro ao registrar email enviado: {e}")
-    
-    def obter_emails_agendados(self) -> List[Dict[str, Any]]:
-        """Obter lista de emails agendados"""
-        return self._carregar_emails_agendados()
+            print(f"❌ Erro ao carregar emails agendados: {e}")
+            return []
     
     def obter_estatisticas(self) -> Dict[str, Any]:
         """Obter estatísticas do scheduler"""
         try:
-            emails = self._carregar_emails_agendados()
+            contagens = self.fila.contagens()
             
             estatisticas = {
-                "total": len(emails),
-                "agendados": len([e for e in emails if e.get("status") == "agendado"]),
-                "enviados": len([e for e in emails if e.get("status") == "enviado"]),
-                "cancelados": len([e for e in emails if e.get("status") == "cancelado"]),
-                "falhados": len([e for e in emails if e.get("status") == "falhado"]),
+                "total": sum(contagens.values()),
+                "agendados": contagens.get("agendado", 0),
+                "enviados": contagens.get("enviado", 0),
+                "cancelados": contagens.get("cancelado", 0),
+                "falhados": contagens.get("falhado", 0),
                 "ultimo_verificacao": self.ultimo_verificacao.strftime("%Y-%m-%d %H:%M:%S") if self.ultimo_verificacao else "Nunca",
                 "ativo": self.ativo
             }
@@ -8,12 +8,13 @@ import smtplib
 import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
 import os
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Callable
+from concurrent.futures import Future
 import logging
 from email_config import email_config
+from email_transport import obter_pool, obter_worker
+from email_attachments import MensagemComAnexos, obter_cache_anexos
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -47,6 +48,25 @@ class EmailSender:
         except Exception as e:
             return False, f"Erro de conexão: {str(e)}"
     
+    def _criar_mensagem(self, smtp_config: dict, to_email: str, subject: str, body: str,
+                        nome_destinatario: str = "") -> MIMEMultipart:
+        """Cria a mensagem com corpo formatado e assinatura"""
+        msg = MIMEMultipart()
+        msg['From'] = smtp_config["email"]
+        msg['To'] = to_email
+        msg['Subject'] = self.config.format_template(subject, nome_destinatario)
+        
+        # Formatar corpo do email
+        body_formatted = self.config.format_template(body, nome_destinatario)
+        
+        # Adicionar assinatura se não estiver presente
+        if not any(keyword in body_formatted.lower() for keyword in ["cumprimentos", "atenciosamente", "equipa"]):
+            assinatura = self.config.format_template(self.config.get("assinatura"), nome_destinatario)
+            body_formatted += "\n\n" + assinatura
+        
+        msg.attach(MIMEText(body_formatted, 'plain', 'utf-8'))
+        return msg
+    
     def send_email(self, to_email: str, subject: str, body: str, 
                    nome_destinatario: str = "") -> Tuple[bool, str]:
         """Envia um email"""
@@ -56,29 +76,10 @@ class EmailSender:
         
         try:
             smtp_config = self.config.get_smtp_config()
+            msg = self._criar_mensagem(smtp_config, to_email, subject, body, nome_destinatario)
             
-            # Criar mensagem
-            msg = MIMEMultipart()
-            msg['From'] = smtp_config["email"]
-            msg['To'] = to_email
-            msg['Subject'] = self.config.format_template(subject, nome_destinatario)
-            
-            # Formatar corpo do email
-            body_formatted = self.config.format_template(body, nome_destinatario)
-            
-            # Adicionar assinatura se não estiver presente
-            if not any(keyword in body_formatted.lower() for keyword in ["cumprimentos", "atenciosamente", "equipa"]):
-                assinatura = self.config.format_template(self.config.get("assinatura"), nome_destinatario)
-                body_formatted += "\n\n" + assinatura
-            
-            msg.attach(MIMEText(body_formatted, 'plain', 'utf-8'))
-            
-            # Enviar email
-            with smtplib.SMTP(smtp_config["server"], smtp_config["port"]) as server:
-                if smtp_config["use_tls"]:
-                    server.starttls()
-                server.login(smtp_config["email"], smtp_config["password"])
-                server.send_message(msg)
+            # Enviar email (ligação reutilizada do pool)
+            obter_pool(smtp_config).enviar(msg)
             
             logger.info(f"Email enviado com sucesso para {to_email}")
             return True, "Email enviado com sucesso"
@@ -105,6 +106,8 @@ class EmailSender:
         Envia emails em lote
         emails_data: lista de dicts com 'email', 'subject', 'body', 'nome'
         on_progress: callback(current, total, nome, success, error_msg)
+        
+        Todas as mensagens seguem pela mesma sessão SMTP autenticada do pool.
         """
         sucessos = 0
         erros = 0
@@ -128,6 +131,27 @@ class EmailSender:
         
         return sucessos, erros
 
+    def send_email_async(self, to_email: str, subject: str, body: str,
+                         nome_destinatario: str = "", attachment_paths: list = None,
+                         callback: Optional[Callable] = None) -> Future:
+        """
+        Envia um email na thread do worker de envio, sem bloquear a interface
+        
+        Args:
+            callback: callback((sucesso, mensagem)) chamado na thread do worker
+        
+        Returns:
+            Future com o tuplo (sucesso, mensagem)
+        """
+        if attachment_paths:
+            return obter_worker().submeter(
+                self.send_email_with_attachments, to_email, subject, body,
+                attachment_paths, nome_destinatario, callback=callback
+            )
+        return obter_worker().submeter(
+            self.send_email, to_email, subject, body, nome_destinatario, callback=callback
+        )
+
     def send_email_with_attachment(self, to_email: str, subject: str, body: str, 
                                  attachment_path: str, nome_destinatario: str = "") -> Tuple[bool, str]:
         """Envia um email com anexo (compatibilidade - usa send_email_with_attachments)"""
@@ -155,48 +179,20 @@ class EmailSender:
         
         try:
             smtp_config = self.config.get_smtp_config()
+            msg = self._criar_mensagem(smtp_config, to_email, subject, body, nome_destinatario)
             
-            # Criar mensagem
-            msg = MIMEMultipart()
-            msg['From'] = smtp_config["email"]
-            msg['To'] = to_email
-            msg['Subject'] = self.config.format_template(subject, nome_destinatario)
-            
-            # Formatar corpo do email
-            body_formatted = self.config.format_template(body, nome_destinatario)
-            
-            # Adicionar assinatura se não estiver presente
-            if not any(keyword in body_formatted.lower() for keyword in ["cumprimentos", "atenciosamente", "equipa"]):
-                assinatura = self.config.format_template(self.config.get("assinatura"), nome_destinatario)
-                body_formatted += "\n\n" + assinatura
-            
-            msg.attach(MIMEText(body_formatted, 'plain', 'utf-8'))
-            
-            # Adicionar múltiplos anexos
+            # Codificar anexos (ou reutilizar da cache); o conteúdo só é lido
+            # durante o envio, em blocos
+            cache = obter_cache_anexos()
+            anexos_validos = []
             anexos_adicionados = []
             for attachment_path in attachment_paths:
                 try:
-                    with open(attachment_path, "rb") as attachment:
-                        # Determinar o tipo MIME correto baseado na extensão
-                        if attachment_path.lower().endswith('.pdf'):
-                            part = MIMEBase('application', 'pdf')
-                        elif attachment_path.lower().endswith(('.doc', '.docx')):
-                            part = MIMEBase('application', 'vnd.openxmlformats-officedocument.wordprocessingml.document')
-                        else:
-                            part = MIMEBase('application', 'octet-stream')
-                            
-                        part.set_payload(attachment.read())
-                    
-                    encoders.encode_base64(part)
+                    cache.caminho_codificado(attachment_path)
                     
                     # Obter nome do arquivo
                     filename = os.path.basename(attachment_path)
-                    part.add_header(
-                        'Content-Disposition',
-                        f'attachment; filename="{filename}"',  # Adicionar aspas ao nome
-                    )
-                    
-                    msg.attach(part)
+                    anexos_validos.append(attachment_path)
                     anexos_adicionados.append(filename)
                     logger.info(f"Anexo adicionado: {filename}")
                     
@@ -209,12 +205,8 @@ class EmailSender:
                 logger.error(error_msg)
                 return False, error_msg
             
-            # Enviar email
-            with smtplib.SMTP(smtp_config["server"], smtp_config["port"]) as server:
-                if smtp_config["use_tls"]:
-                    server.starttls()
-                server.login(smtp_config["email"], smtp_config["password"])
-                server.send_message(msg)
+            # Enviar email em streaming (ligação reutilizada do pool)
+            obter_pool(smtp_config).enviar(MensagemComAnexos(msg, anexos_validos, cache))
             
             success_msg = f"Email com {len(anexos_adicionados)} anexo(s) enviado para {to_email}: {', '.join(anexos_adicionados)}"
             logger.info(success_msg)
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Transporte SMTP para Biodesk
+- Pool de ligações SMTP autenticadas reutilizadas entre mensagens
+- Worker em thread com fila limitada e novas tentativas com backoff
+- O resultado final de cada envio alimenta o monitor de conectividade
+"""
+
+import smtplib
+import socket
+import threading
+import queue
+import time
+import logging
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from connectivity_monitor import MonitorConectividade, obter_monitor
+
+logger = logging.getLogger(__name__)
+
+# Erros transitórios: a ligação caiu ou o servidor pediu para tentar mais tarde
+ERROS_TRANSITORIOS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    ConnectionError,
+    socket.timeout,
+)
+
+
+def erro_transitorio(erro: Exception) -> bool:
+    """Indica se vale a pena repetir o envio após este erro"""
+    if isinstance(erro, ERROS_TRANSITORIOS):
+        return True
+    # Respostas 4xx são temporárias por definição (RFC 5321)
+    if isinstance(erro, smtplib.SMTPResponseException):
+        return 400 <= erro.smtp_code < 500
+    return False
+
+
+class SMTPConnectionPool:
+    """
+    Pool pequeno de ligações SMTP já autenticadas (STARTTLS + login)
+
+    Ligações paradas há mais de idle_timeout segundos são verificadas com
+    NOOP antes de serem reutilizadas, porque a maioria dos servidores fecha
+    sessões inativas sem avisar.
+    """
+
+    def __init__(self, server: str, port: int, use_tls: bool, email: str, password: str,
+                 max_conexoes: int = 2, idle_timeout: float = 60.0, timeout: float = 30.0,
+                 monitor: Optional[MonitorConectividade] = None):
+        self.server = server
+        self.port = port
+        self.use_tls = use_tls
+        self.email = email
+        self.password = password
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.monitor = monitor  # None: monitor partilhado da aplicação
+
+        self._livres = []  # [(smtp, instante_ultimo_uso)]
+        self._lock = threading.Lock()
+        self._semaforo = threading.BoundedSemaphore(max_conexoes)
+        self.ligacoes_abertas = 0  # estatística: total de ligações criadas
+
+    def _abrir(self) -> smtplib.SMTP:
+        """Abre e autentica uma nova ligação"""
+        smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            smtp.login(self.email, self.password)
+        except Exception:
+            self._fechar_ligacao(smtp)
+            raise
+        self.ligacoes_abertas += 1
+        return smtp
+
+    @staticmethod
+    def _fechar_ligacao(smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _ligacao_viva(smtp: smtplib.SMTP) -> bool:
+        try:
+            return smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _obter(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                if not self._livres:
+                    break
+                smtp, ultimo_uso = self._livres.pop()
+
+            if time.monotonic() - ultimo_uso < self.idle_timeout or self._ligacao_viva(smtp):
+                return smtp
+
+            # Sessão expirada do lado do servidor - descartar e tentar a próxima
+            self._fechar_ligacao(smtp)
+
+        return self._abrir()
+
+    def _devolver(self, smtp: smtplib.SMTP):
+        with self._lock:
+            self._livres.append((smtp, time.monotonic()))
+
+    @contextmanager
+    def conexao(self):
+        """
+        Empresta uma ligação autenticada
+
+        Se ocorrer um erro de ligação a sessão é descartada; outros erros SMTP
+        (ex: destinatário recusado) fazem RSET e a sessão volta ao pool.
+        """
+        self._semaforo.acquire()
+        smtp = None
+        try:
+            smtp = self._obter()
+            yield smtp
+        except ERROS_TRANSITORIOS + (OSError,):
+            if smtp is not None:
+                self._fechar_ligacao(smtp)
+                smtp = None
+            raise
+        except smtplib.SMTPException:
+            if smtp is not None:
+                try:
+                    smtp.rset()
+                except Exception:
+                    self._fechar_ligacao(smtp)
+                    smtp = None
+            raise
+        finally:
+            if smtp is not None:
+                self._devolver(smtp)
+            self._semaforo.release()
+
+    def enviar(self, msg, tentativas: int = 3, backoff_inicial: float = 0.5):
+        """
+        Envia uma mensagem por uma ligação do pool, repetindo erros transitórios
+
+        Raises:
+            smtplib.SMTPException / OSError: erro definitivo ou tentativas esgotadas
+        """
+        for tentativa in range(tentativas):
+            try:
+                with self.conexao() as smtp:
+                    # Mensagens com anexos em streaming escrevem-se na sessão
+                    if hasattr(msg, 'enviar_por'):
+                        resultado = msg.enviar_por(smtp)
+                    else:
+                        resultado = smtp.send_message(msg)
+                (self.monitor or obter_monitor()).reportar_sucesso("smtp")
+                return resultado
+            except Exception as e:
+                if not erro_transitorio(e) or tentativa == tentativas - 1:
+                    (self.monitor or obter_monitor()).reportar_erro(e, "smtp")
+                    raise
+                atraso = backoff_inicial * (2 ** tentativa)
+                logger.warning(f"Envio falhou ({e}); nova tentativa em {atraso:.1f}s")
+                time.sleep(atraso)
+
+    def fechar(self):
+        """Fecha todas as ligações livres"""
+        with self._lock:
+            livres, self._livres = self._livres, []
+        for smtp, _ in livres:
+            self._fechar_ligacao(smtp)
+
+
+class EmailSendWorker:
+    """
+    Worker em thread para envios assíncronos
+
+    submeter() é chamado na thread da interface e nunca bloqueia: a fila não
+    tem limite por omissão (os emails pendentes já estão limitados pela fila
+    SQLite); com tamanho_fila > 0 uma fila cheia levanta queue.Full de
+    imediato e quem submete decide o que fazer com a tarefa.
+    """
+
+    def __init__(self, tamanho_fila: int = 0):
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _garantir_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name="EmailSendWorker", daemon=True)
+                self._thread.start()
+
+    def submeter(self, funcao: Callable, *args, callback: Optional[Callable] = None, **kwargs) -> Future:
+        """
+        Agenda funcao(*args, **kwargs) na thread do worker
+
+        Args:
+            callback: chamado na thread do worker com o resultado da função
+
+        Returns:
+            Future com o resultado
+
+        Raises:
+            queue.Full: só com tamanho_fila > 0 e a fila cheia
+        """
+        futuro = Future()
+        self._garantir_thread()
+        self._fila.put_nowait((funcao, args, kwargs, callback, futuro))
+        return futuro
+
+    def pendentes(self) -> int:
+        return self._fila.qsize()
+
+    def parar(self, timeout: float = 5.0) -> bool:
+        """
+        Termina a thread depois das tarefas já submetidas (ex: ao sair da aplicação)
+
+        Returns:
+            bool: False se a thread ainda estava a trabalhar ao fim do timeout
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None or not thread.is_alive():
+            return True
+        try:
+            self._fila.put(None, timeout=timeout)  # marcador de fim, depois das tarefas pendentes
+        except queue.Full:
+            return False
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def aguardar(self):
+        """Bloqueia até todas as tarefas submetidas terminarem"""
+        self._fila.join()
+
+    def _executar(self):
+        while True:
+            tarefa = self._fila.get()
+            if tarefa is None:
+                self._fila.task_done()
+                return
+            funcao, args, kwargs, callback, futuro = tarefa
+            try:
+                if futuro.set_running_or_notify_cancel():
+                    try:
+                        resultado = funcao(*args, **kwargs)
+                    except Exception as e:
+                        futuro.set_exception(e)
+                    else:
+                        futuro.set_result(resultado)
+                        if callback:
+                            try:
+                                callback(resultado)
+                            except Exception as e:
+                                logger.error(f"Erro no callback de envio: {e}")
+            finally:
+                self._fila.task_done()
+
+
+# Pool partilhado pelas instâncias de EmailSender (recriado se a configuração mudar)
+_pool = None
+_pool_chave = None
+_pool_lock = threading.Lock()
+_worker = None
+
+
+def obter_pool(smtp_config: dict) -> SMTPConnectionPool:
+    """Devolve o pool para a configuração SMTP atual"""
+    global _pool, _pool_chave
+    chave = (smtp_config["server"], smtp_config["port"], smtp_config["use_tls"],
+             smtp_config["email"], smtp_config["password"])
+
+    with _pool_lock:
+        if _pool is None or _pool_chave != chave:
+            if _pool is not None:
+                _pool.fechar()
+            _pool = SMTPConnectionPool(*chave)
+            _pool_chave = chave
+        return _pool
+
+
+def obter_worker() -> EmailSendWorker:
+    """Devolve o worker de envio partilhado"""
+    global _worker
+    with _pool_lock:
+        if _worker is None:
+            _worker = EmailSendWorker()
+        return _worker
+
+
+def fechar_transporte(timeout: float = 5.0):
+    """
+    Ao sair da aplicação: deixa o worker partilhado terminar os envios já
+    submetidos (até timeout segundos) e fecha as ligações do pool
+    """
+    global _pool, _pool_chave
+    with _pool_lock:
+        worker = _worker
+    if worker is not None and not worker.parar(timeout):
+        logger.warning("Worker de envio ainda ocupado ao fechar o transporte")
+    with _pool_lock:
+        if _pool is not None:
+            _pool.fechar()
+        _pool = None
+        _pool_chave = None
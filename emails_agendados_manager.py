@@ -4,8 +4,8 @@ Permite visualizar, agendar, editar e cancelar emails agendados
 """
 
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, 
-    QTableWidgetItem, QPushButton, QDialog, QDateTimeEdit,
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableView,
+    QPushButton, QDialog, QDateTimeEdit,
     QLineEdit, QTextEdit, QComboBox, QMessageBox, QHeaderView,
     QFrame, QSplitter, QGroupBox, QGridLayout, QSpacerItem,
     QSizePolicy, QFileDialog, QListWidget, QListWidgetItem,
@@ -19,6 +19,68 @@ from typing import List, Dict, Any, Optional
 import json
 import os
 from email_scheduler import get_email_scheduler
+from table_models import ColunaTabela, ModeloTabelaIncremental
+
+
+# Estado -> (texto, cor de fundo) na coluna de status
+STATUS_CONFIGS = {
+    "agendado": ("📅 Agendado", QColor(173, 216, 230)),   # Light blue
+    "a_enviar": ("📤 A enviar", QColor(255, 228, 181)),   # Moccasin
+    "enviado": ("✅ Enviado", QColor(144, 238, 144)),    # Light green
+    "cancelado": ("❌ Cancelado", QColor(211, 211, 211)), # Light gray
+    "falhado": ("⚠️ Falhado", QColor(255, 255, 0))       # Yellow
+}
+
+
+def _texto_data(email):
+    # Formatar data para display mais amigável
+    data_envio = email.get("data_envio", "")
+    try:
+        data_obj = datetime.fromisoformat(data_envio.replace('Z', '+00:00'))
+        return data_obj.strftime("%d/%m/%Y\n%H:%M")
+    except:
+        return data_envio
+
+
+def _texto_paciente(email):
+    paciente = email.get("paciente_nome", "")
+    return f"👤 {paciente}" if paciente else "👤 Paciente não informado"
+
+
+def _texto_anexos(email):
+    # Anexos com nomes dos arquivos (todos visíveis)
+    anexos = email.get("anexos", [])
+    if not anexos:
+        return "📎 Sem anexos"
+    if len(anexos) == 1:
+        # Um anexo: mostrar o nome
+        nome_arquivo = os.path.basename(anexos[0]) if isinstance(anexos[0], str) else "Arquivo"
+        return f"📎 {nome_arquivo}"
+    # Múltiplos anexos: mostrar TODOS os nomes
+    nomes_anexos = [f"• {os.path.basename(anexo) if isinstance(anexo, str) else 'Arquivo'}" for anexo in anexos]
+    return f"📎 {len(anexos)} arquivo(s):\n" + "\n".join(nomes_anexos)
+
+
+def _fonte_status(email):
+    # Destaque visual para agendados e enviados
+    if email.get("status") in ("agendado", "enviado"):
+        return QFont("Arial", 10, QFont.Weight.Bold)
+    return None
+
+
+COLUNAS_EMAILS = [
+    ColunaTabela("📅 Data Agendamento", _texto_data, alinhamento=Qt.AlignmentFlag.AlignCenter),
+    ColunaTabela("👤 Paciente", _texto_paciente),
+    ColunaTabela("📧 Email", lambda email: f"📧 {email.get('destinatario', '')}"),
+    ColunaTabela("📝 Assunto", lambda email: f"📝 {email.get('assunto', '')}"),
+    ColunaTabela("📎 Anexos", _texto_anexos,
+                 alinhamento=Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop),
+    ColunaTabela("🔄 Status",
+                 lambda email: STATUS_CONFIGS.get(email.get("status", ""), (email.get("status", ""),))[0],
+                 alinhamento=Qt.AlignmentFlag.AlignCenter,
+                 fundo=lambda email: STATUS_CONFIGS.get(email.get("status", ""), (None, QColor(255, 255, 255)))[1],
+                 fonte=_fonte_status),
+]
 
 
 class EmailAgendamentoDialog(QDialog):
@@ -343,34 +405,36 @@ class EmailsAgendadosWidget(QWidget):
         
         layout.addLayout(buttons_layout)
         
-        # Tabela de emails com visual melhorado
-        self.tabela = QTableWidget()
+        # Tabela de emails com visual melhorado (modelo carregado em lotes)
+        self.modelo = ModeloTabelaIncremental(COLUNAS_EMAILS, parent=self)
+        self.tabela = QTableView()
+        self.tabela.setModel(self.modelo)
         self.tabela.setAlternatingRowColors(True)
-        self.tabela.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.tabela.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.tabela.setWordWrap(True)  # Habilitar quebra de linha automática
         self.tabela.setTextElideMode(Qt.TextElideMode.ElideNone)  # Não cortar texto
-        self.tabela.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.tabela.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.tabela.setShowGrid(False)  # Remover linhas de grade
         self.tabela.setWordWrap(True)   # Quebra de linha automática
         
         # Estilo visual melhorado similar à imagem
         self.tabela.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #e0e0e0;
                 border-radius: 5px;
                 font-size: 12px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 12px 8px;
                 border-bottom: 1px solid #f0f0f0;
                 border-right: 1px solid #f0f0f0;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e3f2fd;
                 color: #1976d2;
             }
-            QTableWidget::item:hover {
+            QTableView::item:hover {
                 background-color: #f5f5f5;
             }
             QHeaderView::section {
@@ -384,14 +448,6 @@ class EmailsAgendadosWidget(QWidget):
             }
         """)
         
-        # Configurar colunas (sem cabeçalho visível)
-        colunas = [
-            "📅 Data Agendamento", "👤 Paciente", "📧 Email", 
-            "📝 Assunto", "📎 Anexos", "🔄 Status"
-        ]
-        self.tabela.setColumnCount(len(colunas))
-        self.tabela.setHorizontalHeaderLabels(colunas)
-        
         # Ocultar cabeçalho da tabela
         self.tabela.horizontalHeader().setVisible(False)
         
@@ -460,12 +516,12 @@ class EmailsAgendadosWidget(QWidget):
     
     def editar_email(self):
         """Editar email selecionado"""
-        row = self.tabela.currentRow()
-        if row < 0:
+        email_selecionado = self.modelo.linha(self.tabela.currentIndex().row())
+        if email_selecionado is None:
             BiodeskMessageBox.warning(self, "Aviso", "Selecione um email para editar!")
             return
         
-        email_id = self.tabela.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        email_id = email_selecionado.get("id")
         emails = self.scheduler.obter_emails_agendados()
         
         email_data = None
@@ -498,13 +554,13 @@ class EmailsAgendadosWidget(QWidget):
     
     def cancelar_email(self):
         """Cancelar email selecionado"""
-        row = self.tabela.currentRow()
-        if row < 0:
+        email_selecionado = self.modelo.linha(self.tabela.currentIndex().row())
+        if email_selecionado is None:
             BiodeskMessageBox.warning(self, "Aviso", "Selecione um email para cancelar!")
             return
         
-        email_id = self.tabela.item(row, 0).data(Qt.ItemDataRole.UserRole)
-        assunto = self.tabela.item(row, 3).text()  # Coluna 3 = Assunto
+        email_id = email_selecionado.get("id")
+        assunto = f"📝 {email_selecionado.get('assunto', '')}"
         
         resp = BiodeskMessageBox.question(
             self,
@@ -599,87 +655,8 @@ class EmailsAgendadosWidget(QWidget):
             # Ordenar por data (mais recentes primeiro)
             todos_emails.sort(key=lambda x: x.get("data_envio", ""), reverse=True)
             
-            self.tabela.setRowCount(len(todos_emails))
-            
-            for row, email in enumerate(todos_emails):
-                # Coluna 0: Data de Agendamento
-                data_envio = email.get("data_envio", "")
-                # Formatar data para display mais amigável
-                try:
-                    from datetime import datetime
-                    data_obj = datetime.fromisoformat(data_envio.replace('Z', '+00:00'))
-                    data_formatada = data_obj.strftime("%d/%m/%Y\n%H:%M")
-                except:
-                    data_formatada = data_envio
-                
-                item_data = QTableWidgetItem(data_formatada)
-                item_data.setData(Qt.ItemDataRole.UserRole, email.get("id"))
-                item_data.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.tabela.setItem(row, 0, item_data)
-                
-                # Coluna 1: Paciente
-                paciente = email.get("paciente_nome", "")
-                if not paciente:
-                    paciente = "👤 Paciente não informado"
-                else:
-                    paciente = f"👤 {paciente}"
-                self.tabela.setItem(row, 1, QTableWidgetItem(paciente))
-                
-                # Coluna 2: Email
-                destinatario = email.get("destinatario", "")
-                email_item = QTableWidgetItem(f"📧 {destinatario}")
-                self.tabela.setItem(row, 2, email_item)
-                
-                # Coluna 3: Assunto
-                assunto = email.get("assunto", "")
-                assunto_item = QTableWidgetItem(f"📝 {assunto}")
-                self.tabela.setItem(row, 3, assunto_item)
-                
-                # Coluna 4: Anexos com nomes dos arquivos (todos visíveis)
-                anexos = email.get("anexos", [])
-                if anexos:
-                    if len(anexos) == 1:
-                        # Um anexo: mostrar o nome
-                        nome_arquivo = os.path.basename(anexos[0]) if isinstance(anexos[0], str) else "Arquivo"
-                        anexos_text = f"📎 {nome_arquivo}"
-                    else:
-                        # Múltiplos anexos: mostrar TODOS os nomes
-                        nomes_anexos = []
-                        for anexo in anexos:  # Mostrar TODOS os anexos
-                            nome = os.path.basename(anexo) if isinstance(anexo, str) else "Arquivo"
-                            nomes_anexos.append(f"• {nome}")
-                        
-                        anexos_text = f"📎 {len(anexos)} arquivo(s):\n" + "\n".join(nomes_anexos)
-                else:
-                    anexos_text = "📎 Sem anexos"
-                
-                anexos_item = QTableWidgetItem(anexos_text)
-                anexos_item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
-                # Habilitar quebra de linha para mostrar todos os anexos
-                anexos_item.setData(Qt.ItemDataRole.DisplayRole, anexos_text)
-                self.tabela.setItem(row, 4, anexos_item)
-                
-                # Coluna 5: Status com cores
-                status = email.get("status", "")
-                status_configs = {
-                    "agendado": ("📅 Agendado", QColor(173, 216, 230)),   # Light blue
-                    "enviado": ("✅ Enviado", QColor(144, 238, 144)),    # Light green
-                    "cancelado": ("❌ Cancelado", QColor(211, 211, 211)), # Light gray
-                    "falhado": ("⚠️ Falhado", QColor(255, 255, 0))       # Yellow
-                }
-                
-                status_text, cor = status_configs.get(status, (status, QColor(255, 255, 255)))
-                status_item = QTableWidgetItem(status_text)
-                status_item.setBackground(cor)
-                status_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                
-                # Adicionar efeito visual para status
-                if status == "agendado":
-                    status_item.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-                elif status == "enviado":
-                    status_item.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-                
-                self.tabela.setItem(row, 5, status_item)
+            # Só o primeiro lote de linhas é criado na vista; o resto entra com o scroll
+            self.modelo.definir_linhas(todos_emails)
             
             # Atualizar estatísticas
             self.atualizar_estatisticas()
@@ -17,6 +17,7 @@ except ImportError as e:
 
 # Imports essenciais para a classe principal
 from db_manager import DBManager
+from data_cache import get_cache
 from sistema_assinatura import abrir_dialogo_assinatura
 
 # 🔧 SERVIÇOS MODULARES - Arquitetura refatorada
@@ -285,7 +286,9 @@ class FichaPaciente(QMainWindow):
             # Recarregar dados do BD se disponível
             if hasattr(self, 'db') and self.db:
                 paciente_id = self.paciente_data.get('id')
-                dados_atualizados = self.db.obter_paciente(paciente_id)
+                # Linha lida pelo pré-carregamento (usada uma vez), senão a BD
+                dados_atualizados = (get_cache().pop_patient_prefetch(paciente_id, 'paciente')
+                                     or self.db.obter_paciente(paciente_id))
                 
                 if dados_atualizados:
                     # Atualizar apenas se há mudanças significativas
@@ -2500,11 +2503,12 @@ Naturopata | Osteopata | Medicina Quântica
         """Delegado para atualizar a lista no Gestor de Documentos."""
         try:
             if hasattr(self, "gestao_documentos_widget") and self.gestao_documentos_widget:
-                # Garantir que está a usar o ID atual
+                # Garantir que está a usar o ID atual (set_paciente_id já atualiza a lista)
                 pid = self.paciente_data.get("id") or self.paciente_data.get("nome")
-                if pid:
+                if pid and pid != self.gestao_documentos_widget.paciente_id:
                     self.gestao_documentos_widget.set_paciente_id(pid)
-                self.gestao_documentos_widget.atualizar_lista_documentos()
+                else:
+                    self.gestao_documentos_widget.atualizar_lista_documentos()
                 print("🔄 [DOCUMENTOS] Refresh pedido pela FichaPaciente")
         except Exception as e:
             print(f"❌ [DOCUMENTOS] Erro no refresh delegado: {e}")
@@ -3074,13 +3078,10 @@ Naturopata | Osteopata | Medicina Quântica
         else:
             print("⚠️ [PDF] Nenhum PDF disponível para abrir")
 
-    def _is_online(self, timeout=3):
-        """Verifica conectividade básica (DNS/Google) antes de tentar enviar."""
-        try:
-            socket.create_connection(("8.8.8.8", 53), timeout=timeout)
-            return True
-        except Exception:
-            return False
+    def _is_online(self):
+        """Estado de ligação em cache (monitor de conectividade), sem bloquear a interface."""
+        from connectivity_monitor import obter_monitor
+        return obter_monitor().esta_online()
 
     def schedule_followup_consulta(self):
         """REMOVIDO: Agendamento de follow-up movido para comunicacao_manager.py"""
@@ -4013,8 +4014,10 @@ Naturopata | Osteopata | Medicina Quântica
             if not paciente_id:
                 return
             
-            manager = ConsentimentosManager()
-            status_dict = manager.obter_status_consentimentos(paciente_id)
+            # Estado lido pelo pré-carregamento (usado uma vez), senão a BD
+            status_dict = get_cache().pop_patient_prefetch(paciente_id, 'consentimentos')
+            if status_dict is None:
+                status_dict = ConsentimentosManager().obter_status_consentimentos(paciente_id)
             
             # Atualizar labels de status
             for tipo, info in status_dict.items():
@@ -23,7 +23,7 @@ from typing import List, Dict, Optional
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
     QLabel, QLineEdit, QTextEdit, QComboBox, QPushButton,
-    QListWidget, QListWidgetItem, QCheckBox, QGroupBox,
+    QListWidget, QListWidgetItem, QListView, QCheckBox, QGroupBox,
     QScrollArea, QFrame, QProgressBar, QFileDialog,
     QMessageBox, QApplication, QDialog, QRadioButton, 
     QDateTimeEdit, QButtonGroup
@@ -32,6 +32,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QThread, pyqtSlot, QDateTime
 from PyQt6.QtGui import QFont, QPixmap, QIcon, QColor
 
 from biodesk_dialogs import mostrar_informacao, mostrar_aviso, mostrar_confirmacao
+from table_models import ColunaTabela, ModeloTabelaIncremental
 
 # ✅ IMPORTAR SISTEMA DE ESTILOS
 try:
@@ -99,6 +100,18 @@ class DocumentoItem:
             return f"{self.tamanho // 1024} KB"
         else:
             return f"{self.tamanho // (1024 * 1024)} MB"
+    
+    def texto_lista(self) -> str:
+        """Texto mostrado na lista de documentos (ícone baseado no tipo)"""
+        if self.tipo == '.pdf':
+            icone = "📄"
+        elif self.tipo in ['.jpg', '.jpeg', '.png']:
+            icone = "🖼️"
+        elif self.tipo in ['.docx', '.doc']:
+            icone = "📝"
+        else:
+            icone = "📎"
+        return f"{icone} {self.nome}\n📁 {self.formatar_tamanho()} • {self.data_modificacao.strftime('%d/%m/%Y %H:%M')}"
 
 
 class DocumentosListWidget(QWidget):
@@ -143,31 +156,39 @@ class DocumentosListWidget(QWidget):
         pesquisa_layout.addWidget(self.campo_pesquisa)
         layout.addWidget(pesquisa_frame)
         
-        # 📋 LISTA DE DOCUMENTOS
-        self.lista_documentos = QListWidget()
-        self.lista_documentos.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
+        # 📋 LISTA DE DOCUMENTOS (modelo carregado em lotes; checkbox = anexar)
+        self.modelo_documentos = ModeloTabelaIncremental([
+            ColunaTabela(
+                "Documento", DocumentoItem.texto_lista,
+                marcado=lambda documento: documento.selecionado,
+                marcar=lambda documento, valor: setattr(documento, 'selecionado', valor),
+            ),
+        ], parent=self)
+        self.lista_documentos = QListView()
+        self.lista_documentos.setModel(self.modelo_documentos)
+        self.lista_documentos.setSelectionMode(QListView.SelectionMode.SingleSelection)
         self.lista_documentos.setStyleSheet("""
-            QListWidget {
+            QListView {
                 border: 1px solid #ccc;
                 border-radius: 4px;
                 background-color: white;
                 color: #2c3e50;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 8px;
                 border-bottom: 1px solid #eee;
                 color: #2c3e50;
                 background-color: white;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #e3f2fd;
                 color: #1565c0;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background-color: #f5f5f5;
                 color: #2c3e50;
             }
-            QListWidget::item:selected:hover {
+            QListView::item:selected:hover {
                 background-color: #bbdefb;
                 color: #0d47a1;
             }
@@ -193,15 +214,14 @@ class DocumentosListWidget(QWidget):
         layout.addWidget(botoes_frame)
         
         # Conectar seleção e double-click
-        self.lista_documentos.itemChanged.connect(self.on_item_changed)
-        self.lista_documentos.itemDoubleClicked.connect(self.abrir_ficheiro_duplo_click)
-        self.lista_documentos.currentItemChanged.connect(self.on_current_item_changed)
+        self.modelo_documentos.marcacao_alterada.connect(self.on_item_changed)
+        self.lista_documentos.doubleClicked.connect(self.abrir_ficheiro_duplo_click)
     
     def carregar_documentos(self):
         """Carregar documentos do paciente"""
         try:
             self.documentos_disponiveis.clear()
-            self.lista_documentos.clear()
+            self.modelo_documentos.definir_linhas([])
             
             # Determinar pasta do paciente
             paciente_id = self.paciente_data.get('id', '999')
@@ -242,53 +262,23 @@ class DocumentosListWidget(QWidget):
             traceback.print_exc()
     
     def atualizar_lista_visual(self):
-        """Atualizar a lista visual com os documentos"""
-        self.lista_documentos.clear()
-        
-        for documento in self.documentos_disponiveis:
-            item = QListWidgetItem()
-            item.setText(f"{documento.nome}\n📁 {documento.formatar_tamanho()} • {documento.data_modificacao.strftime('%d/%m/%Y %H:%M')}")
-            item.setData(Qt.ItemDataRole.UserRole, documento)
-            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
-            item.setCheckState(Qt.CheckState.Checked if documento.selecionado else Qt.CheckState.Unchecked)
-            
-            # Ícone baseado no tipo
-            if documento.tipo == '.pdf':
-                item.setText(f"📄 {item.text()}")
-            elif documento.tipo in ['.jpg', '.jpeg', '.png']:
-                item.setText(f"🖼️ {item.text()}")
-            elif documento.tipo in ['.docx', '.doc']:
-                item.setText(f"📝 {item.text()}")
-            else:
-                item.setText(f"📎 {item.text()}")
-            
-            self.lista_documentos.addItem(item)
+        """Atualizar a lista visual com os documentos (respeitando a pesquisa)"""
+        self.filtrar_documentos(self.campo_pesquisa.text())
     
     def filtrar_documentos(self, texto_pesquisa: str):
         """Filtrar documentos baseado na pesquisa"""
-        for i in range(self.lista_documentos.count()):
-            item = self.lista_documentos.item(i)
-            documento = item.data(Qt.ItemDataRole.UserRole)
-            
-            # Mostrar/ocultar baseado na pesquisa
-            mostrar = texto_pesquisa.lower() in documento.nome.lower()
-            item.setHidden(not mostrar)
+        texto_pesquisa = texto_pesquisa.lower()
+        self.modelo_documentos.definir_linhas([
+            documento for documento in self.documentos_disponiveis
+            if texto_pesquisa in documento.nome.lower()
+        ])
     
-    def on_item_changed(self, item: QListWidgetItem):
+    def on_item_changed(self, documento: DocumentoItem, selecionado: bool):
         """Quando um item é selecionado/desmarcado"""
-        documento = item.data(Qt.ItemDataRole.UserRole)
-        if documento:
-            documento.selecionado = item.checkState() == Qt.CheckState.Checked
-            if documento.selecionado:
-                self.documento_selecionado.emit(documento)
-            else:
-                self.documento_removido.emit(documento)
-    
-    def on_current_item_changed(self, current, previous):
-        """Quando o item atual muda - garante que apenas um item fica com highlight azul"""
-        # Esta função garante que apenas o item atual tenha o highlight azul
-        # O comportamento de checkbox permanece independente
-        pass
+        if selecionado:
+            self.documento_selecionado.emit(documento)
+        else:
+            self.documento_removido.emit(documento)
     
     def abrir_pasta_paciente(self):
         """Abrir pasta do paciente no explorador"""
@@ -306,12 +296,11 @@ class DocumentosListWidget(QWidget):
     def abrir_ficheiro_selecionado(self):
         """Abrir ficheiro selecionado diretamente"""
         try:
-            item_atual = self.lista_documentos.currentItem()
-            if not item_atual:
+            documento = self.modelo_documentos.linha(self.lista_documentos.currentIndex().row())
+            if not documento:
                 BiodeskMessageBox.information(self, "Informação", "Seleccione um ficheiro para abrir.")
                 return
             
-            documento = item_atual.data(Qt.ItemDataRole.UserRole)
             if documento and os.path.exists(documento.caminho):
                 os.startfile(documento.caminho)
             else:
@@ -320,10 +309,10 @@ class DocumentosListWidget(QWidget):
         except Exception as e:
             BiodeskMessageBox.critical(self, "Erro", f"Erro ao abrir ficheiro:\n{e}")
     
-    def abrir_ficheiro_duplo_click(self, item):
+    def abrir_ficheiro_duplo_click(self, index):
         """Abrir ficheiro com duplo-click"""
         try:
-            documento = item.data(Qt.ItemDataRole.UserRole)
+            documento = self.modelo_documentos.linha(index.row())
             if documento and os.path.exists(documento.caminho):
                 os.startfile(documento.caminho)
             else:
@@ -1465,7 +1454,7 @@ Clínica Biodesk"""
         """Mostrar histórico de emails enviados"""
         try:
             import json
-            from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView
+            from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTableView, QHeaderView
             
             # Criar janela do histórico
             dialog = QDialog(self)
@@ -1474,12 +1463,22 @@ Clínica Biodesk"""
             
             layout = QVBoxLayout(dialog)
             
-            # Criar tabela
-            tabela = QTableWidget()
-            tabela.setColumnCount(6)
-            tabela.setHorizontalHeaderLabels([
-                "Data/Hora", "Paciente", "Destinatário", "Assunto", "Anexos", "Status"
-            ])
+            # Criar tabela (modelo carregado em lotes durante o scroll)
+            modelo = ModeloTabelaIncremental([
+                ColunaTabela("Data/Hora", lambda email: email.get('data_envio', '')),
+                ColunaTabela("Paciente", lambda email: email.get('paciente_nome', '')),
+                ColunaTabela("Destinatário", lambda email: email.get('destinatario', '')),
+                ColunaTabela("Assunto", lambda email: email.get('assunto', '')),
+                ColunaTabela("Anexos", lambda email: f"{email.get('num_anexos', 0)}"),
+                ColunaTabela(
+                    "Status", lambda email: email.get('status', 'Desconhecido'),
+                    # Verde claro se enviado, amarelo claro nos restantes
+                    fundo=lambda email: QColor(200, 255, 200) if email.get('status', 'Desconhecido') == "Enviado"
+                    else QColor(255, 255, 200),
+                ),
+            ], parent=dialog)
+            tabela = QTableView()
+            tabela.setModel(modelo)
             
             # Ocultar cabeçalho para visual mais limpo
             tabela.horizontalHeader().setVisible(False)
@@ -1495,7 +1494,7 @@ Clínica Biodesk"""
             
             # Estilo melhorado da tabela
             tabela.setStyleSheet("""
-                QTableWidget {
+                QTableView {
                     background-color: #ffffff;
                     alternate-background-color: #f8f9fa;
                     gridline-color: #e9ecef;
@@ -1504,17 +1503,17 @@ Clínica Biodesk"""
                     selection-background-color: #007bff;
                     selection-color: white;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 10px 8px;
                     border: none;
                     font-size: 13px;
                 }
-                QTableWidget::item:selected {
+                QTableView::item:selected {
                     background-color: #007bff;
                     color: white;
                     font-weight: bold;
                 }
-                QTableWidget::item:hover {
+                QTableView::item:hover {
                     background-color: #e3f2fd;
                     color: #1976d2;
                 }
@@ -1534,43 +1533,19 @@ Clínica Biodesk"""
             # Filtrar por paciente atual
             paciente_id = self.paciente_data.get('id', '999')
             historico_paciente = [h for h in historico if h.get('paciente_id') == paciente_id]
-            
+
+            # Enviados pelo scheduler: registados na fila SQLite, não no ficheiro
+            try:
+                from email_queue import FilaEmails
+                historico_paciente.extend(FilaEmails().historico_enviados(paciente_id))
+            except Exception as e:
+                print(f"⚠️ Histórico do scheduler indisponível: {e}")
+
             # Ordenar por data (mais recente primeiro)
             historico_paciente.sort(key=lambda x: x.get('data_envio', ''), reverse=True)
             
             # Preencher tabela
-            tabela.setRowCount(len(historico_paciente))
-            
-            for i, email in enumerate(historico_paciente):
-                # Data
-                item_data = QTableWidgetItem(email.get('data_envio', ''))
-                tabela.setItem(i, 0, item_data)
-                
-                # Paciente
-                item_paciente = QTableWidgetItem(email.get('paciente_nome', ''))
-                tabela.setItem(i, 1, item_paciente)
-                
-                # Destinatário
-                item_destinatario = QTableWidgetItem(email.get('destinatario', ''))
-                tabela.setItem(i, 2, item_destinatario)
-                
-                # Assunto
-                item_assunto = QTableWidgetItem(email.get('assunto', ''))
-                tabela.setItem(i, 3, item_assunto)
-                
-                # Anexos
-                num_anexos = email.get('num_anexos', 0)
-                item_anexos = QTableWidgetItem(f"{num_anexos}")
-                tabela.setItem(i, 4, item_anexos)
-                
-                # Status
-                status = email.get('status', 'Desconhecido')
-                item_status = QTableWidgetItem(status)
-                if status == "Enviado":
-                    item_status.setBackground(QColor(200, 255, 200))  # Verde claro
-                else:
-                    item_status.setBackground(QColor(255, 255, 200))  # Amarelo claro
-                tabela.setItem(i, 5, item_status)
+            modelo.definir_linhas(historico_paciente)
             
             layout.addWidget(tabela)
             
@@ -21,7 +21,7 @@ from pathlib import Path
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFrame, QLabel, 
                              QPushButton, QTextEdit, QScrollArea, QLineEdit, QComboBox, QFormLayout,
                              QGroupBox, QGridLayout, QCheckBox, QMessageBox)
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtGui import QFont
 
 # Importar componentes do Biodesk
@@ -55,10 +55,99 @@ except ImportError:
                      "PDF será gerado sem assinaturas.")
         return None
 
+class EstadoFormulario:
+    """
+    Modelo do estado do formulário: nome do campo -> valor atual
+
+    Os widgets registados mantêm o modelo atualizado pelos seus sinais, por
+    isso ler os dados não obriga a percorrer widgets. Campos de secções ainda
+    não construídas devolvem o valor por omissão ou o valor definido antes da
+    construção (aplicado ao widget quando é registado).
+    """
+
+    PADRAO_COMBO = "Selecionar..."
+
+    def __init__(self):
+        self.valores = {}
+        self._widgets = {}
+
+    @staticmethod
+    def _ler(widget):
+        if isinstance(widget, QComboBox):
+            return widget.currentText()
+        if isinstance(widget, QTextEdit):
+            return widget.toPlainText()
+        if isinstance(widget, QCheckBox):
+            return widget.isChecked()
+        return widget.text()
+
+    @staticmethod
+    def _aplicar(widget, valor):
+        if isinstance(widget, QComboBox):
+            indice = widget.findText(str(valor))
+            widget.setCurrentIndex(max(indice, 0))
+        elif isinstance(widget, QTextEdit):
+            widget.setPlainText(str(valor))
+        elif isinstance(widget, QCheckBox):
+            widget.setChecked(bool(valor))
+        else:
+            widget.setText(str(valor))
+
+    @staticmethod
+    def e_campo(widget) -> bool:
+        return isinstance(widget, (QComboBox, QLineEdit, QTextEdit, QCheckBox))
+
+    def registar(self, nome, widget):
+        """Liga um widget ao modelo (aplicando o valor pendente, se existir)"""
+        self._widgets[nome] = widget
+        if nome in self.valores:
+            self._aplicar(widget, self.valores[nome])
+        else:
+            self.valores[nome] = self._ler(widget)
+
+        def atualizar(*_):
+            self.valores[nome] = self._ler(widget)
+
+        if isinstance(widget, QComboBox):
+            widget.currentTextChanged.connect(atualizar)
+        elif isinstance(widget, QCheckBox):
+            widget.toggled.connect(atualizar)
+        else:
+            widget.textChanged.connect(atualizar)
+
+    def definir(self, nome, valor):
+        self.valores[nome] = valor
+        if nome in self._widgets:
+            self._aplicar(self._widgets[nome], valor)
+
+    def texto(self, nome) -> str:
+        valor = self.valores.get(nome)
+        if valor is None:
+            return self.PADRAO_COMBO if nome.endswith('_combo') else ''
+        return valor
+
+    def marcado(self, nome) -> bool:
+        return bool(self.valores.get(nome, False))
+
+    def limpar(self):
+        """Repõe todos os campos no valor inicial"""
+        self.valores = {nome: valor for nome, valor in self.valores.items() if nome in self._widgets}
+        for nome, widget in self._widgets.items():
+            if isinstance(widget, QComboBox):
+                widget.setCurrentIndex(0)
+            elif isinstance(widget, QCheckBox):
+                widget.setChecked(False)
+            elif not (isinstance(widget, QLineEdit) and widget.isReadOnly()):
+                widget.clear()
+
+
 class DeclaracaoSaudeWidget(QWidget):
     """
     Widget profissional para declaração de saúde
     """
+    # Secções construídas logo na abertura; as restantes quando entram na área visível
+    SECOES_IMEDIATAS = 2
+    ALTURA_ESTIMADA_SECAO = 420
     # Sinais
     declaracao_assinada = pyqtSignal(dict)
     dados_atualizados = pyqtSignal(dict)
@@ -75,6 +164,10 @@ class DeclaracaoSaudeWidget(QWidget):
         self._foi_assinado = False
         self._alterado = False
         
+        # Estado do formulário e secções construídas a pedido
+        self._estado = EstadoFormulario()
+        self._secoes = []  # [marcador, método de construção, construída]
+        
         self.init_ui()
         # self._conectar_sinais_alteracao()  # TODO: Implementar se necessário
     
@@ -166,6 +259,8 @@ class DeclaracaoSaudeWidget(QWidget):
         
         formulario_widget = self._criar_formulario_profissional()
         scroll.setWidget(formulario_widget)
+        self._scroll_formulario = scroll
+        scroll.verticalScrollBar().valueChanged.connect(self._construir_secoes_visiveis)
         main_horizontal_layout.addWidget(scroll, 3)  # 75% do espaço
         
         # ÁREA DIREITA (25%): Botões e status verticalmente
@@ -369,33 +464,86 @@ class DeclaracaoSaudeWidget(QWidget):
         """)
         layout.addWidget(instrucoes)
         
-        # Seção Identificação - COMPACTA
-        self._criar_secao_identificacao_compacta(layout)
-        
-        # Seções médicas - COMPACTAS
-        self._criar_secao_metabolicas_compacta(layout)
-        self._criar_secao_cardiovasculares_compacta(layout)
-        self._criar_secao_respiratorias_compacta(layout)
-        self._criar_secao_gastrointestinais_compacta(layout)
-        self._criar_secao_neurologicas_compacta(layout)
-        self._criar_secao_musculoesqueleticas_compacta(layout)
-        self._criar_secao_dermatologia_compacta(layout)
-        self._criar_secao_alergias_compacta(layout)
-        self._criar_secao_infecciosas_compacta(layout)
-        self._criar_secao_oncologia_compacta(layout)
-        self._criar_secao_reprodutiva_compacta(layout)
-        self._criar_secao_cirurgias_compacta(layout)
-        self._criar_secao_implantes_compacta(layout)
-        self._criar_secao_medicacao_compacta(layout)
-        self._criar_secao_estilo_vida_compacta(layout)
-        self._criar_secao_exames_compacta(layout)
-        self._criar_secao_red_flags_compacta(layout)
-        self._criar_secao_outras_questoes_compacta(layout)
-        self._criar_secao_preferencias_compacta(layout)
-        self._criar_secao_consentimentos_compacta(layout)
+        # Secções: cada uma tem um marcador no layout e só é construída quando
+        # entra na área visível ou é escolhida na navegação rápida
+        secoes = [
+            self._criar_secao_identificacao_compacta,
+            self._criar_secao_metabolicas_compacta,
+            self._criar_secao_cardiovasculares_compacta,
+            self._criar_secao_respiratorias_compacta,
+            self._criar_secao_gastrointestinais_compacta,
+            self._criar_secao_neurologicas_compacta,
+            self._criar_secao_musculoesqueleticas_compacta,
+            self._criar_secao_dermatologia_compacta,
+            self._criar_secao_alergias_compacta,
+            self._criar_secao_infecciosas_compacta,
+            self._criar_secao_oncologia_compacta,
+            self._criar_secao_reprodutiva_compacta,
+            self._criar_secao_cirurgias_compacta,
+            self._criar_secao_implantes_compacta,
+            self._criar_secao_medicacao_compacta,
+            self._criar_secao_estilo_vida_compacta,
+            self._criar_secao_exames_compacta,
+            self._criar_secao_red_flags_compacta,
+            self._criar_secao_outras_questoes_compacta,
+            self._criar_secao_preferencias_compacta,
+            self._criar_secao_consentimentos_compacta,
+        ]
+        
+        for metodo in secoes:
+            marcador = QWidget()
+            marcador_layout = QVBoxLayout(marcador)
+            marcador_layout.setContentsMargins(0, 0, 0, 0)
+            marcador.setMinimumHeight(self.ALTURA_ESTIMADA_SECAO)
+            layout.addWidget(marcador)
+            self._secoes.append([marcador, metodo, False])
+        
+        for indice in range(self.SECOES_IMEDIATAS):
+            self._construir_secao(indice)
         
         return widget
     
+    def _construir_secao(self, indice):
+        """Constrói a secção indicada (se ainda não existir) e regista os seus campos"""
+        marcador, metodo, construida = self._secoes[indice]
+        if construida:
+            return False
+        
+        atributos_antes = set(vars(self))
+        metodo(marcador.layout())
+        for nome in set(vars(self)) - atributos_antes:
+            widget = getattr(self, nome)
+            if EstadoFormulario.e_campo(widget):
+                self._estado.registar(nome, widget)
+        
+        marcador.setMinimumHeight(0)
+        self._secoes[indice][2] = True
+        return True
+    
+    def _construir_todas_secoes(self):
+        for indice in range(len(self._secoes)):
+            self._construir_secao(indice)
+    
+    def _construir_secoes_visiveis(self, *_):
+        """Constrói as secções na área visível do scroll (mais um ecrã de margem)"""
+        viewport = self._scroll_formulario.viewport().height()
+        topo = self._scroll_formulario.verticalScrollBar().value() - viewport
+        fundo = topo + 3 * viewport
+        
+        construiu = False
+        for indice, (marcador, _, construida) in enumerate(self._secoes):
+            geometria = marcador.geometry()
+            if not construida and geometria.bottom() >= topo and geometria.top() <= fundo:
+                construiu = self._construir_secao(indice) or construiu
+        
+        # As posições só mudam depois de o layout ser recalculado
+        if construiu:
+            QTimer.singleShot(0, self._construir_secoes_visiveis)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        QTimer.singleShot(0, self._construir_secoes_visiveis)
+    
     # ====== MÉTODOS COMPACTOS - NOVA IMPLEMENTAÇÃO ======
     
     def _criar_secao_identificacao_compacta(self, layout):
@@ -1248,6 +1396,7 @@ class DeclaracaoSaudeWidget(QWidget):
             if dados_assinaturas:
                 # Gerar PDF com assinaturas
                 if self._gerar_pdf_com_assinaturas(dados_assinaturas):
+                    self._guardar_assinaturas_na_bd(dados_assinaturas)
                     # Atualizar progresso após assinatura
                     self._atualizar_progresso()
                     
@@ -1290,25 +1439,25 @@ class DeclaracaoSaudeWidget(QWidget):
                 return False
             
             # Verificar checkboxes obrigatórios
-            if not hasattr(self, 'veracidade_checkbox') or not self.veracidade_checkbox.isChecked():
+            if not self._estado.marcado('veracidade_checkbox'):
                 mostrar_aviso(self, "Formulário Incompleto", 
                              "⚠️ Deve confirmar a veracidade das informações prestadas.")
                 return False
             
-            if not hasattr(self, 'rgpd_checkbox') or not self.rgpd_checkbox.isChecked():
+            if not self._estado.marcado('rgpd_checkbox'):
                 mostrar_aviso(self, "Formulário Incompleto", 
                              "⚠️ Deve aceitar o tratamento de dados pessoais (RGPD).")
                 return False
             
             # Verificar se pelo menos alguns consentimentos foram escolhidos
             consentimentos_preenchidos = 0
-            if hasattr(self, 'naturopatia_combo') and self.naturopatia_combo.currentText() != "Selecionar...":
+            if self._estado.texto('naturopatia_combo') != "Selecionar...":
                 consentimentos_preenchidos += 1
-            if hasattr(self, 'osteopatia_combo') and self.osteopatia_combo.currentText() != "Selecionar...":
+            if self._estado.texto('osteopatia_combo') != "Selecionar...":
                 consentimentos_preenchidos += 1
-            if hasattr(self, 'mesoterapia_consent_combo') and self.mesoterapia_consent_combo.currentText() != "Selecionar...":
+            if self._estado.texto('mesoterapia_consent_combo') != "Selecionar...":
                 consentimentos_preenchidos += 1
-            if hasattr(self, 'medicina_quantica_combo') and self.medicina_quantica_combo.currentText() != "Selecionar...":
+            if self._estado.texto('medicina_quantica_combo') != "Selecionar...":
                 consentimentos_preenchidos += 1
             
             if consentimentos_preenchidos == 0:
@@ -1320,7 +1469,7 @@ class DeclaracaoSaudeWidget(QWidget):
             campos_preenchidos = 0
             
             # Verificar motivo de consulta
-            if hasattr(self, 'motivo_consulta') and self.motivo_consulta.toPlainText().strip():
+            if self._estado.texto('motivo_consulta').strip():
                 campos_preenchidos += 1
             
             # Verificar algumas condições principais
@@ -1331,10 +1480,8 @@ class DeclaracaoSaudeWidget(QWidget):
             ]
             
             for campo in campos_principais:
-                if hasattr(self, campo):
-                    combo = getattr(self, campo)
-                    if combo.currentText() != "Selecionar...":
-                        campos_preenchidos += 1
+                if self._estado.texto(campo) != "Selecionar...":
+                    campos_preenchidos += 1
             
             if campos_preenchidos < 3:
                 mostrar_aviso(self, "Formulário Incompleto", 
@@ -1356,174 +1503,9 @@ class DeclaracaoSaudeWidget(QWidget):
     def limpar_formulario(self):
         """Limpa todos os campos do formulário"""
         try:
-            # Limpar combos - definir para primeiro item ("Selecionar...")
-            combos = [
-                # Identificação
-                self.profissao_combo,
-                
-                # Metabólicas / Endócrinas
-                self.diabetes_combo, self.hipertensao_combo, self.tireoide_combo, 
-                self.dislipidemia_combo, self.hepatica_combo, self.renal_combo,
-                
-                # Cardiovasculares
-                self.cardiaca_combo, self.avc_combo, self.trombose_combo, 
-                self.aneurisma_combo, self.dor_toracica_combo, self.pacemaker_combo,
-                
-                # Respiratórias
-                self.asma_combo, self.dpoc_combo, self.apneia_combo, self.infecao_resp_combo,
-                
-                # Gastrointestinais
-                self.refluxo_combo, self.dii_combo, self.cirurgias_digest_combo,
-                
-                # Neurológicas / Psiquiátricas
-                self.epilepsia_combo, self.desmielinizantes_combo, self.tce_combo,
-                self.cefaleias_combo, self.psiquiatricas_combo, self.cauda_equina_combo,
-                
-                # Músculo-esqueléticas
-                self.artrite_combo, self.osteoporose_combo, self.hernias_combo,
-                self.escoliose_combo, self.fraturas_combo, self.quedas_combo,
-                self.cirurgias_ortop_combo, self.proteses_combo, self.infiltracoes_combo,
-                self.tecido_conjuntivo_combo,
-                
-                # Dermatologia / Feridas
-                self.feridas_combo, self.queloides_combo, self.infecoes_cutaneas_combo,
-                self.hemorragicas_combo, self.alergia_anestesicos_combo, self.alergia_adesivos_combo,
-                
-                # Alergias / Intolerâncias
-                self.alergias_medicamentos_combo, self.alergias_alimentos_combo,
-                self.alergias_plantas_combo, self.alergias_homeopaticos_combo, self.intolerancias_combo,
-                
-                # Infecciosas / Imunológicas
-                self.autoimunes_combo, self.hiv_hepatites_combo, self.febre_perda_peso_combo,
-                
-                # Oncologia
-                self.cancro_combo, self.tratamento_oncologico_combo, self.linfedema_combo,
-                
-                # Saúde Reprodutiva
-                self.gravidez_combo, self.amamentacao_combo, self.gineco_urologicas_combo,
-                self.dispositivo_intrauterino_combo,
-                
-                # Cirurgias / Internamentos / Traumas
-                self.cirurgias_combo, self.internamentos_combo, self.acidentes_combo,
-                
-                # Implantes e Dispositivos
-                self.dispositivos_eletronicos_combo, self.implantes_metalicos_combo, self.tatuagens_combo,
-                
-                # Medicação e Suplementos
-                self.anticoagulantes_combo, self.imunossupressores_combo, self.antidiabeticos_combo,
-                self.psicotropicos_combo, self.fotossensibilizantes_combo, self.bifosfonatos_combo,
-                self.suplementos_combo, self.reacoes_previas_combo,
-                
-                # Estilo de Vida
-                self.tabaco_combo, self.alcool_combo, self.drogas_combo,
-                self.atividade_fisica_combo, self.sono_combo, self.stress_combo,
-                
-                # Exames
-                self.exames_combo,
-                
-                # Red Flags
-                self.dor_noturna_combo, self.defices_neurologicos_combo, self.incontinencia_combo,
-                self.febre_sem_causa_combo, self.perda_peso_combo,
-                
-                # Preferências / Limites
-                self.hvla_combo, self.mesoterapia_aceit_combo, self.terapias_freq_combo,
-                self.aversao_agulhas_combo,
-                
-                # Consentimentos
-                self.naturopatia_combo, self.osteopatia_combo, self.mesoterapia_consent_combo,
-                self.medicina_quantica_combo, self.cabeca_combo, self.ombro_combo,
-                self.anca_combo, self.palpacao_combo,
-            ]
-            
-            for combo in combos:
-                combo.setCurrentIndex(0)
-            
-            # Limpar line edits
-            line_edits = [
-                # Identificação
-                self.contacto_telem, self.email, self.profissao_edit, self.profissao_detalhe,
-                self.contacto_emergencia,
-                
-                # Metabólicas / Endócrinas
-                self.diabetes_detalhe, self.hipertensao_detalhe, self.tireoide_detalhe,
-                self.dislipidemia_detalhe, self.hepatica_detalhe, self.renal_detalhe,
-                
-                # Cardiovasculares
-                self.cardiaca_detalhe, self.avc_detalhe, self.trombose_detalhe,
-                self.aneurisma_detalhe, self.dor_toracica_detalhe, self.pacemaker_detalhe,
-                
-                # Respiratórias
-                self.asma_detalhe, self.dpoc_detalhe, self.apneia_detalhe, self.infecao_resp_detalhe,
-                
-                # Gastrointestinais
-                self.refluxo_detalhe, self.dii_detalhe, self.cirurgias_digest_detalhe,
-                
-                # Neurológicas / Psiquiátricas
-                self.epilepsia_detalhe, self.desmielinizantes_detalhe, self.cefaleias_detalhe,
-                self.psiquiatricas_detalhe, self.cauda_equina_detalhe,
-                
-                # Músculo-esqueléticas
-                self.artrite_detalhe, self.osteoporose_detalhe, self.hernias_detalhe,
-                self.escoliose_detalhe, self.fraturas_detalhe, self.quedas_detalhe,
-                self.cirurgias_ortop_detalhe, self.proteses_detalhe, self.infiltracoes_detalhe,
-                self.tecido_conjuntivo_detalhe,
-                
-                # Dermatologia / Feridas
-                self.feridas_detalhe, self.queloides_detalhe, self.infecoes_cutaneas_detalhe,
-                self.hemorragicas_detalhe, self.alergia_anestesicos_detalhe, self.alergia_adesivos_detalhe,
-                
-                # Alergias / Intolerâncias
-                self.alergias_medicamentos_detalhe, self.alergias_alimentos_detalhe,
-                self.alergias_plantas_detalhe, self.alergias_homeopaticos_detalhe, self.intolerancias_detalhe,
-                
-                # Infecciosas / Imunológicas
-                self.autoimunes_detalhe, self.hiv_hepatites_detalhe, self.febre_perda_peso_detalhe,
-                
-                # Oncologia
-                self.cancro_detalhe, self.tratamento_oncologico_detalhe, self.linfedema_detalhe,
-                
-                # Saúde Reprodutiva
-                self.gravidez_detalhe, self.gineco_urologicas_detalhe, self.dispositivo_intrauterino_detalhe,
-                
-                # Cirurgias / Internamentos / Traumas
-                self.cirurgias_detalhe, self.internamentos_detalhe, self.acidentes_detalhe,
-                
-                # Implantes e Dispositivos
-                self.dispositivos_eletronicos_detalhe, self.implantes_metalicos_detalhe, self.tatuagens_detalhe,
-                
-                # Medicação e Suplementos
-                self.anticoagulantes_detalhe, self.imunossupressores_detalhe, self.antidiabeticos_detalhe,
-                self.bifosfonatos_detalhe, self.suplementos_detalhe, self.reacoes_previas_detalhe,
-                
-                # Estilo de Vida
-                self.tabaco_detalhe, self.alcool_detalhe, self.drogas_detalhe,
-                self.atividade_fisica_detalhe, self.sono_detalhe,
-                
-                # Preferências / Limites
-                self.hvla_detalhe, self.mesoterapia_aceit_detalhe, self.terapias_freq_detalhe,
-                self.aversao_agulhas_detalhe,
-            ]
-            
-            for line_edit in line_edits:
-                line_edit.clear()
-            
-            # Limpar text edits
-            text_edits = [
-                self.motivo_consulta, self.exames_detalhe, self.red_flags_detalhe,
-            ]
-            
-            for text_edit in text_edits:
-                text_edit.clear()
-            
-            # Limpar checkboxes
-            checkboxes = [
-                self.veracidade_checkbox, self.rgpd_checkbox, self.li_compreendi_checkbox,
-                self.escolhi_modalidades_checkbox, self.assinalei_caixas_checkbox,
-                self.questoes_respondidas_checkbox,
-            ]
-            
-            for checkbox in checkboxes:
-                checkbox.setChecked(False)
+            # Combos voltam a "Selecionar...", campos de texto e checkboxes limpos
+            # (secções ainda não construídas já estão no valor inicial)
+            self._estado.limpar()
             
             # Mostrar mensagem de sucesso
             from biodesk_dialogs import mostrar_sucesso
@@ -1535,417 +1517,417 @@ class DeclaracaoSaudeWidget(QWidget):
             mostrar_erro(self, "Erro", f"Erro ao limpar formulário:\n{str(e)}")
     
     def _obter_dados_formulario(self):
-        """Obtém dados estruturados do formulário completo"""
+        """Obtém dados estruturados do formulário completo (a partir do modelo de estado)"""
         return {
             # Identificação
-            'nome': self.nome_edit.text(),
-            'data_nascimento': self.data_nasc_edit.text(),
-            'contacto_telem': self.contacto_telem.text(),
-            'email': self.email.text(),
-            'profissao_nome': self.profissao_edit.text(),
+            'nome': self._estado.texto('nome_edit'),
+            'data_nascimento': self._estado.texto('data_nasc_edit'),
+            'contacto_telem': self._estado.texto('contacto_telem'),
+            'email': self._estado.texto('email'),
+            'profissao_nome': self._estado.texto('profissao_edit'),
             'profissao_esforco': {
-                'resposta': self.profissao_combo.currentText(),
-                'detalhe': self.profissao_detalhe.text()
+                'resposta': self._estado.texto('profissao_combo'),
+                'detalhe': self._estado.texto('profissao_detalhe')
             },
-            'contacto_emergencia': self.contacto_emergencia.text(),
-            'motivo_consulta': self.motivo_consulta.toPlainText().strip(),
+            'contacto_emergencia': self._estado.texto('contacto_emergencia'),
+            'motivo_consulta': self._estado.texto('motivo_consulta').strip(),
             
             # 1) Metabólicas / Endócrinas
             'diabetes': {
-                'resposta': self.diabetes_combo.currentText(),
-                'detalhe': self.diabetes_detalhe.text()
+                'resposta': self._estado.texto('diabetes_combo'),
+                'detalhe': self._estado.texto('diabetes_detalhe')
             },
             'hipertensao': {
-                'resposta': self.hipertensao_combo.currentText(),
-                'detalhe': self.hipertensao_detalhe.text()
+                'resposta': self._estado.texto('hipertensao_combo'),
+                'detalhe': self._estado.texto('hipertensao_detalhe')
             },
             'tireoide': {
-                'resposta': self.tireoide_combo.currentText(),
-                'detalhe': self.tireoide_detalhe.text()
+                'resposta': self._estado.texto('tireoide_combo'),
+                'detalhe': self._estado.texto('tireoide_detalhe')
             },
             'dislipidemia': {
-                'resposta': self.dislipidemia_combo.currentText(),
-                'detalhe': self.dislipidemia_detalhe.text()
+                'resposta': self._estado.texto('dislipidemia_combo'),
+                'detalhe': self._estado.texto('dislipidemia_detalhe')
             },
             'hepatica': {
-                'resposta': self.hepatica_combo.currentText(),
-                'detalhe': self.hepatica_detalhe.text()
+                'resposta': self._estado.texto('hepatica_combo'),
+                'detalhe': self._estado.texto('hepatica_detalhe')
             },
             'renal': {
-                'resposta': self.renal_combo.currentText(),
-                'detalhe': self.renal_detalhe.text()
+                'resposta': self._estado.texto('renal_combo'),
+                'detalhe': self._estado.texto('renal_detalhe')
             },
             
             # 2) Cardiovasculares
             'cardiaca': {
-                'resposta': self.cardiaca_combo.currentText(),
-                'detalhe': self.cardiaca_detalhe.text()
+                'resposta': self._estado.texto('cardiaca_combo'),
+                'detalhe': self._estado.texto('cardiaca_detalhe')
             },
             'avc': {
-                'resposta': self.avc_combo.currentText(),
-                'detalhe': self.avc_detalhe.text()
+                'resposta': self._estado.texto('avc_combo'),
+                'detalhe': self._estado.texto('avc_detalhe')
             },
             'trombose': {
-                'resposta': self.trombose_combo.currentText(),
-                'detalhe': self.trombose_detalhe.text()
+                'resposta': self._estado.texto('trombose_combo'),
+                'detalhe': self._estado.texto('trombose_detalhe')
             },
             'aneurisma': {
-                'resposta': self.aneurisma_combo.currentText(),
-                'detalhe': self.aneurisma_detalhe.text()
+                'resposta': self._estado.texto('aneurisma_combo'),
+                'detalhe': self._estado.texto('aneurisma_detalhe')
             },
             'dor_toracica': {
-                'resposta': self.dor_toracica_combo.currentText(),
-                'detalhe': self.dor_toracica_detalhe.text()
+                'resposta': self._estado.texto('dor_toracica_combo'),
+                'detalhe': self._estado.texto('dor_toracica_detalhe')
             },
             'pacemaker': {
-                'resposta': self.pacemaker_combo.currentText(),
-                'detalhe': self.pacemaker_detalhe.text()
+                'resposta': self._estado.texto('pacemaker_combo'),
+                'detalhe': self._estado.texto('pacemaker_detalhe')
             },
             
             # 3) Respiratórias
             'asma': {
-                'resposta': self.asma_combo.currentText(),
-                'detalhe': self.asma_detalhe.text()
+                'resposta': self._estado.texto('asma_combo'),
+                'detalhe': self._estado.texto('asma_detalhe')
             },
             'dpoc': {
-                'resposta': self.dpoc_combo.currentText(),
-                'detalhe': self.dpoc_detalhe.text()
+                'resposta': self._estado.texto('dpoc_combo'),
+                'detalhe': self._estado.texto('dpoc_detalhe')
             },
             'apneia': {
-                'resposta': self.apneia_combo.currentText(),
-                'detalhe': self.apneia_detalhe.text()
+                'resposta': self._estado.texto('apneia_combo'),
+                'detalhe': self._estado.texto('apneia_detalhe')
             },
             'infecao_resp': {
-                'resposta': self.infecao_resp_combo.currentText(),
-                'detalhe': self.infecao_resp_detalhe.text()
+                'resposta': self._estado.texto('infecao_resp_combo'),
+                'detalhe': self._estado.texto('infecao_resp_detalhe')
             },
             
             # 4) Gastrointestinais
             'refluxo': {
-                'resposta': self.refluxo_combo.currentText(),
-                'detalhe': self.refluxo_detalhe.text()
+                'resposta': self._estado.texto('refluxo_combo'),
+                'detalhe': self._estado.texto('refluxo_detalhe')
             },
             'dii': {
-                'resposta': self.dii_combo.currentText(),
-                'detalhe': self.dii_detalhe.text()
+                'resposta': self._estado.texto('dii_combo'),
+                'detalhe': self._estado.texto('dii_detalhe')
             },
             'cirurgias_digest': {
-                'resposta': self.cirurgias_digest_combo.currentText(),
-                'detalhe': self.cirurgias_digest_detalhe.text()
+                'resposta': self._estado.texto('cirurgias_digest_combo'),
+                'detalhe': self._estado.texto('cirurgias_digest_detalhe')
             },
             
             # 5) Neurológicas / Psiquiátricas
             'epilepsia': {
-                'resposta': self.epilepsia_combo.currentText(),
-                'detalhe': self.epilepsia_detalhe.text()
+                'resposta': self._estado.texto('epilepsia_combo'),
+                'detalhe': self._estado.texto('epilepsia_detalhe')
             },
             'desmielinizantes': {
-                'resposta': self.desmielinizantes_combo.currentText(),
-                'detalhe': self.desmielinizantes_detalhe.text()
+                'resposta': self._estado.texto('desmielinizantes_combo'),
+                'detalhe': self._estado.texto('desmielinizantes_detalhe')
             },
             'tce': {
-                'resposta': self.tce_combo.currentText(),
+                'resposta': self._estado.texto('tce_combo'),
                 'detalhe': ''
             },
             'cefaleias': {
-                'resposta': self.cefaleias_combo.currentText(),
-                'detalhe': self.cefaleias_detalhe.text()
+                'resposta': self._estado.texto('cefaleias_combo'),
+                'detalhe': self._estado.texto('cefaleias_detalhe')
             },
             'psiquiatricas': {
-                'resposta': self.psiquiatricas_combo.currentText(),
-                'detalhe': self.psiquiatricas_detalhe.text()
+                'resposta': self._estado.texto('psiquiatricas_combo'),
+                'detalhe': self._estado.texto('psiquiatricas_detalhe')
             },
             'cauda_equina': {
-                'resposta': self.cauda_equina_combo.currentText(),
-                'detalhe': self.cauda_equina_detalhe.text()
+                'resposta': self._estado.texto('cauda_equina_combo'),
+                'detalhe': self._estado.texto('cauda_equina_detalhe')
             },
             
             # 6) Músculo-esqueléticas
             'artrite': {
-                'resposta': self.artrite_combo.currentText(),
-                'detalhe': self.artrite_detalhe.text()
+                'resposta': self._estado.texto('artrite_combo'),
+                'detalhe': self._estado.texto('artrite_detalhe')
             },
             'osteoporose': {
-                'resposta': self.osteoporose_combo.currentText(),
-                'detalhe': self.osteoporose_detalhe.text()
+                'resposta': self._estado.texto('osteoporose_combo'),
+                'detalhe': self._estado.texto('osteoporose_detalhe')
             },
             'hernias': {
-                'resposta': self.hernias_combo.currentText(),
-                'detalhe': self.hernias_detalhe.text()
+                'resposta': self._estado.texto('hernias_combo'),
+                'detalhe': self._estado.texto('hernias_detalhe')
             },
             'escoliose': {
-                'resposta': self.escoliose_combo.currentText(),
-                'detalhe': self.escoliose_detalhe.text()
+                'resposta': self._estado.texto('escoliose_combo'),
+                'detalhe': self._estado.texto('escoliose_detalhe')
             },
             'fraturas': {
-                'resposta': self.fraturas_combo.currentText(),
-                'detalhe': self.fraturas_detalhe.text()
+                'resposta': self._estado.texto('fraturas_combo'),
+                'detalhe': self._estado.texto('fraturas_detalhe')
             },
             'quedas': {
-                'resposta': self.quedas_combo.currentText(),
-                'detalhe': self.quedas_detalhe.text()
+                'resposta': self._estado.texto('quedas_combo'),
+                'detalhe': self._estado.texto('quedas_detalhe')
             },
             'cirurgias_ortop': {
-                'resposta': self.cirurgias_ortop_combo.currentText(),
-                'detalhe': self.cirurgias_ortop_detalhe.text()
+                'resposta': self._estado.texto('cirurgias_ortop_combo'),
+                'detalhe': self._estado.texto('cirurgias_ortop_detalhe')
             },
             'proteses': {
-                'resposta': self.proteses_combo.currentText(),
-                'detalhe': self.proteses_detalhe.text()
+                'resposta': self._estado.texto('proteses_combo'),
+                'detalhe': self._estado.texto('proteses_detalhe')
             },
             'infiltracoes': {
-                'resposta': self.infiltracoes_combo.currentText(),
-                'detalhe': self.infiltracoes_detalhe.text()
+                'resposta': self._estado.texto('infiltracoes_combo'),
+                'detalhe': self._estado.texto('infiltracoes_detalhe')
             },
             'tecido_conjuntivo': {
-                'resposta': self.tecido_conjuntivo_combo.currentText(),
-                'detalhe': self.tecido_conjuntivo_detalhe.text()
+                'resposta': self._estado.texto('tecido_conjuntivo_combo'),
+                'detalhe': self._estado.texto('tecido_conjuntivo_detalhe')
             },
             
             # 7) Dermatologia / Feridas
             'feridas': {
-                'resposta': self.feridas_combo.currentText(),
-                'detalhe': self.feridas_detalhe.text()
+                'resposta': self._estado.texto('feridas_combo'),
+                'detalhe': self._estado.texto('feridas_detalhe')
             },
             'queloides': {
-                'resposta': self.queloides_combo.currentText(),
-                'detalhe': self.queloides_detalhe.text()
+                'resposta': self._estado.texto('queloides_combo'),
+                'detalhe': self._estado.texto('queloides_detalhe')
             },
             'infecoes_cutaneas': {
-                'resposta': self.infecoes_cutaneas_combo.currentText(),
-                'detalhe': self.infecoes_cutaneas_detalhe.text()
+                'resposta': self._estado.texto('infecoes_cutaneas_combo'),
+                'detalhe': self._estado.texto('infecoes_cutaneas_detalhe')
             },
             'hemorragicas': {
-                'resposta': self.hemorragicas_combo.currentText(),
-                'detalhe': self.hemorragicas_detalhe.text()
+                'resposta': self._estado.texto('hemorragicas_combo'),
+                'detalhe': self._estado.texto('hemorragicas_detalhe')
             },
             'alergia_anestesicos': {
-                'resposta': self.alergia_anestesicos_combo.currentText(),
-                'detalhe': self.alergia_anestesicos_detalhe.text()
+                'resposta': self._estado.texto('alergia_anestesicos_combo'),
+                'detalhe': self._estado.texto('alergia_anestesicos_detalhe')
             },
             'alergia_adesivos': {
-                'resposta': self.alergia_adesivos_combo.currentText(),
-                'detalhe': self.alergia_adesivos_detalhe.text()
+                'resposta': self._estado.texto('alergia_adesivos_combo'),
+                'detalhe': self._estado.texto('alergia_adesivos_detalhe')
             },
             
             # 8) Alergias / Intolerâncias
             'alergias_medicamentos': {
-                'resposta': self.alergias_medicamentos_combo.currentText(),
-                'detalhe': self.alergias_medicamentos_detalhe.text()
+                'resposta': self._estado.texto('alergias_medicamentos_combo'),
+                'detalhe': self._estado.texto('alergias_medicamentos_detalhe')
             },
             'alergias_alimentos': {
-                'resposta': self.alergias_alimentos_combo.currentText(),
-                'detalhe': self.alergias_alimentos_detalhe.text()
+                'resposta': self._estado.texto('alergias_alimentos_combo'),
+                'detalhe': self._estado.texto('alergias_alimentos_detalhe')
             },
             'alergias_plantas': {
-                'resposta': self.alergias_plantas_combo.currentText(),
-                'detalhe': self.alergias_plantas_detalhe.text()
+                'resposta': self._estado.texto('alergias_plantas_combo'),
+                'detalhe': self._estado.texto('alergias_plantas_detalhe')
             },
             'alergias_homeopaticos': {
-                'resposta': self.alergias_homeopaticos_combo.currentText(),
-                'detalhe': self.alergias_homeopaticos_detalhe.text()
+                'resposta': self._estado.texto('alergias_homeopaticos_combo'),
+                'detalhe': self._estado.texto('alergias_homeopaticos_detalhe')
             },
             'intolerancias': {
-                'resposta': self.intolerancias_combo.currentText(),
-                'detalhe': self.intolerancias_detalhe.text()
+                'resposta': self._estado.texto('intolerancias_combo'),
+                'detalhe': self._estado.texto('intolerancias_detalhe')
             },
             
             # 9) Infecciosas / Imunológicas
             'autoimunes': {
-                'resposta': self.autoimunes_combo.currentText(),
-                'detalhe': self.autoimunes_detalhe.text()
+                'resposta': self._estado.texto('autoimunes_combo'),
+                'detalhe': self._estado.texto('autoimunes_detalhe')
             },
             'hiv_hepatites': {
-                'resposta': self.hiv_hepatites_combo.currentText(),
-                'detalhe': self.hiv_hepatites_detalhe.text()
+                'resposta': self._estado.texto('hiv_hepatites_combo'),
+                'detalhe': self._estado.texto('hiv_hepatites_detalhe')
             },
             'febre_perda_peso': {
-                'resposta': self.febre_perda_peso_combo.currentText(),
-                'detalhe': self.febre_perda_peso_detalhe.text()
+                'resposta': self._estado.texto('febre_perda_peso_combo'),
+                'detalhe': self._estado.texto('febre_perda_peso_detalhe')
             },
             
             # 10) Oncologia
             'cancro': {
-                'resposta': self.cancro_combo.currentText(),
-                'detalhe': self.cancro_detalhe.text()
+                'resposta': self._estado.texto('cancro_combo'),
+                'detalhe': self._estado.texto('cancro_detalhe')
             },
             'tratamento_oncologico': {
-                'resposta': self.tratamento_oncologico_combo.currentText(),
-                'detalhe': self.tratamento_oncologico_detalhe.text()
+                'resposta': self._estado.texto('tratamento_oncologico_combo'),
+                'detalhe': self._estado.texto('tratamento_oncologico_detalhe')
             },
             'linfedema': {
-                'resposta': self.linfedema_combo.currentText(),
-                'detalhe': self.linfedema_detalhe.text()
+                'resposta': self._estado.texto('linfedema_combo'),
+                'detalhe': self._estado.texto('linfedema_detalhe')
             },
             
             # 11) Saúde Reprodutiva
             'gravidez': {
-                'resposta': self.gravidez_combo.currentText(),
-                'detalhe': self.gravidez_detalhe.text()
+                'resposta': self._estado.texto('gravidez_combo'),
+                'detalhe': self._estado.texto('gravidez_detalhe')
             },
             'amamentacao': {
-                'resposta': self.amamentacao_combo.currentText(),
+                'resposta': self._estado.texto('amamentacao_combo'),
                 'detalhe': ''
             },
             'gineco_urologicas': {
-                'resposta': self.gineco_urologicas_combo.currentText(),
-                'detalhe': self.gineco_urologicas_detalhe.text()
+                'resposta': self._estado.texto('gineco_urologicas_combo'),
+                'detalhe': self._estado.texto('gineco_urologicas_detalhe')
             },
             'dispositivo_intrauterino': {
-                'resposta': self.dispositivo_intrauterino_combo.currentText(),
-                'detalhe': self.dispositivo_intrauterino_detalhe.text()
+                'resposta': self._estado.texto('dispositivo_intrauterino_combo'),
+                'detalhe': self._estado.texto('dispositivo_intrauterino_detalhe')
             },
             
             # 12) Cirurgias / Internamentos / Traumas
             'cirurgias': {
-                'resposta': self.cirurgias_combo.currentText(),
-                'detalhe': self.cirurgias_detalhe.text()
+                'resposta': self._estado.texto('cirurgias_combo'),
+                'detalhe': self._estado.texto('cirurgias_detalhe')
             },
             'internamentos': {
-                'resposta': self.internamentos_combo.currentText(),
-                'detalhe': self.internamentos_detalhe.text()
+                'resposta': self._estado.texto('internamentos_combo'),
+                'detalhe': self._estado.texto('internamentos_detalhe')
             },
             'acidentes': {
-                'resposta': self.acidentes_combo.currentText(),
-                'detalhe': self.acidentes_detalhe.text()
+                'resposta': self._estado.texto('acidentes_combo'),
+                'detalhe': self._estado.texto('acidentes_detalhe')
             },
             
             # 13) Implantes e Dispositivos
             'dispositivos_eletronicos': {
-                'resposta': self.dispositivos_eletronicos_combo.currentText(),
-                'detalhe': self.dispositivos_eletronicos_detalhe.text()
+                'resposta': self._estado.texto('dispositivos_eletronicos_combo'),
+                'detalhe': self._estado.texto('dispositivos_eletronicos_detalhe')
             },
             'implantes_metalicos': {
-                'resposta': self.implantes_metalicos_combo.currentText(),
-                'detalhe': self.implantes_metalicos_detalhe.text()
+                'resposta': self._estado.texto('implantes_metalicos_combo'),
+                'detalhe': self._estado.texto('implantes_metalicos_detalhe')
             },
             'tatuagens': {
-                'resposta': self.tatuagens_combo.currentText(),
-                'detalhe': self.tatuagens_detalhe.text()
+                'resposta': self._estado.texto('tatuagens_combo'),
+                'detalhe': self._estado.texto('tatuagens_detalhe')
             },
             
             # 14) Medicação e Suplementos
             'anticoagulantes': {
-                'resposta': self.anticoagulantes_combo.currentText(),
-                'detalhe': self.anticoagulantes_detalhe.text()
+                'resposta': self._estado.texto('anticoagulantes_combo'),
+                'detalhe': self._estado.texto('anticoagulantes_detalhe')
             },
             'imunossupressores': {
-                'resposta': self.imunossupressores_combo.currentText(),
-                'detalhe': self.imunossupressores_detalhe.text()
+                'resposta': self._estado.texto('imunossupressores_combo'),
+                'detalhe': self._estado.texto('imunossupressores_detalhe')
             },
             'antidiabeticos': {
-                'resposta': self.antidiabeticos_combo.currentText(),
-                'detalhe': self.antidiabeticos_detalhe.text()
+                'resposta': self._estado.texto('antidiabeticos_combo'),
+                'detalhe': self._estado.texto('antidiabeticos_detalhe')
             },
             'psicotropicos': {
-                'resposta': self.psicotropicos_combo.currentText(),
+                'resposta': self._estado.texto('psicotropicos_combo'),
                 'detalhe': ''
             },
             'fotossensibilizantes': {
-                'resposta': self.fotossensibilizantes_combo.currentText(),
+                'resposta': self._estado.texto('fotossensibilizantes_combo'),
                 'detalhe': ''
             },
             'bifosfonatos': {
-                'resposta': self.bifosfonatos_combo.currentText(),
-                'detalhe': self.bifosfonatos_detalhe.text()
+                'resposta': self._estado.texto('bifosfonatos_combo'),
+                'detalhe': self._estado.texto('bifosfonatos_detalhe')
             },
             'suplementos': {
-                'resposta': self.suplementos_combo.currentText(),
-                'detalhe': self.suplementos_detalhe.text()
+                'resposta': self._estado.texto('suplementos_combo'),
+                'detalhe': self._estado.texto('suplementos_detalhe')
             },
             'reacoes_previas': {
-                'resposta': self.reacoes_previas_combo.currentText(),
-                'detalhe': self.reacoes_previas_detalhe.text()
+                'resposta': self._estado.texto('reacoes_previas_combo'),
+                'detalhe': self._estado.texto('reacoes_previas_detalhe')
             },
             
             # 15) Estilo de Vida
             'tabaco': {
-                'resposta': self.tabaco_combo.currentText(),
-                'detalhe': self.tabaco_detalhe.text()
+                'resposta': self._estado.texto('tabaco_combo'),
+                'detalhe': self._estado.texto('tabaco_detalhe')
             },
             'alcool': {
-                'resposta': self.alcool_combo.currentText(),
-                'detalhe': self.alcool_detalhe.text()
+                'resposta': self._estado.texto('alcool_combo'),
+                'detalhe': self._estado.texto('alcool_detalhe')
             },
             'drogas': {
-                'resposta': self.drogas_combo.currentText(),
-                'detalhe': self.drogas_detalhe.text()
+                'resposta': self._estado.texto('drogas_combo'),
+                'detalhe': self._estado.texto('drogas_detalhe')
             },
             'atividade_fisica': {
-                'resposta': self.atividade_fisica_combo.currentText(),
-                'detalhe': self.atividade_fisica_detalhe.text()
+                'resposta': self._estado.texto('atividade_fisica_combo'),
+                'detalhe': self._estado.texto('atividade_fisica_detalhe')
             },
             'sono': {
-                'resposta': self.sono_combo.currentText(),
-                'detalhe': self.sono_detalhe.text()
+                'resposta': self._estado.texto('sono_combo'),
+                'detalhe': self._estado.texto('sono_detalhe')
             },
             'stress': {
-                'resposta': self.stress_combo.currentText(),
+                'resposta': self._estado.texto('stress_combo'),
                 'detalhe': ''
             },
             
             # 16) Exames/Diagnósticos recentes
             'exames': {
-                'resposta': self.exames_combo.currentText(),
-                'detalhe': self.exames_detalhe.toPlainText().strip()
+                'resposta': self._estado.texto('exames_combo'),
+                'detalhe': self._estado.texto('exames_detalhe').strip()
             },
             
             # 17) Red Flags atuais
             'dor_noturna': {
-                'resposta': self.dor_noturna_combo.currentText(),
+                'resposta': self._estado.texto('dor_noturna_combo'),
                 'detalhe': ''
             },
             'defices_neurologicos': {
-                'resposta': self.defices_neurologicos_combo.currentText(),
+                'resposta': self._estado.texto('defices_neurologicos_combo'),
                 'detalhe': ''
             },
             'incontinencia': {
-                'resposta': self.incontinencia_combo.currentText(),
+                'resposta': self._estado.texto('incontinencia_combo'),
                 'detalhe': ''
             },
             'febre_sem_causa': {
-                'resposta': self.febre_sem_causa_combo.currentText(),
+                'resposta': self._estado.texto('febre_sem_causa_combo'),
                 'detalhe': ''
             },
             'perda_peso': {
-                'resposta': self.perda_peso_combo.currentText(),
+                'resposta': self._estado.texto('perda_peso_combo'),
                 'detalhe': ''
             },
-            'red_flags_descricao': self.red_flags_detalhe.toPlainText().strip(),
+            'red_flags_descricao': self._estado.texto('red_flags_detalhe').strip(),
             
             # 18) Preferências / Limites de Tratamento
             'hvla': {
-                'resposta': self.hvla_combo.currentText(),
-                'detalhe': self.hvla_detalhe.text()
+                'resposta': self._estado.texto('hvla_combo'),
+                'detalhe': self._estado.texto('hvla_detalhe')
             },
             'mesoterapia_aceit': {
-                'resposta': self.mesoterapia_aceit_combo.currentText(),
-                'detalhe': self.mesoterapia_aceit_detalhe.text()
+                'resposta': self._estado.texto('mesoterapia_aceit_combo'),
+                'detalhe': self._estado.texto('mesoterapia_aceit_detalhe')
             },
             'terapias_freq': {
-                'resposta': self.terapias_freq_combo.currentText(),
-                'detalhe': self.terapias_freq_detalhe.text()
+                'resposta': self._estado.texto('terapias_freq_combo'),
+                'detalhe': self._estado.texto('terapias_freq_detalhe')
             },
             'aversao_agulhas': {
-                'resposta': self.aversao_agulhas_combo.currentText(),
-                'detalhe': self.aversao_agulhas_detalhe.text()
+                'resposta': self._estado.texto('aversao_agulhas_combo'),
+                'detalhe': self._estado.texto('aversao_agulhas_detalhe')
             },
             
             # Consentimentos e RGPD
-            'veracidade': self.veracidade_checkbox.isChecked(),
-            'naturopatia': self.naturopatia_combo.currentText(),
-            'osteopatia': self.osteopatia_combo.currentText(),
-            'mesoterapia_consent': self.mesoterapia_consent_combo.currentText(),
-            'medicina_quantica': self.medicina_quantica_combo.currentText(),
-            'toque_cabeca': self.cabeca_combo.currentText(),
-            'toque_ombro': self.ombro_combo.currentText(),
-            'toque_anca': self.anca_combo.currentText(),
-            'toque_palpacao': self.palpacao_combo.currentText(),
-            'rgpd': self.rgpd_checkbox.isChecked(),
-            'li_compreendi': self.li_compreendi_checkbox.isChecked(),
-            'escolhi_modalidades': self.escolhi_modalidades_checkbox.isChecked(),
-            'assinalei_caixas': self.assinalei_caixas_checkbox.isChecked(),
-            'questoes_respondidas': self.questoes_respondidas_checkbox.isChecked(),
+            'veracidade': self._estado.marcado('veracidade_checkbox'),
+            'naturopatia': self._estado.texto('naturopatia_combo'),
+            'osteopatia': self._estado.texto('osteopatia_combo'),
+            'mesoterapia_consent': self._estado.texto('mesoterapia_consent_combo'),
+            'medicina_quantica': self._estado.texto('medicina_quantica_combo'),
+            'toque_cabeca': self._estado.texto('cabeca_combo'),
+            'toque_ombro': self._estado.texto('ombro_combo'),
+            'toque_anca': self._estado.texto('anca_combo'),
+            'toque_palpacao': self._estado.texto('palpacao_combo'),
+            'rgpd': self._estado.marcado('rgpd_checkbox'),
+            'li_compreendi': self._estado.marcado('li_compreendi_checkbox'),
+            'escolhi_modalidades': self._estado.marcado('escolhi_modalidades_checkbox'),
+            'assinalei_caixas': self._estado.marcado('assinalei_caixas_checkbox'),
+            'questoes_respondidas': self._estado.marcado('questoes_respondidas_checkbox'),
         }
     
     def _salvar_assinaturas_para_pdf(self, dados_assinaturas):
@@ -1969,6 +1951,24 @@ class DeclaracaoSaudeWidget(QWidget):
         except Exception as e:
             print(f"⚠️ Erro ao salvar assinaturas: {e}")
 
+    def _guardar_assinaturas_na_bd(self, dados_assinaturas):
+        """Guarda as assinaturas na base de dados no formato vetorial (signature_codec)"""
+        try:
+            from consentimentos_manager import ConsentimentosManager
+            manager = ConsentimentosManager()
+            paciente_id = self.paciente_data.get('id')
+            
+            for chave, tipo_assinatura in (('paciente', 'paciente'), ('profissional', 'terapeuta')):
+                assinatura = dados_assinaturas[chave]
+                if assinatura['assinado'] and assinatura.get('vetor'):
+                    manager.guardar_assinatura_declaracao(
+                        paciente_id, 'declaracao_saude', tipo_assinatura,
+                        assinatura['vetor'], assinatura['nome']
+                    )
+            
+        except Exception as e:
+            print(f"⚠️ Erro ao guardar assinaturas na base de dados: {e}")
+
     def _gerar_pdf_com_assinaturas(self, dados_assinaturas):
         """Gera PDF profissional com assinaturas integradas"""
         try:
@@ -2592,7 +2592,7 @@ class DeclaracaoSaudeWidget(QWidget):
                 "🦠 Infecciosas", "🎗️ Oncologia", "👶 Reprodutiva",
                 "🔪 Cirurgias", "⚕️ Implantes", "💊 Medicação",
                 "🏃 Estilo de Vida", "📊 Exames", "🚨 Red Flags",
-                "⚙️ Preferências", "📝 Consentimentos"
+                "📝 Outras Questões", "⚙️ Preferências", "📝 Consentimentos"
             ]
             
             for secao in secoes:
@@ -2631,12 +2631,16 @@ class DeclaracaoSaudeWidget(QWidget):
         """Navega para uma seção específica"""
         try:
             dialog.accept()
+            if not 0 <= index < len(self._secoes):
+                return
+            
+            # Constrói as secções até à escolhida para que a posição seja a real
+            for indice in range(index + 1):
+                self._construir_secao(indice)
             
-            # Scroll para a seção (implementação simplificada)
-            scroll_area = self.parent().findChild(QScrollArea)
-            if scroll_area:
-                posicao = index * 100  # Estimativa
-                scroll_area.verticalScrollBar().setValue(posicao)
+            # Scroll depois de o layout ser recalculado
+            marcador = self._secoes[index][0]
+            QTimer.singleShot(0, lambda: self._scroll_formulario.verticalScrollBar().setValue(marcador.y()))
                 
             print(f"🎯 Navegando para seção {index}")
             
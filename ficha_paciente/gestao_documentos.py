@@ -43,6 +43,8 @@ except ImportError:
     sqlite3 = None
     
 from biodesk_ui_kit import BiodeskUIKit
+from data_cache import DataCache
+from patient_prefetch import escolher_pasta_documentos, listar_documentos, mtime_pastas
 """
 MÓDULO: Gestão de Documentos
 =============================
@@ -495,75 +497,8 @@ class GestaoDocumentosWidget(QWidget):
         """Retorna a pasta base do paciente com lógica inteligente de seleção."""
         if not self.paciente_id:
             return None
-
-        base = Path("Documentos_Pacientes")
-        base.mkdir(parents=True, exist_ok=True)
-
-        # 1) Tenta pasta exacta {id}
-        pasta_exacta = base / str(self.paciente_id)
-        # 2) Tenta pasta com prefixo {id}_*
-        candidatos = sorted(base.glob(f"{self.paciente_id}_*"))
-
-        # Reunir todas as opções
-        todas_opcoes = []
-        if pasta_exacta.exists():
-            todas_opcoes.append(pasta_exacta)
-        todas_opcoes.extend(candidatos)
-
-        if not todas_opcoes:
-            # Cria {id} se nada existir
-            pasta_exacta.mkdir(parents=True, exist_ok=True)
-            return pasta_exacta
-
-        # 🎯 LÓGICA INTELIGENTE DE SELEÇÃO:
-        
-        # 1º: Tentar correspondência exata com nome do paciente da BD
-        nome_paciente_bd = self._obter_nome_paciente_bd()
-        if nome_paciente_bd:
-            nome_esperado = nome_paciente_bd.replace(' ', '_')
-            pasta_esperada = f"{self.paciente_id}_{nome_esperado}"
-            
-            for pasta in todas_opcoes:
-                if pasta.name == pasta_esperada:
-                    # print(f"✅ Encontrada pasta exata: {pasta.name}")
-                    return pasta
-        
-        # 2º: Priorizar pasta com documentos MAIS RECENTES (indica atividade atual)
-        melhor_pasta = None
-        melhor_score = -1
-        
-        for pasta in todas_opcoes:
-            try:
-                arquivos = [f for f in pasta.rglob("*") if f.is_file() and not f.name.endswith('.meta')]
-                num_docs = len(arquivos)
-                
-                # Calcular data de modificação mais recente
-                data_mais_recente = 0
-                if arquivos:
-                    data_mais_recente = max(f.stat().st_mtime for f in arquivos)
-                
-                # Score: priorizar atividade recente + quantidade de documentos
-                # Normalizar timestamp para evitar overflow
-                score_tempo = data_mais_recente / 1000000 if data_mais_recente > 0 else 0
-                score_total = score_tempo + (num_docs * 0.1)  # Peso menor para quantidade
-                
-                print(f"📂 {pasta.name}: {num_docs} docs, score: {score_total:.2f}")
-                
-                if score_total > melhor_score:
-                    melhor_score = score_total
-                    melhor_pasta = pasta
-                    
-            except Exception as e:
-                print(f"⚠️ Erro ao analisar {pasta.name}: {e}")
-                continue
-        
-        # Fallback: usar primeira opção disponível
-        if melhor_pasta is None:
-            melhor_pasta = todas_opcoes[0]
-            print(f"🔄 Usando fallback: {melhor_pasta.name}")
-
-        print(f"🎯 Pasta selecionada: {melhor_pasta.name}")
-        return melhor_pasta
+        # O nome só é lido da BD se houver várias pastas candidatas
+        return escolher_pasta_documentos(self.paciente_id, self._obter_nome_paciente_bd)
 
     def _obter_nome_paciente_bd(self):
         """Obtém o nome do paciente da base de dados"""
@@ -599,7 +534,10 @@ class GestaoDocumentosWidget(QWidget):
             self.documentos_list.blockSignals(False)
             return
 
-        pasta_docs = self.get_pasta_documentos()
+        # Lista lida pelo pré-carregamento, se ainda for válida; senão percorrer a pasta
+        pasta_docs, arquivos_data = self._documentos_pre_carregados()
+        if pasta_docs is None:
+            pasta_docs = self.get_pasta_documentos()
         if not pasta_docs or not pasta_docs.exists():
             self.documentos_list.blockSignals(False)
             return
@@ -608,25 +546,9 @@ class GestaoDocumentosWidget(QWidget):
         
         # ⚡ OTIMIZAÇÃO: Usar list comprehension para coleta rápida
         try:
-            # Cache de extensões para evitar conversões repetidas
-            ext_cache = {}
-            
-            # Coletar arquivos de forma mais eficiente
-            arquivos_data = []
-            for arquivo in pasta_docs.rglob("*"):
-                if not arquivo.is_file():
-                    continue
-                
-                # Cache do stat para evitar múltiplas chamadas
-                stat_info = arquivo.stat()
-                ext = ext_cache.get(arquivo.name) or arquivo.suffix.lower()
-                if arquivo.name not in ext_cache:
-                    ext_cache[arquivo.name] = ext
-                
-                arquivos_data.append((arquivo, stat_info, ext))
-
-            # ⚡ ORDENAÇÃO OTIMIZADA: usar key pré-computada
-            arquivos_data.sort(key=lambda x: x[1].st_mtime, reverse=True)
+            # Um stat por ficheiro, já ordenados do mais recente para o mais antigo
+            if arquivos_data is None:
+                arquivos_data = listar_documentos(pasta_docs)
 
             # ⚡ BATCH PROCESSING: Preparar todos os itens antes de adicionar
             itens_lista = []
@@ -680,6 +602,18 @@ class GestaoDocumentosWidget(QWidget):
         if item_para_selecionar:
             self.documentos_list.setCurrentItem(item_para_selecionar)
             
+    def _documentos_pre_carregados(self):
+        """(pasta, documentos) do pré-carregamento, ou (None, None) se não houver ou a pasta mudou"""
+        dados = DataCache.get_instance().pop_patient_prefetch(self.paciente_id, 'documentos')
+        if not dados:
+            return None, None
+        try:
+            if mtime_pastas(dados['pasta']) != dados['mtime']:
+                return None, None
+        except OSError:
+            return None, None
+        return dados['pasta'], dados['arquivos']
+            
     def _atualizar_estatisticas_rapidas(self):
         """Atualiza apenas as estatísticas sem recarregar a lista - OTIMIZADO"""
         total_docs = self.documentos_list.count()
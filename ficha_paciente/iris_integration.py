@@ -41,6 +41,7 @@ except ImportError as e:
 
 from biodesk_ui_kit import BiodeskUIKit
 from data_cache import DataCache
+from patient_prefetch import miniatura_iris
 
 
 class IrisIntegrationWidget(QWidget):
@@ -65,6 +66,7 @@ class IrisIntegrationWidget(QWidget):
         self.iris_canvas = None
         self.notas_iris = None
         self._miniaturas_iris = {}
+        self._miniaturas_pre_carregadas = {}  # {caminho: QImage} do pré-carregamento
         self.galeria_containers = []
         
         # Inicializar interface
@@ -335,9 +337,15 @@ class IrisIntegrationWidget(QWidget):
             return
         
         try:
-            from db_manager import DBManager
-            db = DBManager()
-            imagens = db.get_imagens_por_paciente(paciente_id)
+            # Imagens e miniaturas lidas pelo pré-carregamento (usadas uma vez)
+            pre_carregado = self.cache.pop_patient_prefetch(paciente_id, 'iris')
+            if pre_carregado is not None:
+                imagens = pre_carregado['imagens']
+                self._miniaturas_pre_carregadas = pre_carregado['miniaturas']
+            else:
+                from db_manager import DBManager
+                db = DBManager()
+                imagens = db.get_imagens_por_paciente(paciente_id)
         except Exception as e:
             print(f"❌ Erro ao carregar imagens: {e}")
             return
@@ -353,6 +361,7 @@ class IrisIntegrationWidget(QWidget):
         
         # Processar e organizar imagens
         self._processar_imagens_galeria(imagens)
+        self._miniaturas_pre_carregadas = {}
     
     def _processar_imagens_galeria(self, imagens):
         """Processa e organiza imagens na galeria por tipo ESQ/DRT"""
@@ -449,16 +458,10 @@ class IrisIntegrationWidget(QWidget):
         )
         
         if thumb_path and os.path.exists(thumb_path):
-            pix = QPixmap(thumb_path)
-            if not pix.isNull():
-                # Reduzir ainda mais a imagem para garantir centralização
-                thumb_label.setPixmap(
-                    pix.scaled(
-                        63, 43,
-                        Qt.AspectRatioMode.KeepAspectRatio,
-                        Qt.TransformationMode.SmoothTransformation,
-                    )
-                )
+            # Miniatura já reduzida (pré-carregada ou descodificada no tamanho final)
+            imagem = self._miniaturas_pre_carregadas.pop(thumb_path, None) or miniatura_iris(thumb_path)
+            if imagem is not None:
+                thumb_label.setPixmap(QPixmap.fromImage(imagem))
             else:
                 thumb_label.setText('❌')
                 thumb_label.setStyleSheet('border: none; background: transparent; color: #f44336; font-size: 20px;')
@@ -834,6 +837,8 @@ class IrisIntegrationWidget(QWidget):
             # Remover do BD
             db = DBManager()
             db.execute_query("DELETE FROM imagens_iris WHERE id = ?", (img_data['id'],))
+            if self.paciente_data.get('id'):
+                self.cache.invalidate_patient_data(self.paciente_data['id'])
             
             # Atualizar galeria
             self.atualizar_galeria_iris()
@@ -6,10 +6,12 @@ Extraído do monólito para melhor manutenibilidade e performance.
 
 import unicodedata
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
-                            QPushButton, QTableWidget, QTableWidgetItem, QMenu, QHeaderView)
+                            QPushButton, QTableView, QMenu, QHeaderView)
 from PyQt6.QtCore import Qt, QPoint
 from db_manager import DBManager
 from biodesk_ui_kit import BiodeskUIKit
+from table_models import ColunaTabela, ModeloTabelaIncremental
+from patient_prefetch import obter_prefetch
 
 
 class PesquisaPacientesWidget(QDialog):
@@ -120,10 +122,15 @@ class PesquisaPacientesWidget(QDialog):
         resultados_label = QLabel("📋 Resultados da Pesquisa")
         layout.addWidget(resultados_label)
         
-        # Tabela com estilo moderno
-        self.tabela = QTableWidget()
-        self.tabela.setColumnCount(4)
-        self.tabela.setHorizontalHeaderLabels(['👤 Nome', '📅 Nasc.', '📞 Contacto', '📧 Email'])
+        # Tabela com estilo moderno (modelo carregado em lotes durante o scroll)
+        self.modelo = ModeloTabelaIncremental([
+            ColunaTabela('👤 Nome', lambda p: p.get('nome', '')),
+            ColunaTabela('📅 Nasc.', lambda p: str(p.get('data_nascimento', ''))),
+            ColunaTabela('📞 Contacto', lambda p: p.get('contacto', '')),
+            ColunaTabela('📧 Email', lambda p: p.get('email', '')),
+        ], parent=self)
+        self.tabela = QTableView()
+        self.tabela.setModel(self.modelo)
         
         # Ocultar cabeçalho da tabela para visual mais limpo
         self.tabela.horizontalHeader().setVisible(False)
@@ -136,9 +143,9 @@ class PesquisaPacientesWidget(QDialog):
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
         
         self.tabela.setAlternatingRowColors(True)
-        self.tabela.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.tabela.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.tabela.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #ffffff;
                 alternate-background-color: #f8f9fa;
                 gridline-color: #e9ecef;
@@ -147,17 +154,17 @@ class PesquisaPacientesWidget(QDialog):
                 selection-background-color: #007bff;
                 selection-color: white;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 12px 8px;
                 border: none;
                 font-size: 13px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #007bff;
                 color: white;
                 font-weight: bold;
             }
-            QTableWidget::item:hover {
+            QTableView::item:hover {
                 background-color: #e3f2fd;
                 color: #1976d2;
             }
@@ -215,7 +222,7 @@ class PesquisaPacientesWidget(QDialog):
         self.tabela.doubleClicked.connect(self.abrir)
         
         # Seleção da tabela
-        self.tabela.itemSelectionChanged.connect(self.on_selection_changed)
+        self.tabela.selectionModel().selectionChanged.connect(lambda *_: self.on_selection_changed())
         
         # Pesquisa ao escrever
         self.nome_edit.textChanged.connect(self.pesquisar)
@@ -268,13 +275,8 @@ class PesquisaPacientesWidget(QDialog):
 
     def atualizar_tabela(self):
         """Atualiza a tabela com os resultados"""
-        self.tabela.setRowCount(len(self.resultados))
-        
-        for row, p in enumerate(self.resultados):
-            self.tabela.setItem(row, 0, QTableWidgetItem(p.get('nome', '')))
-            self.tabela.setItem(row, 1, QTableWidgetItem(str(p.get('data_nascimento', ''))))
-            self.tabela.setItem(row, 2, QTableWidgetItem(p.get('contacto', '')))
-            self.tabela.setItem(row, 3, QTableWidgetItem(p.get('email', '')))
+        self.modelo.definir_linhas(self.resultados)
+        self.on_selection_changed()
 
     def criar_novo_paciente(self):
         """Cria um novo paciente e fecha o diálogo"""
@@ -306,12 +308,18 @@ class PesquisaPacientesWidget(QDialog):
 
     def on_selection_changed(self):
         """Ativa/desativa botão quando há seleção"""
-        tem_selecao = len(self.tabela.selectedItems()) > 0
+        tem_selecao = self.tabela.selectionModel().hasSelection()
         self.btn_abrir.setEnabled(tem_selecao)
+        
+        # Pré-carregar as fichas que devem ser abertas a seguir: o resultado
+        # selecionado e os vizinhos (ou os primeiros, sem seleção)
+        row = self.tabela.currentIndex().row() if tem_selecao else 0
+        if self.resultados:
+            obter_prefetch().pedir_vizinhos(self.resultados, row)
 
     def abrir(self):
         """Abre o paciente selecionado"""
-        row = self.tabela.currentRow()
+        row = self.tabela.currentIndex().row()
         if row >= 0 and row < len(self.resultados):
             paciente = self.resultados[row]
             self.accept()
@@ -319,7 +327,7 @@ class PesquisaPacientesWidget(QDialog):
 
     def eliminar(self):
         """Elimina o paciente selecionado"""
-        row = self.tabela.currentRow()
+        row = self.tabela.currentIndex().row()
         if row >= 0 and row < len(self.resultados):
             paciente = self.resultados[row]
             from biodesk_dialogs import mostrar_confirmacao
@@ -333,11 +341,11 @@ class PesquisaPacientesWidget(QDialog):
 
     def menu_contexto(self, pos: QPoint):
         """Menu de contexto com clique direito"""
-        item = self.tabela.itemAt(pos)
-        if not item:
+        index = self.tabela.indexAt(pos)
+        if not index.isValid():
             return
         
-        row = item.row()
+        row = index.row()
         if row < 0 or row >= len(self.resultados):
             return
         
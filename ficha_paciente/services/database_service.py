@@ -20,6 +20,10 @@ import os
 from typing import Dict, Any, Optional, List, Tuple
 from contextlib import contextmanager
 
+from consentimentos_manager import guardar_conteudo, invalidar_cache_consentimento, resolver_conteudo
+from data_cache import get_cache
+from schema_migrations import aplicar_migracoes
+
 
 class DatabaseService:
     """Serviço para operações centralizadas de banco de dados"""
@@ -34,6 +38,10 @@ class DatabaseService:
         """
         Context manager para conexões seguras com SQLite
         
+        Aplica antes as migrações do esquema 'pacientes' (só a primeira vez
+        por base de dados custa mais do que ler PRAGMA user_version), para que
+        o armazém conteudo_consentimentos exista em bases antigas.
+        
         Args:
             db_path: Caminho do banco (padrão: pacientes.db)
             
@@ -44,6 +52,7 @@ class DatabaseService:
         conn = None
         
         try:
+            aplicar_migracoes(db_path, 'pacientes')
             conn = sqlite3.connect(db_path, timeout=DatabaseService.TIMEOUT_SECONDS)
             conn.row_factory = sqlite3.Row  # Permite acesso por nome de coluna
             yield conn
@@ -109,7 +118,8 @@ class DatabaseService:
         """
         query = '''
             SELECT id, assinatura_paciente, assinatura_terapeuta, nome_paciente, 
-                   nome_terapeuta, status, data_assinatura, conteudo_texto, conteudo_html
+                   nome_terapeuta, status, data_assinatura, conteudo_texto, conteudo_html,
+                   assinatura_paciente_hash, assinatura_terapeuta_hash, conteudo_html_hash
             FROM consentimentos 
             WHERE paciente_id = ? AND tipo_consentimento = ? 
                   AND (status IS NULL OR status != 'anulado')
@@ -117,24 +127,27 @@ class DatabaseService:
             LIMIT 1
         '''
         
-        resultado = DatabaseService.executar_query(
-            query, 
-            (paciente_id, tipo_consentimento),
-            fetch_one=True
-        )
-        
-        if resultado:
-            return {
-                'id': resultado['id'],
-                'assinatura_paciente': resultado['assinatura_paciente'],
-                'assinatura_terapeuta': resultado['assinatura_terapeuta'],
-                'nome_paciente': resultado['nome_paciente'],
-                'nome_terapeuta': resultado['nome_terapeuta'],
-                'status': resultado['status'],
-                'data_assinatura': resultado['data_assinatura'],
-                'conteudo_texto': resultado['conteudo_texto'],
-                'conteudo_html': resultado['conteudo_html']
-            }
+        with DatabaseService.obter_conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (paciente_id, tipo_consentimento))
+            resultado = cursor.fetchone()
+            
+            if resultado:
+                # Conteúdo pesado vive no armazém externo - carregado apenas aqui
+                return {
+                    'id': resultado['id'],
+                    'assinatura_paciente': resolver_conteudo(
+                        cursor, resultado['assinatura_paciente'], resultado['assinatura_paciente_hash']),
+                    'assinatura_terapeuta': resolver_conteudo(
+                        cursor, resultado['assinatura_terapeuta'], resultado['assinatura_terapeuta_hash']),
+                    'nome_paciente': resultado['nome_paciente'],
+                    'nome_terapeuta': resultado['nome_terapeuta'],
+                    'status': resultado['status'],
+                    'data_assinatura': resultado['data_assinatura'],
+                    'conteudo_texto': resultado['conteudo_texto'],
+                    'conteudo_html': resolver_conteudo(
+                        cursor, resultado['conteudo_html'], resultado['conteudo_html_hash'], texto=True)
+                }
         
         return None
     
@@ -185,16 +198,20 @@ class DatabaseService:
         """
         query = '''
             UPDATE consentimentos 
-            SET conteudo_html = ?, conteudo_texto = ?, data_assinatura = ?
+            SET conteudo_html = NULL, conteudo_html_hash = ?, conteudo_texto = ?, data_assinatura = ?
             WHERE id = ?
         '''
         
         try:
-            DatabaseService.executar_query(
-                query,
-                (conteudo_html, conteudo_texto, data_assinatura, consentimento_id),
-                commit=True
-            )
+            with DatabaseService.obter_conexao() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    query,
+                    (guardar_conteudo(cursor, conteudo_html), conteudo_texto,
+                     data_assinatura, consentimento_id)
+                )
+                conn.commit()
+                invalidar_cache_consentimento(conn, consentimento_id)
             return True
         except Exception as e:
             print(f"[ERRO] Falha ao atualizar consentimento: {e}")
@@ -228,19 +245,23 @@ class DatabaseService:
         
         query = '''
             INSERT INTO consentimentos 
-            (paciente_id, tipo_consentimento, data_assinatura, conteudo_html, conteudo_texto, 
+            (paciente_id, tipo_consentimento, data_assinatura, conteudo_html_hash, conteudo_texto, 
              nome_paciente, nome_terapeuta, status, data_criacao)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         '''
         
         try:
-            consentimento_id = DatabaseService.executar_query(
-                query,
-                (paciente_id, tipo_consentimento, data_atual, conteudo_html, conteudo_texto,
-                 nome_paciente, nome_terapeuta, status, data_atual),
-                commit=True
-            )
-            return consentimento_id
+            with DatabaseService.obter_conexao() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    query,
+                    (paciente_id, tipo_consentimento, data_atual,
+                     guardar_conteudo(cursor, conteudo_html), conteudo_texto,
+                     nome_paciente, nome_terapeuta, status, data_atual)
+                )
+                conn.commit()
+                get_cache().invalidate_patient_data(paciente_id)
+                return cursor.lastrowid
         except Exception as e:
             print(f"[ERRO] Falha ao criar consentimento: {e}")
             return None
@@ -305,30 +326,35 @@ class DatabaseService:
         Returns:
             True se sucesso
         """
-        updates = []
-        params = []
-        
-        if assinatura_paciente is not None:
-            updates.append("assinatura_paciente = ?")
-            params.append(assinatura_paciente)
-        
-        if assinatura_terapeuta is not None:
-            updates.append("assinatura_terapeuta = ?")
-            params.append(assinatura_terapeuta)
+        assinaturas = {
+            'assinatura_paciente': assinatura_paciente,
+            'assinatura_terapeuta': assinatura_terapeuta
+        }
+        assinaturas = {coluna: dados for coluna, dados in assinaturas.items() if dados is not None}
         
-        if not updates:
+        if not assinaturas:
             return True  # Nada para atualizar
         
-        params.append(consentimento_id)  # WHERE id = ?
-        
-        query = f'''
-            UPDATE consentimentos 
-            SET {', '.join(updates)}
-            WHERE id = ?
-        '''
-        
         try:
-            DatabaseService.executar_query(query, tuple(params), commit=True)
+            with DatabaseService.obter_conexao() as conn:
+                cursor = conn.cursor()
+                updates = []
+                params = []
+                
+                for coluna, dados in assinaturas.items():
+                    updates.append(f"{coluna} = NULL, {coluna}_hash = ?")
+                    params.append(guardar_conteudo(cursor, dados))
+                
+                params.append(consentimento_id)  # WHERE id = ?
+                
+                query = f'''
+                    UPDATE consentimentos 
+                    SET {', '.join(updates)}
+                    WHERE id = ?
+                '''
+                cursor.execute(query, tuple(params))
+                conn.commit()
+                invalidar_cache_consentimento(conn, consentimento_id)
             return True
         except Exception as e:
             print(f"[ERRO] Falha ao atualizar assinaturas: {e}")
@@ -361,6 +387,8 @@ class DatabaseService:
                 ("anulado", motivo, data_anulacao, consentimento_id),
                 commit=True
             )
+            with DatabaseService.obter_conexao() as conn:
+                invalidar_cache_consentimento(conn, consentimento_id)
             return True
         except Exception as e:
             print(f"[ERRO] Falha ao anular consentimento: {e}")
@@ -8,6 +8,7 @@ Inclui validações de segurança e monitorização em tempo real.
 
 import time
 import logging
+import threading
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
@@ -37,6 +38,125 @@ class GenerationSession:
     created_at: datetime
     notes: str = ""
 
+class StatusPoller(QThread):
+    """
+    Pergunta STATUS? ao HS3 fora da thread da GUI, a ritmo adaptativo
+    
+    Não pergunta nada se uma resposta a um comando chegou há menos de um
+    intervalo (o estado já está em cache). Enquanto o estado não muda o
+    intervalo duplica até max_interval_s; uma mudança ou erro volta ao mínimo.
+    """
+    
+    polled = pyqtSignal(dict)  # Resposta de get_status()
+    
+    def __init__(self, min_interval_s: float = 2.0, max_interval_s: float = 30.0, parent=None):
+        super().__init__(parent)
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max_interval_s
+        self.interval_s = min_interval_s
+        self.active = False
+        self._wake = threading.Event()
+        self._shutdown = False
+        self._last_polled = None
+    
+    def set_active(self, active: bool):
+        """Ativa/suspende a monitorização (a thread fica parada à espera)"""
+        self.active = active
+        self.interval_s = self.min_interval_s
+        self._wake.set()
+    
+    def shutdown(self):
+        self._shutdown = True
+        self._wake.set()
+    
+    def run(self):
+        while not self._shutdown:
+            self._wake.wait(self.interval_s if self.active else None)
+            self._wake.clear()
+            if self._shutdown or not self.active:
+                continue
+            
+            # Estado confirmado por uma resposta recente: não ocupar a ligação série
+            if time.monotonic() - hs3_hardware.last_reply_at < self.interval_s:
+                continue
+            
+            status = hs3_hardware.get_status()
+            relevant = {key: status.get(key) for key in ("connected", "status", "generating", "error")}
+            if relevant == self._last_polled and "error" not in status:
+                self.interval_s = min(self.interval_s * 2, self.max_interval_s)
+            else:
+                self.interval_s = self.min_interval_s
+            self._last_polled = relevant
+            self.polled.emit(status)
+
+class HardwareTelemetry(QObject):
+    """
+    Telemetria do HS3 em cache com sinais agregados
+    
+    O estado vem das respostas aos comandos (hs3_hardware.last_state) e, a
+    ritmo baixo, do StatusPoller. Várias alterações seguidas (ex.: FREQ,
+    AMPL, OFFS, START de um passo) resultam num único state_changed.
+    """
+    
+    state_changed = pyqtSignal(dict)  # Estado completo após alterações
+    
+    def __init__(self, coalesce_ms: int = 200):
+        super().__init__()
+        self.state: Dict = {}
+        self.poller = StatusPoller()
+        self.poller.polled.connect(self._on_polled)
+        
+        self._coalesce_timer = QTimer()
+        self._coalesce_timer.setSingleShot(True)
+        self._coalesce_timer.setInterval(coalesce_ms)
+        self._coalesce_timer.timeout.connect(self._flush)
+        
+        self.logger = logging.getLogger(__name__)
+    
+    def start(self):
+        """Inicia a monitorização e publica o estado atual"""
+        if not self.poller.isRunning():
+            app = QApplication.instance()
+            if app is not None:
+                app.aboutToQuit.connect(self.shutdown)
+            self.poller.start(QThread.Priority.LowPriority)
+        self.poller.set_active(True)
+        self.update_from_hardware()
+    
+    def stop(self):
+        """Suspende a monitorização sem esperar pela thread"""
+        self.poller.set_active(False)
+        self._coalesce_timer.stop()
+    
+    def shutdown(self):
+        self.stop()
+        self.poller.shutdown()
+        self.poller.wait(1000)
+    
+    def update(self, **fields):
+        """Atualiza o estado; se algo mudou, agenda um state_changed"""
+        changed = {key: value for key, value in fields.items() if self.state.get(key) != value}
+        if not changed:
+            return
+        self.state.update(changed)
+        if not self._coalesce_timer.isActive():
+            self._coalesce_timer.start()
+    
+    def update_from_hardware(self, **fields):
+        """Estado confirmado pelas respostas aos comandos já enviados"""
+        self.update(connected=hs3_hardware.is_connected(), status=hs3_hardware.status.value,
+                    **hs3_hardware.last_state, **fields)
+    
+    def _on_polled(self, status: Dict):
+        if "warning" in status:
+            self.logger.warning(f"Monitorização do HS3: {status['warning']}")
+        self.update(**{key: status[key] for key in
+                       ("connected", "status", "generating", "frequency", "amplitude", "offset", "error")
+                       if key in status})
+    
+    def _flush(self):
+        self.state_changed.emit(dict(self.state))
+
 class FrequencyGenerator(QObject):
     """
     Gerador de frequências com validações de segurança
@@ -71,10 +191,9 @@ class FrequencyGenerator(QObject):
         self.step_timer.timeout.connect(self._next_step)
         self.step_timer.setSingleShot(True)
         
-        # Timer para monitorização em tempo real
-        self.monitor_timer = QTimer()
-        self.monitor_timer.timeout.connect(self._collect_realtime_data)
-        self.monitor_timer.setInterval(100)  # 10Hz
+        # Monitorização: estado em cache, publicado só quando muda
+        self.telemetry = HardwareTelemetry()
+        self.telemetry.state_changed.connect(self._publish_realtime_data)
         
         # Configurar logging
         self.logger = logging.getLogger(__name__)
@@ -105,7 +224,7 @@ class FrequencyGenerator(QObject):
             self.start_time = datetime.now()
             
             # Iniciar monitorização
-            self.monitor_timer.start()
+            self.telemetry.start()
             
             # Emitir sinal de início
             self.session_started.emit(session.session_id)
@@ -130,7 +249,7 @@ class FrequencyGenerator(QObject):
             
             # Parar timers
             self.step_timer.stop()
-            self.monitor_timer.stop()
+            self.telemetry.stop()
             
             self.is_paused = True
             self.session_paused.emit(self.current_session.session_id)
@@ -150,7 +269,7 @@ class FrequencyGenerator(QObject):
         
         try:
             self.is_paused = False
-            self.monitor_timer.start()
+            self.telemetry.start()
             self.status_updated.emit("Sessão retomada")
             
             # Retomar passo atual
@@ -169,7 +288,7 @@ class FrequencyGenerator(QObject):
             
             # Parar timers
             self.step_timer.stop()
-            self.monitor_timer.stop()
+            self.telemetry.stop()
             
             # Resetar estado
             session_id = self.current_session.session_id if self.current_session else "unknown"
@@ -197,7 +316,7 @@ class FrequencyGenerator(QObject):
             
             # Parar todos os timers
             self.step_timer.stop()
-            self.monitor_timer.stop()
+            self.telemetry.stop()
             
             # Resetar completamente
             self.current_session = None
@@ -321,6 +440,11 @@ class FrequencyGenerator(QObject):
             if not valid:
                 return HS3Response(False, f"Passo {i+1}: {msg}")
             
+            # Tensão total (amplitude + |offset|): a mesma regra aplicada no envio
+            violation = hs3_hardware.interlock.check(step.frequency, step.amplitude, step.offset)
+            if violation:
+                return HS3Response(False, f"Passo {i+1}: {violation}")
+            
             # Validar duração (converter segundos para minutos para validação)
             duration_minutes = step.duration_seconds // 60
             if duration_minutes < 1:
@@ -345,13 +469,11 @@ class FrequencyGenerator(QObject):
             if not freq_result.success:
                 return freq_result
             
-            ampl_result = hs3_hardware.set_amplitude(step.amplitude)
-            if not ampl_result.success:
-                return ampl_result
-            
-            offs_result = hs3_hardware.set_offset(step.offset)
-            if not offs_result.success:
-                return offs_result
+            # Amplitude e offset juntos: o par do passo é verificado e as escritas
+            # ordenadas para a transição desde o passo anterior ser segura
+            output_result = hs3_hardware.set_output(step.amplitude, step.offset)
+            if not output_result.success:
+                return output_result
             
             # Iniciar geração
             start_result = hs3_hardware.start_generation()
@@ -368,6 +490,9 @@ class FrequencyGenerator(QObject):
             }
             self.step_started.emit(self.current_step, step_data)
             
+            # As respostas OK aos comandos acima já atualizaram o estado em cache
+            self.telemetry.update_from_hardware(step=self.current_step)
+            
             # Programar próximo passo
             self.step_timer.start(step.duration_seconds * 1000)  # Converter para ms
             
@@ -412,7 +537,7 @@ class FrequencyGenerator(QObject):
             
             # Parar timers
             self.step_timer.stop()
-            self.monitor_timer.stop()
+            self.telemetry.stop()
             
             session_id = self.current_session.session_id if self.current_session else "unknown"
             
@@ -435,19 +560,16 @@ class FrequencyGenerator(QObject):
             self.logger.error(error_msg)
             return HS3Response(False, error_msg)
     
-    def _collect_realtime_data(self):
-        """Coleta dados em tempo real"""
+    def _publish_realtime_data(self, hs3_state: Dict):
+        """Publica a telemetria agregada (só quando o estado do HS3 ou o passo mudam)"""
         try:
             if not self.is_running or self.is_paused:
                 return
             
-            # Obter estado do HS3
-            hs3_status = hs3_hardware.get_status()
-            
             # Dados de monitorização
             data = {
                 "timestamp": datetime.now().isoformat(),
-                "hs3_status": hs3_status,
+                "hs3_status": hs3_state,
                 "session_status": self.get_session_status(),
                 "current_step_data": None
             }
@@ -466,7 +588,7 @@ class FrequencyGenerator(QObject):
             self.realtime_data.emit(data)
             
         except Exception as e:
-            self.logger.warning(f"Erro ao coletar dados em tempo real: {e}")
+            self.logger.warning(f"Erro ao publicar dados em tempo real: {e}")
 
 # Instância global do gerador
 frequency_generator = FrequencyGenerator()
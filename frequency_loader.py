@@ -8,6 +8,9 @@ import os
 from pathlib import Path
 import logging
 
+from schema_migrations import aplicar_migracoes
+from protocol_codec import codificar_frequencias, descodificar_frequencias
+
 # Imports opcionais para maior robustez
 try:
     import pandas as pd
@@ -31,54 +34,7 @@ class FrequencyLoader:
     
     def init_db(self):
         """Cria base de dados SQLite"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Tabela de condições e frequências
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS frequency_protocols (
-                id INTEGER PRIMARY KEY,
-                condition_name TEXT NOT NULL,
-                frequency REAL NOT NULL,
-                description TEXT,
-                source TEXT,
-                category TEXT,
-                amplitude REAL DEFAULT 3.0,
-                duration INTEGER DEFAULT 5,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de sessões de terapia
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS therapy_sessions (
-                id INTEGER PRIMARY KEY,
-                patient_id TEXT,
-                protocol_name TEXT,
-                start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                end_time TIMESTAMP,
-                frequencies_used TEXT,  -- JSON array
-                amplitude REAL,
-                duration INTEGER,
-                notes TEXT,
-                biofeedback_data TEXT  -- JSON
-            )
-        ''')
-        
-        # Tabela de protocolos personalizados
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS custom_protocols (
-                id INTEGER PRIMARY KEY,
-                protocol_name TEXT UNIQUE NOT NULL,
-                frequencies TEXT NOT NULL,  -- JSON array
-                description TEXT,
-                created_by TEXT,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        aplicar_migracoes(self.db_path, 'frequencies')
         print("✅ Base de dados inicializada")
     
     def load_from_excel(self):
@@ -300,11 +256,22 @@ class FrequencyLoader:
         cursor = conn.cursor()
         
         try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO custom_protocols 
-                (protocol_name, frequencies, description)
-                VALUES (?, ?, ?)
-            ''', (name, json.dumps(frequencies), description))
+            # Frequências numéricas em binário (com metadados); outros formatos ficam em JSON
+            blob = codificar_frequencias(list(frequencies))
+            if blob is not None:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO custom_protocols 
+                    (protocol_name, frequencies, description,
+                     frequencies_blob, n_frequencies, freq_min, freq_max)
+                    VALUES (?, '', ?, ?, ?, ?, ?)
+                ''', (name, description, blob, len(frequencies),
+                      min(frequencies, default=None), max(frequencies, default=None)))
+            else:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO custom_protocols 
+                    (protocol_name, frequencies, description)
+                    VALUES (?, ?, ?)
+                ''', (name, json.dumps(frequencies), description))
             
             conn.commit()
             conn.close()
@@ -314,25 +281,38 @@ class FrequencyLoader:
             conn.close()
             return False
     
-    def get_custom_protocols(self):
-        """Lista protocolos personalizados"""
+    def get_custom_protocols(self, include_frequencies=True):
+        """
+        Lista protocolos personalizados
+        
+        Com include_frequencies=False devolve só os metadados (número e gama
+        de frequências), sem ler as listas de frequências.
+        """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT protocol_name, frequencies, description, created_date
+        frequencies_columns = "frequencies, frequencies_blob" if include_frequencies else "NULL, NULL"
+        cursor.execute(f'''
+            SELECT protocol_name, description, created_date, n_frequencies, freq_min, freq_max,
+                   {frequencies_columns}
             FROM custom_protocols 
             ORDER BY protocol_name
         ''')
         
         results = []
         for row in cursor.fetchall():
-            results.append({
+            protocol = {
                 'name': row[0],
-                'frequencies': json.loads(row[1]),
-                'description': row[2],
-                'created_date': row[3]
-            })
+                'description': row[1],
+                'created_date': row[2],
+                'n_frequencies': row[3],
+                'freq_min': row[4],
+                'freq_max': row[5]
+            }
+            if include_frequencies:
+                protocol['frequencies'] = (descodificar_frequencias(row[7]) if row[7] is not None
+                                           else json.loads(row[6]))
+            results.append(protocol)
         
         conn.close()
         return results
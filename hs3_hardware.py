@@ -8,11 +8,15 @@ NUNCA simula hardware - se não estiver conectado, gera erro claro.
 
 import serial
 import serial.tools.list_ports
+import os
 import time
 import logging
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from typing import Optional, List, Tuple, Dict
-from PyQt6.QtCore import QObject, pyqtSignal, QThread
+from PyQt6.QtCore import QObject, pyqtSignal, QThread, QTimer, QFileSystemWatcher
 from dataclasses import dataclass
 from enum import Enum
 
@@ -25,6 +29,7 @@ except ImportError:
     USB_AVAILABLE = False
 
 from hs3_config import hs3_config
+from safety_interlock import SafetyInterlock
 
 class HS3Status(Enum):
     """Estados possíveis do HS3"""
@@ -41,6 +46,203 @@ class HS3Response:
     message: str
     data: Optional[Dict] = None
 
+class HS3Discovery(QObject):
+    """
+    Descoberta de dispositivos HS3 nas portas série
+    
+    Sonda as portas candidatas em paralelo, cada uma com prazo curto, e
+    guarda em hs3_config a última porta boa e a impressão digital do
+    dispositivo (VID:PID e número de série). Na ligação seguinte essa porta
+    (ou a porta onde está agora o mesmo dispositivo) é sondada primeiro.
+    Quando o sistema acrescenta/remove portas (hotplug/udev) a descoberta é
+    refeita em segundo plano.
+    """
+    
+    devices_changed = pyqtSignal(list)  # Portas com HS3 após um refrescamento
+    
+    PROBE_DEADLINE_S = 0.3
+    MAX_PARALLEL_PROBES = 16
+    COMMON_PORTS = ['COM1', 'COM2', 'COM3', 'COM4', 'COM5', 'COM6', 'COM7', 'COM8']
+    CONFIG_KEY = "ultimo_hs3"
+    
+    def __init__(self):
+        super().__init__()
+        self.ports: List[str] = []      # Resultado da última descoberta
+        self.last_refresh = 0.0         # time.monotonic() da última descoberta
+        self._refresh_lock = threading.Lock()
+        self._known_ports = None
+        self._watcher = None
+        self._poll_timer = None
+        self._debounce_timer = None
+        self.logger = logging.getLogger(__name__)
+    
+    @property
+    def last_good(self) -> Dict:
+        """Última porta/dispositivo com que a ligação funcionou"""
+        return hs3_config.user_config.get(self.CONFIG_KEY) or {}
+    
+    @staticmethod
+    def fingerprint(port) -> Dict:
+        """VID:PID e número de série de uma porta (None se o sistema não os conhecer)"""
+        vid, pid = getattr(port, 'vid', None), getattr(port, 'pid', None)
+        return {
+            "vid_pid": f"{vid:04X}:{pid:04X}" if vid is not None and pid is not None else None,
+            "serial_number": getattr(port, 'serial_number', None),
+        }
+    
+    def list_candidates(self) -> List:
+        """Portas série do sistema; sem nenhuma, as portas COM comuns"""
+        ports = list(serial.tools.list_ports.comports())
+        if not ports:
+            ports = [SimpleNamespace(device=name, description='Porta COM comum', vid=None, pid=None,
+                                     serial_number=None) for name in self.COMMON_PORTS]
+        return ports
+    
+    def _priority(self, port) -> int:
+        last = self.last_good
+        if not last:
+            return 2
+        fingerprint = self.fingerprint(port)
+        # O mesmo dispositivo pode ter mudado de porta (outra entrada USB)
+        if fingerprint["vid_pid"] and fingerprint == {"vid_pid": last.get("vid_pid"),
+                                                      "serial_number": last.get("serial_number")}:
+            return 0
+        if port.device == last.get("port"):
+            return 1
+        return 2
+    
+    def probe(self, port_device: str, deadline_s: Optional[float] = None) -> Optional[str]:
+        """Envia *IDN? e espera pela resposta até ao prazo; None se não responder"""
+        deadline_s = deadline_s or self.PROBE_DEADLINE_S
+        try:
+            with serial.Serial(port_device, baudrate=hs3_config.limits.SERIAL_BAUDRATE,
+                               timeout=deadline_s, write_timeout=deadline_s) as test_serial:
+                test_serial.reset_input_buffer()
+                test_serial.write(b"*IDN?\n")
+                # readline termina na resposta, sem esperar o prazo todo
+                response = test_serial.readline().decode('utf-8', errors='ignore').strip()
+        except Exception as e:
+            self.logger.debug(f"  ❌ Erro testando {port_device}: {e}")
+            return None
+        return response or None
+    
+    def probe_last_good(self, deadline_s: Optional[float] = None) -> Optional[str]:
+        """Sonda só a última porta boa; devolve a porta se o HS3 responder"""
+        if not self.last_good:
+            return None
+        candidates = sorted(self.list_candidates(), key=self._priority)
+        if not candidates or self._priority(candidates[0]) == 2:
+            # A porta guardada já não existe no sistema: tentar na mesma pelo nome
+            candidates = [SimpleNamespace(device=self.last_good.get("port"), vid=None, pid=None,
+                                          serial_number=None)]
+        port = candidates[0]
+        identification = self.probe(port.device, deadline_s)
+        if not identification:
+            return None
+        self.logger.info(f"⚡ HS3 na última porta conhecida: {port.device}")
+        if port.vid is not None:
+            self.remember(port.device, identification, port)
+        return port.device
+    
+    def discover(self, deadline_s: Optional[float] = None, use_cache: bool = True) -> List[str]:
+        """
+        Procura HS3 em todas as portas candidatas
+        
+        Com use_cache, a última porta boa é sondada primeiro e, se responder,
+        as restantes não são sondadas.
+        """
+        if use_cache:
+            port = self.probe_last_good(deadline_s)
+            if port:
+                self.ports = [port]
+                self.last_refresh = time.monotonic()
+                return list(self.ports)
+        
+        candidates = sorted(self.list_candidates(), key=self._priority)
+        self.logger.info(f"🔍 Procurando HS3... {len(candidates)} porta(s) candidata(s), em paralelo")
+        for port in candidates:
+            self.logger.info(f"  📍 {port.device} - {getattr(port, 'description', '')} - "
+                             f"VID:PID {getattr(port, 'vid', None)}:{getattr(port, 'pid', None)}")
+        
+        found = []
+        if candidates:
+            with ThreadPoolExecutor(max_workers=min(len(candidates), self.MAX_PARALLEL_PROBES)) as pool:
+                replies = list(pool.map(lambda port: self.probe(port.device, deadline_s), candidates))
+            for port, reply in zip(candidates, replies):
+                if reply:
+                    self.logger.info(f"  📝 Resposta de {port.device}: '{reply}'")
+                    found.append((port, reply))
+        
+        if found:
+            self.remember(found[0][0].device, found[0][1], found[0][0])
+            self.logger.info(f"🎯 {len(found)} dispositivo(s) HS3 encontrado(s): {[p.device for p, _ in found]}")
+        else:
+            self.logger.warning("⚠️ Nenhum dispositivo HS3 encontrado")
+        
+        self.ports = [port.device for port, _ in found]
+        self.last_refresh = time.monotonic()
+        return list(self.ports)
+    
+    def remember(self, port_device: str, identification: str, port=None):
+        """Guarda a última porta boa e a impressão digital do dispositivo"""
+        if port is None:
+            port = next((p for p in self.list_candidates() if p.device == port_device), None)
+        record = {"port": port_device, "identification": identification, **self.fingerprint(port)}
+        if record == self.last_good:
+            return
+        hs3_config.user_config[self.CONFIG_KEY] = record
+        hs3_config.save_config()
+    
+    # ── Hotplug ──
+    
+    def start_hotplug_monitor(self):
+        """
+        Refaz a descoberta quando as portas do sistema mudam
+        
+        Em Linux/macOS o udev/devfs cria e remove entradas em /dev; no
+        Windows compara-se a lista de portas a cada 3 s (sem sondar nada).
+        """
+        if self._watcher or self._poll_timer:
+            return
+        self._known_ports = {port.device for port in serial.tools.list_ports.comports()}
+        self._debounce_timer = QTimer()
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(500)  # o udev cria várias entradas seguidas
+        self._debounce_timer.timeout.connect(self._check_ports)
+        
+        if os.path.isdir('/dev'):
+            self._watcher = QFileSystemWatcher(['/dev'])
+            self._watcher.directoryChanged.connect(lambda _path: self._debounce_timer.start())
+        else:
+            self._poll_timer = QTimer()
+            self._poll_timer.timeout.connect(self._check_ports)
+            self._poll_timer.start(3000)
+    
+    def _check_ports(self):
+        ports = {port.device for port in serial.tools.list_ports.comports()}
+        if ports == self._known_ports:
+            return
+        self.logger.info(f"🔌 Portas série alteradas: +{sorted(ports - self._known_ports)} "
+                         f"-{sorted(self._known_ports - ports)}")
+        self._known_ports = ports
+        self.refresh_async()
+    
+    def refresh_async(self) -> bool:
+        """Descoberta numa thread; emite devices_changed no fim. False se já estiver a correr"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        
+        def refresh():
+            try:
+                self.devices_changed.emit(self.discover())
+            except Exception as e:
+                self.logger.error(f"❌ Erro a refrescar dispositivos HS3: {e}")
+            finally:
+                self._refresh_lock.release()
+        
+        threading.Thread(target=refresh, name="hs3-discovery", daemon=True).start()
+        return True
+
 class HS3Hardware(QObject):
     """
     Driver principal do gerador HS3
@@ -60,10 +262,28 @@ class HS3Hardware(QObject):
         self.device_info = {}
         self.last_error = ""
         
+        # Estado conhecido do gerador, atualizado pelas respostas "OK" aos comandos
+        # (evita perguntar STATUS? para saber o que acabámos de configurar)
+        self._reset_state()
+        self.last_reply_at = 0.0  # time.monotonic() da última resposta recebida
+        
+        # Limites compilados: cada comando é verificado com o estado resultante antes de ser enviado
+        self.interlock = SafetyInterlock.from_hs3_limits(hs3_config.limits)
+        
+        # A monitorização corre noutra thread: os comandos não se podem intercalar
+        self._serial_lock = threading.Lock()
+        
+        # Descoberta de portas (paralela, com última porta boa em cache)
+        self.discovery = HS3Discovery()
+        
         # Configurar logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
     
+    def _reset_state(self):
+        """Estado desconhecido: nova ligação ou ligação fechada"""
+        self.last_state = {"frequency": None, "amplitude": None, "offset": None, "generating": False}
+    
     def find_hs3_usb_devices(self) -> List[Dict]:
         """
         Procura dispositivos HS3 via USB direto
@@ -203,79 +423,15 @@ class HS3Hardware(QObject):
         
         return hs3_devices
 
-    def find_hs3_devices(self) -> List[str]:
+    def find_hs3_devices(self, use_cache: bool = True) -> List[str]:
         """
         Procura dispositivos HS3 nas portas COM
         Retorna lista de portas onde HS3 foi encontrado
-        """
-        hs3_ports = []
-        
-        # Procurar em todas as portas COM disponíveis
-        available_ports = serial.tools.list_ports.comports()
-        
-        self.logger.info(f"🔍 Procurando HS3... Portas disponíveis: {len(available_ports)}")
-        
-        # Listar todas as portas para debug
-        for port in available_ports:
-            self.logger.info(f"  📍 {port.device} - {port.description} - VID:PID {port.vid}:{port.pid}")
         
-        # Se não há portas, tentar portas padrão do Windows
-        if not available_ports:
-            self.logger.warning("⚠️ Nenhuma porta COM detectada pelo sistema")
-            # Tentar portas COM comuns no Windows
-            common_ports = ['COM1', 'COM2', 'COM3', 'COM4', 'COM5', 'COM6', 'COM7', 'COM8']
-            self.logger.info("🔍 Tentando portas COM comuns...")
-            
-            for port_name in common_ports:
-                try:
-                    test_serial = serial.Serial(port_name, timeout=0.5)
-                    test_serial.close()
-                    self.logger.info(f"  ✅ {port_name} acessível")
-                    available_ports.append(type('Port', (), {'device': port_name, 'description': 'Porta detectada manualmente'})())
-                except:
-                    continue
-        
-        for port in available_ports:
-            try:
-                port_device = port.device if hasattr(port, 'device') else str(port)
-                self.logger.info(f"🔌 Testando {port_device}...")
-                
-                # Tentar comunicação básica
-                test_serial = serial.Serial(
-                    port_device,
-                    baudrate=hs3_config.limits.SERIAL_BAUDRATE,
-                    timeout=hs3_config.limits.SERIAL_TIMEOUT
-                )
-                
-                # Enviar comando de identificação
-                test_serial.write(b"*IDN?\n")
-                time.sleep(0.5)
-                
-                response = test_serial.read_all().decode('utf-8', errors='ignore')
-                test_serial.close()
-                
-                self.logger.info(f"  📝 Resposta de {port_device}: '{response.strip()}'")
-                
-                # Verificar se é um HS3 (critérios mais flexíveis)
-                response_upper = response.upper()
-                if ("HS3" in response_upper or 
-                    "FREQUENCY" in response_upper or 
-                    "GENERATOR" in response_upper or
-                    len(response.strip()) > 0):  # Qualquer resposta válida
-                    
-                    hs3_ports.append(port_device)
-                    self.logger.info(f"✅ Possível HS3 encontrado em {port_device}")
-                
-            except Exception as e:
-                self.logger.debug(f"  ❌ Erro testando {port_device}: {e}")
-                continue
-        
-        if hs3_ports:
-            self.logger.info(f"🎯 {len(hs3_ports)} dispositivo(s) HS3 encontrado(s): {hs3_ports}")
-        else:
-            self.logger.warning("⚠️ Nenhum dispositivo HS3 encontrado")
-        
-        return hs3_ports
+        As portas são sondadas em paralelo (ver HS3Discovery); com use_cache
+        a última porta boa é tentada primeiro.
+        """
+        return self.discovery.discover(use_cache=use_cache)
     
     def connect(self, port: str = "AUTO") -> HS3Response:
         """
@@ -284,8 +440,15 @@ class HS3Hardware(QObject):
         """
         try:
             self._update_status(HS3Status.CONNECTING)
+            self._reset_state()  # nada do que foi configurado antes é garantido
             
             # Detecção automática se necessário
+            if port == "AUTO":
+                self.discovery.start_hotplug_monitor()
+                
+                # A última porta série boa responde? Evita a procura USB/PowerShell
+                port = self.discovery.probe_last_good() or "AUTO"
+            
             if port == "AUTO":
                 # Primeiro tentar detecção USB direta
                 usb_devices = self.find_hs3_usb_devices()
@@ -298,7 +461,7 @@ class HS3Hardware(QObject):
                 
                 # Se USB falhou, tentar portas COM
                 self.logger.info("🔍 USB falhou, tentando detecção por porta COM...")
-                hs3_ports = self.find_hs3_devices()
+                hs3_ports = self.find_hs3_devices(use_cache=False)
                 if not hs3_ports:
                     error_msg = (
                         "❌ GERADOR HS3 NÃO ENCONTRADO\n\n"
@@ -340,6 +503,10 @@ class HS3Hardware(QObject):
             # Obter informações do dispositivo
             self.device_info = self._get_device_info()
             
+            # Próxima ligação tenta esta porta primeiro
+            if self.device_info.get('identification'):
+                self.discovery.remember(port, self.device_info['identification'])
+            
             self._update_status(HS3Status.CONNECTED)
             success_msg = f"✅ HS3 conectado em {port}"
             self.logger.info(success_msg)
@@ -367,6 +534,7 @@ class HS3Hardware(QObject):
                 self.serial_connection.close()
                 self.serial_connection = None
             
+            self._reset_state()
             self._update_status(HS3Status.DISCONNECTED)
             self.logger.info("HS3 desconectado")
             
@@ -393,15 +561,16 @@ class HS3Hardware(QObject):
             return HS3Response(False, "HS3 não conectado")
         
         # Validar frequência
-        valid, msg = hs3_config.validate_frequency(frequency)
-        if not valid:
-            return HS3Response(False, f"Frequência inválida: {msg}")
+        violation = self.interlock.check(frequency=frequency)
+        if violation:
+            return HS3Response(False, f"Frequência inválida: {violation}")
         
         try:
             command = f"FREQ {frequency}\n"
             response = self._send_command(command)
             
             if "OK" in response:
+                self.last_state["frequency"] = frequency
                 return HS3Response(True, f"Frequência definida: {frequency}Hz")
             else:
                 return HS3Response(False, f"Erro ao definir frequência: {response}")
@@ -414,41 +583,63 @@ class HS3Hardware(QObject):
         if not self.is_connected():
             return HS3Response(False, "HS3 não conectado")
         
-        # Validar amplitude
-        valid, msg = hs3_config.validate_amplitude(amplitude)
-        if not valid:
-            return HS3Response(False, f"Amplitude inválida: {msg}")
+        # Validar amplitude (com o offset atual, para a tensão total)
+        violation = self.interlock.check(amplitude=amplitude, offset=self.last_state["offset"])
+        if violation:
+            return HS3Response(False, f"Amplitude inválida: {violation}")
         
-        try:
-            command = f"AMPL {amplitude}\n"
-            response = self._send_command(command)
-            
-            if "OK" in response:
-                return HS3Response(True, f"Amplitude definida: {amplitude}V")
-            else:
-                return HS3Response(False, f"Erro ao definir amplitude: {response}")
-                
-        except Exception as e:
-            return HS3Response(False, f"Erro na comunicação: {e}")
+        return self._write_output("amplitude", amplitude)
     
     def set_offset(self, offset: float) -> HS3Response:
         """Define offset"""
         if not self.is_connected():
             return HS3Response(False, "HS3 não conectado")
         
-        # Validar offset
-        valid, msg = hs3_config.validate_offset(offset)
-        if not valid:
-            return HS3Response(False, f"Offset inválido: {msg}")
+        # Validar offset (com a amplitude atual, para a tensão total)
+        violation = self.interlock.check(amplitude=self.last_state["amplitude"], offset=offset)
+        if violation:
+            return HS3Response(False, f"Offset inválido: {violation}")
+        
+        return self._write_output("offset", offset)
+    
+    def set_output(self, amplitude: float, offset: float) -> HS3Response:
+        """
+        Define amplitude e offset de um passo
+        
+        O par de destino é verificado uma vez e as escritas são ordenadas para
+        que o estado intermédio também respeite a tensão total: de 2 V/+2 V
+        para 4 V/0 V o offset desce antes de a amplitude subir. Verificar cada
+        escrita contra o outro parâmetro ainda antigo rejeitaria essa transição.
+        """
+        if not self.is_connected():
+            return HS3Response(False, "HS3 não conectado")
+        
+        violation = self.interlock.check(amplitude=amplitude, offset=offset)
+        if violation:
+            return HS3Response(False, f"Amplitude/offset inválidos: {violation}")
         
+        targets = {"amplitude": amplitude, "offset": offset}
+        for name in self.interlock.output_order(amplitude, offset, self.last_state["offset"]):
+            if self.last_state[name] == targets[name]:
+                continue  # já configurado
+            result = self._write_output(name, targets[name])
+            if not result.success:
+                return result
+        
+        return HS3Response(True, f"Saída definida: {amplitude}V, offset {offset}V")
+    
+    def _write_output(self, name: str, value: float) -> HS3Response:
+        """Envia AMPL/OFFS (já verificado pelo interlock) e atualiza o estado conhecido"""
+        command, label = {"amplitude": ("AMPL", "Amplitude definida"),
+                          "offset": ("OFFS", "Offset definido")}[name]
         try:
-            command = f"OFFS {offset}\n"
-            response = self._send_command(command)
+            response = self._send_command(f"{command} {value}\n")
             
             if "OK" in response:
-                return HS3Response(True, f"Offset definido: {offset}V")
+                self.last_state[name] = value
+                return HS3Response(True, f"{label}: {value}V")
             else:
-                return HS3Response(False, f"Erro ao definir offset: {response}")
+                return HS3Response(False, f"Erro ao definir {name}: {response}")
                 
         except Exception as e:
             return HS3Response(False, f"Erro na comunicação: {e}")
@@ -462,6 +653,7 @@ class HS3Hardware(QObject):
             response = self._send_command("START\n")
             
             if "OK" in response:
+                self.last_state["generating"] = True
                 self._update_status(HS3Status.GENERATING)
                 return HS3Response(True, "Geração iniciada")
             else:
@@ -477,6 +669,7 @@ class HS3Hardware(QObject):
         
         try:
             response = self._send_command("STOP\n")
+            self.last_state["generating"] = False
             
             if self.status == HS3Status.GENERATING:
                 self._update_status(HS3Status.CONNECTED)
@@ -496,13 +689,20 @@ class HS3Hardware(QObject):
             if self.serial_connection and self.serial_connection.is_open:
                 response = self._send_command("STATUS?\n")
                 
-                # TODO: Parsear resposta real do HS3
-                # Por agora, retornar estado básico
+                # Só GENERATING/IDLE são conhecidos; outras respostas mantêm o estado em cache
+                reply = response.upper()
+                if "GENERATING" in reply:
+                    self.last_state["generating"] = True
+                elif "IDLE" in reply:
+                    self.last_state["generating"] = False
+                
                 return {
                     "connected": True,
                     "status": self.status.value,
                     "generating": self.status == HS3Status.GENERATING,
-                    "device_info": self.device_info
+                    "device_info": self.device_info,
+                    "reply": response,
+                    **self.last_state
                 }
             
             # Se conexão é via USB direto, retornar status simulado
@@ -573,14 +773,18 @@ class HS3Hardware(QObject):
         if not self.serial_connection or not self.serial_connection.is_open:
             raise Exception("Conexão serial não disponível")
         
-        # Enviar comando
-        self.serial_connection.write(command.encode('utf-8'))
-        
-        # Aguardar resposta
-        time.sleep(0.1)
-        response = self.serial_connection.read_all().decode('utf-8', errors='ignore')
+        with self._serial_lock:
+            # Enviar comando
+            self.serial_connection.write(command.encode('utf-8'))
+            
+            # Aguardar resposta
+            time.sleep(0.1)
+            response = self.serial_connection.read_all().decode('utf-8', errors='ignore').strip()
+            # Só uma resposta real conta como sinal de vida (silêncio/timeout não)
+            if response:
+                self.last_reply_at = time.monotonic()
         
-        return response.strip()
+        return response
     
     def _verify_communication(self) -> bool:
         """Verifica comunicação básica"""
@@ -10,6 +10,7 @@ import json
 import math
 import os
 from iris_overlay_manager import IrisOverlayManager
+from iris_piramide import ItemPiramideIris, item_pre_visualizacao, obter_cache_piramides
 from biodesk_dialogs import BiodeskMessageBox
 
 # 🎨 SISTEMA DE ESTILOS CENTRALIZADO
@@ -555,6 +556,8 @@ class IrisCanvas(QWidget):
     zonaClicada = pyqtSignal(str)  # Emite o nome da zona clicada
     calibracao_mudou = pyqtSignal(bool)  # Emite quando calibração é ativada/desativada
     ajuste_fino_mudou = pyqtSignal(bool)  # Emite quando ajuste fino é ativado/desativado
+    # Interno: pirâmide gerada na thread de trabalho (pedido, PiramideIris ou None)
+    _piramide_pronta = pyqtSignal(int, object)
     
     def redesenhar_zonas(self):
         # Apagar zonas antigas
@@ -634,6 +637,11 @@ class IrisCanvas(QWidget):
         
         self.init_ui()
         self.imagem_pixmap = None
+        self.piramide = None  # pirâmide de mosaicos da imagem atual (iris_piramide)
+        self.rect_imagem = None  # retângulo da imagem original (coordenadas da cena)
+        self._item_imagem = None
+        self._pedido_imagem = 0  # descarta pirâmides de imagens que já foram trocadas
+        self._piramide_pronta.connect(self._mostrar_piramide)
         # Instancia o overlay manager para gerir zonas, morphing, etc
         self.overlay_manager = IrisOverlayManager(self.scene)
         # ✅ Definir referência ao IrisCanvas no overlay manager
@@ -1056,21 +1064,31 @@ class IrisCanvas(QWidget):
         self.raio_pupila = None
         self.raio_anel = None
 
-        # Carrega a nova imagem
-        self.imagem_pixmap = QPixmap(caminho_imagem)
-        if self.imagem_pixmap.isNull():
-            print(f"❌ Erro ao carregar imagem: {caminho_imagem}")
-            return
+        # Carrega a nova imagem como pirâmide de mosaicos (gerada uma vez e guardada em
+        # disco). Na primeira abertura a pirâmide é gerada em fundo e mostra-se já
+        # uma pré-visualização reduzida com as mesmas coordenadas
+        self._pedido_imagem += 1
+        cache = obter_cache_piramides()
+        self.piramide = cache.procurar(caminho_imagem)
+        if self.piramide is not None:
+            item = ItemPiramideIris(self.piramide)
+            self.rect_imagem = self.piramide.rect()
+        else:
+            pre_visualizacao = item_pre_visualizacao(caminho_imagem)
+            if pre_visualizacao is None:
+                print(f"❌ Erro ao carregar imagem: {caminho_imagem}")
+                return
+            item, self.rect_imagem = pre_visualizacao
+            pedido = self._pedido_imagem
+            cache.obter_em_fundo(caminho_imagem, lambda piramide: self._piramide_pronta.emit(pedido, piramide))
 
-        # 3. Adicionar diretamente o pixmap (imagem original) ao QGraphicsScene
-        item = self.scene.addPixmap(self.imagem_pixmap)
-        
-        # Define Z-Value para imagem ficar abaixo das zonas (se não for None)
-        if item is not None:
-            item.setZValue(0)  # Imagem fica na camada mais baixa
+        # 3. Adicionar a imagem ao QGraphicsScene; só os mosaicos visíveis são pintados
+        self.scene.addItem(item)
+        item.setZValue(0)  # Imagem fica na camada mais baixa
+        self._item_imagem = item
         
         # 4. CORREÇÃO: Configurar a scene com o tamanho correto da imagem
-        image_rect = self.imagem_pixmap.rect()
+        image_rect = self.rect_imagem
         # CORREÇÃO: Converter QRect para QRectF para compatibilidade
         scene_rect = QRectF(image_rect)
         self.scene.setSceneRect(scene_rect)
@@ -1201,7 +1219,7 @@ class IrisCanvas(QWidget):
                     print(f"   Raio íris: {self.raio_anel}")
                 else:
                     # Fallback se não houver calibração inicial
-                    img_rect = self.imagem_pixmap.rect()
+                    img_rect = self.rect_imagem
                     w, h = img_rect.width(), img_rect.height()
                     if w == 0 or h == 0:
                         w, h = 800, 600
@@ -1304,9 +1322,25 @@ class IrisCanvas(QWidget):
         if caminho_imagem and tipo:
             self.carregar_imagem_e_zonas(caminho_imagem, tipo)
         else:
+            self._pedido_imagem += 1
+            self._item_imagem = None
             self.scene.clear()
             self.set_side_label(None)
 
+    def _mostrar_piramide(self, pedido, piramide):
+        """Troca a pré-visualização pela pirâmide gerada em fundo (thread da interface)"""
+        if pedido != self._pedido_imagem or self._item_imagem is None:
+            return  # a imagem foi trocada entretanto
+        if piramide is None:
+            print("⚠️ Pirâmide não gerada - mantida a pré-visualização")
+            return
+        self.piramide = piramide
+        item = ItemPiramideIris(piramide)
+        item.setZValue(self._item_imagem.zValue())
+        self.scene.removeItem(self._item_imagem)
+        self.scene.addItem(item)
+        self._item_imagem = item
+
     def closeEvent(self, event):
         """Limpa os arquivos temporários ao fechar a janela"""
         if hasattr(self, 'temp_files'):
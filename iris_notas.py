@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Classificação de notas iridológicas em condições terapêuticas
+- Palavras-chave e setores anatómicos compilados uma única vez numa
+  expressão regular em forma de árvore (trie), sem acentos
+- Cada nota é percorrida uma vez, independentemente do tamanho do
+  vocabulário; mantém a semântica de substring do mapeamento original
+  (ex: 'renal' também é encontrado dentro de 'supra-renal')
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set
+
+# Mapeamento de palavras-chave (no texto ou no setor da nota) para condições
+PALAVRAS_CONDICOES: Dict[str, str] = {
+    # Sistema nervoso
+    'stress': 'sistema_nervoso',
+    'tensão': 'sistema_nervoso',
+    'ansiedade': 'ansiedade',
+    'nervoso': 'sistema_nervoso',
+    'irritabilidade': 'ansiedade',
+    'fadiga': 'fadiga',
+    'cansaço': 'fadiga',
+    'depressão': 'depressao',
+    'insónia': 'insonia',
+    'sono': 'insonia',
+
+    # Sistema digestivo
+    'digestão': 'digestao',
+    'intestino': 'intestinos',
+    'estômago': 'digestao',
+    'fígado': 'figado',
+    'vesícula': 'figado',
+    'pâncreas': 'pancreas',
+    'diabetes': 'pancreas',
+
+    # Sistema circulatório
+    'circulação': 'circulacao',
+    'coração': 'coracao',
+    'pressão': 'pressao_arterial',
+    'vascular': 'circulacao',
+
+    # Sistema respiratório
+    'pulmão': 'pulmoes',
+    'respiração': 'respiracao',
+    'asma': 'pulmoes',
+    'bronquite': 'pulmoes',
+
+    # Sistema reprodutor
+    'reprodutor': 'reprodutor',
+    'hormonal': 'hormonios',
+    'hormônio': 'hormonios',
+    'menstrual': 'hormonios',
+    'próstata': 'reprodutor',
+
+    # Sistema músculo-esquelético
+    'músculo': 'musculos',
+    'articulação': 'articulacoes',
+    'osso': 'ossos',
+    'artrite': 'articulacoes',
+    'reumatismo': 'articulacoes',
+
+    # Sistema imunitário
+    'imunidade': 'imunidade',
+    'defesa': 'imunidade',
+    'linfático': 'linfatico',
+    'alergia': 'imunidade',
+
+    # Órgãos específicos
+    'tiróide': 'tiroide',
+    'tiróidea': 'tiroide',
+    'rim': 'rins',
+    'renal': 'rins',
+    'bexiga': 'bexiga',
+    'supra-renal': 'supra_renais',
+    'adrenal': 'supra_renais',
+
+    # Condições gerais
+    'inflamação': 'inflamacao',
+    'dor': 'dor',
+    'energia': 'energia',
+    'vitalidade': 'vitalidade',
+    'equilíbrio': 'equilibrio',
+    'detox': 'detox',
+    'purificação': 'purificacao'
+}
+
+# Setores anatómicos da íris (procurados só no setor da nota)
+SETORES_CONDICOES: Dict[str, List[str]] = {
+    # Setores digestivos
+    'estômago': ['digestao'],
+    'duodeno': ['digestao'],
+    'intestino delgado': ['intestinos'],
+    'cólon': ['intestinos'],
+    'fígado': ['figado'],
+    'vesícula': ['figado'],
+    'pâncreas': ['pancreas'],
+
+    # Setores endócrinos
+    'hipófise': ['hormonios'],
+    'tiróide': ['tiroide'],
+    'paratiróide': ['tiroide'],
+    'supra-renais': ['supra_renais'],
+    'ovários': ['reprodutor', 'hormonios'],
+    'testículos': ['reprodutor', 'hormonios'],
+
+    # Setores circulatórios
+    'coração': ['coracao'],
+    'aorta': ['circulacao'],
+    'veia cava': ['circulacao'],
+
+    # Setores respiratórios
+    'pulmão': ['pulmoes'],
+    'brônquios': ['pulmoes'],
+    'traqueia': ['respiracao'],
+
+    # Setores urinários
+    'rim': ['rins'],
+    'ureter': ['rins'],
+    'bexiga': ['bexiga'],
+
+    # Sistema nervoso
+    'cérebro': ['sistema_nervoso'],
+    'cerebelo': ['sistema_nervoso'],
+    'medula': ['sistema_nervoso'],
+
+    # Membros
+    'braço': ['musculos', 'articulacoes'],
+    'perna': ['musculos', 'articulacoes'],
+    'coluna': ['ossos', 'musculos']
+}
+
+# Separa texto e setor da nota numa só cadeia; nenhum termo o contém
+SEPARADOR = '\x00'
+
+
+def _tabela_sem_acentos() -> dict:
+    """Letras latinas acentuadas -> letra base; marcas combinantes soltas removidas"""
+    tabela = dict.fromkeys(range(0x0300, 0x0370))
+    for codigo in list(range(0x00C0, 0x0250)) + list(range(0x1E00, 0x1F00)):
+        base = ''.join(c for c in unicodedata.normalize('NFKD', chr(codigo))
+                       if not unicodedata.combining(c))
+        if base and base != chr(codigo):
+            tabela[codigo] = base
+    return str.maketrans(tabela)
+
+
+_SEM_ACENTOS = _tabela_sem_acentos()
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas e sem acentos: 'Tiróide' e 'tiroide' ficam iguais"""
+    return texto.lower().translate(_SEM_ACENTOS)
+
+
+class Vocabulario:
+    """
+    Conjunto de termos compilado numa única expressão regular
+
+    A expressão tem a forma da trie dos termos: cada correspondência é o termo
+    mais longo que começa nessa posição, e a procura seguinte recomeça no
+    carácter seguinte, por isso as sobreposições também são encontradas. Os
+    termos contidos em cada termo (prefixos e substrings, ex: 'rim' em
+    'primeiro') são pré-calculados, o que dá exatamente o resultado de testar
+    'termo in texto' para cada termo.
+    """
+
+    def __init__(self, termos: Iterable[str]):
+        self.termos = list(termos)
+        self._indices: Dict[str, List[int]] = {}
+        for indice, termo in enumerate(self.termos):
+            normalizado = normalizar(termo)
+            if normalizado:
+                self._indices.setdefault(normalizado, []).append(indice)
+
+        self._trie: dict = {}
+        for normalizado in self._indices:
+            no = self._trie
+            for caractere in normalizado:
+                no = no.setdefault(caractere, {})
+            no[''] = normalizado
+
+        self._regex = re.compile(self._compilar(self._trie) if self._trie else '(?!)')
+        self._contidos = {normalizado: frozenset(self._contidos_em(normalizado))
+                          for normalizado in self._indices}
+
+    @classmethod
+    def _compilar(cls, no: dict) -> str:
+        ramos = [re.escape(caractere) + cls._compilar(filho)
+                 for caractere, filho in no.items() if caractere]
+        if not ramos:
+            return ''
+        corpo = ramos[0] if len(ramos) == 1 else '(?:' + '|'.join(ramos) + ')'
+        # Num termo que é prefixo de outro o ramo é opcional (guloso: o mais longo primeiro)
+        return f'(?:{corpo})?' if '' in no else corpo
+
+    def _contidos_em(self, normalizado: str) -> Set[int]:
+        """Índices de todos os termos que são substring de normalizado"""
+        indices = set()
+        for inicio in range(len(normalizado)):
+            no = self._trie
+            for caractere in normalizado[inicio:]:
+                no = no.get(caractere)
+                if no is None:
+                    break
+                if '' in no:
+                    indices.update(self._indices[no['']])
+        return indices
+
+    def procurar(self, texto_normalizado: str) -> Set[int]:
+        """Índices dos termos presentes no texto (já normalizado)"""
+        encontrados = set()
+        procurar = self._regex.search
+        correspondencia = procurar(texto_normalizado)
+        while correspondencia:
+            encontrados |= self._contidos[correspondencia.group()]
+            correspondencia = procurar(texto_normalizado, correspondencia.start() + 1)
+        return encontrados
+
+
+class ClassificadorNotasIris:
+    """
+    Converte notas iridológicas ({'texto', 'setor'}) em condições terapêuticas
+
+    As condições saem pela mesma ordem do mapeamento original: primeiro as
+    palavras-chave, depois os setores, nota a nota e sem repetições.
+    """
+
+    def __init__(self, palavras: Optional[Dict[str, str]] = None,
+                 setores: Optional[Dict[str, List[str]]] = None):
+        palavras = PALAVRAS_CONDICOES if palavras is None else palavras
+        setores = SETORES_CONDICOES if setores is None else setores
+        self._palavras = Vocabulario(palavras)
+        self._condicoes_palavras = list(palavras.values())
+        self._setores = Vocabulario(setores)
+        self._condicoes_setores = list(setores.values())
+
+    def condicoes_setor(self, setor: str) -> List[str]:
+        """Condições associadas ao setor anatómico (pode repetir condições)"""
+        condicoes = []
+        for indice in sorted(self._setores.procurar(normalizar(setor))):
+            condicoes.extend(self._condicoes_setores[indice])
+        return condicoes
+
+    def condicoes_nota(self, texto: str, setor: str) -> List[str]:
+        """Condições de uma nota, sem repetições"""
+        # Texto e setor normalizados de uma vez; o separador impede correspondências entre os dois
+        normalizado = normalizar(f"{texto}{SEPARADOR}{setor}")
+        setor_normalizado = normalizado[normalizado.rindex(SEPARADOR) + 1:]
+        indices = self._palavras.procurar(normalizado)
+        condicoes = [self._condicoes_palavras[indice] for indice in sorted(indices)]
+        for indice in sorted(self._setores.procurar(setor_normalizado)):
+            condicoes.extend(self._condicoes_setores[indice])
+        return list(dict.fromkeys(condicoes))
+
+    def classificar(self, notas: Iterable[Dict]) -> List[str]:
+        """Condições de todas as notas, pela ordem em que aparecem"""
+        condicoes = {}
+        for nota in notas:
+            for condicao in self.condicoes_nota(nota.get('texto', ''), nota.get('setor', '')):
+                condicoes.setdefault(condicao, None)
+        return list(condicoes)
+
+
+_classificador: Optional[ClassificadorNotasIris] = None
+
+
+def obter_classificador() -> ClassificadorNotasIris:
+    """Classificador com o mapeamento padrão, compilado uma vez por processo"""
+    global _classificador
+    if _classificador is None:
+        _classificador = ClassificadorNotasIris()
+    return _classificador
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pirâmide de resolução para imagens de íris
+- Gerada uma vez por imagem e guardada em disco: mosaicos de 512 px, cada
+  nível com metade da resolução do anterior. O nível 0 (zoom total) é PNG,
+  sem perdas, para mostrar os pixels originais da imagem de diagnóstico; só
+  os níveis reduzidos são JPEG
+- A cache fica na pasta de dados da aplicação (privada) e as pirâmides não
+  usadas há mais de idade_maxima_s são apagadas
+- A primeira geração corre numa thread de trabalho; entretanto a interface
+  mostra uma pré-visualização reduzida (item_pre_visualizacao)
+- ItemPiramideIris pinta apenas os mosaicos visíveis, do nível adequado ao
+  zoom atual; a cena mantém as coordenadas da imagem original, por isso as
+  zonas e a calibração não mudam
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from PyQt6.QtCore import Qt, QRect, QRectF, QSize
+from PyQt6.QtGui import QImageReader, QPainter, QPixmap
+from PyQt6.QtWidgets import QGraphicsItem, QGraphicsPixmapItem, QStyleOptionGraphicsItem
+
+from app_paths import pasta_cache
+
+TAMANHO_MOSAICO = 512
+QUALIDADE_JPEG = 92          # só para os níveis reduzidos
+FICHEIRO_META = 'piramide.json'
+VERSAO_PIRAMIDE = 2          # 2: nível 0 em PNG (as anteriores eram todas JPEG)
+IDADE_MAXIMA_CACHE_S = 30 * 86400
+IDADE_MAXIMA_TEMPORARIA_S = 3600  # gerações interrompidas (.gerar_*)
+LADO_PRE_VISUALIZACAO = 1024
+
+
+class PiramideIris:
+    """Metadados de uma pirâmide já gerada em disco"""
+
+    def __init__(self, pasta: str, largura: int, altura: int, niveis: int,
+                 tamanho_mosaico: int = TAMANHO_MOSAICO):
+        self.pasta = pasta
+        self.largura = largura
+        self.altura = altura
+        self.niveis = niveis
+        self.tamanho_mosaico = tamanho_mosaico
+
+    @classmethod
+    def abrir(cls, pasta: str) -> Optional['PiramideIris']:
+        """Lê piramide.json; None se a pirâmide não existir ou estiver incompleta"""
+        try:
+            with open(os.path.join(pasta, FICHEIRO_META), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('versao', 1) < VERSAO_PIRAMIDE:
+                return None  # nível 0 com perdas: gerar de novo
+            return cls(pasta, meta['largura'], meta['altura'], meta['niveis'], meta['tamanho_mosaico'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def rect(self) -> QRect:
+        """Retângulo da imagem original (nível 0)"""
+        return QRect(0, 0, self.largura, self.altura)
+
+    def caminho_mosaico(self, nivel: int, coluna: int, linha: int) -> str:
+        return os.path.join(self.pasta, str(nivel), f"{coluna}_{linha}.{extensao_nivel(nivel)}")
+
+    def nivel_para_escala(self, escala: float) -> int:
+        """Nível mais pequeno com resolução igual ou superior à do ecrã"""
+        if escala >= 1.0 or escala <= 0:
+            return 0
+        return min(self.niveis - 1, int(math.floor(math.log2(1.0 / escala))))
+
+
+def extensao_nivel(nivel: int) -> str:
+    """Nível 0 sem perdas (PNG); níveis reduzidos em JPEG"""
+    return 'png' if nivel == 0 else 'jpg'
+
+
+def gerar_piramide(caminho_imagem: str, pasta: str,
+                   tamanho_mosaico: int = TAMANHO_MOSAICO) -> Optional[PiramideIris]:
+    """
+    Descodifica a imagem uma vez e grava todos os níveis em mosaicos
+
+    piramide.json só é escrito no fim, por isso uma geração interrompida
+    nunca é confundida com uma pirâmide completa.
+    """
+    imagem = QImageReader(caminho_imagem).read()
+    if imagem.isNull():
+        return None
+    largura, altura = imagem.width(), imagem.height()
+
+    nivel = 0
+    while True:
+        os.makedirs(os.path.join(pasta, str(nivel)), exist_ok=True)
+        for linha in range(math.ceil(imagem.height() / tamanho_mosaico)):
+            for coluna in range(math.ceil(imagem.width() / tamanho_mosaico)):
+                x, y = coluna * tamanho_mosaico, linha * tamanho_mosaico
+                # Os mosaicos da borda direita/inferior ficam recortados à imagem
+                mosaico = imagem.copy(x, y, min(tamanho_mosaico, imagem.width() - x),
+                                      min(tamanho_mosaico, imagem.height() - y))
+                destino = os.path.join(pasta, str(nivel), f"{coluna}_{linha}.{extensao_nivel(nivel)}")
+                guardado = (mosaico.save(destino, 'PNG') if nivel == 0
+                            else mosaico.save(destino, 'JPG', QUALIDADE_JPEG))
+                if not guardado:
+                    return None
+        if max(imagem.width(), imagem.height()) <= tamanho_mosaico:
+            break
+        imagem = imagem.scaled(max(1, imagem.width() // 2), max(1, imagem.height() // 2),
+                               Qt.AspectRatioMode.IgnoreAspectRatio,
+                               Qt.TransformationMode.SmoothTransformation)
+        nivel += 1
+
+    with open(os.path.join(pasta, FICHEIRO_META), 'w', encoding='utf-8') as f:
+        json.dump({'versao': VERSAO_PIRAMIDE, 'largura': largura, 'altura': altura,
+                   'niveis': nivel + 1, 'tamanho_mosaico': tamanho_mosaico}, f)
+    return PiramideIris(pasta, largura, altura, nivel + 1, tamanho_mosaico)
+
+
+class CachePiramides:
+    """
+    Cache em disco das pirâmides de imagens de íris
+
+    A chave inclui caminho, tamanho e data de modificação, por isso uma imagem
+    alterada volta a ser processada. Quando o total excede limite_bytes são
+    removidas as pirâmides usadas há mais tempo; pirâmides não usadas há mais
+    de idade_maxima_s são apagadas ao abrir a cache e depois de cada geração.
+    """
+
+    def __init__(self, pasta: Optional[str] = None, limite_bytes: int = 2 * 1024 ** 3,
+                 idade_maxima_s: float = IDADE_MAXIMA_CACHE_S):
+        self.pasta = pasta or pasta_cache('iris_piramides')
+        self.limite_bytes = limite_bytes
+        self.idade_maxima_s = idade_maxima_s
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.geracoes = 0  # estatística: pirâmides geradas (falhas de cache)
+        os.makedirs(self.pasta, mode=0o700, exist_ok=True)
+        self.expirar()
+
+    def _chave(self, caminho: str) -> str:
+        info = os.stat(caminho)
+        identificador = f"{os.path.abspath(caminho)}|{info.st_size}|{info.st_mtime_ns}"
+        return hashlib.sha256(identificador.encode('utf-8')).hexdigest()
+
+    def procurar(self, caminho_imagem: str) -> Optional[PiramideIris]:
+        """Pirâmide já gerada em disco (sem gerar); None se ainda não existir"""
+        if not caminho_imagem or not os.path.exists(caminho_imagem):
+            return None
+        destino = os.path.join(self.pasta, self._chave(caminho_imagem))
+        with self._lock:
+            piramide = PiramideIris.abrir(destino)
+            if piramide is not None:
+                os.utime(destino)
+            return piramide
+
+    def obter_em_fundo(self, caminho_imagem: str,
+                       callback: Callable[[Optional[PiramideIris]], None]) -> Future:
+        """
+        Gera a pirâmide numa thread de trabalho (só QImage, sem QPixmap)
+
+        callback(piramide ou None) é chamado nessa thread; a interface deve
+        passar o resultado por um sinal Qt.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="PiramideIris")
+        futuro = self._executor.submit(self.obter, caminho_imagem)
+
+        def entregar(f: Future):
+            try:
+                piramide = f.result()
+            except Exception as e:
+                print(f"❌ Erro ao gerar pirâmide de {caminho_imagem}: {e}")
+                piramide = None
+            callback(piramide)
+
+        futuro.add_done_callback(entregar)
+        return futuro
+
+    def obter(self, caminho_imagem: str) -> Optional[PiramideIris]:
+        """Devolve a pirâmide da imagem, gerando-a se necessário; None se a imagem for ilegível"""
+        if not caminho_imagem or not os.path.exists(caminho_imagem):
+            return None
+        destino = os.path.join(self.pasta, self._chave(caminho_imagem))
+
+        with self._lock:
+            piramide = PiramideIris.abrir(destino)
+            if piramide is not None:
+                os.utime(destino)  # marcar como usada recentemente
+                return piramide
+
+            temporaria = tempfile.mkdtemp(dir=self.pasta, prefix='.gerar_')
+            try:
+                piramide = gerar_piramide(caminho_imagem, temporaria)
+                if piramide is None:
+                    return None
+                shutil.rmtree(destino, ignore_errors=True)
+                os.replace(temporaria, destino)
+            finally:
+                shutil.rmtree(temporaria, ignore_errors=True)
+            self.geracoes += 1
+            self._limpar()
+            return PiramideIris.abrir(destino)
+
+    def expirar(self, agora: Optional[float] = None) -> int:
+        """Apaga pirâmides não usadas há mais de idade_maxima_s e gerações interrompidas"""
+        agora = time.time() if agora is None else agora
+        removidas = 0
+        for nome in os.listdir(self.pasta):
+            caminho = os.path.join(self.pasta, nome)
+            if not os.path.isdir(caminho):
+                continue
+            limite = IDADE_MAXIMA_TEMPORARIA_S if nome.startswith('.gerar_') else self.idade_maxima_s
+            try:
+                if agora - os.path.getmtime(caminho) > limite:
+                    shutil.rmtree(caminho, ignore_errors=True)
+                    removidas += 1
+            except OSError:
+                pass
+        return removidas
+
+    def _limpar(self):
+        """Remove as pirâmides expiradas e as menos usadas até caber no limite"""
+        self.expirar()
+        entradas = []
+        total = 0
+        for nome in os.listdir(self.pasta):
+            caminho = os.path.join(self.pasta, nome)
+            if nome.startswith('.') or not os.path.isdir(caminho):
+                continue
+            tamanho = sum(os.path.getsize(os.path.join(raiz, f))
+                          for raiz, _, ficheiros in os.walk(caminho) for f in ficheiros)
+            entradas.append((os.path.getmtime(caminho), tamanho, caminho))
+            total += tamanho
+
+        for _, tamanho, caminho in sorted(entradas):
+            if total <= self.limite_bytes:
+                break
+            shutil.rmtree(caminho, ignore_errors=True)
+            total -= tamanho
+
+
+class ItemPiramideIris(QGraphicsItem):
+    """
+    Imagem de íris pintada a partir dos mosaicos da pirâmide
+
+    Ocupa o retângulo da imagem original; em cada paint escolhe o nível pela
+    escala atual e desenha só os mosaicos que intersetam a área exposta. Os
+    mosaicos descodificados ficam numa cache LRU limitada a max_mosaicos.
+    """
+
+    def __init__(self, piramide: PiramideIris, max_mosaicos: int = 64, parent=None):
+        super().__init__(parent)
+        self.piramide = piramide
+        self.max_mosaicos = max_mosaicos
+        self.mosaicos_lidos = 0  # estatística: mosaicos descodificados do disco
+        self._mosaicos = OrderedDict()
+        self._rect = QRectF(piramide.rect())
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption, True)
+
+    def boundingRect(self) -> QRectF:
+        return self._rect
+
+    def _mosaico(self, nivel: int, coluna: int, linha: int) -> Optional[QPixmap]:
+        chave = (nivel, coluna, linha)
+        pixmap = self._mosaicos.get(chave)
+        if pixmap is not None:
+            self._mosaicos.move_to_end(chave)
+            return pixmap
+
+        pixmap = QPixmap(self.piramide.caminho_mosaico(nivel, coluna, linha))
+        if pixmap.isNull():
+            return None
+        self.mosaicos_lidos += 1
+        self._mosaicos[chave] = pixmap
+        while len(self._mosaicos) > self.max_mosaicos:
+            self._mosaicos.popitem(last=False)
+        return pixmap
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget=None):
+        escala = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        nivel = self.piramide.nivel_para_escala(escala)
+        lado = self.piramide.tamanho_mosaico * (2 ** nivel)  # lado do mosaico em pixels originais
+
+        visivel = option.exposedRect.intersected(self._rect)
+        if visivel.isEmpty():
+            return
+
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
+        for linha in range(int(visivel.top() // lado), math.ceil(visivel.bottom() / lado)):
+            for coluna in range(int(visivel.left() // lado), math.ceil(visivel.right() / lado)):
+                pixmap = self._mosaico(nivel, coluna, linha)
+                if pixmap is None:
+                    continue
+                x, y = coluna * lado, linha * lado
+                destino = QRectF(x, y, min(lado, self.piramide.largura - x),
+                                 min(lado, self.piramide.altura - y))
+                painter.drawPixmap(destino, pixmap, QRectF(pixmap.rect()))
+
+
+def item_pre_visualizacao(caminho_imagem: str,
+                          lado_maximo: int = LADO_PRE_VISUALIZACAO) -> Optional[Tuple[QGraphicsPixmapItem, QRect]]:
+    """
+    Imagem reduzida (descodificada já no tamanho final) escalada para o
+    retângulo da imagem original, para mostrar enquanto a pirâmide é gerada
+
+    Returns:
+        (item, retângulo original) ou None se a imagem for ilegível
+    """
+    leitor = QImageReader(caminho_imagem)
+    tamanho = leitor.size()
+    if not tamanho.isValid() or tamanho.isEmpty():
+        return None
+    fator = min(1.0, lado_maximo / max(tamanho.width(), tamanho.height()))
+    leitor.setScaledSize(QSize(max(1, round(tamanho.width() * fator)),
+                               max(1, round(tamanho.height() * fator))))
+    imagem = leitor.read()
+    if imagem.isNull():
+        return None
+    item = QGraphicsPixmapItem(QPixmap.fromImage(imagem))
+    item.setTransformationMode(Qt.TransformationMode.SmoothTransformation)
+    item.setScale(tamanho.width() / imagem.width())
+    return item, QRect(0, 0, tamanho.width(), tamanho.height())
+
+
+_cache_piramides: Optional[CachePiramides] = None
+
+
+def obter_cache_piramides() -> CachePiramides:
+    """Cache de pirâmides partilhada pela aplicação"""
+    global _cache_piramides
+    if _cache_piramides is None:
+        _cache_piramides = CachePiramides()
+    return _cache_piramides
@@ -0,0 +1,210 @@
+"""
+⏱️ Importações diferidas para o arranque do Biodesk
+═══════════════════════════════════════════════════════════════════════
+
+- FabricaDiferida: ecrãs pesados (ficha, íris, terapia, emails) só são
+  importados quando abertos pela primeira vez
+- PerfilImportacoes: tempo de importação por módulo (próprio e acumulado)
+
+Variáveis de ambiente:
+    BIODESK_ARRANQUE_IMEDIATO=1   importa todos os ecrãs no arranque (modo antigo)
+    BIODESK_PERFIL_IMPORTS=1      mostra o tempo de importação por módulo
+"""
+
+import importlib
+import os
+import sys
+import time
+import traceback
+from importlib.abc import MetaPathFinder
+
+
+def arranque_imediato() -> bool:
+    return os.environ.get('BIODESK_ARRANQUE_IMEDIATO', '') not in ('', '0')
+
+
+def perfil_pedido() -> bool:
+    return os.environ.get('BIODESK_PERFIL_IMPORTS', '') not in ('', '0')
+
+
+class FabricaDiferida:
+    """
+    Substituto de uma classe/função que só importa o módulo quando é usada
+
+    Chamar a fábrica cria a instância; atributos (ex: métodos estáticos) são
+    procurados no objeto real. Se a importação falhar o erro é mostrado uma
+    vez e a fábrica fica indisponível, como acontecia com os imports antigos
+    protegidos por try/except.
+    """
+
+    _PENDENTE = object()
+
+    def __init__(self, modulo: str, atributo: str):
+        self.modulo = modulo
+        self.atributo = atributo
+        self.erro = None
+        self._objeto = self._PENDENTE
+
+    def carregar(self):
+        """Importa o módulo (apenas na primeira chamada) e devolve o objeto ou None"""
+        if self._objeto is self._PENDENTE:
+            try:
+                self._objeto = getattr(importlib.import_module(self.modulo), self.atributo)
+            except Exception as e:
+                traceback.print_exc()
+                self.erro = e
+                self._objeto = None
+        return self._objeto
+
+    @property
+    def carregada(self) -> bool:
+        return self._objeto is not self._PENDENTE
+
+    @property
+    def disponivel(self) -> bool:
+        return self.carregar() is not None
+
+    def __call__(self, *args, **kwargs):
+        objeto = self.carregar()
+        if objeto is None:
+            raise ImportError(f"Não foi possível carregar {self.modulo}.{self.atributo}: {self.erro}")
+        return objeto(*args, **kwargs)
+
+    def __getattr__(self, nome):
+        objeto = self.carregar()
+        if objeto is None:
+            raise AttributeError(nome)
+        return getattr(objeto, nome)
+
+    def __repr__(self):
+        estado = 'carregada' if self.carregada else 'por carregar'
+        return f"<FabricaDiferida {self.modulo}.{self.atributo} ({estado})>"
+
+
+# Registo global das fábricas, usado pelo modo de arranque imediato
+FABRICAS = {}
+
+
+def registar(nome: str, modulo: str, atributo: str) -> FabricaDiferida:
+    """Regista e devolve uma fábrica diferida"""
+    fabrica = FabricaDiferida(modulo, atributo)
+    FABRICAS[nome] = fabrica
+    if arranque_imediato():
+        fabrica.carregar()
+    return fabrica
+
+
+def carregar_todas():
+    """Importa já todos os ecrãs registados (ex: pré-aquecimento em segundo plano)"""
+    for fabrica in FABRICAS.values():
+        fabrica.carregar()
+
+
+class _LoaderCronometrado:
+    """Envolve o loader original apenas durante create_module/exec_module"""
+
+    def __init__(self, loader, nome, perfil):
+        self._loader = loader
+        self._nome = nome
+        self._perfil = perfil
+        self._a_medir = False
+
+    def create_module(self, spec):
+        # Em extensões C (numpy, pandas) a biblioteca é carregada aqui e pode
+        # importar outros módulos, por isso a medição começa já
+        self._perfil._entrar()
+        self._a_medir = True
+        try:
+            return self._loader.create_module(spec)
+        except BaseException:
+            self._perfil._descartar()
+            self._a_medir = False
+            raise
+
+    def exec_module(self, module):
+        # O módulo fica a apontar para o loader original (importlib.resources, pickle, ...)
+        module.__loader__ = self._loader
+        if getattr(module, '__spec__', None) is not None:
+            module.__spec__.loader = self._loader
+
+        if not self._a_medir:
+            self._perfil._entrar()
+        self._a_medir = False
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._perfil._sair(self._nome)
+
+    def __getattr__(self, nome):
+        return getattr(self._loader, nome)
+
+
+class PerfilImportacoes(MetaPathFinder):
+    """
+    Mede o tempo de importação de cada módulo
+
+    - próprio: tempo a executar o corpo do módulo
+    - acumulado: inclui os módulos que ele importou pela primeira vez
+    """
+
+    def __init__(self):
+        self.registos = {}  # nome -> (próprio, acumulado) em segundos
+        self._pilha = []    # [instante_inicio, tempo_dos_filhos]
+        self._ativo = False
+
+    def iniciar(self):
+        if not self._ativo:
+            sys.meta_path.insert(0, self)
+            self._ativo = True
+
+    def parar(self):
+        if self._ativo:
+            sys.meta_path.remove(self)
+            self._ativo = False
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _LoaderCronometrado(spec.loader, fullname, self)
+                return spec
+        return None
+
+    def _entrar(self):
+        self._pilha.append([time.perf_counter(), 0.0])
+
+    def _descartar(self):
+        self._pilha.pop()
+
+    def _sair(self, nome):
+        inicio, filhos = self._pilha.pop()
+        acumulado = time.perf_counter() - inicio
+        self.registos[nome] = (acumulado - filhos, acumulado)
+        if self._pilha:
+            self._pilha[-1][1] += acumulado
+
+    def total(self) -> float:
+        """Tempo total de importação (soma dos tempos próprios)"""
+        return sum(proprio for proprio, _ in self.registos.values())
+
+    def relatorio(self, limite: int = 25) -> str:
+        linhas = [
+            f"⏱️ Importações: {len(self.registos)} módulos, {self.total() * 1000:.0f} ms",
+            f"{'módulo':50}{'próprio (ms)':>14}{'acumulado (ms)':>16}",
+        ]
+        ordenados = sorted(self.registos.items(), key=lambda item: item[1][1], reverse=True)
+        for nome, (proprio, acumulado) in ordenados[:limite]:
+            linhas.append(f"{nome[:50]:50}{proprio * 1000:>14.1f}{acumulado * 1000:>16.1f}")
+        return "\n".join(linhas)
+
+
+perfil_importacoes = PerfilImportacoes()
+
+
+def iniciar_perfil_se_pedido():
+    """Ativa o perfil de importações se BIODESK_PERFIL_IMPORTS estiver definido"""
+    if perfil_pedido():
+        perfil_importacoes.iniciar()
@@ -1,6 +1,10 @@
 import sys
 import os
-import traceback
+
+# ⏱️ Perfil de importações (BIODESK_PERFIL_IMPORTS=1) - ativar antes dos imports pesados
+from lazy_imports import registar, iniciar_perfil_se_pedido, perfil_pedido, perfil_importacoes
+iniciar_perfil_se_pedido()
+
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -16,7 +20,6 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QIcon, QPixmap, QGuiApplication, QColor
 from PyQt6.QtCore import Qt, QSize, QPoint, QTimer, QDateTime
-from ficha_paciente import FichaPaciente
 from biodesk_dialogs import BiodeskMessageBox
 
 # ✅ IMPORTAR NOVO SISTEMA DE ESTILOS
@@ -27,27 +30,17 @@ except ImportError as e:
     print(f"⚠️ BiodeskStyles não disponível: {e}")
     BiodeskStyles = None
 
-# Importar módulos de íris com tratamento de erro
-try:
-    from iris_canvas import IrisCanvas
-except Exception as e:
-    traceback.print_exc()
-    IrisCanvas = None
-
-try:
-    from iris_anonima_canvas import IrisAnonimaCanvas        
-except Exception as e:
-    traceback.print_exc()
-    IrisAnonimaCanvas = None
+# 🚀 Ecrãs pesados (pandas, numpy, QtWebEngine, reportlab) só são importados
+# quando abertos pela primeira vez; BIODESK_ARRANQUE_IMEDIATO=1 repõe o modo antigo
+FichaPaciente = registar('ficha_paciente', 'ficha_paciente', 'FichaPaciente')
+IrisCanvas = registar('iris', 'iris_canvas', 'IrisCanvas')
+IrisAnonimaCanvas = registar('iris_anonima', 'iris_anonima_canvas', 'IrisAnonimaCanvas')
+TerapiaQuanticaWindow = registar('terapia_quantica', 'terapia_quantica_window', 'TerapiaQuanticaWindow')
+TodoListWindow = registar('todo_list', 'todo_list_window', 'TodoListWindow')
 
-# 📧 Importar sistema de agendamento de emails
-try:
-    from email_scheduler import get_email_scheduler
-    from emails_agendados_manager import EmailsAgendadosWindow
-    email_scheduler_disponivel = True
-except ImportError as e:
-    print(f"⚠️ Sistema de agendamento de emails não disponível: {e}")
-    email_scheduler_disponivel = False
+# 📧 Sistema de agendamento de emails
+get_email_scheduler = registar('email_scheduler', 'email_scheduler', 'get_email_scheduler')
+EmailsAgendadosWindow = registar('emails_agendados', 'emails_agendados_manager', 'EmailsAgendadosWindow')
 
 
 class MainWindow(QMainWindow):
@@ -90,8 +83,13 @@ class MainWindow(QMainWindow):
             print("⚠️ BiodeskStyles não disponível - funcionalidade reduzida")
             pass
             
-        # 📧 Inicializar sistema de agendamento de emails
-        self.inicializar_sistema_emails()
+        # 📧 Inicializar sistema de agendamento de emails depois do primeiro desenho
+        self.email_scheduler = None
+        QTimer.singleShot(0, self.inicializar_sistema_emails)
+        QApplication.instance().aboutToQuit.connect(self.encerrar_sistema_emails)
+        
+        # 📋 Pré-carregar as fichas dos pacientes com follow-ups hoje (depois do arranque)
+        QTimer.singleShot(3000, self.pre_carregar_agenda_hoje)
     
     def showEvent(self, event):
         """Garantir que a janela fica sempre maximizada quando mostrada"""
@@ -505,7 +503,7 @@ class MainWindow(QMainWindow):
         """
         try:
             if modo_anonimo:
-                if IrisAnonimaCanvas is None:
+                if not IrisAnonimaCanvas.disponivel:
                     BiodeskMessageBox.critical(
                         self,
                         "Erro de Importação",
@@ -515,7 +513,7 @@ class MainWindow(QMainWindow):
                     return
                 self.iris_window = IrisAnonimaCanvas()
             else:
-                if IrisCanvas is None:
+                if not IrisCanvas.disponivel:
                     BiodeskMessageBox.critical(
                         self,
                         "Erro de Importação",
@@ -589,7 +587,6 @@ class MainWindow(QMainWindow):
         Abre o módulo de terapia quântica com dados de um paciente específico
         """
         try:
-            from terapia_quantica_window import TerapiaQuanticaWindow
             self.terapia_window = TerapiaQuanticaWindow(paciente_data=paciente_data)
             self.safe_maximize_window(self.terapia_window)
         except Exception as e:
@@ -603,7 +600,6 @@ class MainWindow(QMainWindow):
     def abrir_todo_list(self):
         """Abre a janela de lista de tarefas"""
         try:
-            from todo_list_window import TodoListWindow
             self.todo_window = TodoListWindow()
             self.safe_maximize_window(self.todo_window)
         except Exception as e:
@@ -613,10 +609,22 @@ class MainWindow(QMainWindow):
                 f"Erro ao abrir lista de tarefas:\n\n{str(e)}"
             )
     
+    def pre_carregar_agenda_hoje(self):
+        """Pré-carrega em fundo as fichas dos pacientes agendados para hoje"""
+        try:
+            from patient_prefetch import obter_prefetch
+            obter_prefetch().pedir_agenda_hoje()
+        except Exception as e:
+            print(f"⚠️ Pré-carregamento da agenda indisponível: {e}")
+    
     def inicializar_sistema_emails(self):
         """Inicializar sistema de agendamento de emails"""
         try:
-            if email_scheduler_disponivel:
+            # Sonda de conectividade em fundo: a interface só consulta o estado em cache
+            from connectivity_monitor import obter_monitor
+            obter_monitor()
+            
+            if get_email_scheduler.disponivel:
                 self.email_scheduler = get_email_scheduler()
                 self.email_scheduler.iniciar()
                 print("✅ Sistema de agendamento de emails iniciado")
@@ -627,10 +635,20 @@ class MainWindow(QMainWindow):
             print(f"❌ Erro ao inicializar sistema de emails: {e}")
             self.email_scheduler = None
     
+    def encerrar_sistema_emails(self):
+        """Ao sair: para o scheduler, termina o worker de envio e fecha as ligações SMTP"""
+        try:
+            if self.email_scheduler:
+                self.email_scheduler.parar()
+            from email_transport import fechar_transporte
+            fechar_transporte()
+        except Exception as e:
+            print(f"⚠️ Erro ao encerrar sistema de emails: {e}")
+    
     def abrir_gestao_emails_agendados(self):
         """Abrir janela de gestão de emails agendados"""
         try:
-            if not email_scheduler_disponivel:
+            if not EmailsAgendadosWindow.disponivel:
                 BiodeskMessageBox.warning(
                     self,
                     "Sistema Indisponível",
@@ -638,7 +656,6 @@ class MainWindow(QMainWindow):
                 )
                 return
             
-            from emails_agendados_manager import EmailsAgendadosWindow
             self.emails_window = EmailsAgendadosWindow(self)
             self.emails_window.show()
             
@@ -735,7 +752,6 @@ class MainWindow(QMainWindow):
                 loader = FrequencyLoader(frequency_file)
             
             # Abrir janela de terapia
-            from terapia_quantica_window import TerapiaQuanticaWindow
             self.terapia_window = TerapiaQuanticaWindow(paciente_data=None)
             self.safe_maximize_window(self.terapia_window)
             
@@ -983,6 +999,9 @@ class PatientsPanel(QDialog):
 
 
 if __name__ == '__main__':
+    # QtWebEngine (prescrições, PDF) é importado só quando necessário; para
+    # isso os contextos OpenGL têm de ser partilhados antes de criar a app
+    QApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
     window = MainWindow()
     
@@ -990,4 +1009,7 @@ if __name__ == '__main__':
     window.setWindowState(Qt.WindowState.WindowMaximized)
     window.show()
     
+    if perfil_pedido():
+        QTimer.singleShot(0, lambda: print(perfil_importacoes.relatorio()))
+    
     sys.exit(app.exec())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rampas de parâmetros do gerador sem bloquear quem as pede
+- A rampa é planeada de uma vez como uma lista de pontos (instante,
+  parâmetros) em que amplitude e offset variam em simultâneo
+- Uma thread aplica os pontos nos prazos absolutos (sem acumular atrasos
+  de cada escrita) e pode ser cancelada a qualquer momento
+- Sem dependências de Qt nem de hardware
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_STEPS = 20
+DEFAULT_DELAY_MS = 50.0
+
+# (segundos desde o início da rampa, {atributo: valor})
+RampPoint = Tuple[float, Dict[str, float]]
+
+
+def plan_ramp(start: Dict[str, float], target: Dict[str, float],
+              steps: int = DEFAULT_STEPS, delay_ms: float = DEFAULT_DELAY_MS) -> List[RampPoint]:
+    """
+    Pontos de uma rampa linear de `start` até `target`
+
+    Todos os atributos mudam em cada ponto. Como amplitude e |offset| são
+    convexos ao longo da reta, a tensão total nos pontos intermédios nunca
+    excede a dos extremos (ao contrário de rampas sequenciais, que passam
+    por combinações nova amplitude + offset antigo). O último ponto é
+    exatamente `target`.
+    """
+    steps = max(1, int(steps))
+    interval = max(0.0, delay_ms) / 1000.0
+    changing = {name: (start.get(name, value), value) for name, value in target.items()
+                if start.get(name) != value}
+    if not changing:
+        return []
+
+    points = []
+    previous = {name: a for name, (a, b) in changing.items()}
+    for i in range(1, steps + 1):
+        values = ({name: a + (b - a) * i / steps for name, (a, b) in changing.items()}
+                  if i < steps else {name: b for name, (a, b) in changing.items()})
+        # Dentro de cada ponto, primeiro os atributos cujo módulo desce: a
+        # tensão total não passa pela combinação transitória mais alta
+        order = sorted(values, key=lambda name: abs(values[name]) >= abs(previous[name]))
+        points.append(((i - 1) * interval, {name: values[name] for name in order}))
+        previous = values
+    return points
+
+
+class ParameterRamp:
+    """
+    Execução de uma rampa planeada numa thread de temporização
+
+    apply(atributo, valor) é chamado pela thread da rampa; quem a usa deve
+    serializar o acesso ao hardware (ex.: um lock partilhado). Erros numa
+    escrita intermédia levam diretamente ao valor final, como no soft_ramp
+    antigo.
+    """
+
+    def __init__(self, points: List[RampPoint], apply: Callable[[str, float], None],
+                 on_finished: Optional[Callable[['ParameterRamp'], None]] = None,
+                 name: str = "hs3-ramp"):
+        self.points = points
+        self.apply = apply
+        self.on_finished = on_finished
+        self.logger = logging.getLogger("ParameterRamp")
+        self.applied = 0          # pontos aplicados
+        self.cancelled = False
+        self.error: Optional[Exception] = None
+
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> 'ParameterRamp':
+        if self.points:
+            self._thread.start()
+        else:
+            self._finish()
+        return self
+
+    def cancel(self, wait: bool = True, timeout: Optional[float] = 1.0) -> None:
+        """Interrompe a rampa no ponto atual (os parâmetros ficam onde estão)"""
+        self._cancel.set()
+        if wait and self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera o fim da rampa; True se terminou (concluída, cancelada ou com erro)"""
+        return self._done.wait(timeout)
+
+    @property
+    def running(self) -> bool:
+        return not self._done.is_set()
+
+    @property
+    def final_values(self) -> Dict[str, float]:
+        return self.points[-1][1] if self.points else {}
+
+    def _run(self):
+        origin = time.monotonic()
+        try:
+            for offset_s, values in self.points:
+                # Prazo absoluto: o tempo de cada escrita não atrasa os pontos seguintes
+                delay = origin + offset_s - time.monotonic()
+                if delay > 0 and self._cancel.wait(delay):
+                    break
+                if self._cancel.is_set():
+                    break
+                for name, value in values.items():
+                    self.apply(name, value)
+                self.applied += 1
+        except Exception as e:
+            self.error = e
+            self.logger.warning(f"Erro na rampa, a aplicar valores finais: {e}")
+            try:
+                for name, value in self.final_values.items():
+                    self.apply(name, value)
+            except Exception as e2:
+                self.logger.error(f"Erro ao aplicar valores finais da rampa: {e2}")
+        finally:
+            self.cancelled = self._cancel.is_set() and self.applied < len(self.points)
+            self._finish()
+
+    def _finish(self):
+        self._done.set()
+        if self.on_finished is not None:
+            try:
+                self.on_finished(self)
+            except Exception as e:
+                self.logger.error(f"Erro no fim da rampa: {e}")
@@ -0,0 +1,331 @@
+"""
+Pré-carregamento das fichas de pacientes
+- Uma thread de fundo lê o que abrir uma ficha precisa: a linha do
+  paciente, as imagens de íris (com as miniaturas já reduzidas), a pasta e
+  a lista de documentos e o estado dos consentimentos
+- Os pedidos vêm dos vizinhos do resultado selecionado na pesquisa e dos
+  pacientes com follow-ups agendados para hoje; um pedido novo substitui
+  os que ainda não foram lidos
+- Os resultados ficam no DataCache e são consumidos uma vez, ao abrir a
+  ficha; escritas do paciente invalidam-nos (DataCache.invalidate_patient_data)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from data_cache import DataCache
+
+PASTA_DOCUMENTOS = Path("Documentos_Pacientes")
+TAMANHO_MINIATURA = (63, 43)  # miniaturas da galeria de íris
+RAIO_VIZINHOS = 2             # resultados acima e abaixo do selecionado
+
+# (caminho, stat, extensão) de cada documento, do mais recente para o mais antigo
+Documento = Tuple[Path, os.stat_result, str]
+
+
+# ═══════════════ LEITURAS (partilhadas com os widgets da ficha) ═══════════════
+
+def escolher_pasta_documentos(paciente_id, nome_bd=None, base: Path = PASTA_DOCUMENTOS,
+                              criar: bool = True) -> Optional[Path]:
+    """
+    Pasta de documentos do paciente: {id} ou {id}_{nome}
+
+    Havendo várias, prefere a que corresponde ao nome na BD (texto, ou uma
+    função chamada só nesse caso) e depois a que tem documentos mais
+    recentes. Com criar=False (pré-carregamento) não cria pastas e devolve
+    None se não houver nenhuma.
+    """
+    if not paciente_id:
+        return None
+    if criar:
+        base.mkdir(parents=True, exist_ok=True)
+
+    pasta_exacta = base / str(paciente_id)
+    candidatos = sorted(base.glob(f"{paciente_id}_*")) if base.exists() else []
+    todas_opcoes = ([pasta_exacta] if pasta_exacta.exists() else []) + candidatos
+    if not todas_opcoes:
+        if not criar:
+            return None
+        pasta_exacta.mkdir(parents=True, exist_ok=True)
+        return pasta_exacta
+    if len(todas_opcoes) == 1:
+        return todas_opcoes[0]
+
+    if callable(nome_bd):
+        nome_bd = nome_bd()
+    if nome_bd:
+        pasta_esperada = f"{paciente_id}_{nome_bd.replace(' ', '_')}"
+        for pasta in todas_opcoes:
+            if pasta.name == pasta_esperada:
+                return pasta
+
+    # Atividade recente + quantidade de documentos
+    melhor_pasta = None
+    melhor_score = -1
+    for pasta in todas_opcoes:
+        try:
+            arquivos = [f for f in pasta.rglob("*") if f.is_file() and not f.name.endswith('.meta')]
+            data_mais_recente = max((f.stat().st_mtime for f in arquivos), default=0)
+            score = (data_mais_recente / 1000000 if data_mais_recente > 0 else 0) + len(arquivos) * 0.1
+            if score > melhor_score:
+                melhor_score = score
+                melhor_pasta = pasta
+        except Exception as e:
+            print(f"⚠️ Erro ao analisar {pasta.name}: {e}")
+    return melhor_pasta or todas_opcoes[0]
+
+
+def listar_documentos(pasta: Path) -> List[Documento]:
+    """Ficheiros da pasta (recursivo), com um stat cada, do mais recente para o mais antigo"""
+    documentos = []
+    for arquivo in pasta.rglob("*"):
+        if arquivo.is_file():
+            documentos.append((arquivo, arquivo.stat(), arquivo.suffix.lower()))
+    documentos.sort(key=lambda d: d[1].st_mtime, reverse=True)
+    return documentos
+
+
+def mtime_pastas(pasta: Path) -> float:
+    """
+    Maior mtime da pasta e de todas as subpastas
+
+    Os documentos são gravados em subpastas (prescricoes, pdfs,
+    Consentimentos, ...): criar, apagar ou renomear um ficheiro só altera o
+    mtime da pasta onde ele está, não o da pasta do paciente.
+    """
+    maior = pasta.stat().st_mtime
+    for raiz, subpastas, _ in os.walk(pasta):
+        for nome in subpastas:
+            maior = max(maior, os.stat(os.path.join(raiz, nome)).st_mtime)
+    return maior
+
+
+def miniatura_iris(caminho: str, tamanho: Tuple[int, int] = TAMANHO_MINIATURA):
+    """
+    QImage reduzida de uma imagem de íris, descodificada já no tamanho final
+    (QImageReader.setScaledSize) em vez de carregar a imagem inteira e
+    reduzir depois. QImage pode ser criada fora da thread da interface.
+    """
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QImageReader
+
+    leitor = QImageReader(caminho)
+    leitor.setAutoTransform(True)
+    original = leitor.size()
+    if original.isValid():
+        leitor.setScaledSize(original.scaled(tamanho[0], tamanho[1], Qt.AspectRatioMode.KeepAspectRatio))
+    imagem = leitor.read()
+    return None if imagem.isNull() else imagem
+
+
+def ids_agenda_hoje(db_emails: str = "emails_agendados.db", agora: Optional[datetime] = None) -> List[int]:
+    """Pacientes com follow-ups agendados para hoje, pela hora de envio"""
+    if not os.path.exists(db_emails):
+        return []
+    agora = agora or datetime.now()
+    inicio = datetime(agora.year, agora.month, agora.day)
+    try:
+        conn = sqlite3.connect(f"file:{db_emails}?mode=ro", uri=True, timeout=5)
+        try:
+            linhas = conn.execute('''
+                SELECT paciente_id FROM emails_agendados
+                WHERE status = 'agendado' AND data_envio_ts >= ? AND data_envio_ts < ?
+                GROUP BY paciente_id ORDER BY MIN(data_envio_ts)
+            ''', (inicio.timestamp(), (inicio + timedelta(days=1)).timestamp())).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ Agenda de hoje indisponível: {e}")
+        return []
+    ids = []
+    for (paciente_id,) in linhas:
+        try:
+            ids.append(int(paciente_id))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def ordem_vizinhos(indice: int, total: int, raio: int = RAIO_VIZINHOS) -> List[int]:
+    """Índices a pré-carregar: o selecionado, depois os seguintes e anteriores alternados"""
+    ordem = [indice] if 0 <= indice < total else []
+    for d in range(1, raio + 1):
+        ordem.extend(i for i in (indice + d, indice - d) if 0 <= i < total)
+    return ordem
+
+
+# ═══════════════ PRÉ-CARREGAMENTO ═══════════════
+
+class PrefetchPacientes:
+    """Thread de fundo que aquece o DataCache com as fichas que devem ser abertas a seguir"""
+
+    def __init__(self, db_path: str = "pacientes.db", db_emails: str = "emails_agendados.db",
+                 base_documentos: Path = PASTA_DOCUMENTOS, cache: Optional[DataCache] = None,
+                 miniaturas: bool = True, status_consentimentos: Optional[Callable[[int], Dict]] = None):
+        self.db_path = db_path
+        self.db_emails = db_emails
+        self.base_documentos = Path(base_documentos)
+        self.cache = cache or DataCache.get_instance()
+        self.miniaturas = miniaturas
+        self._status_consentimentos = status_consentimentos
+
+        self._pendentes = deque()
+        self._condicao = threading.Condition()
+        self._parar = False
+        self._thread: Optional[threading.Thread] = None
+        self._a_carregar = False
+        self.carregados = 0
+        self.erros = 0
+
+    # ─────────────── pedidos ───────────────
+
+    def pedir(self, ids: Iterable) -> int:
+        """Substitui os pedidos pendentes por `ids` (por ordem de probabilidade); devolve quantos ficaram"""
+        novos = []
+        for paciente_id in ids:
+            if paciente_id and paciente_id not in novos and not self.cache.has_patient_prefetch(paciente_id, 'paciente'):
+                novos.append(paciente_id)
+        with self._condicao:
+            self._pendentes.clear()
+            self._pendentes.extend(novos)
+            if novos:
+                self._iniciar()
+                self._condicao.notify()
+        return len(novos)
+
+    def pedir_vizinhos(self, resultados: Sequence[Dict[str, Any]], indice: int,
+                       raio: int = RAIO_VIZINHOS) -> int:
+        """Pré-carrega o resultado selecionado da pesquisa e os vizinhos"""
+        return self.pedir(resultados[i].get('id') for i in ordem_vizinhos(indice, len(resultados), raio))
+
+    def pedir_agenda_hoje(self) -> int:
+        return self.pedir(ids_agenda_hoje(self.db_emails))
+
+    def pendentes(self) -> int:
+        with self._condicao:
+            return len(self._pendentes)
+
+    def esperar(self, timeout: Optional[float] = None) -> bool:
+        """Espera que os pedidos pendentes sejam lidos (usado no benchmark)"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._condicao:
+            while self._pendentes or self._a_carregar:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._condicao.wait(restante)
+        return True
+
+    def parar(self, timeout: float = 2.0):
+        with self._condicao:
+            self._parar = True
+            self._pendentes.clear()
+            self._condicao.notify_all()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+
+    # ─────────────── leitura ───────────────
+
+    def carregar(self, paciente_id, conn: Optional[sqlite3.Connection] = None) -> bool:
+        """Lê todas as partes da ficha de um paciente e guarda-as no DataCache"""
+        inicio = time.time()
+        fechar = conn is None
+        conn = conn or self._ligar()
+        try:
+            conn.row_factory = sqlite3.Row
+            linha = conn.execute("SELECT * FROM pacientes WHERE id = ?", (paciente_id,)).fetchone()
+            if linha is None:
+                return False
+            paciente = dict(linha)
+            imagens = [dict(r) for r in conn.execute(
+                "SELECT * FROM imagens_iris WHERE paciente_id = ?", (paciente_id,))]
+        finally:
+            if fechar:
+                conn.close()
+
+        iris = {'imagens': imagens, 'miniaturas': self._miniaturas(imagens)}
+        pasta = escolher_pasta_documentos(paciente_id, paciente.get('nome'), self.base_documentos, criar=False)
+        documentos = None
+        if pasta is not None and pasta.exists():
+            # mtime lido antes da lista: uma escrita a meio invalida o resultado
+            documentos = {'pasta': pasta, 'mtime': mtime_pastas(pasta), 'arquivos': listar_documentos(pasta)}
+        consentimentos = self._consentimentos(paciente_id)
+
+        for tipo, valor in (('iris', iris), ('documentos', documentos),
+                            ('consentimentos', consentimentos), ('paciente', paciente)):
+            if valor is not None:
+                self.cache.set_patient_prefetch(paciente_id, tipo, valor, inicio)
+        return True
+
+    def _ligar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _miniaturas(self, imagens: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if not self.miniaturas:
+            return {}
+        miniaturas = {}
+        for img in imagens:
+            caminho = img.get('caminho_imagem') or img.get('caminho') or ''
+            if caminho and os.path.exists(caminho):
+                try:
+                    miniaturas[caminho] = miniatura_iris(caminho)
+                except ImportError:
+                    self.miniaturas = False
+                    return {}
+        return miniaturas
+
+    def _consentimentos(self, paciente_id) -> Optional[Dict]:
+        if self._status_consentimentos is None:
+            from consentimentos_manager import ConsentimentosManager
+            self._status_consentimentos = ConsentimentosManager(self.db_path).obter_status_consentimentos
+        return self._status_consentimentos(paciente_id)
+
+    def _iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar = False
+            self._thread = threading.Thread(target=self._executar, name="prefetch-pacientes", daemon=True)
+            self._thread.start()
+
+    def _executar(self):
+        conn = self._ligar()
+        try:
+            while True:
+                with self._condicao:
+                    self._a_carregar = False
+                    self._condicao.notify_all()
+                    while not self._pendentes and not self._parar:
+                        self._condicao.wait()
+                    if self._parar:
+                        return
+                    paciente_id = self._pendentes.popleft()
+                    self._a_carregar = True
+                try:
+                    if self.carregar(paciente_id, conn):
+                        self.carregados += 1
+                except Exception as e:
+                    self.erros += 1
+                    print(f"⚠️ Pré-carregamento do paciente {paciente_id} falhou: {e}")
+        finally:
+            conn.close()
+            with self._condicao:
+                self._a_carregar = False
+                self._condicao.notify_all()
+
+
+_prefetch: Optional[PrefetchPacientes] = None
+_prefetch_lock = threading.Lock()
+
+
+def obter_prefetch() -> PrefetchPacientes:
+    """Instância partilhada do pré-carregamento (criada no primeiro uso)"""
+    global _prefetch
+    with _prefetch_lock:
+        if _prefetch is None:
+            _prefetch = PrefetchPacientes()
+        return _prefetch
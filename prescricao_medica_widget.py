@@ -452,20 +452,6 @@ class PrescricaoMedicaWidget(QWidget):
             
             cursor = conn.cursor()
             
-            # Verificar se existe tabela de prescrições
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS prescricoes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    paciente_id INTEGER,
-                    data_prescricao TEXT,
-                    status TEXT DEFAULT 'assinada',
-                    arquivo_json TEXT,
-                    assinatura_timestamp TEXT,
-                    observacoes TEXT,
-                    FOREIGN KEY (paciente_id) REFERENCES pacientes (id)
-                )
-            """)
-            
             # Inserir registro da prescrição
             timestamp = datetime.now().isoformat()
             cursor.execute("""
@@ -744,19 +730,6 @@ Dr(a). [Seu Nome]"""
             conn = db_manager._connect()
             cursor = conn.cursor()
             
-            # Criar tabela de documentos se não existir
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS documentos_paciente (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    paciente_id INTEGER,
-                    tipo_documento TEXT,
-                    caminho_arquivo TEXT,
-                    data_criacao TEXT,
-                    observacoes TEXT,
-                    FOREIGN KEY (paciente_id) REFERENCES pacientes (id)
-                )
-            """)
-            
             # Inserir registro do PDF
             cursor.execute("""
                 INSERT INTO documentos_paciente 
@@ -0,0 +1,103 @@
+"""
+Codificação binária dos passos de protocolos terapêuticos
+- Os passos são guardados por colunas: frequência, amplitude e offset
+  (float64), duração (int32) e descrições (UTF-8)
+- A descodificação lê cada coluna de uma vez (array.frombytes), sem JSON
+  nem um dicionário por passo
+- Os metadados (nº de passos, duração total, gama de frequências) são
+  calculados na gravação e guardados em colunas indexadas, para listar e
+  filtrar protocolos sem descodificar os passos
+"""
+
+import json
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAGIA_PASSOS = b'BPP1'
+MAGIA_FREQUENCIAS = b'BPF1'
+_CABECALHO = struct.Struct('<4sI')  # magia, número de elementos
+SEPARADOR_DESCRICAO = '\x1f'         # separador de unidade ASCII; retirado das descrições
+
+Colunas = Tuple[List[float], List[float], List[float], List[int], List[str]]
+
+
+def _bytes_coluna(tipo: str, valores) -> bytes:
+    coluna = array(tipo, valores)
+    if sys.byteorder == 'big':
+        coluna.byteswap()  # em disco sempre little-endian
+    return coluna.tobytes()
+
+
+def _ler_coluna(tipo: str, dados: bytes, inicio: int, n: int) -> Tuple[array, int]:
+    coluna = array(tipo)
+    fim = inicio + n * coluna.itemsize
+    coluna.frombytes(dados[inicio:fim])
+    if sys.byteorder == 'big':
+        coluna.byteswap()
+    return coluna, fim
+
+
+def codificar_passos(passos: Iterable) -> bytes:
+    """Passos (objetos com frequency, amplitude, offset, duration_seconds, description) -> bytes"""
+    passos = list(passos)
+    descricoes = SEPARADOR_DESCRICAO.join(
+        (getattr(p, 'description', '') or '').replace(SEPARADOR_DESCRICAO, ' ') for p in passos)
+    return b''.join((
+        _CABECALHO.pack(MAGIA_PASSOS, len(passos)),
+        _bytes_coluna('d', (float(p.frequency) for p in passos)),
+        _bytes_coluna('d', (float(p.amplitude) for p in passos)),
+        _bytes_coluna('d', (float(p.offset) for p in passos)),
+        _bytes_coluna('i', (int(p.duration_seconds) for p in passos)),
+        descricoes.encode('utf-8'),
+    ))
+
+
+def descodificar_passos(dados: bytes) -> Colunas:
+    """bytes -> (frequências, amplitudes, offsets, durações, descrições)"""
+    magia, n = _CABECALHO.unpack_from(dados)
+    if magia != MAGIA_PASSOS:
+        raise ValueError("Formato de passos desconhecido")
+    posicao = _CABECALHO.size
+    frequencias, posicao = _ler_coluna('d', dados, posicao, n)
+    amplitudes, posicao = _ler_coluna('d', dados, posicao, n)
+    offsets, posicao = _ler_coluna('d', dados, posicao, n)
+    duracoes, posicao = _ler_coluna('i', dados, posicao, n)
+    descricoes = dados[posicao:].decode('utf-8').split(SEPARADOR_DESCRICAO) if n else []
+    return (frequencias.tolist(), amplitudes.tolist(), offsets.tolist(),
+            duracoes.tolist(), descricoes)
+
+
+def metadados_passos(passos: Iterable) -> Dict:
+    """Colunas indexadas de um protocolo: step_count, total_duration, freq_min, freq_max"""
+    passos = list(passos)
+    frequencias = [float(p.frequency) for p in passos]
+    return {
+        'step_count': len(passos),
+        'total_duration': sum(int(p.duration_seconds) for p in passos),
+        'freq_min': min(frequencias) if frequencias else None,
+        'freq_max': max(frequencias) if frequencias else None,
+    }
+
+
+def passos_gravados(steps_blob: Optional[bytes], steps_json: Optional[str] = None) -> List[Dict]:
+    """Passos de uma linha de therapy_protocols como dicionários (binário ou JSON antigo)"""
+    if steps_blob is not None:
+        return [{'frequency': f, 'amplitude': a, 'offset': o, 'duration_seconds': d, 'description': t}
+                for f, a, o, d, t in zip(*descodificar_passos(steps_blob))]
+    return json.loads(steps_json) if steps_json else []
+
+
+def codificar_frequencias(frequencias: List) -> Optional[bytes]:
+    """Lista de frequências numéricas -> bytes; None se houver valores não numéricos"""
+    if not all(isinstance(f, (int, float)) and not isinstance(f, bool) for f in frequencias):
+        return None
+    return _CABECALHO.pack(MAGIA_FREQUENCIAS, len(frequencias)) + _bytes_coluna('d', frequencias)
+
+
+def descodificar_frequencias(dados: bytes) -> List[float]:
+    magia, n = _CABECALHO.unpack_from(dados)
+    if magia != MAGIA_FREQUENCIAS:
+        raise ValueError("Formato de frequências desconhecido")
+    return _ler_coluna('d', dados, _CABECALHO.size, n)[0].tolist()
@@ -0,0 +1,408 @@
+"""
+Escrita incremental dos relatórios de análise de ressonância
+- O relatório é escrito por partes num destino com write() (ficheiro,
+  StringIO) ou sendall() (socket), através de um buffer de tamanho fixo,
+  em vez de ser montado inteiro em memória por concatenação
+- As linhas das tabelas usam modelos compilados uma vez (str.format) e o
+  CSV é escrito pelo módulo csv, que trata aspas e separadores nos nomes
+- As secções estáticas (cabeçalho com CSS, cabeçalhos das tabelas, rodapé)
+  são renderizadas uma vez, na importação
+- As estatísticas e os top 5 são calculados numa passagem, com heapq, sem
+  ordenar todos os itens
+"""
+
+import csv
+import heapq
+from datetime import datetime
+from html import escape
+from io import StringIO
+from itertools import islice
+from typing import Iterable, List, NamedTuple
+
+TAMANHO_BUFFER = 64 * 1024   # caracteres acumulados antes de escrever no destino
+LINHAS_POR_BLOCO = 1000    # linhas CSV formatadas antes de cada escrita
+TOP_N = 5
+SEPARADOR_TEXTO = "=" * 80
+COLUNAS_CSV = ["Item", "Categoria", "Subcategoria", "Ressonancia", "Estabilidade", "Confianca", "Campo"]
+FORMATOS = {"html": "html", "text": "text", "txt": "text", "csv": "csv"}
+
+
+class SaidaRelatorio:
+    """Buffer de escrita para ficheiros (write) ou sockets (sendall, em UTF-8)"""
+
+    def __init__(self, destino, tamanho_buffer: int = TAMANHO_BUFFER):
+        if hasattr(destino, "write"):
+            self._escrever = destino.write
+        elif hasattr(destino, "sendall"):
+            self._escrever = lambda texto: destino.sendall(texto.encode("utf-8"))
+        else:
+            raise TypeError("O destino do relatório tem de ter write() ou sendall()")
+        self.tamanho_buffer = tamanho_buffer
+        self._partes: List[str] = []
+        self._tamanho = 0
+        self.escritos = 0  # caracteres já entregues ao destino
+
+    def write(self, texto: str) -> int:
+        self._partes.append(texto)
+        self._tamanho += len(texto)
+        if self._tamanho >= self.tamanho_buffer:
+            self.flush()
+        return len(texto)
+
+    def flush(self):
+        if self._partes:
+            bloco = "".join(self._partes)
+            self._partes, self._tamanho = [], 0
+            self._escrever(bloco)
+            self.escritos += len(bloco)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+class EstatisticasRessonancia(NamedTuple):
+    total: int
+    positivos: int
+    negativos: int
+    media: float
+    top_positivos: list
+    top_negativos: list
+
+
+def estatisticas_ressonancia(resultados: Iterable, n: int = TOP_N) -> EstatisticasRessonancia:
+    """
+    Contagens, média e os n itens mais ressonantes de cada sinal
+
+    Mesma ordem que sorted(..., reverse=True)[:n] (em empate fica o primeiro
+    item), mas com heaps limitados a n elementos.
+    """
+    total = positivos = negativos = soma = 0
+    top_positivos, top_negativos = [], []  # heaps mínimos de (|valor|, -ordem, item)
+    for ordem, item in enumerate(resultados):
+        valor = item.resonance_value
+        total += 1
+        soma += valor
+        if valor == 0:
+            continue
+        if valor > 0:
+            positivos += 1
+            heap = top_positivos
+        else:
+            negativos += 1
+            heap = top_negativos
+        entrada = (abs(valor), -ordem, item)
+        if len(heap) < n:
+            heapq.heappush(heap, entrada)
+        elif entrada[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entrada)
+    return EstatisticasRessonancia(
+        total, positivos, negativos, soma / total if total else 0,
+        [item for *_, item in sorted(top_positivos, reverse=True)],
+        [item for *_, item in sorted(top_negativos, reverse=True)])
+
+
+# ═══════════════ SECÇÕES ESTÁTICAS (renderizadas uma vez) ═══════════════
+
+CABECALHO_HTML = """
+<!DOCTYPE html>
+<html lang="pt">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Relatório de Análise de Ressonância - Biodesk</title>
+    <style>
+        body { 
+            font-family: 'Segoe UI', Arial, sans-serif; 
+            margin: 20px; 
+            color: #2c3e50;
+            line-height: 1.6;
+        }
+        .header { 
+            text-align: center; 
+            border-bottom: 3px solid #3498db; 
+            padding-bottom: 20px;
+            margin-bottom: 30px;
+        }
+        .header h1 { 
+            color: #2c3e50; 
+            margin: 0;
+            font-size: 28px;
+        }
+        .header h2 { 
+            color: #7f8c8d; 
+            margin: 5px 0 0 0;
+            font-weight: normal;
+        }
+        .section { 
+            margin: 30px 0; 
+            padding: 20px;
+            border: 1px solid #bdc3c7;
+            border-radius: 8px;
+            background-color: #f8f9fa;
+        }
+        .section h3 { 
+            color: #34495e; 
+            border-bottom: 2px solid #ecf0f1;
+            padding-bottom: 10px;
+            margin-top: 0;
+        }
+        .stats-grid { 
+            display: grid; 
+            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); 
+            gap: 15px; 
+            margin: 20px 0;
+        }
+        .stat-card { 
+            background: white; 
+            padding: 15px; 
+            border-radius: 6px; 
+            text-align: center;
+            border: 1px solid #ecf0f1;
+        }
+        .stat-number { 
+            font-size: 24px; 
+            font-weight: bold; 
+            color: #3498db;
+        }
+        .stat-label { 
+            color: #7f8c8d; 
+            font-size: 14px;
+        }
+        .resonance-table { 
+            width: 100%; 
+            border-collapse: collapse; 
+            margin: 20px 0;
+        }
+        .resonance-table th, .resonance-table td { 
+            border: 1px solid #ddd; 
+            padding: 10px; 
+            text-align: left;
+        }
+        .resonance-table th { 
+            background-color: #3498db; 
+            color: white;
+        }
+        .positive { color: #27ae60; font-weight: bold; }
+        .negative { color: #e74c3c; font-weight: bold; }
+        .neutral { color: #f39c12; }
+        .footer { 
+            text-align: center; 
+            margin-top: 40px; 
+            padding-top: 20px;
+            border-top: 1px solid #bdc3c7;
+            color: #7f8c8d;
+            font-size: 12px;
+        }
+    </style>
+</head>
+<body>
+"""
+
+
+def _abrir_tabela_html(titulo: str) -> str:
+    return f"""
+    <div class="section">
+        <h3>{titulo}</h3>
+        <table class="resonance-table">
+            <thead>
+                <tr>
+                    <th>Item</th>
+                    <th>Categoria</th>
+                    <th>Ressonância</th>
+                    <th>Estabilidade</th>
+                    <th>Confiança</th>
+                </tr>
+            </thead>
+            <tbody>
+"""
+
+
+TABELA_POSITIVOS_HTML = _abrir_tabela_html("✅ Top 5 Ressonantes Positivos")
+TABELA_STRESSORS_HTML = _abrir_tabela_html("⚠️ Top 5 Stressors")
+FECHAR_TABELA_HTML = """            </tbody>
+        </table>
+    </div>
+"""
+RODAPE_HTML = """
+    <div class="footer">
+        <p>Relatório gerado pelo Sistema Biodesk de Medicina Informacional</p>
+        <p>Este relatório é para fins de pesquisa e apoio complementar</p>
+        <p>Data de geração: {gerado}</p>
+    </div>
+</body>
+</html>
+"""
+CABECALHO_TEXTO = f"""{SEPARADOR_TEXTO}
+                        RELATÓRIO DE ANÁLISE DE RESSONÂNCIA
+                           Sistema Biodesk - Medicina Informacional
+{SEPARADOR_TEXTO}
+
+"""
+
+# ═══════════════ MODELOS DE LINHA (compilados uma vez) ═══════════════
+
+_LINHA_HTML = """                <tr>
+                    <td>{nome}</td>
+                    <td>{categoria}</td>
+                    <td class="{classe}">{item.resonance_value:+d}</td>
+                    <td>{item.stability:.2f}</td>
+                    <td>{item.confidence:.2f}</td>
+                </tr>
+""".format
+_LINHA_TEXTO = ("{posicao}. {item.name} ({item.category})\n"
+                "   Ressonância: {item.resonance_value:+d} | Estabilidade: {item.stability:.2f} | "
+                "Confiança: {item.confidence:.2f}\n\n").format
+_DADOS_HTML = """
+    <div class="header">
+        <h1>🔮 Relatório de Análise de Ressonância</h1>
+        <h2>Sistema Biodesk - Medicina Informacional</h2>
+        <p><strong>Data:</strong> {data}</p>
+        <p><strong>ID da Sessão:</strong> {sessao}</p>
+    </div>
+
+    <div class="section">
+        <h3>👤 Dados do Paciente</h3>
+        <p><strong>Nome:</strong> {nome}</p>
+        <p><strong>Data de Nascimento:</strong> {nascimento}</p>
+        <p><strong>Campo Analisado:</strong> {campo}</p>
+    </div>
+
+    <div class="section">
+        <h3>📊 Estatísticas Gerais</h3>
+        <div class="stats-grid">
+            <div class="stat-card">
+                <div class="stat-number">{e.total}</div>
+                <div class="stat-label">Total de Itens</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-number positive">{e.positivos}</div>
+                <div class="stat-label">Ressonantes Positivos</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-number negative">{e.negativos}</div>
+                <div class="stat-label">Stressors</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-number">{e.media:+.1f}</div>
+                <div class="stat-label">Ressonância Média</div>
+            </div>
+        </div>
+    </div>
+""".format
+_DADOS_TEXTO = """Data da Sessão: {data}
+ID da Sessão: {sessao}
+
+DADOS DO PACIENTE
+{separador}
+Nome: {nome}
+Data de Nascimento: {nascimento}
+Campo Analisado: {campo}
+
+ESTATÍSTICAS GERAIS
+{separador}
+Total de Itens Analisados: {e.total}
+Ressonantes Positivos: {e.positivos}
+Stressors (Negativos): {e.negativos}
+""".format
+_OBSERVACOES_HTML = """
+    <div class="section">
+        <h3>📝 Observações</h3>
+        <p>{notas}</p>
+    </div>
+""".format
+
+
+def _agora() -> str:
+    return datetime.now().strftime('%d/%m/%Y às %H:%M')
+
+
+# ═══════════════ ESCRITORES ═══════════════
+
+def escrever_html(session_data, saida) -> None:
+    """Relatório HTML: dados da sessão, estatísticas, top 5 de cada sinal e observações"""
+    e = estatisticas_ressonancia(session_data.analysis_results)
+    testemunho = session_data.patient_witness
+    escrever = saida.write
+    escrever(CABECALHO_HTML)
+    escrever(_DADOS_HTML(
+        data=session_data.timestamp.strftime('%d/%m/%Y às %H:%M'),
+        sessao=escape(str(session_data.session_id)),
+        nome=escape(str(testemunho.get('name', 'N/A'))),
+        nascimento=escape(str(testemunho.get('birth_date', 'N/A'))),
+        campo=escape(str(session_data.field_used)), e=e))
+    for abertura, itens, classe in ((TABELA_POSITIVOS_HTML, e.top_positivos, "positive"),
+                                    (TABELA_STRESSORS_HTML, e.top_negativos, "negative")):
+        escrever(abertura)
+        for item in itens:
+            escrever(_LINHA_HTML(nome=escape(item.name), categoria=escape(item.category),
+                                 classe=classe, item=item))
+        escrever(FECHAR_TABELA_HTML)
+    escrever(_OBSERVACOES_HTML(
+        notas=escape(session_data.notes) if session_data.notes else 'Nenhuma observação registrada.'))
+    escrever(RODAPE_HTML.format(gerado=_agora()))
+
+
+def escrever_texto(session_data, saida) -> None:
+    """Relatório em texto simples com a mesma informação do HTML"""
+    e = estatisticas_ressonancia(session_data.analysis_results)
+    testemunho = session_data.patient_witness
+    escrever = saida.write
+    escrever(CABECALHO_TEXTO)
+    escrever(_DADOS_TEXTO(
+        data=session_data.timestamp.strftime('%d/%m/%Y às %H:%M'),
+        sessao=session_data.session_id, nome=testemunho.get('name', 'N/A'),
+        nascimento=testemunho.get('birth_date', 'N/A'), campo=session_data.field_used,
+        separador=SEPARADOR_TEXTO, e=e))
+    if e.total:
+        escrever(f"Ressonância Média: {e.media:+.1f}\n")
+        for titulo, itens in (("TOP 5 RESSONANTES POSITIVOS", e.top_positivos),
+                              ("TOP 5 STRESSORS", e.top_negativos)):
+            if itens:
+                escrever(f"\n{titulo}\n{SEPARADOR_TEXTO}\n")
+                for posicao, item in enumerate(itens, 1):
+                    escrever(_LINHA_TEXTO(posicao=posicao, item=item))
+    if session_data.notes:
+        escrever(f"\nOBSERVAÇÕES\n{SEPARADOR_TEXTO}\n{session_data.notes}\n")
+    escrever(f"\n{SEPARADOR_TEXTO}\nRelatório gerado em: {_agora()}\n"
+             f"Sistema Biodesk de Medicina Informacional\n")
+
+
+def escrever_csv(session_data, saida) -> None:
+    """Uma linha por item analisado (o módulo csv trata aspas e vírgulas nos nomes)"""
+    # O csv.writer escreve num StringIO e o bloco passa ao destino a cada
+    # LINHAS_POR_BLOCO linhas, em vez de uma chamada write() por linha
+    bloco = StringIO()
+    escritor = csv.writer(bloco, lineterminator="\n")
+    escritor.writerow(COLUNAS_CSV)
+    campo = session_data.field_used
+    linhas = ((item.name, item.category, item.subcategory, item.resonance_value,
+               f"{item.stability:.3f}", f"{item.confidence:.3f}", campo)
+              for item in session_data.analysis_results)
+    while True:
+        escritor.writerows(islice(linhas, LINHAS_POR_BLOCO))
+        if not bloco.tell():
+            return
+        saida.write(bloco.getvalue())
+        bloco.seek(0)
+        bloco.truncate()
+
+
+ESCRITORES = {"html": escrever_html, "text": escrever_texto, "csv": escrever_csv}
+
+
+def escrever_relatorio(session_data, destino, format_type: str = "html",
+                       tamanho_buffer: int = TAMANHO_BUFFER) -> int:
+    """
+    Escreve o relatório de análise no destino (write() ou sendall())
+
+    format_type: html, text (ou txt) ou csv. Devolve os caracteres escritos.
+    """
+    formato = FORMATOS.get(format_type)
+    if formato is None:
+        raise ValueError(f"Formato não suportado: {format_type}")
+    with SaidaRelatorio(destino, tamanho_buffer) as saida:
+        ESCRITORES[formato](session_data, saida)
+    return saida.escritos
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Interlock de segurança compilado para o caminho de comando do gerador
+- Os limites de HS3SafetyLimits (hs3_config.py) e de SafetyLimits
+  (biodesk/quantum/safety.py) são compilados uma vez numa tabela plana
+  de limites numéricos
+- Cada comando (frequência, amplitude, offset) é verificado de forma
+  síncrona, em microssegundos, antes de ser enviado ao hardware
+- Sem dependências de Qt nem de hardware
+"""
+
+import math
+from typing import Optional, Tuple
+
+
+class SafetyInterlock:
+    """
+    Tabela de limites de um gerador
+
+    A tensão total é amplitude_weight * amplitude + |offset|, o que cobre as
+    duas convenções do projeto:
+    - SafetyManager: amplitude + |offset| <= MAX_AMPLITUDE (peso 1)
+    - assert_safe_output: max(|amp/2 + off|, |-amp/2 + off|) <= max_total_voltage,
+      que para amplitude >= 0 é amp/2 + |off| (peso 0.5)
+    """
+
+    __slots__ = ('min_frequency', 'max_frequency', 'min_amplitude', 'max_amplitude',
+                 'min_offset', 'max_offset', 'amplitude_weight', 'max_total')
+
+    def __init__(self, min_frequency: float, max_frequency: float,
+                 min_amplitude: float, max_amplitude: float,
+                 min_offset: float, max_offset: float,
+                 amplitude_weight: float = 1.0, max_total: float = math.inf):
+        self.min_frequency = float(min_frequency)
+        self.max_frequency = float(max_frequency)
+        self.min_amplitude = float(min_amplitude)
+        self.max_amplitude = float(max_amplitude)
+        self.min_offset = float(min_offset)
+        self.max_offset = float(max_offset)
+        self.amplitude_weight = float(amplitude_weight)
+        self.max_total = float(max_total)
+
+        if not (self.min_frequency <= self.max_frequency and
+                self.min_amplitude <= self.max_amplitude and
+                self.min_offset <= self.max_offset):
+            raise ValueError("Limites de segurança inconsistentes (mínimo acima do máximo)")
+
+    @classmethod
+    def from_hs3_limits(cls, limits) -> 'SafetyInterlock':
+        """Regras parameter_limits e total_voltage do SafetyManager"""
+        return cls(limits.MIN_FREQUENCY, limits.MAX_FREQUENCY,
+                   limits.MIN_AMPLITUDE, limits.MAX_AMPLITUDE,
+                   limits.MIN_OFFSET, limits.MAX_OFFSET,
+                   amplitude_weight=1.0, max_total=limits.MAX_AMPLITUDE)
+
+    @classmethod
+    def from_safety_limits(cls, limits) -> 'SafetyInterlock':
+        """Limites de assert_safe_output (biodesk.quantum.safety.SafetyLimits)"""
+        return cls(limits.min_frequency_hz, limits.max_frequency_hz,
+                   0.0, limits.max_amp_vpp,
+                   -limits.max_offset_v, limits.max_offset_v,
+                   amplitude_weight=0.5, max_total=limits.max_total_voltage)
+
+    def check(self, frequency: Optional[float] = None, amplitude: Optional[float] = None,
+              offset: Optional[float] = None) -> Optional[str]:
+        """
+        Verifica um comando; None se estiver dentro dos limites, senão a violação
+
+        Parâmetros None não fazem parte do comando (e contam 0 na tensão
+        total). As comparações são escritas como 'not (min <= x <= max)' para
+        que NaN seja sempre rejeitado.
+        """
+        try:
+            if frequency is not None and not (self.min_frequency <= frequency <= self.max_frequency):
+                return (f"Frequência {frequency}Hz fora dos limites "
+                        f"[{self.min_frequency:g}, {self.max_frequency:g}]Hz")
+            if amplitude is not None and not (self.min_amplitude <= amplitude <= self.max_amplitude):
+                return (f"Amplitude {amplitude}V fora dos limites "
+                        f"[{self.min_amplitude:g}, {self.max_amplitude:g}]V")
+            if offset is not None and not (self.min_offset <= offset <= self.max_offset):
+                return (f"Offset {offset}V fora dos limites "
+                        f"[{self.min_offset:g}, {self.max_offset:g}]V")
+            total = self.amplitude_weight * (amplitude or 0.0) + abs(offset or 0.0)
+            if not total <= self.max_total:
+                return f"Tensão total {total:.3f}V excede o limite de {self.max_total:g}V"
+        except TypeError:
+            return "Parâmetros devem ser numéricos"
+        return None
+
+    def output_order(self, amplitude: float, offset: float,
+                     current_offset: Optional[float] = None) -> Tuple[str, str]:
+        """
+        Ordem das escritas para chegar a (amplitude, offset) sem estados
+        intermédios acima do limite
+
+        O par de destino tem de ter sido verificado com check(). Se escrever a
+        amplitude primeiro excede a tensão total com o offset atual (ex.:
+        2 V/+2 V -> 4 V/0 V), o offset é escrito primeiro; com o estado atual
+        e o de destino dentro do limite, uma das duas ordens é sempre segura.
+        """
+        if self.check(amplitude=amplitude, offset=current_offset) is None:
+            return ('amplitude', 'offset')
+        return ('offset', 'amplitude')
+
+    def __repr__(self):
+        return (f"SafetyInterlock(freq=[{self.min_frequency:g}, {self.max_frequency:g}]Hz, "
+                f"amp=[{self.min_amplitude:g}, {self.max_amplitude:g}]V, "
+                f"offset=[{self.min_offset:g}, {self.max_offset:g}]V, "
+                f"total={self.amplitude_weight:g}*amp+|offset|<={self.max_total:g}V)")
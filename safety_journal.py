@@ -0,0 +1,284 @@
+"""
+🛡️ Diário Persistente de Eventos de Segurança
+Os eventos do SafetyManager são acrescentados (nunca alterados) a um diário
+em SQLite particionado por dia: uma tabela por dia e um catálogo das
+partições. A retenção remove partições inteiras e as consultas por janela
+temporal só leem as partições que a intersetam. Os eventos mais recentes
+ficam também num anel em memória para o estado atual da interface,
+recarregado do disco ao abrir.
+"""
+
+import atexit
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from schema_migrations import aplicar_migracoes
+from time_utils import para_timestamp
+
+DIAS_RETENCAO = 7          # a mesma janela que o SafetyManager mantinha em memória
+TAMANHO_ANEL = 1000
+FLUSH_EVERY = 500           # eventos pendentes antes de gravar
+FLUSH_INTERVALO_S = 2.0     # tempo máximo de um evento pendente em memória (timer)
+NIVEIS_IMEDIATOS = ("danger", "critical")  # gravados de imediato
+
+COLUNAS = ("ts", "tipo", "nivel", "mensagem", "parametros", "acao")
+
+
+class DiarioEventosSeguranca:
+    """Diário de eventos de segurança: anel em memória + SQLite particionado por dia"""
+
+    def __init__(self, db_path: str = "safety_events.db", dias_retencao: int = DIAS_RETENCAO,
+                 tamanho_anel: int = TAMANHO_ANEL, flush_every: int = FLUSH_EVERY,
+                 flush_intervalo_s: float = FLUSH_INTERVALO_S):
+        self.db_path = db_path
+        self.dias_retencao = dias_retencao
+        self.flush_every = flush_every
+        self.flush_intervalo_s = flush_intervalo_s
+        self.anel = deque(maxlen=tamanho_anel)
+
+        self._lock = threading.RLock()
+        self._pendentes: List[tuple] = []
+        self._ultimo_flush = time.monotonic()
+        self._timer_flush: Optional[threading.Timer] = None
+        self._particoes: Dict[str, tuple] = {}   # nome -> (inicio_ts, fim_ts)
+        self._dia_atual = (0.0, 0.0, None)       # (inicio_ts, fim_ts, nome) do último evento
+
+        aplicar_migracoes(self.db_path, 'safety_events')
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for linha in self._conn.execute("SELECT nome, inicio_ts, fim_ts FROM particoes_eventos"):
+            self._particoes[linha["nome"]] = (linha["inicio_ts"], linha["fim_ts"])
+        self._recarregar_anel()
+
+    # ═══════════════ ESCRITA ═══════════════
+
+    def registar(self, timestamp, tipo: str, nivel: str, mensagem: str,
+                 parametros: Optional[Dict[str, Any]] = None, acao: str = "") -> None:
+        """
+        Acrescenta um evento ao diário
+
+        Os eventos ficam pendentes em memória e são gravados em lote (ao
+        chegar a flush_every ou por um timer, no máximo flush_intervalo_s
+        depois do primeiro pendente); níveis em NIVEIS_IMEDIATOS são gravados
+        antes de regressar.
+        """
+        ts = para_timestamp(timestamp)
+        if ts is None:
+            ts = time.time()
+        evento = (ts, tipo, nivel, mensagem,
+                  json.dumps(parametros, default=str) if parametros else None, acao or "")
+        with self._lock:
+            self.anel.append(evento)
+            self._pendentes.append(evento)
+            if (nivel in NIVEIS_IMEDIATOS or len(self._pendentes) >= self.flush_every or
+                    time.monotonic() - self._ultimo_flush >= self.flush_intervalo_s):
+                self.flush()
+            elif self._timer_flush is None and math.isfinite(self.flush_intervalo_s):
+                # Sem mais eventos, os pendentes não podem esperar pelo próximo registar()
+                self._timer_flush = threading.Timer(self.flush_intervalo_s, self.flush)
+                self._timer_flush.daemon = True
+                self._timer_flush.start()
+
+    def flush(self) -> int:
+        """Grava os eventos pendentes numa transação; devolve quantos foram gravados"""
+        with self._lock:
+            self._ultimo_flush = time.monotonic()
+            if self._timer_flush is not None:
+                self._timer_flush.cancel()  # sem efeito se for o próprio timer a chamar
+                self._timer_flush = None
+            if not self._pendentes or self._conn is None:
+                return 0
+            pendentes, self._pendentes = self._pendentes, []
+
+            por_particao: Dict[str, List[tuple]] = {}
+            for evento in pendentes:
+                por_particao.setdefault(self._particao(evento[0]), []).append(evento)
+
+            with self._conn:
+                for nome, eventos in por_particao.items():
+                    self._conn.executemany(
+                        f"INSERT INTO {nome} ({', '.join(COLUNAS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                        eventos)
+                    self._conn.execute(
+                        "UPDATE particoes_eventos SET eventos = eventos + ? WHERE nome = ?",
+                        (len(eventos), nome))
+            return len(pendentes)
+
+    def _particao(self, ts: float) -> str:
+        """Nome da partição diária do instante (criada se ainda não existir)"""
+        inicio, fim, nome = self._dia_atual
+        if inicio <= ts < fim:
+            return nome
+
+        dia = datetime.fromtimestamp(ts).replace(hour=0, minute=0, second=0, microsecond=0)
+        inicio, fim = dia.timestamp(), (dia + timedelta(days=1)).timestamp()
+        nome = f"eventos_{dia:%Y%m%d}"
+        if nome not in self._particoes:
+            with self._conn:
+                self._conn.execute(f'''
+                    CREATE TABLE IF NOT EXISTS {nome} (
+                        id INTEGER PRIMARY KEY,
+                        ts REAL NOT NULL,
+                        tipo TEXT NOT NULL,
+                        nivel TEXT NOT NULL,
+                        mensagem TEXT NOT NULL,
+                        parametros TEXT,
+                        acao TEXT
+                    )
+                ''')
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{nome}_ts ON {nome} (ts)")
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO particoes_eventos (nome, inicio_ts, fim_ts, eventos) "
+                    "VALUES (?, ?, ?, 0)", (nome, inicio, fim))
+            self._particoes[nome] = (inicio, fim)
+        self._dia_atual = (inicio, fim, nome)
+        return nome
+
+    def _recarregar_anel(self):
+        """Últimos eventos gravados de volta ao anel: o estado recente sobrevive a um reinício"""
+        eventos = []
+        for nome in self._particoes_na_janela(0.0, float("inf"), recentes_primeiro=True):
+            falta = self.anel.maxlen - len(eventos)
+            if falta <= 0:
+                break
+            eventos.extend(tuple(linha) for linha in self._conn.execute(
+                f"SELECT {', '.join(COLUNAS)} FROM {nome} ORDER BY ts DESC, id DESC LIMIT ?", (falta,)))
+        self.anel.extend(reversed(eventos))
+
+    # ═══════════════ RETENÇÃO ═══════════════
+
+    def aplicar_retencao(self, dias: Optional[int] = None, agora=None) -> int:
+        """Remove as partições anteriores à janela de retenção; devolve os eventos removidos"""
+        dias = self.dias_retencao if dias is None else dias
+        limite = (para_timestamp(agora) or time.time()) - dias * 86400
+        removidos = 0
+        with self._lock:
+            self.flush()
+            antigas = self._conn.execute(
+                "SELECT nome, eventos FROM particoes_eventos WHERE fim_ts <= ?", (limite,)).fetchall()
+            if not antigas:
+                return 0
+            with self._conn:
+                for linha in antigas:
+                    self._conn.execute(f"DROP TABLE IF EXISTS {linha['nome']}")
+                    self._conn.execute("DELETE FROM particoes_eventos WHERE nome = ?", (linha["nome"],))
+                    self._particoes.pop(linha["nome"], None)
+                    removidos += linha["eventos"]
+            self._dia_atual = (0.0, 0.0, None)
+        return removidos
+
+    # ═══════════════ CONSULTAS ═══════════════
+
+    def _filtros(self, inicio, fim, niveis, tipos, texto):
+        condicoes, valores = ["ts >= ?", "ts < ?"], [inicio, fim]
+        for coluna, lista in (("nivel", niveis), ("tipo", tipos)):
+            if lista:
+                lista = [lista] if isinstance(lista, str) else list(lista)
+                condicoes.append(f"{coluna} IN ({', '.join('?' * len(lista))})")
+                valores.extend(lista)
+        if texto:
+            condicoes.append("mensagem LIKE ?")
+            valores.append(f"%{texto}%")
+        return " AND ".join(condicoes), valores
+
+    def _particoes_na_janela(self, inicio: float, fim: float, recentes_primeiro: bool) -> List[str]:
+        nomes = [nome for nome, (p_inicio, p_fim) in self._particoes.items()
+                 if p_inicio < fim and p_fim > inicio]
+        return sorted(nomes, key=lambda nome: self._particoes[nome][0], reverse=recentes_primeiro)
+
+    def consultar(self, inicio=None, fim=None, niveis: Optional[Iterable[str]] = None,
+                  tipos: Optional[Iterable[str]] = None, texto: Optional[str] = None,
+                  limite: Optional[int] = None, recentes_primeiro: bool = False) -> List[Dict]:
+        """
+        Eventos na janela [inicio, fim), filtrados por nível, tipo e texto da mensagem
+
+        inicio/fim aceitam datetime, texto ISO ou epoch (por omissão: tudo).
+        """
+        inicio = para_timestamp(inicio) or 0.0
+        fim = para_timestamp(fim) or float("inf")
+        where, valores = self._filtros(inicio, fim, niveis, tipos, texto)
+        ordem = "DESC" if recentes_primeiro else "ASC"
+
+        eventos = []
+        with self._lock:
+            self.flush()
+            for nome in self._particoes_na_janela(inicio, fim, recentes_primeiro):
+                sql = f"SELECT {', '.join(COLUNAS)} FROM {nome} WHERE {where} ORDER BY ts {ordem}, id {ordem}"
+                if limite is not None:
+                    sql += f" LIMIT {int(limite) - len(eventos)}"
+                eventos.extend(self._para_dict(tuple(linha))
+                               for linha in self._conn.execute(sql, valores))
+                if limite is not None and len(eventos) >= limite:
+                    break
+        return eventos
+
+    def contar(self, inicio=None, fim=None, niveis: Optional[Iterable[str]] = None,
+               tipos: Optional[Iterable[str]] = None) -> int:
+        """Número de eventos na janela com os mesmos filtros de consultar()"""
+        inicio = para_timestamp(inicio) or 0.0
+        fim = para_timestamp(fim) or float("inf")
+        where, valores = self._filtros(inicio, fim, niveis, tipos, None)
+        with self._lock:
+            self.flush()
+            return sum(self._conn.execute(f"SELECT COUNT(*) FROM {nome} WHERE {where}", valores).fetchone()[0]
+                       for nome in self._particoes_na_janela(inicio, fim, False))
+
+    def total(self) -> int:
+        """Eventos guardados (lido do catálogo, sem percorrer as partições)"""
+        with self._lock:
+            gravados = self._conn.execute("SELECT COALESCE(SUM(eventos), 0) FROM particoes_eventos").fetchone()[0]
+            return gravados + len(self._pendentes)
+
+    def recentes(self, n: int = 10) -> List[Dict]:
+        """Últimos n eventos, do anel em memória (sem acesso ao disco)"""
+        with self._lock:
+            ultimos = list(self.anel)[-n:] if n > 0 else []
+        return [self._para_dict(evento) for evento in ultimos]
+
+    def particoes(self) -> List[Dict]:
+        """Partições diárias existentes, da mais antiga para a mais recente"""
+        with self._lock:
+            self.flush()
+            return [dict(linha) for linha in self._conn.execute(
+                "SELECT nome, inicio_ts, fim_ts, eventos FROM particoes_eventos ORDER BY inicio_ts")]
+
+    @staticmethod
+    def _para_dict(evento: tuple) -> Dict:
+        ts, tipo, nivel, mensagem, parametros, acao = evento
+        return {
+            "timestamp": datetime.fromtimestamp(ts).isoformat(),
+            "type": tipo,
+            "level": nivel,
+            "message": mensagem,
+            "parameters": json.loads(parametros) if parametros else {},
+            "action_taken": acao or "",
+        }
+
+    def fechar(self):
+        """Grava os pendentes e fecha a ligação"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+
+_diario = None
+
+
+def obter_diario_seguranca() -> DiarioEventosSeguranca:
+    """Diário partilhado pela aplicação; os pendentes são gravados à saída"""
+    global _diario
+    if _diario is None:
+        _diario = DiarioEventosSeguranca()
+        atexit.register(_diario.fechar)
+    return _diario
@@ -8,14 +8,16 @@ garantindo que nunca são ultrapassados os limites de segurança estabelecidos.
 
 import time
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Callable, Tuple
 from dataclasses import dataclass
 from enum import Enum
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 
-from hs3_config import hs3_config, HS3SafetyLimits
+from hs3_config import HS3SafetyLimits
 from hs3_hardware import hs3_hardware
+from safety_interlock import SafetyInterlock
+from safety_journal import obter_diario_seguranca
 
 class SafetyLevel(Enum):
     """Níveis de segurança"""
@@ -69,9 +71,10 @@ class SafetyManager(QObject):
         super().__init__()
         self.is_monitoring = False
         self.current_safety_level = SafetyLevel.SAFE
-        self.safety_events: List[SafetyEvent] = []
+        self.journal = obter_diario_seguranca()  # Diário persistente (anel recente + SQLite por dia)
         self.safety_rules: List[SafetyRule] = []
         self.limits = HS3SafetyLimits()
+        self.interlock = SafetyInterlock.from_hs3_limits(self.limits)
         
         # Estado atual do sistema
         self.current_parameters = {
@@ -81,15 +84,10 @@ class SafetyManager(QObject):
             "generating": False
         }
         
-        # Timers de monitorização
-        self.monitor_timer = QTimer()
-        self.monitor_timer.timeout.connect(self._perform_safety_checks)
-        self.monitor_timer.setInterval(1000)  # Verificar a cada segundo
-        
-        # Timer para limpeza de eventos antigos
+        # Timer para retenção do diário (remove partições diárias antigas)
         self.cleanup_timer = QTimer()
         self.cleanup_timer.timeout.connect(self._cleanup_old_events)
-        self.cleanup_timer.setInterval(300000)  # Limpar a cada 5 minutos
+        self.cleanup_timer.setInterval(300000)  # Verificar a cada 5 minutos
         
         # Configurar logging
         logging.basicConfig(level=logging.INFO)
@@ -103,6 +101,7 @@ class SafetyManager(QObject):
         try:
             self.is_monitoring = True
             self.current_safety_level = SafetyLevel.SAFE
+            self.compile_limits()
             
             # Verificação inicial
             initial_check = self.perform_comprehensive_safety_check()
@@ -110,8 +109,8 @@ class SafetyManager(QObject):
                 self.is_monitoring = False
                 return False
             
-            # Iniciar timers
-            self.monitor_timer.start()
+            # Cada comando é verificado pelo interlock antes de ser enviado;
+            # aqui só fica o temporizador de retenção do diário
             self.cleanup_timer.start()
             
             # Registar evento
@@ -133,7 +132,6 @@ class SafetyManager(QObject):
     def stop_monitoring(self):
         """Para monitorização de segurança"""
         try:
-            self.monitor_timer.stop()
             self.cleanup_timer.stop()
             self.is_monitoring = False
             
@@ -157,50 +155,19 @@ class SafetyManager(QObject):
         Esta é a última linha de defesa
         """
         try:
-            # Verificar cada parâmetro individualmente
-            valid, msg = hs3_config.validate_frequency(frequency)
-            if not valid:
-                self._log_safety_event(
-                    SafetyEventType.PARAMETER_LIMIT,
-                    SafetyLevel.DANGER,
-                    f"Frequência rejeitada: {msg}",
-                    {"frequency": frequency}
-                )
-                return False, f"❌ FREQUÊNCIA REJEITADA: {msg}"
-            
-            valid, msg = hs3_config.validate_amplitude(amplitude)
-            if not valid:
-                self._log_safety_event(
-                    SafetyEventType.PARAMETER_LIMIT,
-                    SafetyLevel.DANGER,
-                    f"Amplitude rejeitada: {msg}",
-                    {"amplitude": amplitude}
-                )
-                return False, f"❌ AMPLITUDE REJEITADA: {msg}"
-            
-            valid, msg = hs3_config.validate_offset(offset)
-            if not valid:
-                self._log_safety_event(
-                    SafetyEventType.PARAMETER_LIMIT,
-                    SafetyLevel.DANGER,
-                    f"Offset rejeitado: {msg}",
-                    {"offset": offset}
-                )
-                return False, f"❌ OFFSET REJEITADO: {msg}"
-            
-            # Verificações adicionais de segurança
-            
-            # 1. Combinação amplitude + offset não pode exceder limites absolutos
-            max_voltage = amplitude + abs(offset)
-            if max_voltage > self.limits.MAX_AMPLITUDE:
-                error_msg = f"Tensão total ({max_voltage:.1f}V) excede limite máximo ({self.limits.MAX_AMPLITUDE}V)"
+            # 1. Limites individuais e tensão total (tabela compilada)
+            if frequency is None or amplitude is None or offset is None:
+                violation = "Frequência, amplitude e offset são obrigatórios"
+            else:
+                violation = self.interlock.check(frequency, amplitude, offset)
+            if violation:
                 self._log_safety_event(
                     SafetyEventType.PARAMETER_LIMIT,
                     SafetyLevel.CRITICAL,
-                    error_msg,
-                    {"amplitude": amplitude, "offset": offset, "total_voltage": max_voltage}
+                    f"Parâmetros rejeitados: {violation}",
+                    {"frequency": frequency, "amplitude": amplitude, "offset": offset}
                 )
-                return False, f"❌ TENSÃO TOTAL REJEITADA: {error_msg}"
+                return False, f"❌ PARÂMETROS REJEITADOS: {violation}"
             
             # 2. Verificar se HS3 está conectado e funcional
             if not hs3_hardware.is_connected():
@@ -236,6 +203,30 @@ class SafetyManager(QObject):
             )
             return False, f"❌ ERRO DE VALIDAÇÃO: {error_msg}"
     
+    def check_command(self, frequency: Optional[float] = None, amplitude: Optional[float] = None,
+                      offset: Optional[float] = None) -> Tuple[bool, str]:
+        """
+        Verificação síncrona de um comando do gerador, antes de ser enviado
+        Só limites numéricos (microssegundos); hardware e configuração ficam
+        em validate_parameters_before_start
+        """
+        violation = self.interlock.check(frequency, amplitude, offset)
+        if violation is None:
+            return True, "OK"
+        
+        self._log_safety_event(
+            SafetyEventType.PARAMETER_LIMIT,
+            SafetyLevel.CRITICAL,
+            f"Comando bloqueado: {violation}",
+            {"frequency": frequency, "amplitude": amplitude, "offset": offset}
+        )
+        self.safety_violation.emit("critical", violation)
+        return False, f"❌ COMANDO BLOQUEADO: {violation}"
+    
+    def compile_limits(self):
+        """Recompila a tabela do interlock a partir de self.limits"""
+        self.interlock = SafetyInterlock.from_hs3_limits(self.limits)
+    
     def perform_comprehensive_safety_check(self) -> Tuple[bool, str]:
         """
         Executa verificação completa de segurança
@@ -243,6 +234,7 @@ class SafetyManager(QObject):
         """
         try:
             issues = []
+            self._update_current_parameters()
             
             # 1. Verificar conectividade do hardware
             if not hs3_hardware.is_connected():
@@ -332,23 +324,29 @@ class SafetyManager(QObject):
         """Obtém estado atual da segurança"""
         recent_events = [
             {
-                "timestamp": event.timestamp.isoformat(),
-                "type": event.event_type.value,
-                "level": event.level.value,
-                "message": event.message
+                "timestamp": event["timestamp"],
+                "type": event["type"],
+                "level": event["level"],
+                "message": event["message"]
             }
-            for event in self.safety_events[-10:]  # Últimos 10 eventos
+            for event in self.journal.recentes(10)  # Últimos 10 eventos (anel em memória)
         ]
         
         return {
             "monitoring": self.is_monitoring,
             "safety_level": self.current_safety_level.value,
-            "total_events": len(self.safety_events),
+            "total_events": self.journal.total(),
             "recent_events": recent_events,
             "current_parameters": self.current_parameters.copy(),
             "rules_count": len([r for r in self.safety_rules if r.enabled])
         }
     
+    def get_safety_events(self, start=None, end=None, levels: Optional[List[str]] = None,
+                          event_types: Optional[List[str]] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Consulta o histórico persistente de eventos (mais recentes primeiro)"""
+        return self.journal.consultar(inicio=start, fim=end, niveis=levels, tipos=event_types,
+                                      limite=limit, recentes_primeiro=True)
+    
     def add_custom_safety_rule(self, rule: SafetyRule) -> bool:
         """Adiciona regra personalizada de segurança"""
         try:
@@ -405,20 +403,18 @@ class SafetyManager(QObject):
             level=SafetyLevel.CRITICAL
         ))
         
-        # Regra 2: Parâmetros dentro de limites
+        # Regras 2 e 3: parâmetros e tensão total, pela tabela do interlock
+        # (verificação completa; cada comando já é verificado antes de ser
+        # enviado por check_command e pelo HS3Hardware)
         def check_parameter_limits():
             if not self.current_parameters["generating"]:
                 return True  # OK se não estiver gerando
             
-            freq = self.current_parameters["frequency"]
-            ampl = self.current_parameters["amplitude"]
-            offs = self.current_parameters["offset"]
-            
-            freq_ok = self.limits.MIN_FREQUENCY <= freq <= self.limits.MAX_FREQUENCY
-            ampl_ok = self.limits.MIN_AMPLITUDE <= ampl <= self.limits.MAX_AMPLITUDE
-            offs_ok = self.limits.MIN_OFFSET <= offs <= self.limits.MAX_OFFSET
-            
-            return freq_ok and ampl_ok and offs_ok
+            return self.interlock.check(
+                frequency=self.current_parameters["frequency"],
+                amplitude=self.current_parameters["amplitude"],
+                offset=self.current_parameters["offset"]
+            ) is None
         
         self.safety_rules.append(SafetyRule(
             rule_id="parameter_limits",
@@ -428,16 +424,14 @@ class SafetyManager(QObject):
             level=SafetyLevel.CRITICAL
         ))
         
-        # Regra 3: Tensão total segura
         def check_total_voltage():
             if not self.current_parameters["generating"]:
                 return True
             
-            ampl = self.current_parameters["amplitude"]
-            offs = self.current_parameters["offset"]
-            total = ampl + abs(offs)
-            
-            return total <= self.limits.MAX_AMPLITUDE
+            return self.interlock.check(
+                amplitude=self.current_parameters["amplitude"],
+                offset=self.current_parameters["offset"]
+            ) is None
         
         self.safety_rules.append(SafetyRule(
             rule_id="total_voltage",
@@ -447,84 +441,18 @@ class SafetyManager(QObject):
             level=SafetyLevel.CRITICAL
         ))
     
-    def _perform_safety_checks(self):
-        """Executa verificações de segurança periódicas"""
-        if not self.is_monitoring:
-            return
-        
-        try:
-            # Atualizar parâmetros atuais
-            self._update_current_parameters()
-            
-            # Executar regras críticas
-            critical_violations = []
-            warning_violations = []
-            
-            for rule in self.safety_rules:
-                if not rule.enabled:
-                    continue
-                
-                try:
-                    result = rule.check_function()
-                    if not result:
-                        if rule.level == SafetyLevel.CRITICAL:
-                            critical_violations.append(rule)
-                        elif rule.level == SafetyLevel.WARNING:
-                            warning_violations.append(rule)
-                
-                except Exception as e:
-                    self.logger.error(f"Erro ao executar regra {rule.name}: {e}")
-                    critical_violations.append(rule)
-            
-            # Processar violações críticas
-            if critical_violations:
-                violation_names = [r.name for r in critical_violations]
-                error_msg = f"Violações críticas de segurança: {', '.join(violation_names)}"
-                
-                self._log_safety_event(
-                    SafetyEventType.SYSTEM_ERROR,
-                    SafetyLevel.CRITICAL,
-                    error_msg
-                )
-                
-                # Paragem de emergência automática
-                self.emergency_shutdown(f"Violações automáticas: {error_msg}")
-                
-                return
-            
-            # Processar avisos
-            if warning_violations:
-                warning_names = [r.name for r in warning_violations]
-                warning_msg = f"Avisos de segurança: {', '.join(warning_names)}"
-                
-                self._log_safety_event(
-                    SafetyEventType.SYSTEM_ERROR,
-                    SafetyLevel.WARNING,
-                    warning_msg
-                )
-                
-                self.safety_violation.emit("warning", warning_msg)
-            
-            # Atualizar nível de segurança
-            new_level = SafetyLevel.WARNING if warning_violations else SafetyLevel.SAFE
-            if new_level != self.current_safety_level:
-                old_level = self.current_safety_level
-                self.current_safety_level = new_level
-                self.safety_status_changed.emit(f"level_changed_{old_level.value}_{new_level.value}")
-            
-        except Exception as e:
-            self.logger.error(f"Erro na verificação de segurança: {e}")
-    
     def _update_current_parameters(self):
         """Atualiza parâmetros atuais do sistema"""
         try:
             if hs3_hardware.is_connected():
-                status = hs3_hardware.get_status()
-                
-                # TODO: Obter parâmetros reais do HS3
-                # Por agora, manter valores conhecidos
+                # Estado em cache dos últimos comandos aceites (sem I/O série)
+                # None = parâmetro ainda não definido nesta ligação (não verificado)
+                state = hs3_hardware.last_state
                 self.current_parameters.update({
-                    "generating": status.get("generating", False)
+                    "frequency": state.get("frequency"),
+                    "amplitude": state.get("amplitude"),
+                    "offset": state.get("offset"),
+                    "generating": bool(state.get("generating", False))
                 })
             else:
                 self.current_parameters.update({
@@ -564,7 +492,10 @@ class SafetyManager(QObject):
                 parameters=parameters or {}
             )
             
-            self.safety_events.append(event)
+            self.journal.registar(
+                event.timestamp, event.event_type.value, event.level.value,
+                event.message, event.parameters, event.action_taken
+            )
             
             # Emitir sinal
             event_dict = {
@@ -590,18 +521,9 @@ class SafetyManager(QObject):
             self.logger.error(f"Erro ao registar evento de segurança: {e}")
     
     def _cleanup_old_events(self):
-        """Remove eventos antigos para poupar memória"""
+        """Aplica a retenção do diário (remove partições diárias inteiras)"""
         try:
-            # Manter apenas eventos dos últimos 7 dias
-            cutoff_date = datetime.now() - timedelta(days=7)
-            
-            initial_count = len(self.safety_events)
-            self.safety_events = [
-                event for event in self.safety_events 
-                if event.timestamp > cutoff_date
-            ]
-            
-            removed_count = initial_count - len(self.safety_events)
+            removed_count = self.journal.aplicar_retencao()
             if removed_count > 0:
                 self.logger.info(f"🧹 {removed_count} eventos de segurança antigos removidos")
                 
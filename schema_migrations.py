@@ -0,0 +1,691 @@
+"""
+Migrações de esquema versionadas para as bases de dados da clínica
+═══════════════════════════════════════════════════════════════════════
+
+Cada base de dados guarda a versão do seu esquema em PRAGMA user_version.
+No arranque basta ler esse número e aplicar apenas as migrações pendentes,
+em vez de repetir PRAGMA table_info e ALTER TABLE condicionais em cada
+abertura.
+
+Regras para novas migrações:
+- Acrescentar sempre no fim da lista do esquema, com versão +1
+- Nunca alterar uma migração já publicada
+- Escrever migrações idempotentes (IF NOT EXISTS / verificação de colunas),
+  porque o DDL do SQLite não é revertido se a aplicação for interrompida
+  a meio e a migração volta a correr no arranque seguinte
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from types import SimpleNamespace
+
+from protocol_codec import (codificar_passos, metadados_passos, codificar_frequencias)
+
+
+# Bases já verificadas neste processo: (caminho absoluto, esquema)
+_esquemas_verificados = set()
+_lock = threading.Lock()
+
+
+def adicionar_coluna_se_nao_existir(cursor, tabela, coluna, tipo):
+    """Adiciona uma coluna à tabela se ela não existir (migração segura)"""
+    cursor.execute(f"PRAGMA table_info({tabela})")
+    colunas = [row[1] for row in cursor.fetchall()]
+
+    if colunas and coluna not in colunas:
+        cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+
+
+# ═══════════════ PACIENTES.DB ═══════════════
+
+def _pacientes_v1(conn):
+    """Esquema base: pacientes, imagens de íris, consentimentos e documentos"""
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pacientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT UNIQUE,
+            data_nascimento TEXT,
+            natural_de TEXT,
+            profissao TEXT,
+            estado_civil TEXT,
+            contacto TEXT,
+            email TEXT,
+            historico TEXT,
+            sistemas_afetados TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS imagens_iris (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            paciente_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            caminho_imagem TEXT NOT NULL,
+            data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (paciente_id) REFERENCES pacientes (id)
+        )
+    """)
+
+    # Análise de íris
+    adicionar_coluna_se_nao_existir(cursor, 'imagens_iris', 'constituicao', 'TEXT')
+    adicionar_coluna_se_nao_existir(cursor, 'imagens_iris', 'sinais', 'TEXT')
+    adicionar_coluna_se_nao_existir(cursor, 'imagens_iris', 'data_analise', 'TIMESTAMP')
+
+    # Declaração de saúde, observações e campos atuais da interface
+    for coluna, tipo in [
+        ('sexo', 'TEXT'),
+        ('naturalidade', 'TEXT'),
+        ('local_habitual', 'TEXT'),
+        ('estado_emocional', 'TEXT'),
+        ('notas', 'TEXT'),
+        ('biotipo', 'TEXT'),
+        ('declaracao_saude_html', 'TEXT'),
+        ('declaracao_saude_data', 'TEXT'),
+        ('declaracao_saude_assinada', 'BOOLEAN DEFAULT 0'),
+        ('declaracao_saude_data_assinatura', 'TEXT'),
+        ('observacoes', 'TEXT'),
+        ('conheceu', 'TEXT'),
+        ('referenciado', 'TEXT'),
+        ('nif', 'TEXT'),
+        ('declaracao_saude_dados', 'TEXT'),
+        ('declaracao_saude_primeira_criacao', 'TEXT'),
+        ('declaracao_saude_ultima_alteracao', 'TEXT'),
+        ('declaracao_saude_hash', 'TEXT'),
+    ]:
+        adicionar_coluna_se_nao_existir(cursor, 'pacientes', coluna, tipo)
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS consentimentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            paciente_id INTEGER NOT NULL,
+            tipo_consentimento TEXT NOT NULL,
+            data_assinatura TEXT NOT NULL,
+            conteudo_html TEXT,
+            conteudo_texto TEXT,
+            assinatura_paciente BLOB,
+            assinatura_terapeuta BLOB,
+            nome_paciente TEXT,
+            nome_terapeuta TEXT,
+            status TEXT DEFAULT 'assinado',
+            data_criacao TEXT NOT NULL,
+            FOREIGN KEY (paciente_id) REFERENCES pacientes (id)
+        )
+    ''')
+
+    for coluna in ('nome_paciente', 'nome_terapeuta', 'data_anulacao',
+                   'motivo_anulacao', 'dados_formulario'):
+        adicionar_coluna_se_nao_existir(cursor, 'consentimentos', coluna, 'TEXT')
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS prescricoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            paciente_id INTEGER,
+            data_prescricao TEXT,
+            status TEXT DEFAULT 'assinada',
+            arquivo_json TEXT,
+            assinatura_timestamp TEXT,
+            observacoes TEXT,
+            FOREIGN KEY (paciente_id) REFERENCES pacientes (id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS documentos_paciente (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            paciente_id INTEGER,
+            tipo_documento TEXT,
+            caminho_arquivo TEXT,
+            data_criacao TEXT,
+            observacoes TEXT,
+            FOREIGN KEY (paciente_id) REFERENCES pacientes (id)
+        )
+    """)
+
+
+def _pacientes_v2(conn):
+    """HTML e assinaturas dos consentimentos no armazém endereçado por hash"""
+    from consentimentos_manager import (
+        COLUNAS_CONTEUDO_EXTERNO, criar_tabela_conteudo, migrar_conteudo_para_armazem
+    )
+
+    cursor = conn.cursor()
+    for coluna in COLUNAS_CONTEUDO_EXTERNO:
+        adicionar_coluna_se_nao_existir(cursor, 'consentimentos', f'{coluna}_hash', 'TEXT')
+
+    criar_tabela_conteudo(cursor)
+    conn.commit()
+
+    migrados = migrar_conteudo_para_armazem(conn)
+    if migrados:
+        print(f"✅ {migrados} consentimentos migrados para armazenamento externo")
+
+
+# ═══════════════ TERAPIA_QUANTICA.DB ═══════════════
+
+def _terapia_quantica_v1(conn):
+    """Itens e resultados de avaliação, biofeedback e terapia à distância"""
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS assessment_items (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            category TEXT NOT NULL,
+            gender_filter TEXT DEFAULT 'any',
+            description TEXT,
+            frequency REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS assessment_results (
+            id INTEGER PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            patient_id TEXT,
+            item_id INTEGER,
+            score REAL,
+            timestamp TIMESTAMP,
+            FOREIGN KEY (item_id) REFERENCES assessment_items (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS biofeedback_sessions (
+            id INTEGER PRIMARY KEY,
+            patient_id TEXT,
+            frequencies TEXT,  -- JSON array
+            wave_type TEXT,
+            amplitude REAL,
+            compensation REAL,
+            duration_minutes INTEGER,
+            timestamp TIMESTAMP,
+            notes TEXT
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS distance_therapy_sessions (
+            id TEXT PRIMARY KEY,
+            patient_name TEXT,
+            patient_gender TEXT,
+            start_date TEXT,
+            end_date TEXT,
+            duration_days INTEGER,
+            reactive_items TEXT,  -- JSON
+            frequencies TEXT,     -- JSON
+            created_at TEXT,
+            status TEXT,
+            session_type TEXT
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS distance_therapy_iterations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            timestamp TEXT,
+            items_processed INTEGER,
+            status TEXT,
+            FOREIGN KEY (session_id) REFERENCES distance_therapy_sessions (id)
+        )
+    ''')
+
+
+# ═══════════════ THERAPY_SESSIONS.DB ═══════════════
+
+def _therapy_sessions_v1(conn):
+    """Protocolos, sessões e dados de biofeedback"""
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS therapy_protocols (
+            protocol_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT,
+            category TEXT,
+            steps_json TEXT NOT NULL,
+            created_by TEXT,
+            created_at TIMESTAMP,
+            iris_based BOOLEAN DEFAULT 0,
+            iris_data_json TEXT,
+            active BOOLEAN DEFAULT 1
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS therapy_sessions (
+            session_id TEXT PRIMARY KEY,
+            patient_id TEXT,
+            patient_name TEXT,
+            protocol_id TEXT,
+            protocol_name TEXT,
+            start_time TIMESTAMP,
+            end_time TIMESTAMP,
+            status TEXT,
+            notes TEXT,
+            biofeedback_data_json TEXT,
+            results_json TEXT,
+            FOREIGN KEY (protocol_id) REFERENCES therapy_protocols (protocol_id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS biofeedback_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            timestamp TIMESTAMP,
+            frequency REAL,
+            amplitude REAL,
+            offset REAL,
+            measured_values_json TEXT,
+            FOREIGN KEY (session_id) REFERENCES therapy_sessions (session_id)
+        )
+    ''')
+
+
+def _therapy_sessions_v2(conn):
+    """Índices para o histórico (por paciente e global, mais recentes primeiro)"""
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_therapy_sessions_paciente_inicio
+        ON therapy_sessions (patient_id, start_time DESC)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_therapy_sessions_inicio
+        ON therapy_sessions (start_time DESC)
+    ''')
+
+
+def _therapy_sessions_v3(conn):
+    """Passos em binário por colunas e metadados indexados dos protocolos"""
+    cursor = conn.cursor()
+
+    for coluna, tipo in (('steps_blob', 'BLOB'), ('step_count', 'INTEGER'),
+                         ('total_duration', 'REAL'), ('freq_min', 'REAL'), ('freq_max', 'REAL')):
+        adicionar_coluna_se_nao_existir(cursor, 'therapy_protocols', coluna, tipo)
+
+    # Converter os protocolos existentes (o steps_json antigo fica como estava)
+    cursor.execute("SELECT protocol_id, steps_json FROM therapy_protocols WHERE steps_blob IS NULL")
+    for protocol_id, steps_json in cursor.fetchall():
+        try:
+            passos = [SimpleNamespace(**passo) for passo in json.loads(steps_json or '[]')]
+            blob = codificar_passos(passos)
+        except (ValueError, TypeError, AttributeError):
+            continue  # passos ilegíveis: continuam a ser lidos do JSON
+        meta = metadados_passos(passos)
+        cursor.execute('''
+            UPDATE therapy_protocols
+            SET steps_blob = ?, step_count = ?, total_duration = ?, freq_min = ?, freq_max = ?
+            WHERE protocol_id = ?
+        ''', (blob, meta['step_count'], meta['total_duration'], meta['freq_min'],
+              meta['freq_max'], protocol_id))
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_therapy_protocols_listagem
+        ON therapy_protocols (active, category, created_at DESC)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_therapy_protocols_frequencias
+        ON therapy_protocols (active, freq_min, freq_max)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_therapy_protocols_duracao
+        ON therapy_protocols (active, total_duration)
+    ''')
+
+
+# ═══════════════ FREQUENCIES.DB ═══════════════
+
+def _frequencies_v1(conn):
+    """Protocolos de frequências, sessões e protocolos personalizados"""
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS frequency_protocols (
+            id INTEGER PRIMARY KEY,
+            condition_name TEXT NOT NULL,
+            frequency REAL NOT NULL,
+            description TEXT,
+            source TEXT,
+            category TEXT,
+            amplitude REAL DEFAULT 3.0,
+            duration INTEGER DEFAULT 5,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS therapy_sessions (
+            id INTEGER PRIMARY KEY,
+            patient_id TEXT,
+            protocol_name TEXT,
+            start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            end_time TIMESTAMP,
+            frequencies_used TEXT,  -- JSON array
+            amplitude REAL,
+            duration INTEGER,
+            notes TEXT,
+            biofeedback_data TEXT  -- JSON
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS custom_protocols (
+            id INTEGER PRIMARY KEY,
+            protocol_name TEXT UNIQUE NOT NULL,
+            frequencies TEXT NOT NULL,  -- JSON array
+            description TEXT,
+            created_by TEXT,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _frequencies_v2(conn):
+    """Frequências dos protocolos personalizados em binário, com metadados"""
+    cursor = conn.cursor()
+
+    for coluna, tipo in (('frequencies_blob', 'BLOB'), ('n_frequencies', 'INTEGER'),
+                         ('freq_min', 'REAL'), ('freq_max', 'REAL')):
+        adicionar_coluna_se_nao_existir(cursor, 'custom_protocols', coluna, tipo)
+
+    cursor.execute("SELECT id, frequencies FROM custom_protocols WHERE frequencies_blob IS NULL")
+    for protocolo_id, frequencias_json in cursor.fetchall():
+        try:
+            frequencias = json.loads(frequencias_json or '[]')
+        except ValueError:
+            continue
+        blob = codificar_frequencias(frequencias) if isinstance(frequencias, list) else None
+        if blob is None:
+            continue  # valores não numéricos: continuam em JSON
+        cursor.execute('''
+            UPDATE custom_protocols
+            SET frequencies_blob = ?, n_frequencies = ?, freq_min = ?, freq_max = ?
+            WHERE id = ?
+        ''', (blob, len(frequencias), min(frequencias, default=None),
+              max(frequencias, default=None), protocolo_id))
+
+
+# ═══════════════ EMAILS_AGENDADOS.DB ═══════════════
+
+def _emails_agendados_v1(conn):
+    """Fila de emails agendados indexada por estado e hora de envio"""
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS emails_agendados (
+            id TEXT PRIMARY KEY,
+            data_criacao TEXT,
+            data_envio TEXT,
+            data_envio_ts REAL,  -- epoch; NULL se a data for inválida
+            paciente_id TEXT,
+            paciente_nome TEXT,
+            destinatario TEXT,
+            assunto TEXT,
+            mensagem TEXT,
+            anexos_json TEXT,
+            status TEXT NOT NULL DEFAULT 'agendado',
+            data_envio_real TEXT,
+            data_falha TEXT,
+            data_cancelamento TEXT,
+            erro TEXT,
+            reclamado_ts REAL
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_emails_agendados_status_envio
+        ON emails_agendados (status, data_envio_ts)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_emails_agendados_paciente
+        ON emails_agendados (paciente_id)
+    ''')
+
+
+# ═══════════════ SESSION_ANALYTICS.DB ═══════════════
+
+def _session_analytics_v1(conn):
+    """Passos de sessões concluídas e agregados por paciente e por frequência"""
+    cursor = conn.cursor()
+
+    # Uma linha por sessão concluída (terapia, avaliação ou biofeedback)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sessoes (
+            origem TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            patient_id TEXT NOT NULL DEFAULT '',
+            patient_name TEXT,
+            protocol_name TEXT,
+            inicio_ts REAL,
+            fim_ts REAL,
+            status TEXT,
+            passos INTEGER,
+            duracao_s REAL,
+            score_medio REAL,
+            notas TEXT,
+            PRIMARY KEY (origem, session_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sessoes_paciente_inicio
+        ON sessoes (patient_id, inicio_ts DESC)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sessoes_inicio
+        ON sessoes (inicio_ts DESC)
+    ''')
+
+    # Factos: uma linha por passo; os índices cobrem as consultas de série temporal
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS passos (
+            id INTEGER PRIMARY KEY,
+            origem TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            patient_id TEXT NOT NULL DEFAULT '',
+            inicio_ts REAL,
+            frequencia REAL,
+            duracao_s REAL,
+            amplitude REAL,
+            score REAL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_passos_paciente_cobertura
+        ON passos (patient_id, frequencia, inicio_ts, duracao_s, score)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_passos_sessao
+        ON passos (origem, session_id)
+    ''')
+
+    # Agregados mantidos a cada sessão registada
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS agregado_paciente (
+            patient_id TEXT NOT NULL,
+            origem TEXT NOT NULL,
+            sessoes INTEGER NOT NULL,
+            passos INTEGER NOT NULL,
+            duracao_s REAL NOT NULL,
+            score_soma REAL NOT NULL,
+            score_n INTEGER NOT NULL,
+            primeira_ts REAL,
+            ultima_ts REAL,
+            PRIMARY KEY (patient_id, origem)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS agregado_frequencia (
+            frequencia REAL NOT NULL,
+            origem TEXT NOT NULL,
+            passos INTEGER NOT NULL,
+            duracao_s REAL NOT NULL,
+            score_soma REAL NOT NULL,
+            score_n INTEGER NOT NULL,
+            PRIMARY KEY (frequencia, origem)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS agregado_paciente_frequencia (
+            patient_id TEXT NOT NULL,
+            frequencia REAL NOT NULL,
+            origem TEXT NOT NULL,
+            passos INTEGER NOT NULL,
+            duracao_s REAL NOT NULL,
+            score_soma REAL NOT NULL,
+            score_n INTEGER NOT NULL,
+            ultima_ts REAL,
+            PRIMARY KEY (patient_id, frequencia, origem)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _session_analytics_v2(conn):
+    """Importa uma vez as sessões gravadas antes da análise (bases na mesma pasta)"""
+    from session_analytics import importar_sessoes
+
+    caminho = conn.execute('PRAGMA database_list').fetchone()[2]
+    pasta = os.path.dirname(caminho) if caminho else ''
+    importar_sessoes(conn, os.path.join(pasta, 'therapy_sessions.db'),
+                     os.path.join(pasta, 'terapia_quantica.db'))
+
+
+# ═══════════════ SAFETY_EVENTS.DB ═══════════════
+
+def _safety_events_v1(conn):
+    """Catálogo das partições diárias do diário de eventos de segurança"""
+    cursor = conn.cursor()
+
+    # As tabelas eventos_AAAAMMDD são criadas pelo diário quando chega o primeiro evento do dia
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS particoes_eventos (
+            nome TEXT PRIMARY KEY,
+            inicio_ts REAL NOT NULL,
+            fim_ts REAL NOT NULL,
+            eventos INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_particoes_eventos_periodo
+        ON particoes_eventos (inicio_ts, fim_ts)
+    ''')
+
+
+# ═══════════════ TODOS.DB ═══════════════
+
+def _todos_v1(conn):
+    """Lista de tarefas (antes reescrita inteira em todos.json a cada alteração)"""
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS todos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            created_date TEXT,
+            priority TEXT NOT NULL DEFAULT 'Normal'
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_todos_completed
+        ON todos (completed)
+    ''')
+
+
+# Registo de migrações: esquema -> [(versão, descrição, função)]
+MIGRACOES = {
+    'pacientes': [
+        (1, 'Esquema base de pacientes e consentimentos', _pacientes_v1),
+        (2, 'Armazém externo para HTML e assinaturas', _pacientes_v2),
+    ],
+    'terapia_quantica': [
+        (1, 'Esquema base de terapia quântica', _terapia_quantica_v1),
+    ],
+    'therapy_sessions': [
+        (1, 'Esquema base de sessões terapêuticas', _therapy_sessions_v1),
+        (2, 'Índices do histórico de sessões', _therapy_sessions_v2),
+        (3, 'Passos binários e metadados indexados dos protocolos', _therapy_sessions_v3),
+    ],
+    'frequencies': [
+        (1, 'Esquema base de frequências', _frequencies_v1),
+        (2, 'Frequências binárias dos protocolos personalizados', _frequencies_v2),
+    ],
+    'emails_agendados': [
+        (1, 'Fila indexada de emails agendados', _emails_agendados_v1),
+    ],
+    'session_analytics': [
+        (1, 'Passos e agregados de sessões concluídas', _session_analytics_v1),
+        (2, 'Importação das sessões já gravadas', _session_analytics_v2),
+    ],
+    'safety_events': [
+        (1, 'Catálogo de partições do diário de segurança', _safety_events_v1),
+    ],
+    'todos': [
+        (1, 'Lista de tarefas em SQLite', _todos_v1),
+    ],
+}
+
+
+def versao_atual(esquema):
+    """Versão mais recente registada para o esquema"""
+    return MIGRACOES[esquema][-1][0] if MIGRACOES[esquema] else 0
+
+
+def obter_versao(conn):
+    """Lê a versão do esquema guardada na base de dados"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def aplicar_migracoes(db_path, esquema):
+    """
+    Aplica as migrações pendentes de um esquema
+
+    No caminho rápido (base já atualizada) custa apenas uma leitura de
+    PRAGMA user_version; chamadas repetidas no mesmo processo não tocam
+    na base de dados.
+
+    Args:
+        db_path (str): Caminho da base de dados SQLite
+        esquema (str): Nome do esquema em MIGRACOES
+
+    Returns:
+        int: Versão do esquema após aplicar as migrações
+    """
+    chave = (os.path.abspath(db_path), esquema)
+    if chave in _esquemas_verificados:
+        return versao_atual(esquema)
+
+    with _lock:
+        if chave in _esquemas_verificados:
+            return versao_atual(esquema)
+
+        conn = sqlite3.connect(db_path)
+        try:
+            versao = obter_versao(conn)
+
+            for numero, descricao, migracao in MIGRACOES[esquema]:
+                if numero <= versao:
+                    continue
+
+                migracao(conn)
+                conn.execute(f'PRAGMA user_version = {numero}')
+                conn.commit()
+                versao = numero
+                logging.info(f"[MIGRAÇÃO] {esquema} v{numero}: {descricao}")
+
+            _esquemas_verificados.add(chave)
+            return versao
+        finally:
+            conn.close()
+
+
+def limpar_cache_verificacao():
+    """Esquece as bases verificadas (testes e benchmarks)"""
+    _esquemas_verificados.clear()
@@ -0,0 +1,441 @@
+"""
+📊 Análise de Sessões Concluídas em SQLite
+Guarda os passos de cada sessão de terapia, avaliação ou biofeedback
+concluída e mantém agregados por paciente e por frequência, atualizados
+no registo. Histórico e relatórios leem os agregados (ou índices de
+cobertura) em vez de recarregar e somar as linhas em Python.
+"""
+
+import json
+import os
+import sqlite3
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Iterable
+
+from schema_migrations import aplicar_migracoes
+from protocol_codec import passos_gravados
+from time_utils import para_timestamp
+
+ORIGEM_TERAPIA = "terapia"
+ORIGEM_AVALIACAO = "avaliacao"
+ORIGEM_BIOFEEDBACK = "biofeedback"
+
+COLUNAS_SESSAO = (
+    "origem", "session_id", "patient_id", "patient_name", "protocol_name", "inicio_ts",
+    "fim_ts", "status", "passos", "duracao_s", "score_medio", "notas",
+)
+
+
+def chave_frequencia(frequencia) -> Optional[float]:
+    """Frequência normalizada para agregação (centésimos de Hz)"""
+    return round(float(frequencia), 2) if frequencia is not None else None
+
+
+class AnaliseSessoes:
+    """Armazém de passos de sessões concluídas com agregados pré-calculados"""
+
+    def __init__(self, db_path: str = "session_analytics.db"):
+        self.db_path = db_path
+        aplicar_migracoes(self.db_path, 'session_analytics')
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ═══════════════ ESCRITA ═══════════════
+
+    def registar_sessao(self, origem: str, session_id: str, passos: List[Dict[str, Any]],
+                        patient_id=None, patient_name: str = None, protocol_name: str = None,
+                        inicio=None, fim=None, status: str = "completed", notas: str = None) -> bool:
+        """
+        Regista uma sessão concluída e os seus passos
+
+        Cada passo é um dicionário com frequency e, opcionalmente,
+        duration_s, amplitude, score e timestamp. Devolve False se a sessão
+        já estava registada (o registo é idempotente).
+        """
+        return self.registar_sessoes([{
+            "origem": origem, "session_id": session_id, "passos": passos,
+            "patient_id": patient_id, "patient_name": patient_name,
+            "protocol_name": protocol_name, "inicio": inicio, "fim": fim,
+            "status": status, "notas": notas,
+        }]) == 1
+
+    def registar_sessoes(self, sessoes: Iterable[Dict[str, Any]]) -> int:
+        """Regista várias sessões numa única transação; devolve quantas eram novas"""
+        novas = 0
+        conn = self._connect()
+        try:
+            with conn:
+                for sessao in sessoes:
+                    if self._registar(conn, sessao):
+                        novas += 1
+        finally:
+            conn.close()
+        return novas
+
+    @staticmethod
+    def _registar(conn, sessao: Dict[str, Any]) -> bool:
+        origem = sessao["origem"]
+        session_id = str(sessao["session_id"])
+        patient_id = str(sessao.get("patient_id") or "")
+        inicio_ts = para_timestamp(sessao.get("inicio"))
+        fim_ts = para_timestamp(sessao.get("fim"))
+
+        linhas = []
+        for passo in sessao.get("passos") or []:
+            frequencia = chave_frequencia(passo.get("frequency"))
+            if frequencia is None:
+                continue
+            linhas.append((
+                origem, session_id, patient_id,
+                para_timestamp(passo.get("timestamp")) or inicio_ts,
+                frequencia,
+                float(passo.get("duration_s") or 0.0),
+                passo.get("amplitude"),
+                passo.get("score"),
+            ))
+
+        scores = [linha[7] for linha in linhas if linha[7] is not None]
+        duracao = sum(linha[5] for linha in linhas)
+        cursor = conn.execute('''
+            INSERT OR IGNORE INTO sessoes
+            (origem, session_id, patient_id, patient_name, protocol_name, inicio_ts, fim_ts,
+             status, passos, duracao_s, score_medio, notas)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            origem, session_id, patient_id, sessao.get("patient_name"), sessao.get("protocol_name"),
+            inicio_ts, fim_ts, sessao.get("status", "completed"), len(linhas), duracao,
+            sum(scores) / len(scores) if scores else None, sessao.get("notas"),
+        ))
+        if cursor.rowcount == 0:
+            return False
+
+        conn.executemany('''
+            INSERT INTO passos (origem, session_id, patient_id, inicio_ts, frequencia,
+                                duracao_s, amplitude, score)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', linhas)
+
+        conn.execute('''
+            INSERT INTO agregado_paciente
+            (patient_id, origem, sessoes, passos, duracao_s, score_soma, score_n, primeira_ts, ultima_ts)
+            VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (patient_id, origem) DO UPDATE SET
+                sessoes = sessoes + 1,
+                passos = passos + excluded.passos,
+                duracao_s = duracao_s + excluded.duracao_s,
+                score_soma = score_soma + excluded.score_soma,
+                score_n = score_n + excluded.score_n,
+                primeira_ts = MIN(COALESCE(primeira_ts, excluded.primeira_ts),
+                                  COALESCE(excluded.primeira_ts, primeira_ts)),
+                ultima_ts = MAX(COALESCE(ultima_ts, excluded.ultima_ts),
+                                COALESCE(excluded.ultima_ts, ultima_ts))
+        ''', (patient_id, origem, len(linhas), duracao, sum(scores), len(scores), inicio_ts, inicio_ts))
+
+        # Agregar primeiro dentro da sessão: um upsert por frequência distinta
+        por_frequencia = defaultdict(lambda: [0, 0.0, 0.0, 0])
+        for linha in linhas:
+            acumulado = por_frequencia[linha[4]]
+            acumulado[0] += 1
+            acumulado[1] += linha[5]
+            if linha[7] is not None:
+                acumulado[2] += linha[7]
+                acumulado[3] += 1
+
+        conn.executemany('''
+            INSERT INTO agregado_frequencia (frequencia, origem, passos, duracao_s, score_soma, score_n)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (frequencia, origem) DO UPDATE SET
+                passos = passos + excluded.passos,
+                duracao_s = duracao_s + excluded.duracao_s,
+                score_soma = score_soma + excluded.score_soma,
+                score_n = score_n + excluded.score_n
+        ''', [(frequencia, origem, *valores) for frequencia, valores in por_frequencia.items()])
+
+        conn.executemany('''
+            INSERT INTO agregado_paciente_frequencia
+            (patient_id, frequencia, origem, passos, duracao_s, score_soma, score_n, ultima_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (patient_id, frequencia, origem) DO UPDATE SET
+                passos = passos + excluded.passos,
+                duracao_s = duracao_s + excluded.duracao_s,
+                score_soma = score_soma + excluded.score_soma,
+                score_n = score_n + excluded.score_n,
+                ultima_ts = MAX(COALESCE(ultima_ts, excluded.ultima_ts),
+                                COALESCE(excluded.ultima_ts, ultima_ts))
+        ''', [(patient_id, frequencia, origem, *valores, inicio_ts)
+              for frequencia, valores in por_frequencia.items()])
+        return True
+
+    def reconstruir_agregados(self):
+        """Recalcula todos os agregados a partir dos passos (recuperação/verificação)"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM agregado_paciente")
+                conn.execute("DELETE FROM agregado_frequencia")
+                conn.execute("DELETE FROM agregado_paciente_frequencia")
+                conn.execute('''
+                    INSERT INTO agregado_paciente
+                    SELECT s.patient_id, s.origem, COUNT(*), SUM(s.passos), SUM(s.duracao_s),
+                           COALESCE(SUM(p.score_soma), 0), COALESCE(SUM(p.score_n), 0),
+                           MIN(s.inicio_ts), MAX(s.inicio_ts)
+                    FROM sessoes s
+                    LEFT JOIN (SELECT origem, session_id, SUM(score) AS score_soma,
+                                      COUNT(score) AS score_n
+                               FROM passos GROUP BY origem, session_id) p
+                      ON p.origem = s.origem AND p.session_id = s.session_id
+                    GROUP BY s.patient_id, s.origem
+                ''')
+                conn.execute('''
+                    INSERT INTO agregado_frequencia
+                    SELECT frequencia, origem, COUNT(*), SUM(duracao_s),
+                           COALESCE(SUM(score), 0), COUNT(score)
+                    FROM passos GROUP BY frequencia, origem
+                ''')
+                conn.execute('''
+                    INSERT INTO agregado_paciente_frequencia
+                    SELECT patient_id, frequencia, origem, COUNT(*), SUM(duracao_s),
+                           COALESCE(SUM(score), 0), COUNT(score), MAX(inicio_ts)
+                    FROM passos GROUP BY patient_id, frequencia, origem
+                ''')
+        finally:
+            conn.close()
+
+    # ═══════════════ LEITURA ═══════════════
+
+    def historico(self, patient_id=None, origem: str = None, desde=None, ate=None,
+                  limite: int = 50) -> List[Dict[str, Any]]:
+        """Sessões mais recentes primeiro (usa idx_sessoes_paciente_inicio/idx_sessoes_inicio)"""
+        condicoes, parametros = [], []
+        if patient_id is not None:
+            condicoes.append("patient_id = ?")
+            parametros.append(str(patient_id))
+        if origem:
+            condicoes.append("origem = ?")
+            parametros.append(origem)
+        if desde is not None:
+            condicoes.append("inicio_ts >= ?")
+            parametros.append(para_timestamp(desde))
+        if ate is not None:
+            condicoes.append("inicio_ts <= ?")
+            parametros.append(para_timestamp(ate))
+
+        consulta = f"SELECT {', '.join(COLUNAS_SESSAO)} FROM sessoes"
+        if condicoes:
+            consulta += " WHERE " + " AND ".join(condicoes)
+        consulta += " ORDER BY inicio_ts DESC LIMIT ?"
+        parametros.append(limite)
+
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute(consulta, parametros)]
+        finally:
+            conn.close()
+
+    def resumo_paciente(self, patient_id, frequencias: int = 10) -> Dict[str, Any]:
+        """Totais por origem e frequências mais usadas de um paciente"""
+        patient_id = str(patient_id or "")
+        conn = self._connect()
+        try:
+            por_origem = {}
+            for row in conn.execute('''
+                SELECT origem, sessoes, passos, duracao_s, score_soma, score_n, primeira_ts, ultima_ts
+                FROM agregado_paciente WHERE patient_id = ?
+            ''', (patient_id,)):
+                por_origem[row["origem"]] = {
+                    "sessoes": row["sessoes"],
+                    "passos": row["passos"],
+                    "duracao_s": row["duracao_s"],
+                    "score_medio": row["score_soma"] / row["score_n"] if row["score_n"] else None,
+                    "primeira_ts": row["primeira_ts"],
+                    "ultima_ts": row["ultima_ts"],
+                }
+
+            mais_usadas = [{
+                "frequencia": row["frequencia"],
+                "passos": row["passos"],
+                "duracao_s": row["duracao_s"],
+                "score_medio": row["score_soma"] / row["score_n"] if row["score_n"] else None,
+                "ultima_ts": row["ultima_ts"],
+            } for row in conn.execute('''
+                SELECT frequencia, SUM(passos) AS passos, SUM(duracao_s) AS duracao_s,
+                       SUM(score_soma) AS score_soma, SUM(score_n) AS score_n, MAX(ultima_ts) AS ultima_ts
+                FROM agregado_paciente_frequencia WHERE patient_id = ?
+                GROUP BY frequencia ORDER BY passos DESC, duracao_s DESC LIMIT ?
+            ''', (patient_id, frequencias))]
+        finally:
+            conn.close()
+
+        return {"patient_id": patient_id, "por_origem": por_origem, "frequencias": mais_usadas}
+
+    def resumo_frequencias(self, origem: str = None, limite: int = 20) -> List[Dict[str, Any]]:
+        """Frequências mais usadas (todas as origens ou só uma)"""
+        consulta = '''
+            SELECT frequencia, SUM(passos) AS passos, SUM(duracao_s) AS duracao_s,
+                   SUM(score_soma) AS score_soma, SUM(score_n) AS score_n
+            FROM agregado_frequencia
+        '''
+        parametros = []
+        if origem:
+            consulta += " WHERE origem = ?"
+            parametros.append(origem)
+        consulta += " GROUP BY frequencia ORDER BY passos DESC, duracao_s DESC LIMIT ?"
+        parametros.append(limite)
+
+        conn = self._connect()
+        try:
+            return [{
+                "frequencia": row["frequencia"],
+                "passos": row["passos"],
+                "duracao_s": row["duracao_s"],
+                "score_medio": row["score_soma"] / row["score_n"] if row["score_n"] else None,
+            } for row in conn.execute(consulta, parametros)]
+        finally:
+            conn.close()
+
+    def serie_paciente(self, patient_id, frequencia, desde=None) -> List[Dict[str, Any]]:
+        """Passos de uma frequência de um paciente ao longo do tempo (só o índice de cobertura)"""
+        consulta = '''
+            SELECT inicio_ts, duracao_s, score FROM passos
+            WHERE patient_id = ? AND frequencia = ?
+        '''
+        parametros = [str(patient_id or ""), chave_frequencia(frequencia)]
+        if desde is not None:
+            consulta += " AND inicio_ts >= ?"
+            parametros.append(para_timestamp(desde))
+        consulta += " ORDER BY inicio_ts"
+
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute(consulta, parametros)]
+        finally:
+            conn.close()
+
+    # ═══════════════ IMPORTAÇÃO ═══════════════
+
+    def importar_existentes(self, therapy_db: str = "therapy_sessions.db",
+                            quantica_db: str = "terapia_quantica.db") -> int:
+        """
+        Importa as sessões já gravadas nas bases de terapia e avaliação
+
+        Sessões já registadas são ignoradas, por isso pode correr mais de uma
+        vez. Numa base nova corre uma vez, na migração v2 de session_analytics.
+        """
+        conn = self._connect()
+        try:
+            return importar_sessoes(conn, therapy_db, quantica_db)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _sessoes_terapia(db_path: str) -> List[Dict[str, Any]]:
+        try:
+            conn = sqlite3.connect(db_path)
+            # Bases anteriores à migração v3 de therapy_sessions não têm steps_blob
+            colunas = {row[1] for row in conn.execute("PRAGMA table_info(therapy_protocols)")}
+            steps_blob = "p.steps_blob" if "steps_blob" in colunas else "NULL"
+            linhas = conn.execute(f'''
+                SELECT s.session_id, s.patient_id, s.patient_name, s.protocol_name,
+                       s.start_time, s.end_time, s.status, s.notes, p.steps_json, {steps_blob}
+                FROM therapy_sessions s
+                LEFT JOIN therapy_protocols p ON p.protocol_id = s.protocol_id
+                WHERE s.status = 'completed'
+            ''').fetchall()
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️ Sessões de terapia não importadas: {e}")
+            return []
+
+        return [{
+            "origem": ORIGEM_TERAPIA, "session_id": row[0], "patient_id": row[1],
+            "patient_name": row[2], "protocol_name": row[3], "inicio": row[4], "fim": row[5],
+            "status": row[6], "notas": row[7],
+            "passos": passos_de_protocolo(passos_gravados(row[9], row[8])),
+        } for row in linhas]
+
+    @staticmethod
+    def _sessoes_quantica(db_path: str) -> List[Dict[str, Any]]:
+        try:
+            conn = sqlite3.connect(db_path)
+            resultados = conn.execute('''
+                SELECT r.session_id, r.patient_id, r.score, r.timestamp, i.frequency
+                FROM assessment_results r
+                LEFT JOIN assessment_items i ON i.id = r.item_id
+                ORDER BY r.session_id
+            ''').fetchall()
+            biofeedback = conn.execute('''
+                SELECT id, patient_id, frequencies, amplitude, duration_minutes, timestamp, notes
+                FROM biofeedback_sessions
+            ''').fetchall()
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️ Avaliações e biofeedback não importados: {e}")
+            return []
+
+        avaliacoes = {}
+        for session_id, patient_id, score, timestamp, frequencia in resultados:
+            sessao = avaliacoes.setdefault(session_id, {
+                "origem": ORIGEM_AVALIACAO, "session_id": session_id, "patient_id": patient_id,
+                "inicio": timestamp, "passos": [],
+            })
+            sessao["passos"].append({"frequency": frequencia, "score": score, "timestamp": timestamp})
+
+        sessoes = list(avaliacoes.values())
+        for row in biofeedback:
+            sessoes.append({
+                "origem": ORIGEM_BIOFEEDBACK, "session_id": row[0], "patient_id": row[1],
+                "inicio": row[5], "notas": row[6],
+                "passos": passos_de_biofeedback(json.loads(row[2] or "[]"), row[3], row[4]),
+            })
+        return sessoes
+
+
+def importar_sessoes(conn, therapy_db: str = "therapy_sessions.db",
+                     quantica_db: str = "terapia_quantica.db") -> int:
+    """
+    Regista na base de análise (conn) as sessões das bases de terapia e
+    avaliação, numa única transação; bases inexistentes são ignoradas
+    """
+    sessoes = []
+    if os.path.exists(therapy_db):
+        sessoes.extend(AnaliseSessoes._sessoes_terapia(therapy_db))
+    if os.path.exists(quantica_db):
+        sessoes.extend(AnaliseSessoes._sessoes_quantica(quantica_db))
+
+    with conn:
+        importadas = sum(AnaliseSessoes._registar(conn, sessao) for sessao in sessoes)
+    if importadas:
+        print(f"✅ {importadas} sessões importadas para a análise")
+    return importadas
+
+
+def passos_de_protocolo(passos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Passos de um protocolo (FrequencyStep serializado) no formato da análise"""
+    return [{
+        "frequency": passo.get("frequency"),
+        "duration_s": passo.get("duration_seconds"),
+        "amplitude": passo.get("amplitude"),
+    } for passo in passos]
+
+
+def passos_de_biofeedback(frequencias: List[float], amplitude, duracao_minutos) -> List[Dict[str, Any]]:
+    """Sessão de biofeedback: a duração total repartida pelas frequências"""
+    if not frequencias:
+        return []
+    duracao = (duracao_minutos or 0) * 60 / len(frequencias)
+    return [{"frequency": frequencia, "duration_s": duracao, "amplitude": amplitude}
+            for frequencia in frequencias]
+
+
+_analise = None
+
+
+def obter_analise() -> AnaliseSessoes:
+    """Instância partilhada (base session_analytics.db na pasta atual)"""
+    global _analise
+    if _analise is None:
+        _analise = AnaliseSessoes()
+    return _analise
@@ -0,0 +1,266 @@
+"""
+Codificação vetorial de assinaturas e rasterização em cache
+- Cada traço é guardado como uma lista de pontos quantizados (1/ESCALA px)
+  e codificados por diferenças em varints zigzag: um movimento do rato
+  ocupa tipicamente 2 bytes, em vez de um PNG inteiro por assinatura
+- A imagem é desenhada uma só vez por (hash, tamanho) com um QPainterPath
+  por traço, a qualquer DPI, e fica em cache (QImage, PNG e base64)
+- A codificação não depende de Qt; só a rasterização importa PyQt6
+"""
+
+import base64
+import hashlib
+import struct
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+MAGIA_ASSINATURA = b'BSG1'
+MAGIA_PNG = b'\x89PNG\r\n\x1a\n'
+_CABECALHO = struct.Struct('<4sHHBH')  # magia, largura, altura, escala, nº de traços
+
+ESCALA = 4              # subdivisões por pixel (resolução de 0,25 px)
+DPI_ECRA = 96           # as coordenadas dos canvas estão em pixels de ecrã
+ESPESSURA_CANETA = 2.0  # espessura da caneta dos canvas, em pixels de ecrã
+MAX_CACHE = 256
+
+Ponto = Tuple[float, float]
+Traco = List[Ponto]
+
+
+class Assinatura(NamedTuple):
+    largura: int
+    altura: int
+    tracos: List[Traco]
+
+
+# ═══════════════ CODIFICAÇÃO ═══════════════
+
+def _escrever_varint(saida: bytearray, valor: int):
+    # zigzag: inteiros pequenos (positivos ou negativos) ficam com poucos bits
+    valor = (valor << 1) ^ (valor >> 63)
+    while valor > 0x7F:
+        saida.append((valor & 0x7F) | 0x80)
+        valor >>= 7
+    saida.append(valor)
+
+
+def codificar_assinatura(tracos: Iterable[Sequence[Ponto]], largura: int, altura: int,
+                         escala: int = ESCALA) -> bytes:
+    """
+    Codifica traços (listas de pontos (x, y) em pixels do canvas)
+
+    Pontos consecutivos que ficam iguais depois da quantização são
+    descartados; traços sem pontos também.
+    """
+    corpo = bytearray()
+    n_tracos = 0
+    ax = ay = 0
+    for traco in tracos:
+        quantizados = []
+        for x, y in traco:
+            ponto = (round(x * escala), round(y * escala))
+            if not quantizados or ponto != quantizados[-1]:
+                quantizados.append(ponto)
+        if not quantizados:
+            continue
+        n_tracos += 1
+        _escrever_varint(corpo, len(quantizados))
+        for qx, qy in quantizados:
+            _escrever_varint(corpo, qx - ax)
+            _escrever_varint(corpo, qy - ay)
+            ax, ay = qx, qy
+    return _CABECALHO.pack(MAGIA_ASSINATURA, int(largura), int(altura), escala, n_tracos) + bytes(corpo)
+
+
+def descodificar_assinatura(dados: bytes) -> Assinatura:
+    """Operação inversa de codificar_assinatura (coordenadas em pixels do canvas)"""
+    magia, largura, altura, escala, n_tracos = _CABECALHO.unpack_from(dados)
+    if magia != MAGIA_ASSINATURA:
+        raise ValueError("Dados não são uma assinatura vetorial")
+
+    inteiros = []
+    valor = deslocamento = 0
+    for byte in memoryview(dados)[_CABECALHO.size:]:
+        valor |= (byte & 0x7F) << deslocamento
+        if byte & 0x80:
+            deslocamento += 7
+        else:
+            inteiros.append((valor >> 1) ^ -(valor & 1))
+            valor = deslocamento = 0
+
+    tracos = []
+    i = 0
+    ax = ay = 0
+    for _ in range(n_tracos):
+        n = inteiros[i]
+        i += 1
+        traco = []
+        for _ in range(n):
+            ax += inteiros[i]
+            ay += inteiros[i + 1]
+            i += 2
+            traco.append((ax / escala, ay / escala))
+        tracos.append(traco)
+    return Assinatura(largura, altura, tracos)
+
+
+def e_assinatura_vetorial(dados: Optional[bytes]) -> bool:
+    return bool(dados) and bytes(dados[:4]) == MAGIA_ASSINATURA
+
+
+def hash_assinatura(dados: bytes) -> str:
+    """Hash do conteúdo (o mesmo sha256 do armazém de conteúdos dos consentimentos)"""
+    return hashlib.sha256(dados).hexdigest()
+
+
+def _xy(ponto) -> Ponto:
+    """Coordenadas de um QPoint/QPointF ou de um tuplo (x, y)"""
+    if hasattr(ponto, 'x') and callable(ponto.x):
+        return ponto.x(), ponto.y()
+    return ponto[0], ponto[1]
+
+
+def tracos_de_segmentos(linhas: Iterable[Iterable[Tuple]]) -> List[Traco]:
+    """
+    Converte o formato do SignatureWidget das declarações de saúde (uma
+    lista de segmentos (início, fim) por linha) em traços de pontos
+    """
+    tracos = []
+    for linha in linhas:
+        traco = []
+        for inicio, fim in linha:
+            if not traco:
+                traco.append(_xy(inicio))
+            traco.append(_xy(fim))
+        if traco:
+            tracos.append(traco)
+    return tracos
+
+
+# ═══════════════ CACHE ═══════════════
+
+class CacheRaster:
+    """LRU thread-safe de imagens rasterizadas, por (hash, largura, altura, formato)"""
+
+    def __init__(self, max_entradas: int = MAX_CACHE):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave: Hashable, criar: Callable[[], object]):
+        with self._lock:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return self._entradas[chave]
+            self.falhas += 1
+        valor = criar()  # fora do lock: rasterizar pode demorar
+        with self._lock:
+            self._entradas[chave] = valor
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+_cache = CacheRaster()
+
+
+def obter_cache_raster() -> CacheRaster:
+    return _cache
+
+
+# ═══════════════ RASTERIZAÇÃO (PyQt6) ═══════════════
+
+def dimensoes_assinatura(dados: bytes) -> Tuple[int, int]:
+    """Largura e altura do canvas de captura, lidas só do cabeçalho"""
+    magia, largura, altura, _, _ = _CABECALHO.unpack_from(dados)
+    if magia != MAGIA_ASSINATURA:
+        raise ValueError("Dados não são uma assinatura vetorial")
+    return largura, altura
+
+
+def tamanho_raster(dados: bytes, largura: Optional[int] = None, altura: Optional[int] = None,
+                   dpi: Optional[float] = None) -> Tuple[int, int]:
+    """Tamanho em pixels: explícito, pelo DPI pedido, ou o do canvas original"""
+    if largura and altura:
+        return int(largura), int(altura)
+    largura_canvas, altura_canvas = dimensoes_assinatura(dados)
+    fator = (dpi / DPI_ECRA) if dpi else 1.0
+    if largura:
+        fator = largura / largura_canvas
+    elif altura:
+        fator = altura / altura_canvas
+    return max(1, round(largura_canvas * fator)), max(1, round(altura_canvas * fator))
+
+
+def _desenhar(dados: bytes, largura: int, altura: int, espessura: float):
+    from PyQt6.QtCore import QPointF, Qt
+    from PyQt6.QtGui import QColor, QImage, QPainter, QPainterPath, QPen
+
+    assinatura = descodificar_assinatura(dados)
+    imagem = QImage(largura, altura, QImage.Format.Format_ARGB32_Premultiplied)
+    imagem.fill(Qt.GlobalColor.white)
+    painter = QPainter(imagem)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    # Escala do canvas original para o tamanho pedido; a caneta escala também
+    painter.scale(largura / max(1, assinatura.largura), altura / max(1, assinatura.altura))
+    painter.setPen(QPen(QColor(0, 0, 0), espessura, Qt.PenStyle.SolidLine,
+                        Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin))
+    for traco in assinatura.tracos:
+        if len(traco) == 1:
+            painter.drawPoint(QPointF(*traco[0]))
+            continue
+        caminho = QPainterPath(QPointF(*traco[0]))
+        for x, y in traco[1:]:
+            caminho.lineTo(x, y)
+        painter.drawPath(caminho)
+    painter.end()
+    return imagem
+
+
+def _png(imagem) -> bytes:
+    from PyQt6.QtCore import QBuffer, QIODevice
+
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    imagem.save(buffer, "PNG")
+    return bytes(buffer.data())
+
+
+def rasterizar_imagem(dados: bytes, largura: Optional[int] = None, altura: Optional[int] = None,
+                      dpi: Optional[float] = None, espessura: float = ESPESSURA_CANETA):
+    """QImage da assinatura (desenhada uma vez por hash e tamanho)"""
+    w, h = tamanho_raster(dados, largura, altura, dpi)
+    return _cache.obter((hash_assinatura(dados), w, h, espessura, 'imagem'),
+                        lambda: _desenhar(dados, w, h, espessura))
+
+
+def rasterizar_png(dados: bytes, largura: Optional[int] = None, altura: Optional[int] = None,
+                   dpi: Optional[float] = None, espessura: float = ESPESSURA_CANETA) -> bytes:
+    """PNG da assinatura; blobs que já são PNG (assinaturas antigas) são devolvidos tal como estão"""
+    if bytes(dados[:8]) == MAGIA_PNG:
+        return bytes(dados)
+    w, h = tamanho_raster(dados, largura, altura, dpi)
+    return _cache.obter((hash_assinatura(dados), w, h, espessura, 'png'),
+                        lambda: _png(rasterizar_imagem(dados, w, h, espessura=espessura)))
+
+
+def rasterizar_base64(dados: bytes, largura: Optional[int] = None, altura: Optional[int] = None,
+                      dpi: Optional[float] = None, espessura: float = ESPESSURA_CANETA) -> str:
+    """PNG em base64 (para HTML e PDF), calculado uma vez por hash e tamanho"""
+    if bytes(dados[:8]) == MAGIA_PNG:
+        return base64.b64encode(dados).decode('ascii')
+    w, h = tamanho_raster(dados, largura, altura, dpi)
+    return _cache.obter((hash_assinatura(dados), w, h, espessura, 'base64'),
+                        lambda: base64.b64encode(rasterizar_png(dados, w, h, espessura=espessura)).decode('ascii'))
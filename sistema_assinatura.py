@@ -15,10 +15,11 @@ from datetime import datetime
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFrame, QLabel, 
                              QPushButton, QGraphicsView, QGraphicsScene, QMessageBox)
 from PyQt6.QtCore import Qt, pyqtSignal, QPointF
-from PyQt6.QtGui import QPainter, QPen, QPixmap, QColor
+from PyQt6.QtGui import QPen, QPixmap, QColor
 
 from biodesk_ui_kit import BiodeskUIKit
 from biodesk_dialogs import mostrar_erro, mostrar_sucesso
+from signature_codec import codificar_assinatura, rasterizar_imagem
 
 class CanvasAssinatura(QGraphicsView):
     """Canvas individual para desenhar assinatura"""
@@ -50,6 +51,7 @@ class CanvasAssinatura(QGraphicsView):
         
         self.drawing = False
         self.last_point = QPointF()
+        self.tracos = []  # pontos de cada traço, para a codificação vetorial
         self.pen = QPen(QColor(0, 0, 0), 2, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
         
         # ✅ CENA AJUSTADA para o novo tamanho - 396x116 (4px de margem para a borda)
@@ -77,6 +79,7 @@ class CanvasAssinatura(QGraphicsView):
         if event.button() == Qt.MouseButton.LeftButton:
             self.drawing = True
             self.last_point = self.mapToScene(event.position().toPoint())
+            self.tracos.append([(self.last_point.x(), self.last_point.y())])
             
     def mouseMoveEvent(self, event):
         if self.drawing and event.buttons() & Qt.MouseButton.LeftButton:
@@ -86,6 +89,7 @@ class CanvasAssinatura(QGraphicsView):
                 current_point.x(), current_point.y(),
                 self.pen
             )
+            self.tracos[-1].append((current_point.x(), current_point.y()))
             self.last_point = current_point
             
     def mouseReleaseEvent(self, event):
@@ -94,6 +98,7 @@ class CanvasAssinatura(QGraphicsView):
             
     def limpar(self):
         """Limpa o canvas preservando a linha de orientação"""
+        self.tracos.clear()
         # Remover todos os itens exceto a linha de orientação
         for item in self.scene.items():
             if item.data(0) != "linha_orientacao":
@@ -110,17 +115,21 @@ class CanvasAssinatura(QGraphicsView):
                            if item.data(0) != "linha_orientacao"]
         return len(itens_assinatura) > 0
         
-    def obter_imagem(self):
-        """Obtém imagem da assinatura como pixmap"""
+    def obter_vetor(self):
+        """Assinatura no formato vetorial compacto (signature_codec)"""
         if not self.tem_assinatura():
             return None
-            
-        pixmap = QPixmap(int(self.scene.width()), int(self.scene.height()))
-        pixmap.fill(Qt.GlobalColor.white)
-        painter = QPainter(pixmap)
-        self.scene.render(painter)
-        painter.end()
-        return pixmap
+        # Um clique sem movimento não desenha nada na cena
+        tracos = [traco for traco in self.tracos if len(traco) > 1]
+        return codificar_assinatura(tracos, int(self.scene.width()), int(self.scene.height()))
+        
+    def obter_imagem(self, dpi=None):
+        """Obtém imagem da assinatura como pixmap (sem a linha de orientação)"""
+        vetor = self.obter_vetor()
+        if vetor is None:
+            return None
+        # Desenhada uma vez por assinatura e tamanho; pedidos repetidos vêm da cache
+        return QPixmap.fromImage(rasterizar_imagem(vetor, dpi=dpi))
 
 class DialogoAssinatura(QDialog):
     """
@@ -325,12 +334,14 @@ class DialogoAssinatura(QDialog):
             'paciente': {
                 'assinado': tem_paciente,
                 'imagem': self.canvas_paciente.obter_imagem() if tem_paciente else None,
+                'vetor': self.canvas_paciente.obter_vetor() if tem_paciente else None,
                 'nome': self.paciente_data.get('nome', '') if self.paciente_data else '',
                 'data': datetime.now().strftime('%d/%m/%Y %H:%M')
             },
             'profissional': {
                 'assinado': tem_profissional,
                 'imagem': self.canvas_profissional.obter_imagem() if tem_profissional else None,
+                'vetor': self.canvas_profissional.obter_vetor() if tem_profissional else None,
                 'nome': 'Nuno Filipe Correia (Naturopata CP 0300450)',
                 'data': datetime.now().strftime('%d/%m/%Y %H:%M')
             },
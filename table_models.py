@@ -0,0 +1,145 @@
+"""
+📋 Modelos de tabela com carregamento incremental
+═══════════════════════════════════════════════════════════════════════
+
+Substituem o preenchimento de QTableWidget/QListWidget (um item por célula
+em cada atualização) por um QAbstractTableModel que guarda apenas a lista
+de linhas: o texto de cada célula é calculado quando a vista o pede e as
+linhas entram na vista em lotes, à medida que o utilizador faz scroll
+(canFetchMore/fetchMore).
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+
+@dataclass
+class ColunaTabela:
+    """
+    Definição de uma coluna; cada função recebe o objeto da linha
+
+    Args:
+        titulo: texto do cabeçalho
+        texto: devolve o texto a mostrar
+        alinhamento: Qt.AlignmentFlag da célula
+        fundo: devolve a cor de fundo (QColor) ou None
+        fonte: devolve a QFont ou None
+        marcado: devolve True/False para colunas com checkbox
+        marcar: chamada com (objeto, valor) quando o utilizador muda a checkbox
+    """
+    titulo: str
+    texto: Callable[[Any], str]
+    alinhamento: Optional[Qt.AlignmentFlag] = None
+    fundo: Optional[Callable[[Any], Any]] = None
+    fonte: Optional[Callable[[Any], Any]] = None
+    marcado: Optional[Callable[[Any], bool]] = None
+    marcar: Optional[Callable[[Any, bool], None]] = None
+
+
+class ModeloTabelaIncremental(QAbstractTableModel):
+    """Modelo genérico sobre uma lista de objetos, carregada em lotes"""
+
+    # Emitido depois de o utilizador marcar/desmarcar uma linha (objeto, marcado)
+    marcacao_alterada = pyqtSignal(object, bool)
+
+    def __init__(self, colunas: List[ColunaTabela], tamanho_lote: int = 200, parent=None):
+        super().__init__(parent)
+        self.colunas = colunas
+        self.tamanho_lote = tamanho_lote
+        self._linhas: List[Any] = []
+        self._carregadas = 0
+
+    # ═══════════════ DADOS ═══════════════
+
+    def definir_linhas(self, linhas: List[Any]):
+        """Substitui todas as linhas (só o primeiro lote entra já na vista)"""
+        self.beginResetModel()
+        self._linhas = list(linhas)
+        self._carregadas = min(self.tamanho_lote, len(self._linhas))
+        self.endResetModel()
+
+    def linha(self, row: int) -> Optional[Any]:
+        """Objeto da linha indicada ou None"""
+        if 0 <= row < self._carregadas:
+            return self._linhas[row]
+        return None
+
+    def total(self) -> int:
+        """Número total de linhas (incluindo as ainda não carregadas na vista)"""
+        return len(self._linhas)
+
+    def linhas(self) -> List[Any]:
+        return self._linhas
+
+    # ═══════════════ CARREGAMENTO INCREMENTAL ═══════════════
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._carregadas < len(self._linhas)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        restantes = len(self._linhas) - self._carregadas
+        quantidade = min(self.tamanho_lote, restantes)
+        if quantidade <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._carregadas, self._carregadas + quantidade - 1)
+        self._carregadas += quantidade
+        self.endInsertRows()
+
+    # ═══════════════ QAbstractTableModel ═══════════════
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._carregadas
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.colunas)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal
+                and 0 <= section < len(self.colunas)):
+            return self.colunas[section].titulo
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and self.colunas[index.column()].marcado is not None:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._carregadas:
+            return None
+
+        objeto = self._linhas[index.row()]
+        coluna = self.colunas[index.column()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return coluna.texto(objeto)
+        if role == Qt.ItemDataRole.UserRole:
+            return objeto
+        if role == Qt.ItemDataRole.TextAlignmentRole and coluna.alinhamento is not None:
+            return coluna.alinhamento
+        if role == Qt.ItemDataRole.BackgroundRole and coluna.fundo is not None:
+            return coluna.fundo(objeto)
+        if role == Qt.ItemDataRole.FontRole and coluna.fonte is not None:
+            return coluna.fonte(objeto)
+        if role == Qt.ItemDataRole.CheckStateRole and coluna.marcado is not None:
+            return Qt.CheckState.Checked if coluna.marcado(objeto) else Qt.CheckState.Unchecked
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.CheckStateRole:
+            return False
+        coluna = self.colunas[index.column()]
+        if coluna.marcar is None:
+            return False
+
+        objeto = self._linhas[index.row()]
+        marcado = Qt.CheckState(value) == Qt.CheckState.Checked
+        coluna.marcar(objeto, marcado)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+        self.marcacao_alterada.emit(objeto, marcado)
+        return True
@@ -33,6 +33,9 @@ from PyQt6.QtGui import *
 from biodesk_ui_kit import BiodeskUIKit
 from biodesk_styles import BiodeskStyles
 from biodesk_dialogs import BiodeskMessageBox as BiodeskDialogs
+from schema_migrations import aplicar_migracoes
+from session_analytics import (obter_analise, passos_de_biofeedback,
+                               ORIGEM_AVALIACAO, ORIGEM_BIOFEEDBACK)
 
 # Hardware imports
 try:
@@ -180,52 +183,7 @@ class DatabaseManager:
         
     def init_database(self):
         """Inicializa a base de dados"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Tabela de itens de avaliação
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS assessment_items (
-                id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                category TEXT NOT NULL,
-                gender_filter TEXT DEFAULT 'any',
-                description TEXT,
-                frequency REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de resultados de avaliação
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS assessment_results (
-                id INTEGER PRIMARY KEY,
-                session_id TEXT NOT NULL,
-                patient_id TEXT,
-                item_id INTEGER,
-                score REAL,
-                timestamp TIMESTAMP,
-                FOREIGN KEY (item_id) REFERENCES assessment_items (id)
-            )
-        ''')
-        
-        # Tabela de protocolos de biofeedback
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS biofeedback_sessions (
-                id INTEGER PRIMARY KEY,
-                patient_id TEXT,
-                frequencies TEXT,  -- JSON array
-                wave_type TEXT,
-                amplitude REAL,
-                compensation REAL,
-                duration_minutes INTEGER,
-                timestamp TIMESTAMP,
-                notes TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        aplicar_migracoes(self.db_path, 'terapia_quantica')
         
         # Popular com dados iniciais se vazio
         self._populate_initial_data()
@@ -323,6 +281,73 @@ class DatabaseManager:
             conn.commit()
         
         conn.close()
+    
+    def result_writer(self, session_id: str, patient_id: Optional[str] = None) -> 'AssessmentResultWriter':
+        """Escritor em lote para os resultados de uma sessão de avaliação"""
+        return AssessmentResultWriter(self.db_path, session_id, patient_id)
+
+class AssessmentResultWriter:
+    """
+    Escrita em lote dos resultados de uma avaliação
+    
+    Os resultados ficam em memória e são gravados com executemany numa única
+    ligação aberta durante toda a avaliação. A cada flush_every resultados o
+    lote pendente é confirmado, por isso uma falha a meio perde no máximo um
+    lote; ao sair do bloco with o que faltar é gravado, mesmo com exceção.
+    """
+    
+    FLUSH_EVERY = 1000
+    
+    def __init__(self, db_path: str, session_id: str, patient_id: Optional[str] = None,
+                 flush_every: Optional[int] = None):
+        self.db_path = db_path
+        self.session_id = session_id
+        self.patient_id = str(patient_id) if patient_id not in (None, "") else None
+        self.flush_every = flush_every or self.FLUSH_EVERY
+        self.written = 0
+        self._pending: List[tuple] = []
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    def __enter__(self) -> 'AssessmentResultWriter':
+        self._conn = sqlite3.connect(self.db_path, timeout=30)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.flush()
+        except Exception as e:
+            if exc_type is None:
+                raise
+            print(f"⚠️ Resultados pendentes da avaliação não gravados: {e}")
+        finally:
+            self._conn.close()
+            self._conn = None
+        return False
+    
+    def add(self, result: AssessmentResult):
+        """Acumula um resultado; grava o lote quando atinge flush_every"""
+        self._pending.append((
+            self.session_id,
+            self.patient_id,
+            result.item.id,
+            result.score,
+            result.timestamp
+        ))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+    
+    def flush(self):
+        """Grava os resultados pendentes numa única transação"""
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany("""
+                INSERT INTO assessment_results
+                (session_id, patient_id, item_id, score, timestamp)
+                VALUES (?, ?, ?, ?, ?)
+            """, self._pending)
+        self.written += len(self._pending)
+        self._pending.clear()
 
 class TerapiaQuanticaWindow(QWidget):
     """
@@ -920,23 +945,31 @@ class TerapiaQuanticaWindow(QWidget):
             self.main_status_label.setText("Calculando ressonâncias...")
             results = []
             
-            for i, item in enumerate(items):
-                self.progress_bar.setValue(20 + int(60 * i / len(items)))
-                QApplication.processEvents()
-                
-                score = self.randomness_generator.calculate_resonance_score(
-                    item, noise_vector
-                )
-                
-                result = AssessmentResult(
-                    item=item,
-                    score=score,
-                    timestamp=datetime.now()
-                )
-                results.append(result)
-                
-                # Salvar na base de dados
-                self.save_assessment_result(result)
+            # Atualizar a interface ~60 vezes por avaliação, não a cada item
+            ui_step = max(1, len(items) // 60)
+            patient_id = self.paciente_data.get('id') if self.paciente_data else None
+            
+            # Resultados gravados em lote numa só ligação (ver AssessmentResultWriter)
+            with self.db_manager.result_writer(self.current_session_id, patient_id) as writer:
+                for i, item in enumerate(items):
+                    if i % ui_step == 0:
+                        self.progress_bar.setValue(20 + int(60 * i / len(items)))
+                        QApplication.processEvents()
+                    
+                    score = self.randomness_generator.calculate_resonance_score(
+                        item, noise_vector
+                    )
+                    
+                    result = AssessmentResult(
+                        item=item,
+                        score=score,
+                        timestamp=datetime.now()
+                    )
+                    results.append(result)
+                    writer.add(result)
+            
+            # Registar na análise de sessões (agregados por paciente/frequência)
+            self.register_assessment_analytics(results)
             
             # Ordenar por pontuação absoluta (descendente)
             results.sort(key=lambda x: abs(x.score), reverse=True)
@@ -1015,23 +1048,26 @@ class TerapiaQuanticaWindow(QWidget):
         return items
         
     def save_assessment_result(self, result: AssessmentResult):
-        """Salva resultado na base de dados"""
-        conn = sqlite3.connect(self.db_manager.db_path)
-        cursor = conn.cursor()
+        """Salva um resultado isolado (as avaliações completas gravam em lote)"""
+        patient_id = self.paciente_data.get('id') if self.paciente_data else None
+        with self.db_manager.result_writer(self.current_session_id, patient_id) as writer:
+            writer.add(result)
         
-        cursor.execute("""
-            INSERT INTO assessment_results 
-            (session_id, item_id, score, timestamp)
-            VALUES (?, ?, ?, ?)
-        """, (
-            self.current_session_id,
-            result.item.id,
-            result.score,
-            result.timestamp
-        ))
-        
-        conn.commit()
-        conn.close()
+    def register_assessment_analytics(self, results: List[AssessmentResult]):
+        """Regista a avaliação concluída na análise de sessões"""
+        try:
+            obter_analise().registar_sessao(
+                ORIGEM_AVALIACAO, self.current_session_id,
+                [{'frequency': r.item.frequency, 'score': r.score, 'timestamp': r.timestamp}
+                 for r in results],
+                patient_id=self.paciente_data.get('id') if self.paciente_data else None,
+                patient_name=self.paciente_data.get('nome') if self.paciente_data else None,
+                protocol_name="Avaliação",
+                inicio=results[0].timestamp if results else datetime.now(),
+                fim=datetime.now()
+            )
+        except Exception as e:
+            print(f"⚠️ Avaliação não registada na análise: {e}")
         
     def display_assessment_results(self, results: List[AssessmentResult]):
         """Exibe resultados na tabela"""
@@ -1176,25 +1212,42 @@ class TerapiaQuanticaWindow(QWidget):
                                amplitude: float, compensation: float, 
                                duration: int):
         """Salva sessão de biofeedback"""
+        patient_id = self.paciente_data.get('id') if self.paciente_data else None
+        inicio = datetime.now()
         conn = sqlite3.connect(self.db_manager.db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
             INSERT INTO biofeedback_sessions 
-            (frequencies, wave_type, amplitude, compensation, duration_minutes, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
+            (patient_id, frequencies, wave_type, amplitude, compensation, duration_minutes, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (
+            patient_id,
             json.dumps(frequencies),
             wave_type,
             amplitude,
             compensation,
             duration,
-            datetime.now()
+            inicio
         ))
+        # A importação (AnaliseSessoes._sessoes_quantica) usa o id da linha como chave
+        session_id = cursor.lastrowid
         
         conn.commit()
         conn.close()
         
+        try:
+            obter_analise().registar_sessao(
+                ORIGEM_BIOFEEDBACK, session_id,
+                passos_de_biofeedback(frequencies, amplitude, duration),
+                patient_id=patient_id,
+                patient_name=self.paciente_data.get('nome') if self.paciente_data else None,
+                protocol_name=f"Biofeedback ({wave_type})",
+                inicio=inicio
+            )
+        except Exception as e:
+            print(f"⚠️ Sessão de biofeedback não registada na análise: {e}")
+        
     def populate_programmed_protocols(self):
         """Popula protocolos programados"""
         protocols = [
@@ -1414,23 +1467,6 @@ class TerapiaQuanticaWindow(QWidget):
         conn = sqlite3.connect(self.db_manager.db_path)
         cursor = conn.cursor()
         
-        # Criar tabela se não existir
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS distance_therapy_sessions (
-                id TEXT PRIMARY KEY,
-                patient_name TEXT,
-                patient_gender TEXT,
-                start_date TEXT,
-                end_date TEXT,
-                duration_days INTEGER,
-                reactive_items TEXT,  -- JSON
-                frequencies TEXT,     -- JSON
-                created_at TEXT,
-                status TEXT,
-                session_type TEXT
-            )
-        ''')
-        
         import json
         cursor.execute('''
             INSERT INTO distance_therapy_sessions 
@@ -1523,18 +1559,6 @@ class TerapiaQuanticaWindow(QWidget):
         conn = sqlite3.connect(self.db_manager.db_path)
         cursor = conn.cursor()
         
-        # Criar tabela se não existir
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS distance_therapy_iterations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT,
-                timestamp TEXT,
-                items_processed INTEGER,
-                status TEXT,
-                FOREIGN KEY (session_id) REFERENCES distance_therapy_sessions (id)
-            )
-        ''')
-        
         # Inserir registo da iteração
         cursor.execute('''
             INSERT INTO distance_therapy_iterations 
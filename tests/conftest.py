@@ -0,0 +1,12 @@
+"""
+Configuração dos testes
+- Os módulos da aplicação estão na raiz do repositório e os servidores
+  stub (SMTPStub, RedeLoopback) em benchmarks/
+"""
+
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
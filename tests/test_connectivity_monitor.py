@@ -0,0 +1,44 @@
+"""Monitor de conectividade: a sonda segue o servidor SMTP e recusas do servidor não contam como falta de rede"""
+
+import smtplib
+
+from connectivity_monitor import (DESTINOS_SONDA, MonitorConectividade, destinos_smtp,
+                                  erro_de_rede, sonda_smtp)
+from rede_stub import RedeLoopback
+
+
+class ConfigSMTP:
+    def __init__(self, server, port):
+        self.smtp = {"server": server, "port": port}
+
+    def get_smtp_config(self):
+        return dict(self.smtp)
+
+
+def test_servidor_que_responde_com_recusa_nao_e_erro_de_rede():
+    assert not erro_de_rede(smtplib.SMTPConnectError(421, b"Servico ocupado"))
+    assert not erro_de_rede(smtplib.SMTPAuthenticationError(535, b"Credenciais"))
+    assert erro_de_rede(smtplib.SMTPServerDisconnected("Ligacao fechada"))
+    assert erro_de_rede(ConnectionRefusedError())
+
+
+def test_sonda_liga_ao_servidor_smtp_configurado():
+    with RedeLoopback('online') as rede:
+        config = ConfigSMTP('127.0.0.1', rede.porta)
+        monitor = MonitorConectividade(sonda=sonda_smtp(config, timeout=0.5))
+        assert monitor.verificar() and monitor.esta_online()
+
+        # O servidor deixa de aceitar ligações: a sonda segue-o (não os DNS públicos)
+        rede.definir_modo('recusa')
+        assert not monitor.verificar()
+        assert monitor.estado().origem == 'sonda'
+
+        # A configuração é relida a cada sondagem
+        rede.definir_modo('online')
+        config.smtp["port"] = rede.porta
+        assert monitor.verificar()
+
+
+def test_sem_servidor_configurado_usa_os_destinos_por_omissao():
+    assert destinos_smtp(ConfigSMTP("", 587)) == DESTINOS_SONDA
+    assert destinos_smtp(ConfigSMTP("smtp.exemplo.pt", "465")) == (("smtp.exemplo.pt", 465),)
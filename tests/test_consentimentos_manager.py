@@ -0,0 +1,43 @@
+"""Assinaturas guardadas no formato vetorial; PNG antigos continuam legíveis"""
+
+from consentimentos_manager import ConsentimentosManager
+from signature_codec import MAGIA_PNG, codificar_assinatura, descodificar_assinatura, e_assinatura_vetorial
+
+
+def test_assinatura_vetorial_ida_e_volta_pela_base_de_dados(tmp_path):
+    manager = ConsentimentosManager(str(tmp_path / "pacientes.db"))
+    tracos = [[(10, 20), (11.5, 22.25), (30, 40)], [(50, 60), (52, 61)]]
+    vetor = codificar_assinatura(tracos, 500, 200)
+
+    assert manager.guardar_assinatura_declaracao(7, 'declaracao_saude', 'paciente', vetor, 'Ana Sousa')
+    assert manager.guardar_assinatura_declaracao(7, 'declaracao_saude', 'terapeuta', vetor, 'Terapeuta')
+
+    guardada = manager.obter_assinatura(7, 'declaracao_saude', 'paciente')
+    assert e_assinatura_vetorial(guardada) and guardada == vetor
+    assinatura = descodificar_assinatura(guardada)
+    assert (assinatura.largura, assinatura.altura, assinatura.tracos) == (500, 200, tracos)
+    assert manager.obter_assinatura(7, 'declaracao_saude', 'terapeuta') == vetor
+
+
+def test_assinatura_png_antiga_devolvida_tal_como_esta(tmp_path):
+    manager = ConsentimentosManager(str(tmp_path / "pacientes.db"))
+    png = MAGIA_PNG + b'\x00' * 32
+
+    assert manager.guardar_assinatura_declaracao(7, 'declaracao_saude', 'paciente', png, 'Ana Sousa')
+    assert manager.obter_assinatura(7, 'declaracao_saude', 'paciente') == png
+
+
+def test_escritas_de_assinaturas_invalidam_a_cache_do_paciente(tmp_path):
+    from data_cache import get_cache
+
+    manager = ConsentimentosManager(str(tmp_path / "pacientes.db"))
+    declaracao_id = manager.criar_nova_declaracao_com_conteudo(7, "Declaração", conteudo_html="<p>Declaração</p>")
+    vetor = codificar_assinatura([[(1, 1), (5, 5)]], 100, 50)
+
+    for escrita in (lambda: manager.atualizar_assinatura_paciente(declaracao_id, vetor, "Ana Sousa"),
+                    lambda: manager.atualizar_assinatura_terapeuta(declaracao_id, vetor, "Terapeuta"),
+                    lambda: manager.guardar_assinatura_declaracao(7, 'declaracao_saude', 'paciente', vetor, "Ana"),
+                    lambda: manager.marcar_declaracao_como_alterada(declaracao_id)):
+        get_cache().set("patient_data_7", {"nome": "Ana Sousa"})
+        assert escrita()
+        assert get_cache().get("patient_data_7") is None
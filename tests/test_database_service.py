@@ -0,0 +1,57 @@
+"""DatabaseService: migrações aplicadas antes de gravar no armazém de conteúdo"""
+
+import importlib.util
+import os
+import sqlite3
+
+import schema_migrations
+from conftest import RAIZ
+
+
+def _database_service():
+    # Carregado pelo caminho: o pacote ficha_paciente importa a interface (PyQt6)
+    caminho = os.path.join(RAIZ, "ficha_paciente", "services", "database_service.py")
+    spec = importlib.util.spec_from_file_location("database_service_teste", caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo.DatabaseService
+
+
+def test_base_antiga_recebe_armazem_de_conteudo(tmp_path, monkeypatch):
+    db = str(tmp_path / "pacientes.db")
+    conn = sqlite3.connect(db)
+    schema_migrations._pacientes_v1(conn)  # base anterior ao armazém de conteúdo
+    conn.execute("PRAGMA user_version = 1")
+    conn.execute("INSERT INTO consentimentos (paciente_id, tipo_consentimento, data_assinatura, data_criacao) "
+                 "VALUES (1, 'rgpd', '2025-01-01', '2025-01-01')")
+    conn.commit()
+    conn.close()
+    schema_migrations.limpar_cache_verificacao()
+
+    DatabaseService = _database_service()
+    monkeypatch.setattr(DatabaseService, "DEFAULT_DB_PATH", db)
+    assert DatabaseService.atualizar_consentimento(1, "<p>Consentimento</p>", "Consentimento", "2025-02-01")
+
+    conn = sqlite3.connect(db)
+    referencia, = conn.execute("SELECT conteudo_html_hash FROM consentimentos WHERE id = 1").fetchone()
+    dados, = conn.execute("SELECT dados FROM conteudo_consentimentos WHERE hash = ?", (referencia,)).fetchone()
+    conn.close()
+    assert bytes(dados) == "<p>Consentimento</p>".encode("utf-8")
+
+
+def test_escritas_de_consentimentos_invalidam_a_cache_do_paciente(tmp_path, monkeypatch):
+    from data_cache import get_cache
+
+    DatabaseService = _database_service()
+    monkeypatch.setattr(DatabaseService, "DEFAULT_DB_PATH", str(tmp_path / "pacientes.db"))
+    conn = sqlite3.connect(tmp_path / "pacientes.db")
+    schema_migrations._pacientes_v1(conn)
+    conn.execute("INSERT INTO consentimentos (paciente_id, tipo_consentimento, data_assinatura, data_criacao) "
+                 "VALUES (7, 'rgpd', '2025-01-01', '2025-01-01')")
+    conn.commit()
+    conn.close()
+    schema_migrations.limpar_cache_verificacao()
+
+    get_cache().set("patient_data_7", {"nome": "Ana Sousa"})
+    assert DatabaseService.atualizar_consentimento(1, "<p>Consentimento</p>", "Consentimento", "2025-02-01")
+    assert get_cache().get("patient_data_7") is None
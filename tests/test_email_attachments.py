@@ -0,0 +1,68 @@
+"""Anexos em streaming: mensagem achatada com cabeçalhos codificados e cache privada com expiração"""
+
+import email
+import os
+import smtplib
+import time
+from email.header import decode_header, make_header
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from email_attachments import CacheAnexosCodificados, MensagemComAnexos
+from smtp_stub import SMTPStub
+
+
+def _mensagem(assunto):
+    msg = MIMEMultipart()
+    msg['From'] = 'clinica@exemplo.pt'
+    msg['To'] = 'paciente@exemplo.pt'
+    msg['Subject'] = assunto
+    msg.attach(MIMEText('Segue a prescrição em anexo.', 'plain', 'utf-8'))
+    return msg
+
+
+def test_assunto_e_nome_de_anexo_com_acentos(tmp_path):
+    anexo = tmp_path / "Prescrição.pdf"
+    conteudo = b"%PDF-1.4\n" + bytes(range(256)) * 50
+    anexo.write_bytes(conteudo)
+    cache = CacheAnexosCodificados(str(tmp_path / "cache"))
+
+    with SMTPStub(guardar_mensagens=True) as stub:
+        smtp = smtplib.SMTP('127.0.0.1', stub.porta, timeout=5)
+        try:
+            MensagemComAnexos(_mensagem("olá - Prescrição"), [str(anexo)], cache).enviar_por(smtp)
+        finally:
+            smtp.quit()
+        recebida = email.message_from_bytes(stub.ultima_mensagem)
+
+    assert str(make_header(decode_header(recebida['Subject']))) == "olá - Prescrição"
+    anexos = [parte for parte in recebida.walk() if parte.get_filename()]
+    assert [parte.get_filename() for parte in anexos] == ["Prescrição.pdf"]
+    assert anexos[0].get_payload(decode=True) == conteudo
+
+
+def test_cache_expira_entradas_antigas(tmp_path):
+    pasta = tmp_path / "cache"
+    cache = CacheAnexosCodificados(str(pasta), idade_maxima_s=3600)
+    anexo = tmp_path / "a.pdf"
+    anexo.write_bytes(b"abc")
+    codificado = cache.caminho_codificado(str(anexo))
+    orfao = pasta / "x.b64.tmp"
+    orfao.write_bytes(b"")
+
+    antigo = time.time() - 7200
+    os.utime(orfao, (antigo, antigo))
+    assert cache.expirar() == 1
+    assert os.path.exists(codificado) and not orfao.exists()
+
+    os.utime(codificado, (antigo, antigo))
+    CacheAnexosCodificados(str(pasta), idade_maxima_s=3600)  # expira ao abrir
+    assert not os.path.exists(codificado)
+
+
+def test_cache_por_omissao_na_pasta_de_dados(tmp_path, monkeypatch):
+    monkeypatch.setenv("BIODESK_DADOS", str(tmp_path))
+    cache = CacheAnexosCodificados()
+    assert cache.pasta.startswith(str(tmp_path))
+    if os.name == 'posix':
+        assert os.stat(cache.pasta).st_mode & 0o077 == 0
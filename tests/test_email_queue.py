@@ -0,0 +1,41 @@
+"""FilaEmails: emails reclamados há mais de 600 s voltam ao estado agendado"""
+
+import time
+
+from email_queue import FilaEmails
+
+
+def test_libertar_so_reclamados_antigos(tmp_path):
+    fila = FilaEmails(str(tmp_path / "emails_agendados.db"))
+    for email_id in ("antigo", "recente"):
+        fila.inserir({"id": email_id, "data_envio": "2025-01-01 10:00:00", "destinatario": "p@exemplo.pt"})
+    fila.reclamar_vencidos(agora=time.time() - 700, limite=1)
+    fila.reclamar_vencidos()
+
+    assert fila.libertar_reclamados() == 1
+    assert fila.obter("antigo")["status"] == "agendado"
+    assert fila.obter("recente")["status"] != "agendado"
+
+
+def test_devolver_so_emails_reclamados(tmp_path):
+    fila = FilaEmails(str(tmp_path / "emails_agendados.db"))
+    fila.inserir({"id": "e1", "data_envio": "2025-01-01 10:00:00", "destinatario": "p@exemplo.pt"})
+    fila.reclamar_vencidos()
+
+    assert fila.devolver("e1")
+    assert fila.obter("e1")["status"] == "agendado"
+    fila.marcar_enviado("e1")
+    assert not fila.devolver("e1")
+
+
+def test_historico_enviados_le_as_linhas_da_fila(tmp_path):
+    fila = FilaEmails(str(tmp_path / "emails_agendados.db"))
+    fila.inserir({"id": "e1", "data_envio": "2025-01-01 10:00:00", "paciente_id": 7, "paciente_nome": "Ana",
+                  "destinatario": "p@exemplo.pt", "assunto": "Lembrete", "anexos": ["a.pdf", "b.pdf"]})
+    fila.inserir({"id": "e2", "data_envio": "2025-01-01 10:00:00", "paciente_id": 8})
+    fila.marcar_enviado("e1")
+
+    (registo,) = fila.historico_enviados(7)
+    assert registo["assunto"] == "Lembrete" and registo["num_anexos"] == 2
+    assert registo["status"] == "Enviado via Scheduler" and registo["data_envio"]
+    assert fila.historico_enviados(8) == []
@@ -0,0 +1,103 @@
+"""EmailScheduler: envios interrompidos voltam à fila durante a sessão (requer PyQt6)"""
+
+import time
+
+import pytest
+
+QtCore = pytest.importorskip("PyQt6.QtCore")
+
+import connectivity_monitor
+from connectivity_monitor import MonitorConectividade
+
+
+@pytest.fixture
+def agendador(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(connectivity_monitor, "_monitor", MonitorConectividade(sonda=lambda: True))
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    from email_scheduler import EmailScheduler
+
+    agendador = EmailScheduler()
+    agendador.ativo = True
+    agendador.enviados = []
+    agendador._processar_envio_email = lambda email: agendador.enviados.append(email["id"])
+    yield agendador
+    agendador.timer.stop()
+
+
+def test_reclamado_por_worker_morto_volta_a_ser_enviado(agendador):
+    agendador.fila.inserir({"id": "e1", "data_envio": "2025-01-01 10:00:00", "destinatario": "p@exemplo.pt",
+                            "assunto": "Lembrete", "mensagem": "Olá"})
+    # Um worker reclamou o email há 700 s e morreu sem o enviar
+    assert [e["id"] for e in agendador.fila.reclamar_vencidos(agora=time.time() - 700)] == ["e1"]
+
+    agendador.verificar_emails_pendentes()
+    assert agendador.enviados == ["e1"]
+
+
+def test_reclamado_recente_nao_e_duplicado(agendador):
+    agendador.fila.inserir({"id": "e2", "data_envio": "2025-01-01 10:00:00", "destinatario": "p@exemplo.pt",
+                            "assunto": "Lembrete", "mensagem": "Olá"})
+    agendador.fila.reclamar_vencidos()  # envio ainda em curso
+
+    agendador.verificar_emails_pendentes()
+    assert agendador.enviados == []
+
+
+def test_sonda_ao_servidor_smtp_decide_o_envio(agendador, monkeypatch):
+    from rede_stub import RedeLoopback
+    from connectivity_monitor import sonda_smtp
+
+    class ConfigSMTP:
+        def __init__(self, porta):
+            self.porta = porta
+
+        def get_smtp_config(self):
+            return {"server": "127.0.0.1", "port": self.porta}
+
+    agendador.fila.inserir({"id": "e3", "data_envio": "2025-01-01 10:00:00", "destinatario": "p@exemplo.pt",
+                            "assunto": "Lembrete", "mensagem": "Olá"})
+    with RedeLoopback('recusa') as rede:
+        monitor = MonitorConectividade(sonda=sonda_smtp(ConfigSMTP(rede.porta), timeout=0.5))
+        monkeypatch.setattr(connectivity_monitor, "_monitor", monitor)
+
+        monitor.verificar()  # servidor SMTP inacessível: o email fica na fila
+        agendador.verificar_emails_pendentes()
+        assert agendador.enviados == []
+
+        rede.definir_modo('online')  # só o servidor SMTP precisa de responder
+        monitor.verificar()
+        agendador.verificar_emails_pendentes()
+        assert "e3" in agendador.enviados
+
+
+def test_worker_cheio_devolve_o_email_a_fila(agendador, monkeypatch):
+    import queue
+    import email_sender
+
+    def cheio(*args, **kwargs):
+        raise queue.Full
+
+    del agendador._processar_envio_email  # usar o método real
+    monkeypatch.setattr(email_sender.email_sender, "send_email_async", cheio)
+    agendador.fila.inserir({"id": "e4", "data_envio": "2025-01-01 10:00:00", "destinatario": "p@exemplo.pt",
+                            "assunto": "Lembrete", "mensagem": "Olá"})
+
+    agendador.verificar_emails_pendentes()
+    assert agendador.fila.obter("e4")["status"] == "agendado"
+
+
+def test_resultado_gravado_na_fila_sem_reescrever_o_historico_json(agendador):
+    import json
+    agendador.fila.inserir({"id": "e5", "data_envio": "2025-01-01 10:00:00", "destinatario": "p@exemplo.pt",
+                            "assunto": "Lembrete", "mensagem": "Olá"})
+    agendador.fila.reclamar_vencidos()
+    recebidos = []
+    agendador.email_enviado.connect(recebidos.append)
+
+    agendador._registar_resultado("e5", True, "")
+
+    assert agendador.fila.obter("e5")["status"] == "enviado"
+    assert [e["id"] for e in recebidos] == ["e5"]
+    with open(agendador.emails_enviados_file, encoding='utf-8') as f:
+        assert json.load(f) == []
@@ -0,0 +1,59 @@
+"""EmailSendWorker: submeter nunca bloqueia a thread que chama"""
+
+import queue
+import threading
+import time
+
+import pytest
+
+from email_transport import EmailSendWorker
+
+
+def test_fila_por_omissao_sem_limite():
+    worker = EmailSendWorker()
+    bloqueio = threading.Event()
+    futuros = [worker.submeter(bloqueio.wait, 5) for _ in range(500)]
+    assert worker.pendentes() >= 499
+    bloqueio.set()
+    worker.aguardar()
+    assert all(f.result() for f in futuros)
+
+
+def test_fila_limitada_cheia_falha_de_imediato():
+    worker = EmailSendWorker(tamanho_fila=1)
+    bloqueio = threading.Event()
+    worker.submeter(bloqueio.wait, 5)
+    limite = time.monotonic() + 5
+    while worker.pendentes() and time.monotonic() < limite:
+        time.sleep(0.01)  # a primeira tarefa já saiu da fila e está a correr
+    worker.submeter(bloqueio.wait, 5)
+
+    inicio = time.monotonic()
+    with pytest.raises(queue.Full):
+        worker.submeter(bloqueio.wait, 5)
+    assert time.monotonic() - inicio < 0.5
+    bloqueio.set()
+    worker.aguardar()
+
+
+def test_parar_termina_depois_das_tarefas_submetidas():
+    worker = EmailSendWorker()
+    feitas = []
+    for i in range(3):
+        worker.submeter(lambda i=i: (time.sleep(0.01), feitas.append(i)))
+    thread = worker._thread
+
+    assert worker.parar(timeout=5)
+    assert feitas == [0, 1, 2] and not thread.is_alive()
+    assert worker.parar()  # sem thread ativa
+    assert worker.submeter(lambda: 42).result(timeout=5) == 42  # volta a arrancar se for preciso
+    assert worker.parar()
+
+
+def test_fechar_transporte_para_o_worker_partilhado():
+    import email_transport
+
+    worker = email_transport.obter_worker()
+    futuro = worker.submeter(time.sleep, 0.05)
+    email_transport.fechar_transporte()
+    assert futuro.done() and worker._thread is None
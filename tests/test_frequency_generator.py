@@ -0,0 +1,27 @@
+"""FrequencyGenerator: validação da sessão com a regra de tensão total do interlock (requer PyQt6 e pyserial)"""
+
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("serial")
+pytest.importorskip("PyQt6.QtCore")
+
+from frequency_generator import FrequencyStep, GenerationSession, frequency_generator
+
+
+def _sessao(*passos):
+    return GenerationSession("s1", "Paciente", "Teste",
+                             [FrequencyStep(1000.0, a, o, 60) for a, o in passos],
+                             len(passos) * 60, datetime.now())
+
+
+def test_passo_acima_da_tensao_total_e_rejeitado():
+    # Cada parâmetro dentro do seu limite, mas 4 V + |2 V| > 5 V
+    resposta = frequency_generator._validate_session(_sessao((2.0, 2.0), (4.0, 2.0)))
+    assert not resposta.success
+    assert resposta.message.startswith("Passo 2:")
+
+
+def test_transicao_segura_e_aceite():
+    assert frequency_generator._validate_session(_sessao((2.0, 2.0), (4.0, 0.0))).success
@@ -0,0 +1,70 @@
+"""HS3Hardware: telemetria da ligação (requer PyQt6 e pyserial)"""
+
+import pytest
+
+pytest.importorskip("serial")
+pytest.importorskip("PyQt6.QtCore")
+
+from hs3_hardware import HS3Hardware, HS3Status
+
+
+class SerieFalsa:
+    """Porta série que devolve as respostas indicadas, uma por comando"""
+
+    def __init__(self, respostas):
+        self.is_open = True
+        self.respostas = list(respostas)
+        self.escritas = []
+
+    def write(self, dados):
+        self.escritas.append(dados)
+
+    def read_all(self):
+        return self.respostas.pop(0) if self.respostas else b""
+
+    def close(self):
+        self.is_open = False
+
+
+@pytest.fixture
+def hs3():
+    hs3 = HS3Hardware()
+    hs3.serial_connection = SerieFalsa([b"", b"  \r\n", b"OK\r\n"])
+    return hs3
+
+
+def test_resposta_vazia_nao_conta_como_sinal_de_vida(hs3):
+    assert hs3._send_command("STATUS?\n") == ""
+    assert hs3._send_command("STATUS?\n") == ""
+    assert hs3.last_reply_at == 0.0
+
+    assert hs3._send_command("STATUS?\n") == "OK"
+    assert hs3.last_reply_at > 0.0
+
+
+def test_transicao_entre_passos_baixa_o_offset_antes_de_subir_a_amplitude(hs3):
+    hs3.status = HS3Status.CONNECTED
+    hs3.serial_connection = SerieFalsa([b"OK\r\n"] * 4)
+    assert hs3.set_output(2.0, 2.0).success
+
+    hs3.serial_connection.escritas.clear()
+    resposta = hs3.set_output(4.0, 0.0)
+
+    assert resposta.success, resposta.message
+    assert hs3.serial_connection.escritas == [b"OFFS 0.0\n", b"AMPL 4.0\n"]
+    assert (hs3.last_state["amplitude"], hs3.last_state["offset"]) == (4.0, 0.0)
+
+
+def test_par_de_destino_inseguro_nao_envia_nada(hs3):
+    hs3.status = HS3Status.CONNECTED
+    hs3.serial_connection = SerieFalsa([])
+    assert not hs3.set_output(4.0, 2.0).success
+    assert hs3.serial_connection.escritas == []
+
+
+def test_estado_conhecido_limpo_ao_desligar(hs3):
+    hs3.status = HS3Status.CONNECTED
+    hs3.serial_connection = SerieFalsa([b"OK\r\n"] * 3)
+    hs3.set_output(2.0, 2.0)
+    hs3.disconnect()
+    assert hs3.last_state["amplitude"] is None and hs3.last_state["offset"] is None
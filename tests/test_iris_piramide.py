@@ -0,0 +1,87 @@
+"""Pirâmide de íris: nível 0 sem perdas, cache privada com expiração e geração em fundo (requer PyQt6)"""
+
+import os
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("PyQt6.QtGui")
+
+from PyQt6.QtGui import QColor, QImage
+
+from iris_piramide import CachePiramides, PiramideIris
+
+
+def _imagem(caminho, largura=1300, altura=700):
+    imagem = QImage(largura, altura, QImage.Format.Format_RGB32)
+    for y in range(altura):
+        for x in range(largura):
+            imagem.setPixelColor(x, y, QColor((x * 7) % 256, (y * 13) % 256, (x ^ y) % 256))
+    assert imagem.save(str(caminho), 'PNG')
+    return imagem
+
+
+def test_nivel_0_sem_perdas(tmp_path):
+    original = _imagem(tmp_path / "iris.png")
+    piramide = CachePiramides(str(tmp_path / "cache")).obter(str(tmp_path / "iris.png"))
+
+    mosaico = QImage(piramide.caminho_mosaico(0, 1, 0))
+    assert piramide.caminho_mosaico(0, 1, 0).endswith('.png')
+    assert piramide.caminho_mosaico(1, 0, 0).endswith('.jpg')
+    esperado = original.copy(512, 0, 512, 512).convertToFormat(mosaico.format())
+    assert mosaico == esperado
+
+
+def test_piramide_antiga_e_regenerada(tmp_path):
+    _imagem(tmp_path / "iris.png", 300, 200)
+    cache = CachePiramides(str(tmp_path / "cache"))
+    piramide = cache.obter(str(tmp_path / "iris.png"))
+    meta = os.path.join(piramide.pasta, 'piramide.json')
+    with open(meta, 'w', encoding='utf-8') as f:
+        f.write('{"largura": 300, "altura": 200, "niveis": 1, "tamanho_mosaico": 512}')
+
+    assert PiramideIris.abrir(piramide.pasta) is None
+    assert cache.procurar(str(tmp_path / "iris.png")) is None
+    cache.obter(str(tmp_path / "iris.png"))
+    assert cache.geracoes == 2
+    assert PiramideIris.abrir(piramide.pasta) is not None
+
+
+def test_cache_na_pasta_de_dados_e_expira(tmp_path, monkeypatch):
+    monkeypatch.setenv("BIODESK_DADOS", str(tmp_path / "dados"))
+    _imagem(tmp_path / "iris.png", 300, 200)
+    cache = CachePiramides(idade_maxima_s=3600)
+    assert cache.pasta == str(tmp_path / "dados" / "cache" / "iris_piramides")
+    assert os.stat(cache.pasta).st_mode & 0o777 == 0o700
+
+    piramide = cache.obter(str(tmp_path / "iris.png"))
+    interrompida = os.path.join(cache.pasta, '.gerar_abc')
+    os.makedirs(interrompida)
+    antigo = time.time() - 7200
+    os.utime(piramide.pasta, (antigo, antigo))
+    os.utime(interrompida, (antigo, antigo))
+
+    CachePiramides(cache.pasta, idade_maxima_s=3600)  # expira ao abrir
+    assert not os.path.exists(piramide.pasta)
+    assert not os.path.exists(interrompida)
+
+
+def test_geracao_em_fundo_fora_da_thread_chamadora(tmp_path):
+    _imagem(tmp_path / "iris.png", 300, 200)
+    cache = CachePiramides(str(tmp_path / "cache"))
+    assert cache.procurar(str(tmp_path / "iris.png")) is None
+
+    resultado = {}
+    pronta = threading.Event()
+
+    def ao_terminar(piramide):
+        resultado['piramide'] = piramide
+        resultado['thread'] = threading.current_thread()
+        pronta.set()
+
+    cache.obter_em_fundo(str(tmp_path / "iris.png"), ao_terminar)
+    assert pronta.wait(10)
+    assert resultado['thread'] is not threading.current_thread()
+    assert resultado['piramide'].rect().width() == 300
+    assert cache.procurar(str(tmp_path / "iris.png")) is not None
@@ -0,0 +1,49 @@
+"""Pré-carregamento: a lista de documentos fica obsoleta quando uma subpasta muda"""
+
+import os
+import sqlite3
+import time
+
+from data_cache import DataCache
+from patient_prefetch import PrefetchPacientes, mtime_pastas
+
+
+def _prefetch(tmp_path):
+    db = tmp_path / "pacientes.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE pacientes (id INTEGER PRIMARY KEY, nome TEXT)")
+    conn.execute("CREATE TABLE imagens_iris (id INTEGER PRIMARY KEY, paciente_id INTEGER, caminho_imagem TEXT)")
+    conn.execute("INSERT INTO pacientes (id, nome) VALUES (7, 'Ana Sousa')")
+    conn.commit()
+    conn.close()
+    return PrefetchPacientes(str(db), base_documentos=tmp_path / "Documentos_Pacientes",
+                             cache=DataCache.get_instance(), miniaturas=False,
+                             status_consentimentos=lambda paciente_id: {})
+
+
+def test_documento_novo_numa_subpasta_invalida_a_lista(tmp_path):
+    pasta = tmp_path / "Documentos_Pacientes" / "7_Ana_Sousa"
+    (pasta / "prescricoes").mkdir(parents=True)
+    (pasta / "prescricoes" / "prescricao_1.pdf").write_bytes(b"%PDF")
+    antigo = time.time() - 60
+    for caminho in (pasta, pasta / "prescricoes"):
+        os.utime(caminho, (antigo, antigo))
+
+    assert _prefetch(tmp_path).carregar(7)
+    dados = DataCache.get_instance().pop_patient_prefetch(7, 'documentos')
+    assert mtime_pastas(dados['pasta']) == dados['mtime']
+
+    (pasta / "prescricoes" / "prescricao_2.pdf").write_bytes(b"%PDF")
+
+    assert pasta.stat().st_mtime == antigo  # só o mtime da pasta de topo não chega
+    assert mtime_pastas(dados['pasta']) != dados['mtime']
+    assert len(dados['arquivos']) == 1
+
+
+def test_subpasta_criada_depois_tambem_conta(tmp_path):
+    pasta = tmp_path / "docs"
+    (pasta / "Consentimentos").mkdir(parents=True)
+    antes = mtime_pastas(pasta)
+    time.sleep(0.01)
+    (pasta / "Consentimentos" / "assinaturas").mkdir()
+    assert mtime_pastas(pasta) > antes
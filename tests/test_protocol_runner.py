@@ -0,0 +1,106 @@
+"""StepScheduler: pausa na janela entre o prazo e a transição, tempo em pausa e validação pelo interlock (requer PyQt6)"""
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("PyQt6.QtCore")
+
+from biodesk.quantum.protocol_runner import FrequencyStep, Protocol, StepScheduler
+
+
+class HS3Falso:
+    """Regista os comandos e se a saída está ativa"""
+
+    def __init__(self):
+        self.saida = False
+        self.comandos = []
+        self.arranques_em_pausa = 0
+        self.scheduler = None
+
+    def _registar(self, nome, *args):
+        self.comandos.append((nome, args))
+
+    def configure_generator(self, **kwargs):
+        self._registar("configure_generator", kwargs)
+
+    def set_frequency(self, hz):
+        self._registar("set_frequency", hz)
+
+    def enable_ext_trigger_gated(self, ativo):
+        self._registar("enable_ext_trigger_gated", ativo)
+
+    def start_output(self):
+        if self.scheduler is not None and self.scheduler._paused:
+            self.arranques_em_pausa += 1
+        self.saida = True
+        self._registar("start_output")
+
+    def stop_output(self):
+        self.saida = False
+        self._registar("stop_output")
+
+
+def _protocolo():
+    return Protocol("Teste", "", [FrequencyStep(hz=10, dwell_s=0.05, amp_vpp=1.0),
+                                  FrequencyStep(hz=20, dwell_s=0.05, amp_vpp=2.0)])
+
+
+def test_pausa_depois_do_prazo_nao_arranca_o_passo_seguinte():
+    hs3 = HS3Falso()
+    scheduler = StepScheduler(_protocolo(), hs3_service=hs3)
+    hs3.scheduler = scheduler
+
+    esperar_original = scheduler._wait_until
+    pausado = threading.Event()
+
+    def esperar(prazo):
+        chegou = esperar_original(prazo)
+        if chegou and scheduler.origin is not None and not pausado.is_set():
+            scheduler.pause()  # pausa entre o fim da espera e _execute
+            pausado.set()
+        return chegou
+
+    scheduler._wait_until = esperar
+    thread = threading.Thread(target=scheduler.run)
+    thread.start()
+    assert pausado.wait(2)
+    time.sleep(0.1)
+    assert hs3.saida is False and hs3.arranques_em_pausa == 0
+    assert len(scheduler.transitions) == 1  # a transição para o passo 2 ainda não aconteceu
+
+    scheduler.resume()
+    thread.join(2)
+    assert not thread.is_alive()
+    assert [indice for indice, _, _ in scheduler.transitions] == [0, 1, 2]
+    assert hs3.arranques_em_pausa == 0 and hs3.saida is False
+
+
+def test_pausas_seguidas_somam_todo_o_tempo_em_pausa():
+    scheduler = StepScheduler(_protocolo())
+    scheduler.pause()
+    time.sleep(0.05)
+    scheduler.resume()
+    scheduler.pause()
+    time.sleep(0.05)
+    scheduler.resume()
+    assert scheduler._paused_total == pytest.approx(0.1, abs=0.03)
+
+
+def test_validacao_do_protocolo_pelo_interlock_compilado():
+    from biodesk.quantum.protocol_runner import ProtocolRunner
+    from biodesk.quantum.safety import SafetyError, SafetyLimits
+
+    runner = ProtocolRunner()
+    limites = SafetyLimits(max_total_voltage=1.2)
+    runner._validate_protocol_safety(Protocol("Teste", "", [FrequencyStep(hz=10, dwell_s=1, amp_vpp=2.0)],
+                                              safety_limits=limites))
+
+    # Amplitude e offset válidos sozinhos, mas 2.0/2 + 0.5 > 1.2 V
+    with pytest.raises(SafetyError, match="Tensão total"):
+        runner._validate_protocol_safety(Protocol(
+            "Teste", "", [FrequencyStep(hz=10, dwell_s=1, amp_vpp=2.0, offset_v=0.5)], safety_limits=limites))
+    with pytest.raises(SafetyError, match="Frequência"):
+        runner._validate_protocol_safety(Protocol("Teste", "", [FrequencyStep(hz=2e5, dwell_s=1, amp_vpp=1.0)]))
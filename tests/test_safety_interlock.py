@@ -0,0 +1,39 @@
+"""SafetyInterlock: transições entre passos sem estados intermédios acima da tensão total"""
+
+from hs3_config import HS3SafetyLimits
+from safety_interlock import SafetyInterlock
+
+interlock = SafetyInterlock.from_hs3_limits(HS3SafetyLimits())
+
+
+def _intermedio(ordem, atual, destino):
+    """Estado depois da primeira escrita"""
+    estado = dict(atual)
+    estado[ordem[0]] = destino[ordem[0]]
+    return estado
+
+
+def test_subir_amplitude_baixa_primeiro_o_offset():
+    atual = {'amplitude': 2.0, 'offset': 2.0}
+    destino = {'amplitude': 4.0, 'offset': 0.0}
+    assert interlock.check(**destino) is None
+    assert interlock.check(amplitude=4.0, offset=2.0) is not None  # ordem antiga
+
+    ordem = interlock.output_order(4.0, 0.0, current_offset=2.0)
+    assert ordem == ('offset', 'amplitude')
+    assert interlock.check(**_intermedio(ordem, atual, destino)) is None
+
+
+def test_descer_amplitude_mantem_a_ordem_habitual():
+    assert interlock.output_order(1.0, 2.5, current_offset=0.0) == ('amplitude', 'offset')
+
+
+def test_todas_as_transicoes_seguras_tem_ordem_segura():
+    valores_amp = [0.1, 1.0, 2.0, 2.5, 3.0, 4.0, 5.0]
+    valores_off = [-2.5, -2.0, -1.0, 0.0, 1.0, 2.0, 2.5]
+    pares = [{'amplitude': a, 'offset': o} for a in valores_amp for o in valores_off
+             if interlock.check(amplitude=a, offset=o) is None]
+    for atual in pares:
+        for destino in pares:
+            ordem = interlock.output_order(destino['amplitude'], destino['offset'], atual['offset'])
+            assert interlock.check(**_intermedio(ordem, atual, destino)) is None, (atual, destino)
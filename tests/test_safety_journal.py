@@ -0,0 +1,63 @@
+"""Diário de segurança: gravação por timer, anel recarregado ao reabrir e retenção"""
+
+import time
+from datetime import datetime, timedelta
+
+from safety_journal import DIAS_RETENCAO, DiarioEventosSeguranca
+
+
+def _gravados(db_path):
+    diario = DiarioEventosSeguranca(str(db_path))
+    try:
+        return diario.total()
+    finally:
+        diario.fechar()
+
+
+def test_pendentes_gravados_pelo_timer_sem_novos_eventos(tmp_path):
+    db = tmp_path / "eventos.db"
+    diario = DiarioEventosSeguranca(str(db), flush_intervalo_s=0.1)
+    diario.registar(time.time(), "parametro", "warning", "Amplitude perto do limite")
+    assert _gravados(db) == 0
+
+    limite = time.monotonic() + 5
+    while _gravados(db) == 0 and time.monotonic() < limite:
+        time.sleep(0.05)
+    assert _gravados(db) == 1
+    diario.fechar()
+
+
+def test_fechar_grava_os_pendentes(tmp_path):
+    db = tmp_path / "eventos.db"
+    diario = DiarioEventosSeguranca(str(db), flush_intervalo_s=60)
+    diario.registar(time.time(), "parametro", "info", "Sessão iniciada")
+    diario.fechar()
+    assert _gravados(db) == 1
+
+
+def test_anel_recarregado_ao_reabrir(tmp_path):
+    db = tmp_path / "eventos.db"
+    diario = DiarioEventosSeguranca(str(db), tamanho_anel=3)
+    ontem = datetime.now() - timedelta(days=1)
+    for i in range(5):
+        diario.registar(ontem + timedelta(minutes=i), "parametro", "info", f"ontem {i}")
+    diario.registar(datetime.now(), "emergencia", "critical", "Paragem de emergência")
+    diario.fechar()
+
+    reaberto = DiarioEventosSeguranca(str(db), tamanho_anel=3)
+    try:
+        assert [e["message"] for e in reaberto.recentes(3)] == ["ontem 3", "ontem 4", "Paragem de emergência"]
+    finally:
+        reaberto.fechar()
+
+
+def test_retencao_por_omissao_e_de_7_dias(tmp_path):
+    assert DIAS_RETENCAO == 7
+    diario = DiarioEventosSeguranca(str(tmp_path / "eventos.db"))
+    try:
+        diario.registar(datetime.now() - timedelta(days=9), "parametro", "info", "antigo")
+        diario.registar(datetime.now(), "parametro", "info", "recente")
+        assert diario.aplicar_retencao() == 1
+        assert [e["message"] for e in diario.consultar()] == ["recente"]
+    finally:
+        diario.fechar()
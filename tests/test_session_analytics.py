@@ -0,0 +1,44 @@
+"""Análise de sessões: importação única na criação da base e chave das sessões de biofeedback"""
+
+import json
+import sqlite3
+
+import schema_migrations
+from session_analytics import ORIGEM_BIOFEEDBACK, AnaliseSessoes, passos_de_biofeedback
+
+
+def _base_quantica(caminho):
+    conn = sqlite3.connect(caminho)
+    schema_migrations._terapia_quantica_v1(conn)
+    cursor = conn.execute(
+        "INSERT INTO biofeedback_sessions (patient_id, frequencies, amplitude, duration_minutes, timestamp) "
+        "VALUES ('7', ?, 1.0, 10, '2025-01-01 10:00:00')", (json.dumps([528.0, 741.0]),))
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+
+def test_sessoes_existentes_importadas_uma_vez_ao_criar_a_base(tmp_path):
+    _base_quantica(tmp_path / "terapia_quantica.db")
+    schema_migrations.limpar_cache_verificacao()
+
+    analise = AnaliseSessoes(str(tmp_path / "session_analytics.db"))
+    (sessao,) = analise.historico(patient_id=7)
+    assert sessao["origem"] == ORIGEM_BIOFEEDBACK and sessao["passos"] == 2
+
+    conn = sqlite3.connect(tmp_path / "session_analytics.db")
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == schema_migrations.versao_atual('session_analytics')
+    conn.close()
+    assert not (tmp_path / "therapy_sessions.db").exists()  # bases inexistentes não são criadas
+
+
+def test_biofeedback_registado_com_o_id_da_linha_nao_duplica(tmp_path):
+    analise = AnaliseSessoes(str(tmp_path / "session_analytics.db"))
+    session_id = _base_quantica(tmp_path / "terapia_quantica.db")
+
+    # O que save_biofeedback_session regista depois de gravar a linha
+    assert analise.registar_sessao(ORIGEM_BIOFEEDBACK, session_id,
+                                   passos_de_biofeedback([528.0, 741.0], 1.0, 10), patient_id=7)
+    assert analise.importar_existentes(str(tmp_path / "therapy_sessions.db"),
+                                       str(tmp_path / "terapia_quantica.db")) == 0
+    assert len(analise.historico(patient_id=7)) == 1
@@ -11,11 +11,15 @@ import json
 import uuid
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from PyQt6.QtCore import QObject, pyqtSignal
 
 from frequency_generator import GenerationSession, FrequencyStep
 from hs3_config import hs3_config
+from schema_migrations import aplicar_migracoes
+from session_analytics import obter_analise, passos_de_protocolo, ORIGEM_TERAPIA
+from iris_notas import obter_classificador
+from protocol_codec import codificar_passos, descodificar_passos, metadados_passos, passos_gravados
 
 @dataclass
 class PatientInfo:
@@ -69,59 +73,7 @@ class TherapySessionManager(QObject):
     
     def init_database(self):
         """Inicializa base de dados"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Tabela de protocolos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS therapy_protocols (
-                protocol_id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                description TEXT,
-                category TEXT,
-                steps_json TEXT NOT NULL,
-                created_by TEXT,
-                created_at TIMESTAMP,
-                iris_based BOOLEAN DEFAULT 0,
-                iris_data_json TEXT,
-                active BOOLEAN DEFAULT 1
-            )
-        ''')
-        
-        # Tabela de sessões
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS therapy_sessions (
-                session_id TEXT PRIMARY KEY,
-                patient_id TEXT,
-                patient_name TEXT,
-                protocol_id TEXT,
-                protocol_name TEXT,
-                start_time TIMESTAMP,
-                end_time TIMESTAMP,
-                status TEXT,
-                notes TEXT,
-                biofeedback_data_json TEXT,
-                results_json TEXT,
-                FOREIGN KEY (protocol_id) REFERENCES therapy_protocols (protocol_id)
-            )
-        ''')
-        
-        # Tabela de dados de biofeedback (opcional)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS biofeedback_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT,
-                timestamp TIMESTAMP,
-                frequency REAL,
-                amplitude REAL,
-                offset REAL,
-                measured_values_json TEXT,
-                FOREIGN KEY (session_id) REFERENCES therapy_sessions (session_id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        aplicar_migracoes(self.db_path, 'therapy_sessions')
         
         # Criar protocolos padrão se não existirem
         self._create_default_protocols()
@@ -159,101 +111,11 @@ class TherapySessionManager(QObject):
         Extrai condições terapêuticas dos dados de íris
         Análise mais sofisticada das notas iridológicas
         """
-        conditions = []
-        
         # Obter notas selecionadas
         notas_selecionadas = iris_data.get('notas_selecionadas', [])
         
-        # Mapeamento de palavras-chave para condições
-        keyword_mapping = {
-            # Sistema nervoso
-            'stress': 'sistema_nervoso',
-            'tensão': 'sistema_nervoso', 
-            'ansiedade': 'ansiedade',
-            'nervoso': 'sistema_nervoso',
-            'irritabilidade': 'ansiedade',
-            'fadiga': 'fadiga',
-            'cansaço': 'fadiga',
-            'depressão': 'depressao',
-            'insónia': 'insonia',
-            'sono': 'insonia',
-            
-            # Sistema digestivo
-            'digestão': 'digestao',
-            'intestino': 'intestinos',
-            'estômago': 'digestao',
-            'fígado': 'figado',
-            'vesícula': 'figado',
-            'pâncreas': 'pancreas',
-            'diabetes': 'pancreas',
-            
-            # Sistema circulatório
-            'circulação': 'circulacao',
-            'coração': 'coracao',
-            'pressão': 'pressao_arterial',
-            'vascular': 'circulacao',
-            
-            # Sistema respiratório
-            'pulmão': 'pulmoes',
-            'respiração': 'respiracao',
-            'asma': 'pulmoes',
-            'bronquite': 'pulmoes',
-            
-            # Sistema reprodutor
-            'reprodutor': 'reprodutor',
-            'hormonal': 'hormonios',
-            'hormônio': 'hormonios',
-            'menstrual': 'hormonios',
-            'próstata': 'reprodutor',
-            
-            # Sistema músculo-esquelético
-            'músculo': 'musculos',
-            'articulação': 'articulacoes',
-            'osso': 'ossos',
-            'artrite': 'articulacoes',
-            'reumatismo': 'articulacoes',
-            
-            # Sistema imunitário
-            'imunidade': 'imunidade',
-            'defesa': 'imunidade',
-            'linfático': 'linfatico',
-            'alergia': 'imunidade',
-            
-            # Órgãos específicos
-            'tiróide': 'tiroide',
-            'tiróidea': 'tiroide',
-            'rim': 'rins',
-            'renal': 'rins',
-            'bexiga': 'bexiga',
-            'supra-renal': 'supra_renais',
-            'adrenal': 'supra_renais',
-            
-            # Condições gerais
-            'inflamação': 'inflamacao',
-            'dor': 'dor',
-            'energia': 'energia',
-            'vitalidade': 'vitalidade',
-            'equilíbrio': 'equilibrio',
-            'detox': 'detox',
-            'purificação': 'purificacao'
-        }
-        
-        # Analisar cada nota
-        for nota in notas_selecionadas:
-            texto_nota = nota.get('texto', '').lower()
-            setor = nota.get('setor', '').lower()
-            
-            # Procurar palavras-chave no texto
-            for keyword, condition in keyword_mapping.items():
-                if keyword in texto_nota or keyword in setor:
-                    if condition not in conditions:
-                        conditions.append(condition)
-            
-            # Análise específica por setor anatómico
-            sector_conditions = self._analyze_iris_sector(setor, texto_nota)
-            for condition in sector_conditions:
-                if condition not in conditions:
-                    conditions.append(condition)
+        # Palavras-chave e setores anatómicos (mapeamento em iris_notas, compilado uma vez)
+        conditions = obter_classificador().classificar(notas_selecionadas)
         
         # Se não encontrou condições específicas, usar condições gerais
         if not conditions:
@@ -266,57 +128,7 @@ class TherapySessionManager(QObject):
         """
         Análise específica por setor anatómico da íris
         """
-        sector_map = {
-            # Setores digestivos
-            'estômago': ['digestao'],
-            'duodeno': ['digestao'],
-            'intestino delgado': ['intestinos'],
-            'cólon': ['intestinos'],
-            'fígado': ['figado'],
-            'vesícula': ['figado'],
-            'pâncreas': ['pancreas'],
-            
-            # Setores endócrinos
-            'hipófise': ['hormonios'],
-            'tiróide': ['tiroide'],
-            'paratiróide': ['tiroide'],
-            'supra-renais': ['supra_renais'],
-            'ovários': ['reprodutor', 'hormonios'],
-            'testículos': ['reprodutor', 'hormonios'],
-            
-            # Setores circulatórios
-            'coração': ['coracao'],
-            'aorta': ['circulacao'],
-            'veia cava': ['circulacao'],
-            
-            # Setores respiratórios
-            'pulmão': ['pulmoes'],
-            'brônquios': ['pulmoes'],
-            'traqueia': ['respiracao'],
-            
-            # Setores urinários
-            'rim': ['rins'],
-            'ureter': ['rins'],
-            'bexiga': ['bexiga'],
-            
-            # Sistema nervoso
-            'cérebro': ['sistema_nervoso'],
-            'cerebelo': ['sistema_nervoso'],
-            'medula': ['sistema_nervoso'],
-            
-            # Membros
-            'braço': ['musculos', 'articulacoes'],
-            'perna': ['musculos', 'articulacoes'],
-            'coluna': ['ossos', 'musculos']
-        }
-        
-        conditions = []
-        
-        for sector_name, sector_conditions in sector_map.items():
-            if sector_name in setor:
-                conditions.extend(sector_conditions)
-        
-        return conditions
+        return obter_classificador().condicoes_setor(setor)
     
     def create_custom_protocol(self, name: str, description: str, 
                              frequencies: List[float], amplitude: float = 2.0,
@@ -370,25 +182,31 @@ class TherapySessionManager(QObject):
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            # Serializar passos
-            steps_json = json.dumps([asdict(step) for step in protocol.steps])
+            # Serializar passos (binário por colunas) e metadados para listagens/filtros
+            steps_blob = codificar_passos(protocol.steps)
+            meta = metadados_passos(protocol.steps)
             iris_data_json = json.dumps(protocol.iris_data) if protocol.iris_data else None
             
             cursor.execute('''
                 INSERT OR REPLACE INTO therapy_protocols
                 (protocol_id, name, description, category, steps_json, 
-                 created_by, created_at, iris_based, iris_data_json)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 created_by, created_at, iris_based, iris_data_json,
+                 steps_blob, step_count, total_duration, freq_min, freq_max)
+                VALUES (?, ?, ?, ?, '', ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 protocol.protocol_id,
                 protocol.name,
                 protocol.description,
                 protocol.category,
-                steps_json,
                 protocol.created_by,
                 protocol.created_at.isoformat(),
                 protocol.iris_based,
-                iris_data_json
+                iris_data_json,
+                steps_blob,
+                meta['step_count'],
+                meta['total_duration'],
+                meta['freq_min'],
+                meta['freq_max']
             ))
             
             conn.commit()
@@ -408,7 +226,9 @@ class TherapySessionManager(QObject):
             cursor = conn.cursor()
             
             cursor.execute('''
-                SELECT * FROM therapy_protocols WHERE protocol_id = ? AND active = 1
+                SELECT protocol_id, name, description, category, steps_json,
+                       created_by, created_at, iris_based, iris_data_json, steps_blob
+                FROM therapy_protocols WHERE protocol_id = ? AND active = 1
             ''', (protocol_id,))
             
             row = cursor.fetchone()
@@ -417,9 +237,11 @@ class TherapySessionManager(QObject):
             if not row:
                 return None
             
-            # Deserializar dados
-            steps_data = json.loads(row[4])  # steps_json
-            steps = [FrequencyStep(**step_data) for step_data in steps_data]
+            # Deserializar dados (binário por colunas; JSON só em linhas antigas)
+            if row[9] is not None:
+                steps = [FrequencyStep(*step) for step in zip(*descodificar_passos(row[9]))]
+            else:
+                steps = [FrequencyStep(**step_data) for step_data in json.loads(row[4])]
             
             iris_data = json.loads(row[8]) if row[8] else None  # iris_data_json
             
@@ -439,20 +261,45 @@ class TherapySessionManager(QObject):
             print(f"Erro ao carregar protocolo: {e}")
             return None
     
-    def list_protocols(self, category: str = None) -> List[Dict]:
-        """Lista protocolos disponíveis"""
+    def list_protocols(self, category: str = None, min_duration: float = None,
+                       max_duration: float = None, min_frequency: float = None,
+                       max_frequency: float = None, min_steps: int = None,
+                       max_steps: int = None, limit: int = None) -> List[Dict]:
+        """
+        Lista protocolos disponíveis
+        
+        Os filtros usam só as colunas de metadados (indexadas), sem ler os
+        passos. A gama de frequências seleciona os protocolos cujas
+        frequências estão todas dentro de [min_frequency, max_frequency];
+        durações em segundos.
+        """
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            query = "SELECT protocol_id, name, description, category, created_at, iris_based FROM therapy_protocols WHERE active = 1"
+            query = '''SELECT protocol_id, name, description, category, created_at, iris_based,
+                              step_count, total_duration, freq_min, freq_max
+                       FROM therapy_protocols WHERE active = 1'''
             params = []
             
-            if category:
-                query += " AND category = ?"
-                params.append(category)
+            filters = (
+                ("category = ?", category),
+                ("total_duration >= ?", min_duration),
+                ("total_duration <= ?", max_duration),
+                ("freq_min >= ?", min_frequency),
+                ("freq_max <= ?", max_frequency),
+                ("step_count >= ?", min_steps),
+                ("step_count <= ?", max_steps),
+            )
+            for condition, value in filters:
+                if value is not None and value != "":
+                    query += f" AND {condition}"
+                    params.append(value)
             
             query += " ORDER BY created_at DESC"
+            if limit:
+                query += " LIMIT ?"
+                params.append(int(limit))
             
             cursor.execute(query, params)
             rows = cursor.fetchall()
@@ -466,7 +313,11 @@ class TherapySessionManager(QObject):
                     'description': row[2],
                     'category': row[3],
                     'created_at': row[4],
-                    'iris_based': bool(row[5])
+                    'iris_based': bool(row[5]),
+                    'step_count': row[6],
+                    'total_duration': row[7],
+                    'freq_min': row[8],
+                    'freq_max': row[9]
                 })
             
             return protocols
@@ -554,9 +405,21 @@ class TherapySessionManager(QObject):
                 session_id
             ))
             
+            cursor.execute('''
+                SELECT s.patient_id, s.patient_name, s.protocol_name, s.start_time, s.end_time,
+                       p.steps_json, p.steps_blob
+                FROM therapy_sessions s
+                LEFT JOIN therapy_protocols p ON p.protocol_id = s.protocol_id
+                WHERE s.session_id = ?
+            ''', (session_id,))
+            row = cursor.fetchone()
+            
             conn.commit()
             conn.close()
             
+            if row:
+                self._register_analytics(session_id, row, notes)
+            
             self.session_saved.emit(session_id)
             return True
             
@@ -607,6 +470,19 @@ class TherapySessionManager(QObject):
             return []
     
     # Métodos privados
+    def _register_analytics(self, session_id: str, row: Tuple, notes: str):
+        """Regista a sessão concluída na análise (falhas não afetam a sessão)"""
+        try:
+            patient_id, patient_name, protocol_name, start_time, end_time, steps_json, steps_blob = row
+            obter_analise().registar_sessao(
+                ORIGEM_TERAPIA, session_id,
+                passos_de_protocolo(passos_gravados(steps_blob, steps_json)),
+                patient_id=patient_id, patient_name=patient_name, protocol_name=protocol_name,
+                inicio=start_time, fim=end_time, notas=notes
+            )
+        except Exception as e:
+            print(f"⚠️ Sessão {session_id} não registada na análise: {e}")
+    
     def _analyze_iris_data(self, iris_data: Dict) -> List[Dict]:
         """
         Analisa dados de íris e sugere frequências terapêuticas
@@ -692,7 +568,7 @@ class TherapySessionManager(QObject):
         """Cria protocolos padrão se não existirem"""
         try:
             # Verificar se já existem protocolos
-            existing = self.list_protocols()
+            existing = self.list_protocols(limit=1)
             if existing:
                 return  # Já tem protocolos
             
@@ -0,0 +1,22 @@
+"""
+🕒 Conversão de instantes partilhada pelos armazéns SQLite
+- Os diários e análises guardam epoch (REAL) e aceitam datetime, texto ISO
+  ou epoch nas consultas
+"""
+
+from datetime import datetime
+from typing import Optional
+
+
+def para_timestamp(valor) -> Optional[float]:
+    """Aceita datetime, texto ISO ou epoch; None se não for possível converter"""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    if isinstance(valor, datetime):
+        return valor.timestamp()
+    try:
+        return datetime.fromisoformat(str(valor)).timestamp()
+    except ValueError:
+        return None
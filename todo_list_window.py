@@ -1,6 +1,5 @@
-import json
-import os
 import sys
+from bisect import bisect_left
 from datetime import datetime
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, 
@@ -11,6 +10,7 @@ from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QIcon
 from biodesk_dialogs import BiodeskMessageBox
 from biodesk_ui_kit import BiodeskUIKit
+from todo_store import ArmazemTarefas
 
 # 🎨 SISTEMA DE ESTILOS CENTRALIZADO
 try:
@@ -24,8 +24,12 @@ To-Do List Window para Biodesk
 Lista de tarefas integrada de forma não-intrusiva
 """
 
+PRIORITY_ORDER = {'Alta': 0, 'Normal': 1, 'Baixa': 2}
+PRIORITY_SYMBOLS = {'Alta': '🔴', 'Normal': '🟡', 'Baixa': '⚪'}
+
 class TodoItem:
-    def __init__(self, text, completed=False, created_date=None, priority="Normal"):
+    def __init__(self, text, completed=False, created_date=None, priority="Normal", id=None):
+        self.id = id
         self.text = text
         self.completed = completed
         self.created_date = created_date or datetime.now().strftime("%Y-%m-%d %H:%M")
@@ -45,8 +49,13 @@ class TodoItem:
             data['text'], 
             data.get('completed', False),
             data.get('created_date'),
-            data.get('priority', 'Normal')
+            data.get('priority', 'Normal'),
+            data.get('id')
         )
+    
+    def sort_key(self):
+        """Não concluídas primeiro, depois por prioridade e por ordem de criação"""
+        return (self.completed, PRIORITY_ORDER.get(self.priority, 1), self.id)
 
 class TodoListWidget(QListWidget):
     item_changed = pyqtSignal()
@@ -147,7 +156,9 @@ class TodoListWindow(QWidget):
         super().__init__()
         self.setWindowTitle("📝 Lista de Tarefas - Biodesk")
         self.setGeometry(200, 200, 600, 500)
-        self.todos = []
+        self.store = ArmazemTarefas()
+        self.todos = {}      # id -> TodoItem
+        self._keys = []      # sort_key() de cada linha da lista, pela mesma ordem
         self.load_todos()
         self.setup_ui()
         self.refresh_list()
@@ -212,6 +223,8 @@ class TodoListWindow(QWidget):
         
         # Lista de tarefas
         self.list_widget = TodoListWidget()
+        # Duplo clique para alternar status
+        self.list_widget.itemDoubleClicked.connect(self.toggle_item_status)
         layout.addWidget(self.list_widget)
         
         self.setLayout(layout)
@@ -231,12 +244,17 @@ class TodoListWindow(QWidget):
             if text:
                 priority = dialog.get_priority()
                 todo = TodoItem(text, priority=priority)
-                self.todos.append(todo)
-                self.save_todos()
-                self.refresh_list()
+                try:
+                    todo.id = self.store.adicionar(todo.text, todo.completed, todo.created_date, todo.priority)
+                except Exception as e:
+                    print(f"❌ Erro ao gravar tarefa: {e}")
+                    return
+                self.todos[todo.id] = todo
+                self._insert_row(todo)
+                self.update_counter()
     
     def clear_completed(self):
-        completed_count = sum(1 for todo in self.todos if todo.completed)
+        completed_count = len(self._keys) - self._first_completed_row()
         if completed_count == 0:
             BiodeskMessageBox.information(self, "Info", "Não há tarefas concluídas para limpar.")
             return
@@ -247,76 +265,104 @@ class TodoListWindow(QWidget):
         )
         
         if reply:
-            self.todos = [todo for todo in self.todos if not todo.completed]
-            self.save_todos()
-            self.refresh_list()
+            try:
+                self.store.remover_concluidas()
+            except Exception as e:
+                print(f"❌ Erro ao remover tarefas concluídas: {e}")
+                return
+            # As concluídas ocupam o fim da lista
+            first = self._first_completed_row()
+            self.list_widget.setUpdatesEnabled(False)
+            for row in range(len(self._keys) - 1, first - 1, -1):
+                self.todos.pop(self._keys[row][2], None)
+                self.list_widget.takeItem(row)
+            del self._keys[first:]
+            self.list_widget.setUpdatesEnabled(True)
+            self.update_counter()
     
     def refresh_list(self):
+        """Reconstrói a lista completa (só ao abrir; as alterações atualizam uma linha)"""
+        self.list_widget.setUpdatesEnabled(False)
         self.list_widget.clear()
+        sorted_todos = sorted(self.todos.values(), key=TodoItem.sort_key)
+        self._keys = [todo.sort_key() for todo in sorted_todos]
+        for todo in sorted_todos:
+            self.list_widget.addItem(self._format_item(QListWidgetItem(), todo))
+        self.list_widget.setUpdatesEnabled(True)
         
-        # Ordenar: não concluídas primeiro, depois por prioridade
-        priority_order = {'Alta': 0, 'Normal': 1, 'Baixa': 2}
-        sorted_todos = sorted(
-            self.todos, 
-            key=lambda x: (x.completed, priority_order.get(x.priority, 1))
-        )
+        self.update_counter()
+    
+    def _format_item(self, item, todo):
+        """Texto, fonte e cor de uma linha da lista"""
+        status_symbol = '✅' if todo.completed else '⏳'
         
-        for i, todo in enumerate(sorted_todos):
-            # Criar texto formatado para o item
-            priority_symbols = {'Alta': '🔴', 'Normal': '🟡', 'Baixa': '⚪'}
-            status_symbol = '✅' if todo.completed else '⏳'
-            
-            # Texto principal
-            display_text = f"{status_symbol} {priority_symbols.get(todo.priority, '🟡')} {todo.text}"
-            if todo.completed:
-                display_text = f"~~{display_text}~~"  # Riscado
-            
-            # Adicionar data
-            date_str = todo.created_date.split()[0] if todo.created_date else "N/A"
-            display_text += f"\n    📅 {date_str}"
-            
-            # Criar item da lista
-            item = QListWidgetItem(display_text)
-            
-            # Definir fonte e estilo
-            font = QFont()
-            font.setPointSize(12)
-            if todo.completed:
-                font.setStrikeOut(True)
-                item.setForeground(Qt.GlobalColor.gray)
-            else:
-                font.setStrikeOut(False)
-                item.setForeground(Qt.GlobalColor.black)
-            
-            item.setFont(font)
-            
-            # Armazenar referência ao todo no item
-            item.setData(Qt.ItemDataRole.UserRole, i)
-            
-            # Adicionar à lista
-            self.list_widget.addItem(item)
+        # Texto principal
+        display_text = f"{status_symbol} {PRIORITY_SYMBOLS.get(todo.priority, '🟡')} {todo.text}"
+        if todo.completed:
+            display_text = f"~~{display_text}~~"  # Riscado
         
-        # Conectar duplo clique para alternar status
-        self.list_widget.itemDoubleClicked.connect(self.toggle_item_status)
+        # Adicionar data
+        date_str = todo.created_date.split()[0] if todo.created_date else "N/A"
+        display_text += f"\n    📅 {date_str}"
+        item.setText(display_text)
         
-        self.update_counter()
+        # Definir fonte e estilo
+        font = QFont()
+        font.setPointSize(12)
+        font.setStrikeOut(todo.completed)
+        item.setFont(font)
+        item.setForeground(Qt.GlobalColor.gray if todo.completed else Qt.GlobalColor.black)
+        
+        # Referência à tarefa (id na base de dados)
+        item.setData(Qt.ItemDataRole.UserRole, todo.id)
+        return item
+    
+    def _first_completed_row(self):
+        return bisect_left(self._keys, (True,))
+    
+    def _row_of(self, todo):
+        row = bisect_left(self._keys, todo.sort_key())
+        if row < len(self._keys) and self._keys[row] == todo.sort_key():
+            return row
+        return None
+    
+    def _insert_row(self, todo, item=None):
+        """Insere a linha da tarefa na posição ordenada"""
+        key = todo.sort_key()
+        row = bisect_left(self._keys, key)
+        self._keys.insert(row, key)
+        self.list_widget.insertItem(row, self._format_item(item or QListWidgetItem(), todo))
+        return row
+    
+    def _take_row(self, todo):
+        """Retira a linha da tarefa da lista (devolve o QListWidgetItem)"""
+        row = self._row_of(todo)
+        if row is None:
+            return None
+        del self._keys[row]
+        return self.list_widget.takeItem(row)
+    
+    def _todo_of(self, item):
+        if item is None:
+            return None
+        return self.todos.get(item.data(Qt.ItemDataRole.UserRole))
     
     def toggle_item_status(self, item):
         """Alterna o status de concluído ao fazer duplo clique"""
-        index = item.data(Qt.ItemDataRole.UserRole)
-        if index is not None and 0 <= index < len(self.todos):
-            # Encontrar o todo original na lista não ordenada
-            todo_to_toggle = None
-            priority_order = {'Alta': 0, 'Normal': 1, 'Baixa': 2}
-            sorted_todos = sorted(
-                self.todos, 
-                key=lambda x: (x.completed, priority_order.get(x.priority, 1))
-            )
-            if 0 <= index < len(sorted_todos):
-                todo_to_toggle = sorted_todos[index]
-                todo_to_toggle.completed = not todo_to_toggle.completed
-                self.save_todos()
-                self.refresh_list()
+        todo = self._todo_of(item)
+        if todo is None:
+            return
+        try:
+            self.store.definir_concluida(todo.id, not todo.completed)
+        except Exception as e:
+            print(f"❌ Erro ao atualizar tarefa: {e}")
+            return
+        # A linha muda de posição: retirar, atualizar e voltar a inserir
+        taken = self._take_row(todo)
+        todo.completed = not todo.completed
+        row = self._insert_row(todo, taken)
+        self.list_widget.setCurrentRow(row)
+        self.update_counter()
     
     def keyPressEvent(self, event):
         """Permite deletar itens com a tecla Delete"""
@@ -329,53 +375,39 @@ class TodoListWindow(QWidget):
     
     def delete_selected_item(self):
         """Deleta o item selecionado"""
-        current_item = self.list_widget.currentItem()
-        if current_item:
-            index = current_item.data(Qt.ItemDataRole.UserRole)
-            if index is not None:
-                priority_order = {'Alta': 0, 'Normal': 1, 'Baixa': 2}
-                sorted_todos = sorted(
-                    self.todos, 
-                    key=lambda x: (x.completed, priority_order.get(x.priority, 1))
-                )
-                if 0 <= index < len(sorted_todos):
-                    todo_to_delete = sorted_todos[index]
-                    reply = BiodeskMessageBox.question(
-                        self, "Confirmar", 
-                        f"Deseja deletar a tarefa:\n'{todo_to_delete.text}'?"
-                    )
-                    
-                    if reply:
-                        self.todos.remove(todo_to_delete)
-                        self.save_todos()
-                        self.refresh_list()
+        todo_to_delete = self._todo_of(self.list_widget.currentItem())
+        if todo_to_delete is None:
+            return
+        reply = BiodeskMessageBox.question(
+            self, "Confirmar", 
+            f"Deseja deletar a tarefa:\n'{todo_to_delete.text}'?"
+        )
+        
+        if reply:
+            try:
+                self.store.remover(todo_to_delete.id)
+            except Exception as e:
+                print(f"❌ Erro ao apagar tarefa: {e}")
+                return
+            self._take_row(todo_to_delete)
+            del self.todos[todo_to_delete.id]
+            self.update_counter()
     
     def update_counter(self):
-        total = len(self.todos)
-        completed = sum(1 for todo in self.todos if todo.completed)
+        total = len(self._keys)
+        completed = total - self._first_completed_row()
         pending = total - completed
         self.counter_label.setText(f"📊 Total: {total} | ✅ Concluídas: {completed} | ⏳ Pendentes: {pending}")
     
-    def save_todos(self):
-        try:
-            data = [todo.to_dict() for todo in self.todos]
-            with open('todos.json', 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Erro ao salvar todos: {e}")
-    
     def load_todos(self):
         try:
-            if os.path.exists('todos.json'):
-                with open('todos.json', 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.todos = [TodoItem.from_dict(item) for item in data]
+            self.todos = {todo.id: todo for todo in map(TodoItem.from_dict, self.store.listar())}
         except Exception as e:
             print(f"Erro ao carregar todos: {e}")
-            self.todos = []
+            self.todos = {}
     
     def closeEvent(self, event):
-        self.save_todos()
+        # Cada alteração já foi gravada
         event.accept()
 
 # Este módulo é importado pelo main_window.py
@@ -0,0 +1,104 @@
+"""
+📝 Armazém da Lista de Tarefas em SQLite
+Cada alteração (adicionar, marcar, apagar) grava só a linha afetada, em
+vez de reescrever todo o todos.json. Na primeira abertura as tarefas de
+um todos.json antigo são importadas e o ficheiro fica renomeado.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from schema_migrations import aplicar_migracoes
+
+COLUNAS = ("id", "text", "completed", "created_date", "priority")
+SUFIXO_IMPORTADO = ".importado"
+
+
+class ArmazemTarefas:
+    """Tarefas persistidas linha a linha numa tabela SQLite"""
+
+    def __init__(self, db_path: str = "todos.db", json_legado: Optional[str] = "todos.json"):
+        self.db_path = db_path
+        aplicar_migracoes(self.db_path, 'todos')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if json_legado:
+            self._importar_json(json_legado)
+
+    def _importar_json(self, caminho: str) -> int:
+        """Importa um todos.json antigo se a tabela ainda estiver vazia"""
+        if not os.path.exists(caminho):
+            return 0
+        if self._conn.execute("SELECT 1 FROM todos LIMIT 1").fetchone():
+            return 0
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            importadas = self.adicionar_varias(dados)
+            os.replace(caminho, caminho + SUFIXO_IMPORTADO)
+            print(f"✅ {importadas} tarefas importadas de {caminho}")
+            return importadas
+        except Exception as e:
+            print(f"❌ Erro ao importar {caminho}: {e}")
+            return 0
+
+    # ═══════════════ LEITURA ═══════════════
+
+    def listar(self) -> List[Dict[str, Any]]:
+        """Todas as tarefas, pela ordem de criação"""
+        with self._lock:
+            linhas = self._conn.execute(f"SELECT {', '.join(COLUNAS)} FROM todos ORDER BY id")
+            return [{"id": i, "text": t, "completed": bool(c), "created_date": d, "priority": p}
+                    for i, t, c, d, p in linhas]
+
+    def contar(self) -> Dict[str, int]:
+        with self._lock:
+            total, concluidas = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM todos").fetchone()
+        return {"total": total, "concluidas": concluidas, "pendentes": total - concluidas}
+
+    # ═══════════════ ESCRITA (uma linha por operação) ═══════════════
+
+    def adicionar(self, text: str, completed: bool = False, created_date: Optional[str] = None,
+                  priority: str = "Normal") -> int:
+        """Grava uma tarefa nova; devolve o id"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO todos (text, completed, created_date, priority) VALUES (?, ?, ?, ?)",
+                (text, int(bool(completed)), created_date, priority or "Normal"))
+            return cursor.lastrowid
+
+    def adicionar_varias(self, tarefas: Iterable[Dict[str, Any]]) -> int:
+        """Grava várias tarefas (dicionários no formato de TodoItem.to_dict) numa transação"""
+        linhas = [(t['text'], int(bool(t.get('completed', False))), t.get('created_date'),
+                   t.get('priority') or 'Normal') for t in tarefas]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO todos (text, completed, created_date, priority) VALUES (?, ?, ?, ?)",
+                linhas)
+        return len(linhas)
+
+    def definir_concluida(self, tarefa_id: int, concluida: bool) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute("UPDATE todos SET completed = ? WHERE id = ?",
+                                      (int(bool(concluida)), tarefa_id)).rowcount > 0
+
+    def remover(self, tarefa_id: int) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM todos WHERE id = ?", (tarefa_id,)).rowcount > 0
+
+    def remover_concluidas(self) -> int:
+        """Apaga as tarefas concluídas; devolve quantas foram apagadas"""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM todos WHERE completed = 1").rowcount
+
+    def fechar(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None